@@ -0,0 +1,520 @@
+from src.config_handler import ConfigHandler
+from src.utility_functions import loadData, printStats
+from src.paper import Paper
+from src.corpus_snapshot import CorpusSnapshot, loadPapers, writeSnapshot
+from src.inference_artifact import exportModel, loadModel
+from src.dense_model import loadDenseModel
+from src.author_disambiguation import loadDisambiguationModel
+from src.pair_chunks import iterPairChunks, Reservoir
+from copy import deepcopy
+import argparse
+import gc
+import json
+import numpy as np
+import os
+import pickle
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+arguments = argparse.ArgumentParser(
+    description="Benchmarks for the data structures and models. Paths are taken from config.json",
+    formatter_class=argparse.MetavarTypeHelpFormatter)
+subparsers = arguments.add_subparsers(dest="benchmark")
+papers_parser = subparsers.add_parser("papers", help="Memory per paper and copy time of Paper for the full corpus")
+papers_parser.add_argument("--copy_repeats", type=int, default=3, help="Number of times to copy the corpus")
+snapshot_parser = subparsers.add_parser("snapshot", help="Load time of parsed_papers.json vs the data snapshot")
+snapshot_parser.add_argument("--access", type=int, default=100, help="Number of papers to access after loading")
+imports_parser = subparsers.add_parser("imports", help="Start time of disambiguate.py, fails if it is over budget")
+imports_parser.add_argument("--help_budget", type=float, default=.5,
+                            help="Seconds a warm run of disambiguate.py --help can take")
+imports_parser.add_argument("--start_budget", type=float, default=.5,
+                            help="Seconds a warm start of the disambiguation stage can take")
+imports_parser.add_argument("--repeats", type=int, default=5, help="Number of times to run each command")
+imports_parser.add_argument("--slowest", type=int, default=5, help="Number of the slowest packages to show")
+artifact_parser = subparsers.add_parser("artifact", help="Load time and throughput of a model's pickle vs its "
+                                                          "inference artifact")
+artifact_parser.add_argument("--model_name", type=str, default="VC1", help="Name of the model in models/")
+artifact_parser.add_argument("--batch_sizes", type=int, nargs="+", default=[1, 10, 100, 1000, 10000],
+                             help="Number of rows to predict at once")
+artifact_parser.add_argument("--repeats", type=int, default=5, help="Number of times to load each model")
+dense_parser = subparsers.add_parser("dense", help="Throughput of a model saved by DenseNN vs the voting model")
+dense_parser.add_argument("--model_name", type=str, default="VC1", help="Name of the voting model in models/")
+dense_parser.add_argument("--dense_name", type=str, default="DNN1", help="Name of the dense model in models/")
+dense_parser.add_argument("--batch_sizes", type=int, nargs="+", default=[1, 10, 100, 1000, 10000, 100000],
+                          help="Number of rows to predict at once")
+models_parser = subparsers.add_parser("models", help="Load time, throughput and memory of every model in models/, "
+                                                      "loaded the way AuthorDisambiguation loads them")
+models_parser.add_argument("--batch_sizes", type=int, nargs="+", default=[1, 10, 100, 1000, 10000, 100000],
+                           help="Number of rows to predict at once")
+models_parser.add_argument("--repeats", type=int, default=3, help="Number of times to load each model")
+models_parser.add_argument("--pickle_only", action="store_true",
+                           help="Load model.pickle even when the model has a model.npz artifact")
+models_parser.add_argument("--report", type=str, default="logs/benchmark_models.json",
+                           help="Path to write the JSON report to")
+
+
+def deepSize(obj, seen=None):
+    """
+    Size of an object and everything it references, objects referenced more than once are only counted once
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deepSize(k, seen) + deepSize(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deepSize(x, seen) for x in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(deepSize(getattr(obj, x), seen) for x in obj.__slots__ if hasattr(obj, x))
+    elif hasattr(obj, "__dict__"):
+        size += deepSize(obj.__dict__, seen)
+    return size
+
+
+def benchmarkPapers(papers_dict, copy_repeats=3):
+    """
+    :param papers_dict: dict of pid to paper dict, same as parsed_papers.json
+    :param copy_repeats: number of times to copy every paper
+    :return: list of rows for printStats
+    """
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.time()
+    papers = {k: Paper(**v) for k, v in papers_dict.items()}
+    build_time = time.time() - t0
+    build_memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    paper_count = len(papers)
+
+    seen = set()
+    corpus_size = sum(deepSize(p, seen) for p in papers.values())
+
+    t0 = time.time()
+    for _ in range(copy_repeats):
+        copies = [p.copy() for p in papers.values()]
+    copy_time = (time.time() - t0) / copy_repeats
+    del copies
+
+    t0 = time.time()
+    deep_copies = [Paper(**deepcopy(p.asDict())) for p in papers.values()]
+    deepcopy_time = time.time() - t0
+    del deep_copies
+
+    t0 = time.time()
+    for p in papers.values():
+        if Paper(**p.asDict()).asDict() != p.asDict():
+            raise ValueError("{} did not round trip".format(p.pid))
+    round_trip_time = time.time() - t0
+
+    return [
+        ["Papers", paper_count],
+        ["Build time (s)", build_time],
+        ["Build memory (MB)", build_memory / 1e6],
+        ["Bytes per paper", corpus_size / max(paper_count, 1)],
+        ["Corpus size (MB)", corpus_size / 1e6],
+        ["Copy time (s)", copy_time],
+        ["Deepcopy time (s)", deepcopy_time],
+        ["Copy speedup", deepcopy_time / copy_time if copy_time > 0 else 0],
+        ["Round trip time (s)", round_trip_time]
+    ]
+
+
+def benchmarkSnapshot(json_path, snapshot_path, access=100):
+    """
+    :param json_path: path to parsed_papers.json
+    :param snapshot_path: path to write the snapshot to
+    :param access: number of papers to access after loading
+    :return: list of rows for printStats
+    """
+    t0 = time.time()
+    with open(json_path) as f:
+        papers = loadPapers(json.load(f))
+    json_time = time.time() - t0
+    to_access = list(papers.keys())[:access]
+
+    t0 = time.time()
+    writeSnapshot(snapshot_path, papers)
+    write_time = time.time() - t0
+
+    t0 = time.time()
+    snapshot_papers = loadPapers(CorpusSnapshot(snapshot_path)["parsed_papers"])
+    open_time = time.time() - t0
+    t0 = time.time()
+    for pid in to_access:
+        if snapshot_papers[pid].asDict() != papers[pid].asDict():
+            raise ValueError("{} did not round trip".format(pid))
+    access_time = time.time() - t0
+    t0 = time.time()
+    for _ in snapshot_papers.values():
+        pass
+    decode_time = time.time() - t0
+
+    return [
+        ["Papers", len(papers)],
+        ["Json load + Paper time (s)", json_time],
+        ["Snapshot write time (s)", write_time],
+        ["Json size (MB)", os.path.getsize(json_path) / 1e6],
+        ["Snapshot size (MB)", os.path.getsize(snapshot_path) / 1e6],
+        ["Snapshot open time (s)", open_time],
+        ["Access {} papers time (s)".format(len(to_access)), access_time],
+        ["Decode rest time (s)", decode_time]
+    ]
+
+
+def timeCommand(command, repeats=5, cwd=None):
+    """
+    :param command: command to run
+    :param repeats: number of times to run it
+    :param cwd: directory to run it in
+    :return: run times in seconds, the first run is cold and the rest are warm
+    """
+    out = []
+    for _ in range(repeats):
+        t0 = time.time()
+        subprocess.run(command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        out.append(time.time() - t0)
+    return out
+
+
+def slowestImports(module, count=5, cwd=None):
+    """
+    Top level packages outside of the standard library that take the longest to import when importing module
+    :param module: module to import
+    :param count: number of packages to return
+    :param cwd: directory to import it in
+    :return: list of [package, seconds]
+    """
+    res = subprocess.run([sys.executable, "-X", "importtime", "-c", "import {}".format(module)], cwd=cwd,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    packages = []
+    for line in res.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        if not cumulative.strip().isdigit() or "." in name or name in ["src", module] or \
+                name in sys.stdlib_module_names:
+            continue
+        packages.append([name, int(cumulative) / 1e6])
+    return sorted(packages, key=lambda x: x[1], reverse=True)[:count]
+
+
+def benchmarkImports(help_budget=.5, start_budget=.5, repeats=5, slowest=5):
+    """
+    The warm start time is the time to import disambiguate.py, which imports every module the disambiguation stage
+    needs before it starts loading data. Heavy packages are imported lazily by the stages that use them, so neither
+    should import nltk, scikit-learn or tensorflow.
+    :param help_budget: seconds a warm run of disambiguate.py --help can take
+    :param start_budget: seconds a warm start can take
+    :param repeats: number of times to run each command, at least 2
+    :param slowest: number of the slowest packages to show
+    :return: list of rows for printStats, list of the commands that were over budget
+    """
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    repeats = max(repeats, 2)
+    commands = [
+        ["disambiguate.py --help", [sys.executable, "disambiguate.py", "--help"], help_budget],
+        ["Warm start", [sys.executable, "-c", "import disambiguate"], start_budget]
+    ]
+    rows = []
+    over_budget = []
+    for name, command, budget in commands:
+        times = timeCommand(command, repeats, cwd)
+        warm = statistics.median(times[1:])
+        rows.extend([
+            ["{} cold (s)".format(name), times[0]],
+            ["{} warm (s)".format(name), warm],
+            ["{} budget (s)".format(name), budget]
+        ])
+        if warm > budget:
+            over_budget.append(name)
+    for package, seconds in slowestImports("disambiguate", slowest, cwd):
+        rows.append(["Import {} (s)".format(package), seconds])
+    return rows, over_budget
+
+
+def benchmarkArtifact(model_path, artifact_path, batch_sizes=None, repeats=5):
+    """
+    The artifact is exported from the pickle first. The load times are the times to start python and load the model,
+    which includes importing scikit-learn for the pickle.
+    :param model_path: path to model.pickle
+    :param artifact_path: path to write the artifact to
+    :param batch_sizes: number of rows to predict at once
+    :param repeats: number of times to load each model, at least 2
+    :return: list of rows for printStats
+    """
+    if batch_sizes is None:
+        batch_sizes = [1, 10, 100, 1000, 10000]
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    repeats = max(repeats, 2)
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+    exportModel(model, artifact_path)
+    compiled = loadModel(artifact_path)
+    rows = [
+        ["Pickle size (MB)", os.path.getsize(model_path) / 1e6],
+        ["Artifact size (MB)", os.path.getsize(artifact_path) / 1e6]
+    ]
+    commands = [
+        ["Pickle", "import pickle; pickle.load(open({!r}, 'rb'))".format(model_path)],
+        ["Artifact", "from src.inference_artifact import loadModel; loadModel({!r})".format(artifact_path)]
+    ]
+    for name, code in commands:
+        times = timeCommand([sys.executable, "-c", code], repeats, cwd)
+        rows.extend([
+            ["{} cold load (s)".format(name), times[0]],
+            ["{} warm load (s)".format(name), statistics.median(times[1:])]
+        ])
+
+    predict = "predict_proba" if model.voting == "soft" else "predict"
+    X = np.random.RandomState(1).rand(max(batch_sizes), model.n_features_in_)
+    same = True
+    for batch_size in batch_sizes:
+        batch = X[:batch_size]
+        # Enough batches for each model to take about as long as predicting the largest batch
+        batches = max(1, max(batch_sizes) // batch_size // 10)
+        for name, m in [["Pickle", model], ["Artifact", compiled]]:
+            t0 = time.time()
+            for _ in range(batches):
+                getattr(m, predict)(batch)
+            rows.append(["{} {} rows/s, batches of {}".format(name, predict, batch_size),
+                         batch_size * batches / (time.time() - t0)])
+        same = same and np.array_equal(getattr(model, predict)(batch), getattr(compiled, predict)(batch))
+    rows.append(["Same {}".format(predict), same])
+    return rows
+
+
+def benchmarkDense(model_path, dense_path, batch_sizes=None):
+    """
+    Both models predict the probability of same on the same random rows
+    :param model_path: path to the voting model's model.pickle
+    :param dense_path: directory DenseNN.save wrote the dense model to
+    :param batch_sizes: number of rows to predict at once
+    :return: list of rows for printStats
+    """
+    if batch_sizes is None:
+        batch_sizes = [1, 10, 100, 1000, 10000, 100000]
+    t0 = time.time()
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+    rows = [["Voting load (s)", time.time() - t0]]
+    t0 = time.time()
+    dense = loadDenseModel(dense_path)
+    rows.append(["Dense load (s)", time.time() - t0])
+
+    predict = "predict_proba" if model.voting == "soft" else "predict"
+    X = np.random.RandomState(1).rand(max(batch_sizes), model.n_features_in_)
+    for batch_size in batch_sizes:
+        batch = X[:batch_size]
+        batches = max(1, max(batch_sizes) // batch_size // 10)
+        for name, m in [["Voting", model], ["Dense", dense]]:
+            # The first call of the dense model traces it, which is not counted
+            getattr(m, predict)(batch)
+            t0 = time.time()
+            for _ in range(batches):
+                getattr(m, predict)(batch)
+            rows.append(["{} {} rows/s, batches of {}".format(name, predict, batch_size),
+                         batch_size * batches / (time.time() - t0)])
+    rows.append(["Agreement of predict", np.mean(model.predict(X) == dense.predict(X))])
+    return rows
+
+
+def samplePairVectors(chunks_path, pairs_path, count, seed=1):
+    """
+    Uniform sample of the vectors of the tagged pairs. The chunks are used if they exist, since they do not have to
+    be loaded whole
+    :param chunks_path: path to tagged_pairs_chunks.pickle
+    :param pairs_path: path to tagged_pairs.pickle
+    :param count: number of rows
+    :param seed: random seed
+    :return: array of count rows, sampled with replacement if there are fewer pairs, or None if there are no pairs
+    """
+    reservoir = Reservoir(count, random.Random(seed))
+    if chunks_path and os.path.exists(chunks_path):
+        for chunk in iterPairChunks(chunks_path):
+            for _, _, d in chunk:
+                reservoir.add(d)
+    elif pairs_path and os.path.exists(pairs_path):
+        with open(pairs_path, "rb") as f:
+            for _, _, d in pickle.load(f):
+                reservoir.add(d)
+    if not len(reservoir):
+        return None
+    X = np.asarray(reservoir.items, dtype=float)
+    if len(X) < count:
+        X = X[np.random.RandomState(seed).randint(0, len(X), count)]
+    return X
+
+
+def rowsPerSecond(func, batch, min_time=.5):
+    """
+    :param func: predict or predict_proba
+    :param batch: rows to predict at once
+    :param min_time: seconds to keep predicting for
+    :return: rows predicted per second
+    """
+    # The first call is not counted, it can include building the model's graph or warming caches
+    func(batch)
+    calls = 0
+    t0 = time.time()
+    while calls == 0 or time.time() - t0 < min_time:
+        func(batch)
+        calls += 1
+    return len(batch) * calls / (time.time() - t0)
+
+
+def benchmarkModel(path, X, batch_sizes, repeats=3, compiled_model=True):
+    """
+    Each load runs in a new python process, the first load is cold. Throughput and the memory of predicting are
+    measured in this process
+    :param path: directory of the model
+    :param X: rows to predict, None uses random rows
+    :param batch_sizes: number of rows to predict at once
+    :param repeats: number of times to load the model, at least 2
+    :param compiled_model: load the model like AuthorDisambiguation with compiled_model
+    :return: dict of the results
+    """
+    result = {}
+    if os.path.exists(path + "/parameters.json"):
+        with open(path + "/parameters.json") as f:
+            result["evaluation"] = json.load(f).get("evaluation", {})
+    if not any(os.path.exists(path + "/" + f) for f in ["model.keras", "model.npz", "model.pickle"]):
+        result["error"] = "No model file"
+        return result
+
+    code = "import json, resource, time\n" \
+           "t0 = time.time()\n" \
+           "from src.author_disambiguation import loadDisambiguationModel\n" \
+           "t1 = time.time()\n" \
+           "loadDisambiguationModel({!r}, {!r})\n" \
+           "print(json.dumps([t1 - t0, time.time() - t1, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss]))"
+    code = code.format(path, compiled_model)
+    loads = []
+    for _ in range(max(repeats, 2)):
+        res = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        if res.returncode != 0:
+            result["error"] = res.stderr.strip().splitlines()[-1]
+            return result
+        loads.append(json.loads(res.stdout.strip().splitlines()[-1]))
+    result.update({
+        "import_seconds": loads[0][0],
+        "cold_load_seconds": loads[0][1],
+        "warm_load_seconds": statistics.median(x[1] for x in loads[1:]),
+        # ru_maxrss is in KB on linux
+        "load_peak_rss_mb": max(x[2] for x in loads) / 1024
+    })
+
+    model = loadDisambiguationModel(path, compiled_model)
+    result["type"] = type(model).__name__
+    result["voting"] = getattr(model, "voting", None)
+    if X is None:
+        if getattr(model, "n_features_in_", None) is None:
+            result["error"] = "No pairs to sample rows from"
+            return result
+        X = np.random.RandomState(1).rand(max(batch_sizes), model.n_features_in_)
+    methods = ["predict", "predict_proba"] if result["voting"] == "soft" else ["predict"]
+    result["rows_per_second"] = {}
+    try:
+        for method in methods:
+            func = getattr(model, method)
+            result["rows_per_second"][method] = {str(b): rowsPerSecond(func, X[:b]) for b in batch_sizes}
+        tracemalloc.start()
+        getattr(model, methods[-1])(X[:max(batch_sizes)])
+        result["predict_peak_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    except Exception as e:
+        result["error"] = "{}: {}".format(type(e).__name__, e)
+    return result
+
+
+def benchmarkModels(models_path, X, batch_sizes=None, repeats=3, compiled_model=True):
+    """
+    :param models_path: directory with a directory for every model
+    :param X: rows to predict, None uses random rows
+    :param batch_sizes: number of rows to predict at once
+    :param repeats: number of times to load each model
+    :param compiled_model: load the models like AuthorDisambiguation with compiled_model
+    :return: dict of model name to the results of benchmarkModel, list of rows for printStats
+    """
+    if batch_sizes is None:
+        batch_sizes = [1, 10, 100, 1000, 10000, 100000]
+    results = {}
+    for name in sorted(os.listdir(models_path)):
+        if os.path.isdir(os.path.join(models_path, name)):
+            print("INFO: Benchmarking {}".format(name))
+            results[name] = benchmarkModel(os.path.join(models_path, name), X, batch_sizes, repeats, compiled_model)
+
+    sizes = [batch_sizes[0], batch_sizes[len(batch_sizes) // 2], batch_sizes[-1]]
+    rows = [["Model", "Type", "Cold load (s)", "Warm load (s)", "Load RSS (MB)",
+             *["predict rows/s, {}".format(b) for b in sizes], "F1", "F1 special"]]
+    for name, result in results.items():
+        evaluation = result.get("evaluation", {})
+        if "rows_per_second" not in result or "predict" not in result["rows_per_second"]:
+            rows.append([name, result.get("error", ""), *[""] * (len(rows[0]) - 2)])
+            continue
+        rows.append([name, result["type"], result["cold_load_seconds"], result["warm_load_seconds"],
+                     result["load_peak_rss_mb"], *[result["rows_per_second"]["predict"][str(b)] for b in sizes],
+                     evaluation.get("f1", ""), evaluation.get("f1_special", "")])
+    return results, rows
+
+
+if __name__ == '__main__':
+    args = arguments.parse_args()
+    if not args.benchmark:
+        arguments.print_help()
+        sys.exit(1)
+    log_path = os.getcwd() + "/logs/benchmark.log"
+    with open(log_path, 'w'):
+        pass
+    config_raw = json.load(open("config.json"))
+    config = ConfigHandler(config_raw, "benchmark", raise_error_unknown=True)
+    if args.benchmark == "papers":
+        print("INFO: Loading parsed papers")
+        data = loadData(["parsed_papers"], config.logger, config)
+        printStats("Paper Benchmark", benchmarkPapers(data["parsed_papers"], args.copy_repeats), line_adaptive=True)
+    elif args.benchmark == "snapshot":
+        snapshot_path = os.getcwd() + "/logs/benchmark_snapshot.bin"
+        printStats("Snapshot Benchmark", benchmarkSnapshot(config["parsed_papers"], snapshot_path, args.access),
+                   line_adaptive=True)
+        os.remove(snapshot_path)
+    elif args.benchmark == "imports":
+        rows, over_budget = benchmarkImports(args.help_budget, args.start_budget, args.repeats, args.slowest)
+        printStats("Import Benchmark", rows, line_adaptive=True)
+        if over_budget:
+            config.logger.error("Over budget: {}".format(", ".join(over_budget)))
+            sys.exit(1)
+    elif args.benchmark == "artifact":
+        artifact_path = os.getcwd() + "/logs/benchmark_model.npz"
+        model_path = os.getcwd() + "/models/{}/model.pickle".format(args.model_name)
+        printStats("Artifact Benchmark", benchmarkArtifact(model_path, artifact_path, args.batch_sizes, args.repeats),
+                   line_adaptive=True)
+        os.remove(artifact_path)
+    elif args.benchmark == "dense":
+        model_path = os.getcwd() + "/models/{}/model.pickle".format(args.model_name)
+        dense_path = os.getcwd() + "/models/{}".format(args.dense_name)
+        printStats("Dense Benchmark", benchmarkDense(model_path, dense_path, args.batch_sizes), line_adaptive=True)
+    elif args.benchmark == "models":
+        print("INFO: Sampling rows from the tagged pairs")
+        X = samplePairVectors(config["tagged_pairs_chunks"], config["tagged_pairs"], max(args.batch_sizes))
+        if X is None:
+            config.logger.warning("No tagged pairs found, using random rows")
+        results, rows = benchmarkModels(os.getcwd() + "/models", X, args.batch_sizes, args.repeats,
+                                        not args.pickle_only)
+        report = {
+            "rows": "random" if X is None else "tagged_pairs",
+            "batch_sizes": args.batch_sizes,
+            "compiled_model": not args.pickle_only,
+            "models": results
+        }
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=4)
+        printStats("Model Benchmark", rows, line_adaptive=True)
+        print("INFO: Wrote report to {}".format(args.report))
@@ -2,8 +2,11 @@ import json
 from src.acl_parser import ACLParser
 from src.pdf_parser import PDFParserWrapper
 from src.config_handler import ConfigHandler
-from src.utility_functions import createCLIGroup, parseCLIArgs, loadData,createCLIShared
+from src.utility_functions import createCLIGroup, parseCLIArgs, loadData,createCLIShared, printLogToConsole
+from src.corpus_snapshot import writeSnapshot
+from src.authorship_index import AuthorshipIndex
 import os
+import logging
 import gc
 import argparse
 
@@ -36,4 +39,9 @@ if __name__ == '__main__':
     parser = PDFParserWrapper(**data,
                               **config["PDFParser"])
     parser(config["parsed_pdf_path"])
+    if parser.save_data:
+        printLogToConsole(config.console_log_level, "Writing data snapshot", logging.INFO, logger=config.logger)
+        writeSnapshot(config["data_snapshot"], parser.parsed, parser.author_papers, parser.id_to_name,
+                      parser.organizations)
+        AuthorshipIndex.fromAuthorPapers(parser.author_papers).save(config["authorship_index"])
     gc.collect()
@@ -1,17 +1,16 @@
-from src.utility_functions import createCLIGroup, createCLIShared, createLogger, loadData
+from src.utility_functions import createCLIGroup, createCLIShared, createLogger, loadData, \
+    loadAuthorshipIndex
 from src.target_creator import TargetCreator
 from src.author_disambiguation import AuthorDisambiguation
 from src.input_handler import InputHandler
-from src.paper import Paper
+from src.corpus_snapshot import loadPapers
 from src.config_handler import ConfigHandler
 import json
 import logging
 import os
-from nltk import PorterStemmer
 import gc
 import argparse
 
-stemmer = PorterStemmer()
 arguments = argparse.ArgumentParser(
     description="Parse Disambiguate targets. You can specify these in config.json instead of using command line arguments",
     formatter_class=argparse.MetavarTypeHelpFormatter)
@@ -30,17 +29,13 @@ if __name__ == '__main__':
     config_raw = json.load(open("config.json"))
     config = ConfigHandler(config_raw, "disambiguate", raise_error_unknown=True)
     data = loadData(
-        ["department_corpus", "incomplete_papers", "org_corpus", "conflicts", "parsed_papers", "same_names", "test_special_keys", "author_papers",
-         "id_to_name"], config.logger, config)
-    author_papers = data["author_papers"]
+        ["department_corpus", "org_corpus", "parsed_papers", "id_to_name"], config.logger, config)
+    author_papers = loadAuthorshipIndex(config.logger, config)
     id_to_name = data["id_to_name"]
-    same_names = data["same_names"]
     parsed = data["parsed_papers"]
-    parsed = {x: Paper(**info) for x, info in parsed.items()}
+    parsed = loadPapers(parsed)
     org_corpus = data["org_corpus"]
     department_corpus = data["department_corpus"]
-    incomplete = data["incomplete_papers"]
-    special_keys = data["test_special_keys"]
     input_handler = InputHandler(parsed, author_papers, id_to_name, **config["InputHandler"])
     # input_handler.handleUserInput()
     input_handler.targets = [
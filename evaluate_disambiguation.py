@@ -1,21 +1,20 @@
-from src.utility_functions import createCLIGroup, createCLIShared, createLogger, loadData
+from src.utility_functions import createCLIGroup, createCLIShared, createLogger, loadData, printStats, \
+    loadAuthorshipIndex
 from src.target_creator import TargetCreator
 from src.author_disambiguation import AuthorDisambiguation
 from src.input_handler import InputHandler
-from src.paper import Paper
+from src.corpus_snapshot import loadPapers
 from src.config_handler import ConfigHandler
 import json
 import logging
 import numpy as np
 import os
-from nltk import PorterStemmer
 import gc
 import argparse
 from tqdm import tqdm
 import random
 import sys
 
-stemmer = PorterStemmer()
 arguments = argparse.ArgumentParser(
     description="Parse Disambiguate targets. You can specify these in config.json instead of using command line arguments",
     formatter_class=argparse.MetavarTypeHelpFormatter)
@@ -23,6 +22,122 @@ createCLIShared(arguments)
 createCLIGroup(arguments, "TargetCreator", "Arguments for how to create targets", TargetCreator.parameters)
 createCLIGroup(arguments, "AuthorDisambiguation", "Arguments for how to disambiguate authors, check author_disambiguation.py for default values",
                AuthorDisambiguation.parameters)
+arguments.add_argument("--compare_modes", action="store_true",
+                       help="Also run the other compare_mode on the same targets and report the accuracy of profile "
+                            "comparison against per-paper voting")
+arguments.add_argument("--compare_sampling", action="store_true",
+                       help="Also run with every paper of each id on the same targets and report how often using "
+                            "compare_cutoff changes the decision")
+arguments.add_argument("--cascade_report", action="store_true",
+                       help="Also run with the cascade on the same targets, compare it to full scoring and report the "
+                            "cascade_threshold that keeps cascade_target_recall of the same pairs. Pass -s to save "
+                            "that threshold to config.json")
+
+
+def evaluateResults(results, test_targets):
+    correct = 0
+    false_positives = 0
+    no_same = 0
+    no_different = 0
+    different_auth_count = []
+    none_found = []
+    wrong = []
+    print("INFO: Evaluating results")
+    pbar = tqdm(total=len(results), file=sys.stdout)
+    for k, info in results.items():
+        actual_k = k[:-1]
+        if actual_k not in test_targets:
+            raise ValueError("{} not in test_targets".format(actual_k))
+        if len(info["different"]) == 0:
+            no_different += 1
+        else:
+            different_auth_count.append(len(info["different"]))
+        if info["same"] is None:
+            no_same += 1
+            none_found.append(actual_k)
+        else:
+            if actual_k != info["same"]:
+                false_positives += 1
+                wrong.append(actual_k)
+            else:
+                correct += 1
+        pbar.update()
+    pbar.close()
+    precision = correct / (correct + false_positives) if correct + false_positives > 0 else 0
+    recall = correct / (correct + no_same) if correct + no_same > 0 else 0
+    try:
+        f1 = 2 / (1 / precision + 1 / recall)
+    except ZeroDivisionError:
+        f1 = 0
+    return {
+        "correct": correct,
+        "false_positives": false_positives,
+        "no_same": no_same,
+        "no_different": no_different,
+        "different_auth_count": different_auth_count,
+        "none_found": none_found,
+        "wrong": wrong,
+        "precision": precision,
+        "recall": recall,
+        "f1": f1
+    }
+
+
+def reportComparison(name, a, b):
+    """
+    Print and save the comparison of two runs on the same targets
+    :param name: Name of the report
+    :param a: [label, results, stats from evaluateResults, pairs compared]
+    :param b: same as a
+    """
+    a_results = a[1]
+    b_results = b[1]
+    changed = [k for k in a_results.keys() if k in b_results and a_results[k]["same"] != b_results[k]["same"]]
+    report_rows = []
+    for label, _, run_stats, pairs_compared in [a, b]:
+        report_rows.append(["{} precision".format(label), run_stats["precision"] * 100])
+        report_rows.append(["{} recall".format(label), run_stats["recall"] * 100])
+        report_rows.append(["{} F1".format(label), run_stats["f1"] * 100])
+        report_rows.append(["{} pairs compared".format(label), pairs_compared])
+    report_rows.append(["Changed decisions", len(changed)])
+    report_rows.append(["Targets", len(a_results)])
+    printStats(name, report_rows, line_adaptive=True)
+    print("INFO: Changed decisions = {}".format(changed))
+    with open("test_results.txt", "a") as f:
+        printStats(name, report_rows, line_adaptive=True, print_func=f.write, printing_file=True)
+        f.write("Changed decisions = {}\n".format(changed))
+
+
+def reportCascade(name, report, target_recall):
+    """
+    Save the report from AuthorDisambiguation._evaluateCascade, it was already printed when it was made
+    :param name: Name of the report
+    :param report: cascade_report of the AuthorDisambiguation
+    :param target_recall: cascade_target_recall the threshold was calibrated for
+    """
+    report_rows = [
+        ["Pairs", report["pairs"]],
+        ["Rejected", report["rejected"]],
+        ["Pair recall loss", report["recall_loss"]],
+        ["Changed decisions", report["changed_decisions"]],
+        ["Threshold for {:.2f} recall".format(target_recall), report["calibrated_threshold"]]
+    ]
+    with open("test_results.txt", "a") as f:
+        printStats(name, report_rows, line_adaptive=True, print_func=f.write, printing_file=True)
+
+
+def saveCascadeThreshold(threshold):
+    """
+    Set cascade_threshold in config.json. Only that key is changed, ConfigHandler.save would also write every path
+    as an absolute path
+    :param threshold: the new cascade_threshold
+    """
+    with open("config.json") as f:
+        config_json = json.load(f)
+    config_json["cascade_threshold"] = threshold
+    with open("config.json", "w") as f:
+        json.dump(config_json, f, indent=2)
+
 
 if __name__ == '__main__':
     args = arguments.parse_args()
@@ -34,17 +149,13 @@ if __name__ == '__main__':
     config_raw = json.load(open("config.json"))
     config = ConfigHandler(config_raw, "evaluate_disambiguation", raise_error_unknown=True)
     data = loadData(
-        ["department_corpus", "incomplete_papers", "org_corpus", "conflicts", "parsed_papers", "same_names", "test_special_keys", "author_papers",
-         "id_to_name"], config.logger, config)
-    author_papers = data["author_papers"]
+        ["department_corpus", "org_corpus", "parsed_papers", "id_to_name"], config.logger, config)
+    author_papers = loadAuthorshipIndex(config.logger, config)
     id_to_name = data["id_to_name"]
-    same_names = data["same_names"]
     parsed = data["parsed_papers"]
-    parsed = {x: Paper(**info) for x, info in parsed.items()}
+    parsed = loadPapers(parsed)
     org_corpus = data["org_corpus"]
     department_corpus = data["department_corpus"]
-    incomplete = data["incomplete_papers"]
-    special_keys = data["test_special_keys"]
 
     target_creator = TargetCreator(parsed, id_to_name, author_papers, **config["TargetCreator"])
     tests = [
@@ -75,59 +186,59 @@ if __name__ == '__main__':
                                           **config["AuthorDisambiguation"])
 
     results = disambiguation(targets)
-
-    correct = 0
-    false_positives =0
-    no_same = 0
-    no_different = 0
-    different_auth_count = []
-    none_found = []
-    wrong = []
-    print("INFO: Evaluating results")
-    pbar = tqdm(total=len(results),file=sys.stdout)
-    for k,info in results.items():
-        actual_k = k[:-1]
-        if actual_k not in test_targets:
-            raise ValueError("{} not in test_targets".format(actual_k))
-        if len(info["different"]) == 0:
-            no_different += 1
-            pbar.update()
-        else:
-            different_auth_count.append(len(info["different"]))
-        if info["same"] is None:
-            no_same +=1
-            none_found.append(actual_k)
-        else:
-            if actual_k != info["same"]:
-                false_positives+=1
-                wrong.append(actual_k)
-            else:
-                correct +=1
-
-
-        pbar.update()
-    pbar.close()
-    print(none_found)
-    print(wrong)
-    print("INFO: {} targets were unable to find a same author".format(no_same))
-    print("INFO: {} had more than 1 different author".format(len(different_auth_count)))
-    precision = correct/(correct+false_positives)
-    print("INFO: Precision = {:.2f}".format(precision*100))
-    recall = correct/(correct+no_same)
-    print("INFO: Recall = {:.2f}".format(recall*100))
-    try:
-        f1 = 2/(1/precision+1/recall)
-    except ZeroDivisionError:
-        f1 = 0
-    print("INFO: F1 Score = {:.2f}".format(f1*100))
-    print("INFO: People with no different authors = {}".format(no_different))
-    avg_diff = np.mean(different_auth_count)
+    stats = evaluateResults(results, test_targets)
+    print(stats["none_found"])
+    print(stats["wrong"])
+    print("INFO: {} targets were unable to find a same author".format(stats["no_same"]))
+    print("INFO: {} had more than 1 different author".format(len(stats["different_auth_count"])))
+    print("INFO: Precision = {:.2f}".format(stats["precision"]*100))
+    print("INFO: Recall = {:.2f}".format(stats["recall"]*100))
+    print("INFO: F1 Score = {:.2f}".format(stats["f1"]*100))
+    print("INFO: People with no different authors = {}".format(stats["no_different"]))
+    avg_diff = np.mean(stats["different_auth_count"])
     print("INFO: Average different authors = {:.2f}".format(avg_diff))
     with open("test_results.txt","a") as f:
-        f.write("Wrong author = {}\n".format(wrong))
-        f.write("No author = {}\n".format(none_found))
-        f.write("Precision = {:.2f}\n".format(precision*100))
-        f.write("Recall = {:.2f}\n".format(recall*100))
-        f.write("F1 Score = {:.2f}\n".format(f1*100))
+        f.write("Wrong author = {}\n".format(stats["wrong"]))
+        f.write("No author = {}\n".format(stats["none_found"]))
+        f.write("Precision = {:.2f}\n".format(stats["precision"]*100))
+        f.write("Recall = {:.2f}\n".format(stats["recall"]*100))
+        f.write("F1 Score = {:.2f}\n".format(stats["f1"]*100))
 
+    if args.compare_modes:
+        other_mode = "paper" if disambiguation.compare_mode == "profile" else "profile"
+        print("INFO: Running disambiguation with compare_mode={} for the comparison report".format(other_mode))
+        other_disambiguation = AuthorDisambiguation(papers=target_papers, author_papers=target_authors,
+                                                    compare_args=compare_authors_args, id_to_name=target_ids,
+                                                    **{**config["AuthorDisambiguation"], "compare_mode": other_mode})
+        other_results = other_disambiguation(targets)
+        reportComparison("Profile vs Per-Paper Voting",
+                         [disambiguation.compare_mode, results, stats, disambiguation.pairs_compared],
+                         [other_mode, other_results, evaluateResults(other_results, test_targets),
+                          other_disambiguation.pairs_compared])
 
+    if args.compare_sampling:
+        print("INFO: Running disambiguation with every paper for the sampling report")
+        all_disambiguation = AuthorDisambiguation(papers=target_papers, author_papers=target_authors,
+                                                  compare_args=compare_authors_args, id_to_name=target_ids,
+                                                  **{**config["AuthorDisambiguation"], "compare_cutoff": 0})
+        all_results = all_disambiguation(targets)
+        reportComparison("Sampled vs All Papers",
+                         ["sampled", results, stats, disambiguation.pairs_compared],
+                         ["all papers", all_results, evaluateResults(all_results, test_targets),
+                          all_disambiguation.pairs_compared])
+
+    if args.cascade_report:
+        print("INFO: Running disambiguation with the cascade for the cascade report")
+        cascade_disambiguation = AuthorDisambiguation(papers=target_papers, author_papers=target_authors,
+                                                      compare_args=compare_authors_args, id_to_name=target_ids,
+                                                      **{**config["AuthorDisambiguation"], "use_cascade": True})
+        cascade_disambiguation(targets, evaluation_mode=True)
+        if cascade_disambiguation.cascade_report:
+            reportCascade("Cascade vs Full Scoring", cascade_disambiguation.cascade_report,
+                          cascade_disambiguation.cascade_target_recall)
+            calibrated_threshold = cascade_disambiguation.cascade_report["calibrated_threshold"]
+            if args.save_config:
+                saveCascadeThreshold(calibrated_threshold)
+                print("INFO: Saved cascade_threshold={} to config.json".format(calibrated_threshold))
+            else:
+                print("INFO: Pass -s to save cascade_threshold={} to config.json".format(calibrated_threshold))
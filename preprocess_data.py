@@ -1,14 +1,12 @@
 import json
 from src.config_handler import ConfigHandler
 from src.create_training_data import CreateTrainingData
-from src.paper import Paper
+from src.corpus_snapshot import loadPapers
 from src.utility_functions import createCLIGroup,createCLIShared, parseCLIArgs, loadData
 import os
 import gc
-from nltk.stem import PorterStemmer
 import argparse
 
-stemmer = PorterStemmer()
 arguments = argparse.ArgumentParser(
     description="Process papers using CreateTrainingData. You can specify these in config.json instead of using "
                 "command line arguments",
@@ -31,15 +29,15 @@ if __name__ == "__main__":
     config = parseCLIArgs(args, config)
     data = loadData(
         ["department_corpus", "incomplete_papers", "org_corpus", "conflicts", "parsed_papers",
-         "same_names", "test_special_keys"], config.logger, config)
-    same_names = data["same_names"]
+         "test_special_keys"], config.logger, config, lazy=True)
     parsed = data["parsed_papers"]
-    parsed = {x: Paper(**info) for x, info in parsed.items()}
+    parsed = loadPapers(parsed)
     org_corpus = data["org_corpus"]
     department_corpus = data["department_corpus"]
     incomplete = data["incomplete_papers"]
     special_keys = data["test_special_keys"]
     excluded_dict = data["conflicts"]
+    data.printLoadTimes()
 
     compare_authors_args = {
         "company_corpus": org_corpus,
@@ -15,7 +15,78 @@ from src.utility_functions import printStats, nameFromDict, createID, printLogTo
 import yaml
 import logging
 import sys
+import multiprocessing as mp
 from src.paper import Paper
+from src.artifact_cache import loadCachedArtifact
+
+# Increase when compileNameVariants changes so cached name variants are rebuilt
+NAME_VARIANTS_VERSION = 1
+
+
+def readNameVariants(path):
+    """
+    Read name_variants.yaml, using libyaml's loader when PyYAML was built with it
+    """
+    loader = getattr(yaml, "CFullLoader", yaml.FullLoader)
+    with open(path) as f:
+        return yaml.load(f.read(), Loader=loader)
+
+
+def compileNameVariants(raw_aliases):
+    """
+    Build the maps ACLParser uses from the raw name variants
+    :param raw_aliases: list of entries in name_variants.yaml
+    :return: dict with aliases, id_to_name, same_name, similar_names and affiliations
+    """
+    out = {
+        "aliases": {},
+        "id_to_name": {},
+        "same_name": [],
+        "similar_names": {},
+        "affiliations": {}
+    }
+    for p in raw_aliases:
+        first = p["canonical"]["first"]
+        last = p["canonical"]["last"]
+        name = nameFromDict(p["canonical"])
+        if "id" in p:
+            key = p["id"]
+        else:
+            key = createID(first, last)
+        if "comment" in p:
+            if "several people" in p["comment"].lower():
+                out["same_name"].append(name)
+            else:
+                out["affiliations"][key] = p["comment"]
+        if "similar" in p:
+            out["similar_names"][key] = p["similar"]
+        if "variants" in p:
+            for variant in p["variants"]:
+                if variant["first"] and variant["last"]:
+                    out["aliases"][nameFromDict(variant).lower().strip()] = key
+                    out["aliases"][nameFromDict(variant).lower().strip().replace(".", "")] = key
+                elif variant["last"]:
+                    out["aliases"][variant["last"].lower()] = key
+                else:
+                    out["aliases"][variant["first"].lower()] = key
+        out["id_to_name"][key] = p["canonical"]
+    out["same_name"] = list(set(out["same_name"]))
+    return out
+
+
+# Parser used by each worker process when parsing xml files in parallel
+_worker_parser = None
+
+
+def _initWorker(xpath_config, aliases, id_to_name, log_path):
+    global _worker_parser
+    _worker_parser = ACLParser(xpath_config, log_path=log_path)
+    _worker_parser.aliases = aliases
+    _worker_parser.id_to_name = id_to_name
+
+
+def _parseFileWorker(path):
+    return _worker_parser._parseFile(path)
 
 
 class ACLParser:
@@ -47,13 +118,15 @@ class ACLParser:
         :type log_format: str
         :param log_path: path to log files(default is '/logs/acl_parser.log')
         :type log_path: str
-        :param cores: Doesn't Do anything, just put it in to avoid errors with how I handle configs
+        :param cores: Number of processes used to parse the xml files, 1 parses them serially
         :type cores: int
         """
         if not log_format:
             log_format = '%(asctime)s|%(levelname)8s|%(module)20s|%(funcName)20s: %(message)s'
         if not log_path:
             log_path = os.getcwd() + "/logs/acl_parser.log"
+        self.log_path = log_path
+        self.xpath_config = xpath_config
         self.logger = createLogger("create_training_data", log_path, log_format, console_log_level,
                                    file_log_level)
         self.console_log_level = console_log_level
@@ -98,43 +171,49 @@ class ACLParser:
         self.parseACLXml(xml_path)
 
         if self.save_data:
-            json_path = self.save_dir
-            txt_path = self.save_dir
-
-            if self.ext_directory:
-                json_path = json_path + "/json"
-                txt_path = txt_path + "/txt"
-                if not os.path.exists(json_path):
-                    os.mkdir(json_path)
-                if not os.path.exists(txt_path):
-                    os.mkdir(txt_path)
-
-            with open(json_path + "/aliases.json", "w") as f:
-                json.dump(self.aliases, f, indent=4)
-            with open(json_path + "/id_to_name.json", "w") as f:
-                json.dump(self.id_to_name, f, indent=4)
-
-            papers_print = {x: self.papers[x].asDict() for x in self.papers.keys()}
-            with open(json_path + "/acl_papers.json", "w") as f:
-                json.dump(papers_print, f, indent=4)
-
-            with open(json_path + "/conflicts.json", "w") as f:
-                json.dump(self.conflicts, f, indent=4)
-            with open(json_path + "/known_affiliations.json", "w") as f:
-                json.dump(self.affiliations, f, indent=4)
-            with open(json_path + "/similar_names.json", "w") as f:
-                json.dump(self.similar_names, f, indent=4)
-            with open(txt_path + "/same_names.txt", "w") as f:
-                for i in self.same_name:
-                    f.write(i + "\n")
-            if json_path != txt_path:
-                printLogToConsole(self.console_log_level, "Wrote json files to {}".format(json_path), logging.INFO,
-                                  logger=self.logger)
-                printLogToConsole(self.console_log_level, "Wrote txt files to {}".format(txt_path), logging.INFO,
-                                  logger=self.logger)
-            else:
-                printLogToConsole(self.console_log_level, "Wrote ACL files to {}".format(txt_path), logging.INFO,
-                                  logger=self.logger)
+            self.saveData()
+
+    def saveData(self):
+        """
+        Write the parsed files to save_dir
+        """
+        json_path = self.save_dir
+        txt_path = self.save_dir
+
+        if self.ext_directory:
+            json_path = json_path + "/json"
+            txt_path = txt_path + "/txt"
+            if not os.path.exists(json_path):
+                os.mkdir(json_path)
+            if not os.path.exists(txt_path):
+                os.mkdir(txt_path)
+
+        with open(json_path + "/aliases.json", "w") as f:
+            json.dump(self.aliases, f, indent=4)
+        with open(json_path + "/id_to_name.json", "w") as f:
+            json.dump(self.id_to_name, f, indent=4)
+
+        papers_print = {x: self.papers[x].asDict() for x in self.papers.keys()}
+        with open(json_path + "/acl_papers.json", "w") as f:
+            json.dump(papers_print, f, indent=4)
+
+        with open(json_path + "/conflicts.json", "w") as f:
+            json.dump(self.conflicts, f, indent=4)
+        with open(json_path + "/known_affiliations.json", "w") as f:
+            json.dump(self.affiliations, f, indent=4)
+        with open(json_path + "/similar_names.json", "w") as f:
+            json.dump(self.similar_names, f, indent=4)
+        with open(txt_path + "/same_names.txt", "w") as f:
+            for i in self.same_name:
+                f.write(i + "\n")
+        if json_path != txt_path:
+            printLogToConsole(self.console_log_level, "Wrote json files to {}".format(json_path), logging.INFO,
+                              logger=self.logger)
+            printLogToConsole(self.console_log_level, "Wrote txt files to {}".format(txt_path), logging.INFO,
+                              logger=self.logger)
+        else:
+            printLogToConsole(self.console_log_level, "Wrote ACL files to {}".format(txt_path), logging.INFO,
+                              logger=self.logger)
 
     def parseNameVariants(self, variant_path):
         """
@@ -144,44 +223,18 @@ class ACLParser:
         :type variant_path: str
         """
         # TODO: Implement argument to specify name of name_variants file
-        raw_aliases = yaml.load(open(variant_path + "/name_variants.yaml").read(), Loader=yaml.FullLoader)
-        pbar = tqdm(total=len(raw_aliases), file=sys.stdout, dynamic_ncols=True, ascii=" =")
-        printLogToConsole(self.console_log_level, "Parsing name_variant.yaml", logging.INFO, print_func=pbar.write,
-                          logger=self.logger)
-        self.logger.debug("{} raw aliases".format(len(raw_aliases)))
-        for p in raw_aliases:
-            first = p["canonical"]["first"]
-            last = p["canonical"]["last"]
-            name = nameFromDict(p["canonical"])
-            if "id" in p:
-                key = p["id"]
-            else:
-                key = createID(first, last)
-            if "comment" in p:
-                if "several people" in p["comment"].lower():
-                    self.logger.debug("{}(key={}) had 'several people' in their comment".format(name, key))
-                    self.same_name.append(name)
-                else:
-                    self.logger.debug("{}(key={}) had an affiliation in their comment".format(name, key))
-                    self.affiliations[key] = p["comment"]
-            if "similar" in p:
-                self.logger.debug("{}(key={}) had similar in their name".format(name, key))
-                self.similar_names[key] = p["similar"]
-            if "variants" in p:
-                for variant in p["variants"]:
-                    if variant["first"] and variant["last"]:
-                        self.aliases[nameFromDict(variant).lower().strip()] = key
-                        self.aliases[nameFromDict(variant).lower().strip().replace(".", "")] = key
-                    elif variant["last"]:
-                        self.aliases[variant["last"].lower()] = key
-                    else:
-                        self.aliases[variant["first"].lower()] = key
-
-            self.id_to_name[key] = p["canonical"]
-            self.logger.debug("Added the id {} with the name {} to id_to_name".format(key, name))
-            pbar.update()
-        pbar.close()
-        self.same_name = list(set(self.same_name))
+        printLogToConsole(self.console_log_level, "Parsing name_variant.yaml", logging.INFO, logger=self.logger)
+        name_variants = loadCachedArtifact(variant_path + "/name_variants.yaml", str(NAME_VARIANTS_VERSION),
+                                           lambda x: compileNameVariants(readNameVariants(x)), self.logger)
+        self.logger.debug("{} ids in name variants".format(len(name_variants["id_to_name"])))
+        self.logger.debug("{} aliases, {} same names, {} similar names, {} affiliations".format(
+            len(name_variants["aliases"]), len(name_variants["same_name"]), len(name_variants["similar_names"]),
+            len(name_variants["affiliations"])))
+        self.aliases.update(name_variants["aliases"])
+        self.id_to_name.update(name_variants["id_to_name"])
+        self.similar_names.update(name_variants["similar_names"])
+        self.affiliations.update(name_variants["affiliations"])
+        self.same_name = list(set(self.same_name + name_variants["same_name"]))
 
     def parseACLXml(self, xml_path):
         """
@@ -204,45 +257,30 @@ class ACLParser:
         printLogToConsole(self.console_log_level, "Parsing ACL xml files", logging.INFO, print_func=pbar.write,
                           logger=self.logger)
         self.logger.debug("{} xml files to parse".format(len(xml_files)))
-        for f in xml_files:
-
-            self.logger.debug("Parsing {}".format(f))
-            parsed = []
-            with open(xml_path + f, "rb") as fb:
-                root = etree.XML(fb.read())
-            if root is None:
-                printLogToConsole(self.console_log_level, "{} could not be read".format(f), logging.WARNING,
-                                  print_func=pbar.write,
-                                  logger=self.logger)
-
-            for v in self.get_volumes(root):
-                parsed.extend(self.get_papers(v))
-            pre_papers_failed = papers_failed
-            for p in parsed:
-                total_papers += 1
-                rtr, status, msg = self._parsePaper(p)
-                if status == 0:
-                    paper, p_found, a_found, no_ids = rtr
-                    self.papers[paper.pid] = paper
-                    found_ids += len(p_found)
-                    for _id, name in p_found:
-                        if _id not in self.id_to_name:
-                            self.id_to_name[_id] = name
-                    for name, paper in no_ids:
-                        people_no_id[name].append(paper)
-                    aliases_corrected += a_found
-                    ids_to_create += len(no_ids)
-                    author_count.append(len(p_found) + a_found + len(no_ids))
-                else:
-                    # pbar.write("WARNING: A paper in {} failed to parse with message {}".format(f,msg))
-                    self.logger.warning("A paper in {} failed to parse with message {}".format(f, msg))
-                    papers_failed += 1
-            if papers_failed > pre_papers_failed:
-                printLogToConsole(self.console_log_level,
-                                  "{} papers in {} had an issue".format(papers_failed - pre_papers_failed, f),
-                                  logging.WARNING, pbar.write,
-                                  self.logger)
-            pbar.update()
+        paths = [xml_path + f for f in xml_files]
+        pool = None
+        if self.cores > 1 and len(paths) > 1:
+            # Workers only see the ids from before parsing, so _mergeFile filters the new ids against self.id_to_name.
+            # imap returns results in file order, so merging gives the same papers, ids and people_no_id order as
+            # parsing serially.
+            pool = mp.Pool(min(self.cores, len(paths)), initializer=_initWorker,
+                           initargs=(self.xpath_config, self.aliases, self.id_to_name, self.log_path))
+            file_results = pool.imap(_parseFileWorker, paths)
+        else:
+            file_results = map(self._parseFile, paths)
+        try:
+            for f, file_result in zip(xml_files, file_results):
+                file_papers, file_failed, file_found, file_aliases, file_no_ids = self._mergeFile(
+                    f, file_result, people_no_id, author_count, pbar)
+                total_papers += file_papers
+                papers_failed += file_failed
+                found_ids += file_found
+                aliases_corrected += file_aliases
+                ids_to_create += file_no_ids
+                pbar.update()
+        finally:
+            if pool is not None:
+                pool.terminate()
         pbar.close()
 
         self.conflicts, resolved = self._createNewID(people_no_id)
@@ -260,6 +298,146 @@ class ACLParser:
         ]
         printStats("Results", results, line_adaptive=True)
 
+    def loadExisting(self, papers, id_to_name, conflicts=None):
+        """
+        Use already parsed data so that update can add to it. Call parseNameVariants first, ids from the name variants
+        are kept over the existing ones.
+        :param papers: dict of pid to Paper or paper dict, same as acl_papers.json
+        :param id_to_name: dict of id to name, same as id_to_name.json
+        :param conflicts: dict of conflicts, same as conflicts.json
+        """
+        self.papers = {k: v if isinstance(v, Paper) else Paper(**v) for k, v in papers.items()}
+        for k, v in id_to_name.items():
+            if k not in self.id_to_name:
+                self.id_to_name[k] = v
+        self.conflicts = defaultdict(list, conflicts if conflicts else {})
+
+    def update(self, xml_files):
+        """
+        Parse only xml_files and merge them into the parsed papers and ids. Papers in the files replace the ones
+        already parsed. People with no id get the id of an existing person with the same name, otherwise the first
+        id from createID that is not taken. Modifies:\n
+        - id_to_name\n
+        - papers\n
+        - conflicts\n
+        :param xml_files: paths to the new or changed xml files
+        :type xml_files: list(str)
+        :return: dict with the pids added and updated, and the ids created
+        """
+        pids_before = set(self.papers.keys())
+        ids_before = set(self.id_to_name.keys())
+        people_no_id = defaultdict(list)
+        author_count = []
+        pids = []
+        papers_failed = 0
+        pbar = tqdm(total=len(xml_files), file=sys.stdout, dynamic_ncols=True, ascii=" =")
+        printLogToConsole(self.console_log_level, "Updating with {} ACL xml files".format(len(xml_files)),
+                          logging.INFO, print_func=pbar.write, logger=self.logger)
+        for path in xml_files:
+            file_result = self._parseFile(path)
+            pids.extend(rtr[0].pid for rtr, status, _ in file_result["papers"] if status == 0)
+            papers_failed += self._mergeFile(os.path.basename(path), file_result, people_no_id, author_count,
+                                             pbar)[1]
+            pbar.update()
+        pbar.close()
+        self._assignUpdateIDs(people_no_id)
+
+        changes = {
+            "added": [p for p in pids if p not in pids_before],
+            "updated": [p for p in pids if p in pids_before],
+            "new_ids": [x for x in self.id_to_name.keys() if x not in ids_before],
+            "failed": papers_failed
+        }
+        self.logger.debug("{} papers added, {} papers updated".format(len(changes["added"]), len(changes["updated"])))
+        return changes
+
+    def _assignUpdateIDs(self, people_no_id):
+        """
+        Give ids to the people with no id found by update. Ids are not reassigned, so a person whose id is taken by
+        someone with a different name gets the id with the next free number at the end and is added to conflicts.
+        :param people_no_id: dict of people with no id and their papers
+        :type people_no_id: {str:list(str)}
+        """
+        for person, person_papers in people_no_id.items():
+            name = {
+                "first": person[0],
+                "last": person[1]
+            }
+            base_id = createID(*person)
+            _id = base_id
+            count = 0
+            while _id in self.id_to_name and self.id_to_name[_id] != name:
+                count += 1
+                _id = base_id + str(count)
+            if _id not in self.id_to_name:
+                self.id_to_name[_id] = name
+                if count > 0:
+                    self.conflicts[base_id].append((_id, nameFromDict(name)))
+            for p in person_papers:
+                self.papers[p].authors[_id] = nameFromDict(name)
+
+    def _parseFile(self, path):
+        """
+        Parse every paper in an xml file, does not modify the parser so it can run in a worker process
+        :param path: path to the xml file
+        :return: dict with the results of _parsePaper for each paper and if the file could not be read
+        """
+        self.logger.debug("Parsing {}".format(path))
+        parsed = []
+        with open(path, "rb") as fb:
+            root = etree.XML(fb.read())
+        out = {"read_error": root is None, "papers": []}
+        for v in self.get_volumes(root):
+            parsed.extend(self.get_papers(v))
+        for p in parsed:
+            out["papers"].append(self._parsePaper(p))
+        return out
+
+    def _mergeFile(self, f, file_result, people_no_id, author_count, pbar):
+        """
+        Add the papers and ids found in a file to the parser
+        :param f: name of the file
+        :param file_result: result of _parseFile
+        :param people_no_id: dict of people with no id to their papers, updated in place
+        :param author_count: list of author counts per paper, updated in place
+        :param pbar: progress bar to write warnings with
+        :return: total papers, papers failed, ids found, aliases corrected and ids to create in the file
+        """
+        if file_result["read_error"]:
+            printLogToConsole(self.console_log_level, "{} could not be read".format(f), logging.WARNING,
+                              print_func=pbar.write,
+                              logger=self.logger)
+        total_papers = 0
+        papers_failed = 0
+        found_ids = 0
+        aliases_corrected = 0
+        ids_to_create = 0
+        for rtr, status, msg in file_result["papers"]:
+            total_papers += 1
+            if status == 0:
+                paper, p_found, a_found, no_ids = rtr
+                self.papers[paper.pid] = paper
+                # The ids in p_found were new to whoever parsed the paper, only count the ones still new
+                p_found = [(_id, name) for _id, name in p_found if _id not in self.id_to_name]
+                found_ids += len(p_found)
+                for _id, name in p_found:
+                    if _id not in self.id_to_name:
+                        self.id_to_name[_id] = name
+                for name, paper in no_ids:
+                    people_no_id[name].append(paper)
+                aliases_corrected += a_found
+                ids_to_create += len(no_ids)
+                author_count.append(len(p_found) + a_found + len(no_ids))
+            else:
+                self.logger.warning("A paper in {} failed to parse with message {}".format(f, msg))
+                papers_failed += 1
+        if papers_failed > 0:
+            printLogToConsole(self.console_log_level,
+                              "{} papers in {} had an issue".format(papers_failed, f),
+                              logging.WARNING, pbar.write,
+                              self.logger)
+        return total_papers, papers_failed, found_ids, aliases_corrected, ids_to_create
+
     def _parsePaper(self, paper):
         """
         Parse a paper
@@ -274,7 +452,7 @@ class ACLParser:
         no_ids = []
         aliases_found = 0
         try:
-            pid = self.get_pid(paper)[0]
+            pid = str(self.get_pid(paper)[0])
         except IndexError as e:
             return [None, None, None], -1, "no pid found"
         if "https://www.aclweb.org" in pid:
@@ -284,7 +462,7 @@ class ACLParser:
         elif "https://" in pid:
             return [None, None, None], -1, "https:// in the paper id"
         try:
-            abstract = self.get_abstract(paper)[0]
+            abstract = str(self.get_abstract(paper)[0])
         except IndexError as e:
             abstract = None
         for a in self.get_authors(paper):
@@ -292,16 +470,16 @@ class ACLParser:
             first_name = None
             last_name = None
             try:
-                first_name = self.get_first_name(a)[0]
-                last_name = self.get_last_name(a)[0]
+                first_name = str(self.get_first_name(a)[0])
+                last_name = str(self.get_last_name(a)[0])
                 name = first_name + " " + last_name
             except IndexError:
                 if self.get_first_name(a):
 
-                    name = self.get_first_name(a)[0]
+                    name = str(self.get_first_name(a)[0])
                     first_name = name
                 elif self.get_last_name(a):
-                    name = self.get_last_name(a)[0]
+                    name = str(self.get_last_name(a)[0])
                     last_name = name
                 else:
                     return [Paper(pid, title=title, abstract=abstract, authors=authors), new_ids,
@@ -0,0 +1,84 @@
+import hashlib
+import logging
+import os
+import pickle
+from src.lazy_import import lazyImport
+
+nltk = lazyImport("nltk")
+
+# Increase when the cached format changes so old caches are rebuilt
+CACHE_VERSION = 2
+
+
+def stemmerVersion(stemmer):
+    """
+    Identify a stemmer so that a cache made with a different stemmer, mode or nltk version is not used
+    """
+    return "{}-{}-{}".format(type(stemmer).__name__, getattr(stemmer, "mode", None), nltk.__version__)
+
+
+def fileHash(path):
+    sha = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def cachePath(path):
+    return path + ".cache"
+
+
+def loadCachedArtifact(path, version, build, logger=None):
+    """
+    Load something derived from the file at path, building it with build(path) when it is not cached. The result is
+    pickled next to the file at cachePath(path) and is used while the file's hash and version are unchanged.
+    :param path: path to the source file
+    :param version: string identifying how the artifact is built, change it to invalidate existing caches
+    :param build: function that takes path and returns the artifact
+    :param logger: logger to use
+    :return: the artifact
+    """
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    key = "{}|{}|{}".format(CACHE_VERSION, version, fileHash(path))
+    cache_path = cachePath(path)
+    try:
+        with open(cache_path, "rb") as f:
+            cached_key = pickle.load(f)
+            if cached_key == key:
+                logger.debug("Using cache {}".format(cache_path))
+                return pickle.load(f)
+        logger.debug("{} is stale, rebuilding".format(cache_path))
+    except FileNotFoundError:
+        logger.debug("{} does not exist, creating it".format(cache_path))
+    except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError) as e:
+        logger.warning("Could not read {}: {}".format(cache_path, e))
+
+    artifact = build(path)
+    tmp_path = cache_path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning("Could not write {}: {}".format(cache_path, e))
+    return artifact
+
+
+def loadStemmedCorpus(path, stemmer, logger=None):
+    """
+    Load a corpus text file where every line is a document, stemming every word. The stemmed documents are cached with
+    loadCachedArtifact, keyed by the stemmer version.
+    :param path: path to the corpus
+    :param stemmer: stemmer with a stem method
+    :param logger: logger to use
+    :return: list of the stemmed documents
+    """
+
+    def build(corpus_path):
+        with open(corpus_path) as f:
+            return [[stemmer.stem(w) for w in x.strip().split()] for x in f.readlines()]
+
+    return loadCachedArtifact(path, stemmerVersion(stemmer), build, logger)
@@ -2,10 +2,18 @@ from tqdm import tqdm, trange
 import os
 import json
 import logging
-from src.utility_functions import cleanName, createLogger, printLogToConsole, nameFromDict
+from src.utility_functions import cleanName, createLogger, printLogToConsole, nameFromDict, printStats, chunks
 from src.create_training_data import getAuthorInfo
 from src.compare_authors import CompareAuthors, getAlgo
+from src.cascade_scorer import CascadeScorer
+from src.author_profile import AuthorProfiles
+from src.paper_sampler import PaperSampler
+from src.authorship_index import AuthorshipIndex, AuthorshipOverlay, copyAuthorPapers
 from src.paper import Paper
+from src.pair_keys import authorKey, pairKey, keyToString
+from src.inference_artifact import loadModel
+from src.dense_model import loadDenseModel
+from src.parallel_inference import InferencePool
 import numpy as np
 from collections import defaultdict, Counter
 import sys
@@ -17,15 +25,43 @@ import re
 remove_numbers = re.compile("\d")
 
 
+def loadDisambiguationModel(path, compiled_model=True, logger=None):
+    """
+    Load a model the way AuthorDisambiguation does. A model saved by DenseNN is used if there is one, then the inference
+    artifact if compiled_model, then the pickle
+    :param path: directory of the model, models/<model_name>
+    :param compiled_model: use model.npz if it exists
+    :param logger: logger to log the file that is loaded
+    :return: model with predict, predict_proba and voting
+    """
+    if os.path.exists(path + "/model.keras"):
+        if logger:
+            logger.debug("Loading dense model from {}".format(path))
+        return loadDenseModel(path)
+    if compiled_model and os.path.exists(path + "/model.npz"):
+        if logger:
+            logger.debug("Loading compiled model from {}".format(path + "/model.npz"))
+        return loadModel(path + "/model.npz")
+    with open(path + "/model.pickle", "rb") as f:
+        return pickle.load(f)
+
+
 class AuthorDisambiguation:
     parameters = dict(
         threshold=[.1, "Minimum similarity threshold for considering an author_id as the same as the target"],
         name_similarity_cutoff=[.9, "Minimum string similarity of the other name when "],
         str_algorithm=["jaro-similarity", ""],
-        model_name=["VC1", "Name of the model to use"],
+        model_name=["VC1", "Name of the model to use. A model saved by DenseNN is used if the model's directory has "
+                           "model.keras"],
         model_path=["", "Path to the model, defaults to 'cwd+/models/'"],
+        compiled_model=[True, "Load the model from model.npz if it exists instead of unpickling model.pickle, it loads "
+                              "faster and predicts small batches faster"],
         create_new_author=[False, "Create new authors if no similar authors are found"],
-        compare_cutoff=[3, "Minimum papers for an id to compare it to the target"],
+        compare_cutoff=[0, "Maximum papers of an id to compare to the target, 0 compares every paper"],
+        sample_method=["diverse", "How to select the papers of an id when it has more than compare_cutoff papers. "
+                                  "'diverse' covers distinct years, orgs and co-authors, 'recent' uses the most recent "
+                                  "papers and 'random' uses a random sample"],
+        sample_seed=[1, "Seed used when selecting papers"],
         tie_breaker=["max", "Method to use for breaking ties when more than one id is above the threshold"],
         sim_overrides=[False, "Name similarity score overrides initials not being the same. For example: \nAuthor a id = "
                               "'auth-a-org' and name is 'John (Williams) Doe\nTarget is 'auth-a' and name is 'John Doe'\n With "
@@ -33,15 +69,30 @@ class AuthorDisambiguation:
         allow_authors_not_in_override=[True, "When passing targets to call, Disable allowing authors who do not have "
                                              "predefined authors to compare"],
         same_paper_diff_people=[True, "Disable removing ids who share papers with the target"],
-        use_probabilities=[False, "Use probabilities instead of predictions, only works if the model allows this"]
+        use_probabilities=[False, "Use probabilities instead of predictions, only works if the model allows this"],
+        use_cascade=[False, "Reject clear non-matches with a cheap first stage score before running the full comparison "
+                            "and the model on them"],
+        cascade_threshold=[.5, "Minimum cascade score for a pair to be fully compared"],
+        cascade_target_recall=[.99, "Recall of the model's same pairs used to calibrate the cascade threshold in "
+                                    "evaluation mode"],
+        compare_mode=["paper", "What to compare each target paper to. 'paper' compares it to every paper of the other "
+                               "ids, 'profile' compares it once to an aggregated profile of each id"],
+        early_stopping=[False, "Compare and predict the pairs of each id in batches, and stop once an id can no longer "
+                               "exceed the threshold or overtake the leading id"],
+        stream_batch_size=[10, "Number of pairs per id in each batch when using early_stopping"],
+        inference_cores=[0, "Number of worker processes that predict the compared pairs while the rest are still being "
+                            "compared. 0 predicts on the main process after every pair is compared"]
     )
 
     def __init__(self, papers=None, author_papers=None, compare_args=None, id_to_name=None,
                  console_log_level=logging.ERROR, file_log_level=logging.DEBUG, log_format=None, log_path=None,
                  save_data=False, ext_directory=False, save_path=None, threshold=.2, name_similarity_cutoff=.92,
-                 str_algorithm="jaro-similarity", model=None, model_name="VC1", model_path=None,
-                 create_new_author=False, compare_cutoff=3, tie_breaker="max", cores=4, DEBUG_MODE=False,
-                 sim_overrides=False, allow_authors_not_in_override=True, same_paper_diff_people=True, use_probabilities=False):
+                 str_algorithm="jaro-similarity", model=None, model_name="VC1", model_path=None, compiled_model=True,
+                 create_new_author=False, compare_cutoff=0, tie_breaker="max", cores=4, DEBUG_MODE=False,
+                 sim_overrides=False, allow_authors_not_in_override=True, same_paper_diff_people=True, use_probabilities=False,
+                 use_cascade=False, cascade_threshold=.5, cascade_target_recall=.99, compare_mode="paper",
+                 early_stopping=False, stream_batch_size=10, sample_method="diverse", sample_seed=1,
+                 inference_cores=0):
         if not log_format:
             log_format = '%(asctime)s|%(levelname)8s|%(module)20s|%(funcName)20s: %(message)s'
         if not log_path:
@@ -53,7 +104,8 @@ class AuthorDisambiguation:
         if self.model is None:
             if not model_path:
                 model_path = os.getcwd()
-            self.model = pickle.load(open("{}/models/{}/model.pickle".format(model_path, model_name), "rb"))
+            self.model = loadDisambiguationModel("{}/models/{}".format(model_path, model_name), compiled_model,
+                                                 self.logger)
         try:
             if self.model.voting == "hard" and use_probabilities:
                 self.logger.warning("hard voting does not support probabilities")
@@ -77,7 +129,7 @@ class AuthorDisambiguation:
             else:
                 self.compare_args = compare_args
 
-            if author_papers and (not isinstance(author_papers, dict) and not isinstance(author_papers, defaultdict)):
+            if author_papers and not isinstance(author_papers, (dict, defaultdict, AuthorshipIndex, AuthorshipOverlay)):
                 self.logger.error("passed author_papers is not valid")
                 self.logger.error("type is {}".format(type(author_papers)))
                 self.logger.exception(TypeError("author_papers is not a dict"))
@@ -93,7 +145,7 @@ class AuthorDisambiguation:
                 else:
                     self.author_papers = deepcopy(author_papers)
             else:
-                self.author_papers = deepcopy(author_papers)
+                self.author_papers = copyAuthorPapers(author_papers)
 
             if papers and not isinstance(papers, dict):
                 self.logger.error("passed papers is not valid")
@@ -179,6 +231,22 @@ class AuthorDisambiguation:
         self.sim_overrides = sim_overrides
         self.allow_authors_not_in_override = allow_authors_not_in_override
         self.same_paper_diff_people = same_paper_diff_people
+        self.use_cascade = use_cascade
+        self.cascade = CascadeScorer(cascade_threshold, str_algorithm=self.str_algorithm)
+        self.cascade_target_recall = cascade_target_recall
+        self.cascade_report = {}
+        if compare_mode not in ["paper", "profile"]:
+            self.logger.error("compare_mode is not valid")
+            self.logger.exception(ValueError("{} is not a valid compare_mode".format(compare_mode)))
+            raise ValueError("{} is not a valid compare_mode".format(compare_mode))
+        self.compare_mode = compare_mode
+        self.profiles = AuthorProfiles(self.papers, self.author_papers)
+        self.pairs_compared = 0
+        self.name_blocks = {}
+        self.sampler = PaperSampler(self.papers, compare_cutoff, sample_method, sample_seed)
+        self.early_stopping = early_stopping
+        self.stream_batch_size = stream_batch_size
+        self.inference_cores = inference_cores
         self.logger.debug("AuthorDisambiguation initialized with arguments:")
         self.logger.debug("\tcompare_args={}".format(list(self.compare_args.keys())))
         self.logger.debug("\talgorithm={}".format(algo_name))
@@ -191,8 +259,13 @@ class AuthorDisambiguation:
         self.logger.debug("\tsim_overrides={}".format(self.sim_overrides))
         self.logger.debug("\tsame_paper_diff_people={}".format(self.same_paper_diff_people))
         self.logger.debug("\tuse_probabilities={}".format(self.use_probabilities))
-        if self.compare_cutoff != 3:
-            self.logger.warning("Non-default value for compare_cutoff, currently this is not implemented")
+        self.logger.debug("\tuse_cascade={}".format(self.use_cascade))
+        self.logger.debug("\tcascade_threshold={}".format(cascade_threshold))
+        self.logger.debug("\tcompare_mode={}".format(self.compare_mode))
+        self.logger.debug("\tearly_stopping={}".format(self.early_stopping))
+        self.logger.debug("\tstream_batch_size={}".format(self.stream_batch_size))
+        self.logger.debug("\tinference_cores={}".format(self.inference_cores))
+        self.logger.debug("\tsample_method={}".format(sample_method))
 
     def _findData(self, file_name):
         file_ext = file_name.split(".")[-1]
@@ -234,7 +307,13 @@ class AuthorDisambiguation:
             return None, -1, "{} does not have a supported extensions"
         return out, 0, ""
 
-    def _getAuthorInfos(self, authors) -> (dict, int, int):
+    def _getAuthorInfos(self, authors, papers_to_use=None) -> (dict, int, int):
+        """
+        Get the author info for each paper of authors
+        :param authors: list of author ids
+        :param papers_to_use: Optional set of (paper, id) to limit the infos to
+        :return: dict of the infos, number of authors not found, number of papers not found
+        """
         out = {}
         printLogToConsole(self.console_log_level, "Getting author info for specified authors", logging.INFO)
         self.logger.info("Getting author info for specified authors")
@@ -249,6 +328,8 @@ class AuthorDisambiguation:
                 error_authors += 1
                 continue
             for p in self.author_papers[a]:
+                if papers_to_use is not None and (p, a) not in papers_to_use:
+                    continue
                 if p not in self.papers:
                     self.logger.debug("{} not in self.papers".format(p))
                     error_papers += 1
@@ -350,15 +431,15 @@ class AuthorDisambiguation:
         out = []
         excluded = []
         target, target_paper_info = target_info
-        pid_target, target_id = target.split(" ")
+        pid_target, target_id = target
         for key, info in auth_infos:
-            auth_pid, auth_id = key.split(" ")
+            auth_pid, auth_id = key
             # If the target author shows up in the same paper as the author you are comparing, it is guarnteed they
             # are not the same author
             if auth_pid == pid_target:
                 excluded.append([key, info])
                 continue
-            out.append([target + " " + key, target_paper_info, info])
+            out.append([pairKey(target, key), target_paper_info, info])
             pbar.update()
         pbar.close()
         self.logger.debug("len(excluded)={}".format(len(excluded)))
@@ -396,12 +477,12 @@ class AuthorDisambiguation:
             if self.tie_breaker == "max":
                 sums_above_threshold = [[x[0], sum(model_results[x[0]])] for x in above_threshold]
                 if evaluate:
-                    return max(sums_above_threshold, key=lambda x: x[0])[0], percent_same
-                return max(sums_above_threshold, key=lambda x: x[0])[0], above_threshold
+                    return max(sums_above_threshold, key=lambda x: x[1])[0], percent_same
+                return max(sums_above_threshold, key=lambda x: x[1])[0], above_threshold
             elif self.tie_breaker == "max_percent":
                 if evaluate:
-                    return max(above_threshold, key=lambda x: x[0])[0], percent_same
-                return max(above_threshold, key=lambda x: x[0])[0], above_threshold
+                    return max(above_threshold, key=lambda x: x[1])[0], percent_same
+                return max(above_threshold, key=lambda x: x[1])[0], above_threshold
             else:
                 self.logger.error("tie_breaker is not a valid tie breaker")
                 self.logger.exception(ValueError("{} is not a valid tie breaker".format(self.tie_breaker)))
@@ -431,22 +512,39 @@ class AuthorDisambiguation:
             self.logger.debug("Removing excluded")
             to_compare, known_different = self._removeKnownDifferent(to_compare, excluded)
 
-        compare_results = self._compareAmbiguousPairs(to_compare)
-        compare_results = self._consolidateResults(compare_results)
-        predictions, probabilities = self._makePredictions(compare_results)
+        rejected = {}
+        if self.use_cascade:
+            all_pairs = to_compare
+            to_compare, rejected, cascade_scores = self._cascadeFilter(to_compare)
+            if evaluation_mode:
+                self.cascade_report = self._evaluateCascade(all_pairs, cascade_scores)
 
-        if self.use_probabilities:
-            to_use = {}
-            for k, info in probabilities.items():
-                to_use[k] = {x: [y[1] for y in info[x]] for x in info.keys()}
+        self.pairs_compared = sum(len(x) for x in to_compare.values())
+        self.logger.debug("{} pairs to compare".format(self.pairs_compared))
+        if self.early_stopping:
+            to_use = self._streamVotes(to_compare, rejected)
         else:
-            to_use = predictions
+            if self.inference_cores:
+                predictions, probabilities = self._compareAndPredict(to_compare)
+            else:
+                compare_results = self._compareAmbiguousPairs(to_compare)
+                compare_results = self._consolidateResults(compare_results)
+                predictions, probabilities = self._makePredictions(compare_results)
+            if self.use_cascade:
+                self._addRejectedVotes(rejected, predictions, probabilities)
+
+            if self.use_probabilities:
+                to_use = {}
+                for k, info in probabilities.items():
+                    to_use[k] = {x: [y[1] for y in info[x]] for x in info.keys()}
+            else:
+                to_use = predictions
 
         warning_auth = []
         correct_dict = defaultdict(dict)
         printLogToConsole(self.console_log_level, "Determining the correct author", logging.INFO)
         self.logger.info("Determining the correct author")
-        pbar = tqdm(total=len(predictions), file=sys.stdout)
+        pbar = tqdm(total=len(to_use), file=sys.stdout)
         for k, pred in to_use.items():
             self.logger.debug("{}")
             correct, above_thres = self._determineCorrectAuthor(pred, evaluation_mode)
@@ -506,8 +604,8 @@ class AuthorDisambiguation:
 
         out = defaultdict(list)
         for pair_key, a, b in pairs:
-            p1, a_id, p2, b_id = pair_key.split(" ")
-            if p1 + " " + a_id != target_key:
+            p1, a_id, p2, b_id = pair_key
+            if (p1, a_id) != target_key:
                 raise ValueError("Attempting to compare a pair that is not a target")
             compare_results = comparator([pair_key, 0, a, b])
             out[b_id].append(compare_results[-1])
@@ -533,14 +631,24 @@ class AuthorDisambiguation:
                 self.logger.debug("Skipping {} because it is in excluded".format(a))
                 continue
             authors_get_info.extend(override_authors[a])
-            check_author_keys[a] = self._makeCheckAuthors(override_authors[a])
-        args = []
+            check_author_keys[a] = self._makeCheckAuthors(override_authors[a], ambiguous_author_papers[a])
+        self.name_blocks = self._makeNameBlocks([x for x in [*has_authors, *needs_authors] if x not in excluded],
+                                                ambiguous_author_names)
+
+        # Targets in the same name block have the same similar authors, so only get them once per block
+        block_targets = defaultdict(list)
         for a in needs_authors:
             if a in excluded:
                 self.logger.debug("Skipping {} because it is in excluded".format(a))
                 continue
+            block_targets[self.name_blocks[a]].append(a)
+        args = []
+        for block, targets in block_targets.items():
+            a = targets[0]
             args.append([a, ambiguous_author_names[a], self.author_name, self.str_algorithm, self.name_similarity_cutoff,
                          self.sim_overrides])
+        self.logger.debug("{} targets that need authors are in {} name blocks".format(
+            sum(len(x) for x in block_targets.values()), len(block_targets)))
         printLogToConsole(self.console_log_level, "Getting similar authors in parallel with {} cores".format(self.cores),
                           logging.INFO)
         self.logger.info("Getting similar authors in parallel with {} cores".format(self.cores))
@@ -550,7 +658,7 @@ class AuthorDisambiguation:
             for target, auth, warnings, debug in imap_results:
                 self.logger.debug("Adding authors from {}".format(target))
                 self.logger.debug("len(auth)={}".format(len(auth)))
-                sim_authors.append([target, auth])
+                sim_authors.append([self.name_blocks[target], auth])
                 for i in warnings:
                     self.logger.warning(i)
                 for i in debug:
@@ -558,36 +666,58 @@ class AuthorDisambiguation:
         self.logger.debug("len(sim_authors)={}".format(len(sim_authors)))
 
         pbar = tqdm(total=len(sim_authors), file=sys.stdout)
-        for a, auths in sim_authors:
-
-            if a in override_authors:
-                self.logger.exception(ValueError("{} is in need authors, but is already in override_authors".format(a)))
-                raise ValueError("{} is in need authors, but is already in override_authors".format(a))
-            pbar.write("INFO: Checking similar authors to {}".format(a))
-            self.logger.info("Checking similar authors to {}".format(a))
+        for block, auths in sim_authors:
+            targets = block_targets[block]
+            for a in targets:
+                if a in override_authors:
+                    self.logger.exception(
+                        ValueError("{} is in need authors, but is already in override_authors".format(a)))
+                    raise ValueError("{} is in need authors, but is already in override_authors".format(a))
+            pbar.write("INFO: Checking similar authors to {}".format(", ".join(targets)))
+            self.logger.info("Checking similar authors to {}".format(", ".join(targets)))
             if len(auths) == 0:
-                self.logger.warning("{} has no similar authors".format(a))
-                excluded.append(a)
+                for a in targets:
+                    self.logger.warning("{} has no similar authors".format(a))
+                    excluded.append(a)
             else:
                 authors_get_info.extend(auths)
-                check_author_keys[a] = self._makeCheckAuthors(auths)
-                if len(check_author_keys[a]) == 0:
-                    self.logger.debug("{} had at least 1 similar author, but nothing in check author keys".format(a))
+                block_papers = set([p for a in targets for p in ambiguous_author_papers[a]])
+                block_check_authors = self._makeCheckAuthors(auths, block_papers)
+                for a in targets:
+                    check_author_keys[a] = block_check_authors
+                    if len(check_author_keys[a]) == 0:
+                        self.logger.debug(
+                            "{} had at least 1 similar author, but nothing in check author keys".format(a))
             pbar.update()
         pbar.close()
         authors_get_info = list(set(authors_get_info))
         return ambiguous_author_papers, ambiguous_author_names, check_author_keys, authors_get_info, excluded
 
-    def _makeCheckAuthors(self, check_author):
+    def _makeCheckAuthors(self, check_author, target_papers=None):
+        """
+        Get the (paper, id) pairs of the ids to check. When compare_cutoff is set, only the papers selected by
+        self.sampler are used, plus any paper shared with the target so that same_paper_diff_people still works
+        :param check_author: list of ids
+        :param target_papers: papers of the target
+        :return: list of (paper, id)
+        """
         out = []
+        if not target_papers:
+            target_papers = []
         self.logger.debug("check_author={}".format(check_author))
         for i in check_author:
             self.logger.debug("Checking {}".format(i))
             try:
-                for p in self.author_papers[i]:
-                    out.append((p, i))
-            except:
+                papers = self.author_papers[i]
+            except KeyError:
                 self.logger.warning("{} was not found in self.author_papers".format(i))
+                continue
+            selected = self.sampler(i, papers)
+            if len(selected) != len(papers):
+                self.logger.debug("Selected {} of {} papers from {}".format(len(selected), len(papers), i))
+                selected.extend([p for p in papers if p in target_papers and p not in selected])
+            for p in selected:
+                out.append((p, i))
         self.logger.debug("out={}".format(out))
         return out
 
@@ -595,7 +725,10 @@ class AuthorDisambiguation:
         printLogToConsole(self.console_log_level, "Creating pairs for ambiguous authors", logging.INFO)
         self.logger.info("Creating pairs for ambiguous authors")
 
-        known_author_info, error_authors, error_papers = self._getAuthorInfos(authors_to_get)
+        if self.compare_mode == "profile":
+            return self._makeProfilePairs(ambiguous_papers, check_authors, authors_to_get)
+        papers_to_use = set([x for check in check_authors.values() for x in check])
+        known_author_info, error_authors, error_papers = self._getAuthorInfos(authors_to_get, papers_to_use)
         if error_authors > 0:
             self.logger.warning("{} errors getting known author infos".format(error_authors))
         if error_papers > 0:
@@ -605,6 +738,8 @@ class AuthorDisambiguation:
         self.logger.debug("{} ambiguous author ids".format(len(check_authors)))
         results = defaultdict(list)
         excluded = defaultdict(list)
+        # Targets in the same name block share their check authors, so the candidate infos are only gathered once
+        block_known = {}
         for a in ambiguous_papers.keys():
             printLogToConsole(self.console_log_level, "Creating pairs for {}".format(a), logging.INFO)
             self.logger.info("Creating pairs for {}".format(a))
@@ -612,47 +747,176 @@ class AuthorDisambiguation:
             self.logger.debug("{} has {} to check against".format(a, len(check_authors[a])))
             self.logger.debug("{} has {} total possible pairs".format(a, len(ambiguous_papers) * len(check_authors[a])))
 
-            known_to_use = [[" ".join(x), known_author_info[" ".join(x)]] for x in check_authors[a]]
+            if id(check_authors[a]) not in block_known:
+                block_known[id(check_authors[a])] = [[x, known_author_info[x]] for x in check_authors[a]]
+            known_to_use = block_known[id(check_authors[a])]
             for p in ambiguous_papers[a]:
                 ambiguous_paper_info = getAuthorInfo([self.papers[p], a])
                 pairs_to_use, pairs_excluded = self._makePairs(ambiguous_paper_info, known_to_use)
                 self.logger.debug("{} {} has {} pairs".format(p, a, len(pairs_to_use)))
                 self.logger.debug("{} {} has {} excluded".format(p, a, len(pairs_excluded)))
-                results[" ".join([p, a])] = pairs_to_use
+                results[authorKey(p, a)] = pairs_to_use
 
-                excluded[" ".join([p, a])] = [x[0] for x in pairs_excluded]
+                excluded[authorKey(p, a)] = [x[0] for x in pairs_excluded]
 
         return results, excluded
 
-    def _compareAmbiguousPairs(self, pairs_to_use):
-        printLogToConsole(self.console_log_level, "Comparing all ambiguous pairs", logging.INFO)
-        self.logger.info("Comparing all ambiguous pairs")
+    def _makeProfilePairs(self, ambiguous_papers, check_authors, authors_to_get):
+        """
+        Same as _makeAmbiguousPairs, but each target paper is paired once with the profile of each id instead of with
+        every paper of that id
+        """
+        self.logger.debug("Building profiles for {} authors".format(len(authors_to_get)))
+        self.profiles.build([x for x in authors_to_get if x in self.author_papers])
+        if self.profiles.missing_papers > 0:
+            self.logger.warning("{} papers were missing when building profiles".format(self.profiles.missing_papers))
+        results = defaultdict(list)
+        excluded = defaultdict(list)
+        for a in ambiguous_papers.keys():
+            printLogToConsole(self.console_log_level, "Creating profile pairs for {}".format(a), logging.INFO)
+            self.logger.info("Creating profile pairs for {}".format(a))
+            check_ids = []
+            for _, i in check_authors[a]:
+                if i not in check_ids:
+                    check_ids.append(i)
+            check_profiles = [self.profiles[i] for i in check_ids if i in self.profiles and len(self.profiles[i]) > 0]
+            self.logger.debug("{} has {} profiles to check against".format(a, len(check_profiles)))
+            for p in ambiguous_papers[a]:
+                target_key, target_info = getAuthorInfo([self.papers[p], a])
+                results[target_key] = []
+                excluded[target_key] = []
+                for profile in check_profiles:
+                    profile_key, profile_info = profile.asAuthorInfo(p)
+                    # Same as in _makePairs, the target showing up in the same paper as the other id means that they
+                    # are not the same author
+                    if p in profile:
+                        excluded[target_key].append(authorKey(p, profile.author_id))
+                        continue
+                    results[target_key].append([pairKey(target_key, profile_key), target_info, profile_info])
+        return results, excluded
+
+    def _createComparator(self):
         try:
-            comparator = CompareAuthors(**self.compare_args)
+            return CompareAuthors(**self.compare_args)
         except Exception as e:
             self.logger.error("Error intializing comparator")
             self.logger.error("comparator_args={}".format(list(self.compare_args.keys())))
             self.logger.exception(e)
             raise e
+
+    def _compareAmbiguousPairs(self, pairs_to_use, comparator=None, pool=None):
         out = {}
+        for block_results in self._iterCompareBlocks(pairs_to_use, comparator, pool):
+            for k, res in block_results:
+                out[k] = res
+        return out
+
+    def _iterCompareBlocks(self, pairs_to_use, comparator=None, pool=None):
+        """
+        Compare the pairs in the batches from _makeBlockBatches
+        :param pairs_to_use: dict of target key to pairs
+        :param comparator: CompareAuthors to compare with, one is created if None
+        :param pool: open mp.Pool to compare with when cores is not 1, one is opened for this call if None
+        :return: generator of the list of (target key, compare results) of every batch, in the order they finish
+        """
+        printLogToConsole(self.console_log_level, "Comparing all ambiguous pairs", logging.INFO)
+        self.logger.info("Comparing all ambiguous pairs")
+        if comparator is None:
+            comparator = self._createComparator()
+        batches = self._makeBlockBatches(pairs_to_use)
+        self.logger.debug("Comparing {} targets in {} batches".format(len(pairs_to_use), len(batches)))
         if self.cores == 1:
             self.logger.debug("Using 1 core")
-            pbar = tqdm(total=len(pairs_to_use), file=sys.stdout)
-            for k, pairs in pairs_to_use.items():
-                target, compare_results = self._compareAuthors([comparator, k, pairs])
-                out[target] = compare_results
-                pbar.update()
-            pbar.close()
-            return out
+            for batch in tqdm(batches, file=sys.stdout):
+                yield self._compareBlock([comparator, batch])
         else:
             self.logger.debug("Using {} cores".format(self.cores))
-            args = [[comparator, k, pairs] for k, pairs in pairs_to_use.items()]
-            with mp.Pool(self.cores) as Pool:
-                imap_results = list(
-                    tqdm(Pool.imap_unordered(self._compareAuthors, args), total=len(args), file=sys.stdout))
-            for k, res in imap_results:
-                out[k] = res
-            return out
+            args = [[comparator, batch] for batch in batches]
+            if pool is not None:
+                yield from tqdm(pool.imap_unordered(self._compareBlock, args), total=len(args), file=sys.stdout)
+            else:
+                with mp.Pool(self.cores) as Pool:
+                    yield from tqdm(Pool.imap_unordered(self._compareBlock, args), total=len(args), file=sys.stdout)
+
+    def _compareAndPredict(self, pairs_to_use):
+        """
+        Same results as _compareAmbiguousPairs, _consolidateResults and _makePredictions, but the compare results of
+        every batch are sent to inference_cores workers as soon as the batch is compared, so they are predicted while
+        the next batches are compared
+        :param pairs_to_use: dict of target key to pairs
+        :return: predictions, probabilities
+        """
+        printLogToConsole(self.console_log_level,
+                          "Predicting same authors with {} cores while comparing".format(self.inference_cores),
+                          logging.INFO)
+        self.logger.info("Predicting same authors with {} cores while comparing".format(self.inference_cores))
+        # (target key, other id) to the block and rows of its results
+        locations = {}
+        blocks = []
+        with InferencePool(self.model, self.inference_cores) as inference:
+            for block_results in self._iterCompareBlocks(pairs_to_use):
+                rows = []
+                for k, res in block_results:
+                    for other_id, id_results in res.items():
+                        if any([1 for x in id_results if len(x) != self.compare_terms]):
+                            self.logger.error("A compare result from {}-{} does not have the correct number of "
+                                              "terms".format(keyToString(k), other_id))
+                            raise ValueError("Compare results length does not match comparator's result length")
+                        locations[k, other_id] = (len(blocks), len(rows), len(rows) + len(id_results))
+                        rows.extend(id_results)
+                blocks.append(inference.submit(np.array(rows, dtype=float).reshape(len(rows), self.compare_terms)))
+            self.logger.debug("Waiting for the predictions of {} blocks".format(len(blocks)))
+            outputs = [b.result() for b in blocks]
+
+        # Every id's results are in the order _consolidateResults puts them in
+        predictions = defaultdict(lambda: defaultdict(list))
+        probabilities = defaultdict(lambda: defaultdict(list))
+        for (k, other_id), (block, start, end) in locations.items():
+            block_predictions, block_probabilities = outputs[block]
+            _, k_id = k
+            predictions[k_id][other_id].extend(block_predictions[start:end].tolist())
+            if block_probabilities is not None:
+                probabilities[k_id][other_id].extend(block_probabilities[start:end].tolist())
+        if not inference.has_probabilities:
+            self.logger.warning("Could not get probabilities, the model does not have predict_proba")
+        predictions = defaultdict(dict, {k: dict(v) for k, v in predictions.items()})
+        probabilities = defaultdict(dict, {k: dict(v) for k, v in probabilities.items()})
+        return predictions, probabilities
+
+    def _makeBlockBatches(self, pairs_to_use):
+        """
+        Group the pairs by the name block of their target so that each candidate info is only sent to a worker and
+        preprocessed once per block. If there are fewer blocks than cores, blocks are split so every core is used
+        :param pairs_to_use: dict of target key to pairs
+        :return: list of dicts of target key to pairs
+        """
+        blocks = defaultdict(list)
+        for k in pairs_to_use.keys():
+            _, k_id = k
+            blocks[self.name_blocks.get(k_id, remove_numbers.sub("", k_id))].append(k)
+        splits = 1
+        if 0 < len(blocks) < self.cores:
+            splits = -(-self.cores // len(blocks))
+        batches = []
+        for block, keys in blocks.items():
+            for chunk in chunks(keys, -(-len(keys) // splits)):
+                batches.append({k: pairs_to_use[k] for k in chunk})
+        return batches
+
+    @staticmethod
+    def _compareBlock(args):
+        comparator, batch = args
+        return [AuthorDisambiguation._compareAuthors([comparator, k, pairs]) for k, pairs in batch.items()]
+
+    @staticmethod
+    def _makeNameBlocks(targets, target_names):
+        """
+        Targets created from the same id (i.e. yang-liu1, yang-liu2) with the same name are in the same block
+        :param targets: list of target ids
+        :param target_names: dict of target id to cleaned name
+        :return: dict of target id to its block
+        """
+        return {a: remove_numbers.sub("", a) + " " + target_names[a] for a in targets}
 
     def _removeKnownDifferent(self, pairs, excluded):
         fixed_pairs = {}
@@ -662,25 +926,26 @@ class AuthorDisambiguation:
         for k, info in excluded.items():
             if len(info) == 0:
                 continue
-            _, k_id = k.split(" ")
+            _, k_id = k
             if k_id not in known_different:
                 known_different[k_id] = set()
             for a in info:
-                _, a_id = a.split(" ")
+                _, a_id = a
                 known_different[k_id].add(a_id)
         for k in known_different.keys():
             known_different[k] = list(known_different[k])
         self.logger.debug("Removing pairs that have the excluded authors")
         for k, info in pairs.items():
-            pid, k_id = k.split(" ")
+            pid, k_id = k
             if k_id not in known_different:
                 fixed_pairs[k] = info
                 continue
             fixed_pairs[k] = []
             for pair in info:
-                p1, a, p2, b = pair[0].split(' ')
+                p1, a, p2, b = pair[0]
                 if p1 != pid or a != k_id:
-                    raise ValueError("Pairs[{}] has a pair that has {} as the first value".format(k, " ".join([p1, a])))
+                    raise ValueError("Pairs[{}] has a pair that has {} as the first value".format(keyToString(k),
+                                                                                                  keyToString((p1, a))))
                 if b not in known_different[k_id]:
                     fixed_pairs[k].append(pair)
                 else:
@@ -693,7 +958,7 @@ class AuthorDisambiguation:
         out = {}
         pbar = tqdm(total=len(compare_results), file=sys.stdout)
         for k, results in compare_results.items():
-            pid, k_id = k.split(" ")
+            pid, k_id = k
             if k_id not in out:
                 out[k_id] = defaultdict(list)
             for _id, id_results in results.items():
@@ -747,3 +1012,234 @@ class AuthorDisambiguation:
         pbar.close()
 
         return predictions, probabilities
+
+    def _cascadeFilter(self, pairs_to_use):
+        """
+        Run the cheap first stage of the cascade on every pair
+        :param pairs_to_use: dict of target key to list of pairs, same as what _compareAmbiguousPairs takes
+        :return: the pairs that passed, the pairs that were rejected, and the cascade scores for every pair in
+        pairs_to_use in the same order
+        """
+        printLogToConsole(self.console_log_level, "Running the first stage of the cascade", logging.INFO)
+        self.logger.info("Running the first stage of the cascade")
+        kept = {}
+        rejected = {}
+        scores = {}
+        total_pairs = 0
+        total_rejected = 0
+        pbar = tqdm(total=len(pairs_to_use), file=sys.stdout)
+        for k, pairs in pairs_to_use.items():
+            kept[k] = []
+            rejected[k] = []
+            scores[k] = []
+            for pair in pairs:
+                score = self.cascade(pair[1], pair[2])
+                scores[k].append(score)
+                if self.cascade.keep(score):
+                    kept[k].append(pair)
+                else:
+                    rejected[k].append(pair)
+            total_pairs += len(pairs)
+            total_rejected += len(rejected[k])
+            pbar.update()
+        pbar.close()
+        self.logger.debug("Cascade rejected {} of {} pairs".format(total_rejected, total_pairs))
+        return kept, rejected, scores
+
+    @staticmethod
+    def _addRejectedVotes(rejected, predictions, probabilities):
+        """
+        Pairs rejected by the cascade count as a vote for different, so that the vote fractions in
+        _determineCorrectAuthor stay the same as if the model had predicted different for them
+        """
+        for k, pairs in rejected.items():
+            _, k_id = k
+            for pair in pairs:
+                _, _, _, b_id = pair[0]
+                predictions[k_id].setdefault(b_id, []).append(0)
+                probabilities[k_id].setdefault(b_id, []).append([1.0, 0.0])
+
+    def _evaluateCascade(self, pairs_to_use, cascade_scores):
+        """
+        Compare the cascade to full scoring by running the full comparison and the model on every pair. Used in
+        evaluation mode to tune cascade_threshold
+        :param pairs_to_use: every pair, before the cascade was ran
+        :param cascade_scores: scores from _cascadeFilter
+        :return: dict of the stats
+        """
+        printLogToConsole(self.console_log_level, "Evaluating the cascade against full scoring", logging.INFO)
+        self.logger.info("Evaluating the cascade against full scoring")
+        compare_results = self._compareAmbiguousPairs(pairs_to_use)
+        scores = []
+        vectors = []
+        pair_ids = []
+        for k, pairs in pairs_to_use.items():
+            _, k_id = k
+            id_results = {b_id: iter(results) for b_id, results in compare_results[k].items()}
+            for pair, score in zip(pairs, cascade_scores[k]):
+                _, _, _, b_id = pair[0]
+                vectors.append(next(id_results[b_id]))
+                scores.append(score)
+                pair_ids.append((k_id, b_id))
+        if not vectors:
+            self.logger.warning("No pairs to evaluate the cascade on")
+            return {}
+        scores = np.asarray(scores)
+        vectors = np.asarray(vectors)
+        full_predictions = self.model.predict(vectors)
+        if self.use_probabilities:
+            full_votes = self.model.predict_proba(vectors)[:, 1]
+        else:
+            full_votes = full_predictions
+        cascade_votes = np.where(scores >= self.cascade.threshold, full_votes, 0)
+
+        full_results = defaultdict(lambda: defaultdict(list))
+        cascade_results = defaultdict(lambda: defaultdict(list))
+        for (k_id, b_id), full_vote, cascade_vote in zip(pair_ids, full_votes.tolist(), cascade_votes.tolist()):
+            full_results[k_id][b_id].append(full_vote)
+            cascade_results[k_id][b_id].append(cascade_vote)
+        changed_decisions = 0
+        for k_id in full_results.keys():
+            full_correct, _ = self._determineCorrectAuthor(full_results[k_id])
+            cascade_correct, _ = self._determineCorrectAuthor(cascade_results[k_id])
+            if full_correct != cascade_correct:
+                self.logger.debug("Cascade changed {} from {} to {}".format(k_id, full_correct, cascade_correct))
+                changed_decisions += 1
+
+        report = {
+            "pairs": int(scores.shape[0]),
+            "rejected": int(np.sum(scores < self.cascade.threshold)),
+            "recall_loss": self.cascade.recallLoss(scores, full_predictions, self.cascade.threshold),
+            "changed_decisions": changed_decisions,
+            "calibrated_threshold": self.cascade.calibrate(scores, full_predictions, self.cascade_target_recall)
+        }
+        printStats("Cascade vs Full Scoring", [
+            ["Pairs", report["pairs"]],
+            ["Rejected", report["rejected"]],
+            ["Pair recall loss", report["recall_loss"]],
+            ["Changed decisions", report["changed_decisions"]],
+            ["Threshold for {:.2f} recall".format(self.cascade_target_recall), report["calibrated_threshold"]]
+        ], line_adaptive=True)
+        for k, v in report.items():
+            self.logger.info("cascade {}={}".format(k, v))
+        return report
+
+    def _pruneCandidates(self, votes, totals, active):
+        """
+        Find which ids can still change the decision for a target. Each vote is between 0 and 1, so with s being the
+        sum of the votes seen so far, n the total number of pairs, and k the number of votes seen, the final vote
+        fraction of an id is in [s/n, (s+n-k)/n].
+        :param votes: dict of id to the list of votes seen so far
+        :param totals: dict of id to the total number of pairs for that id
+        :param active: list of ids that still have pairs to compare
+        :return: ids that are still active, ids that were dropped
+        """
+        bounds = {}
+        for b_id, total in totals.items():
+            seen_sum = sum(votes.get(b_id, []))
+            unseen = total - len(votes.get(b_id, []))
+            bounds[b_id] = [seen_sum, seen_sum + unseen, seen_sum / total, (seen_sum + unseen) / total]
+
+        # Ids that are guaranteed to be above the threshold
+        leaders = [b_id for b_id, b in bounds.items() if b[2] * 100 > self.threshold * 100]
+        leader_value = None
+        if leaders and self.tie_breaker == "max":
+            leader_value = max(bounds[x][0] for x in leaders)
+        elif leaders and self.tie_breaker == "max_percent":
+            leader_value = max(bounds[x][2] for x in leaders)
+
+        still_active = []
+        dropped = []
+        for b_id in active:
+            min_sum, max_sum, min_percent, max_percent = bounds[b_id]
+            if max_percent * 100 <= self.threshold * 100:
+                dropped.append(b_id)
+            elif leader_value is not None and self.tie_breaker == "max" and max_sum < leader_value:
+                dropped.append(b_id)
+            elif leader_value is not None and self.tie_breaker == "max_percent" and max_percent < leader_value:
+                dropped.append(b_id)
+            else:
+                still_active.append(b_id)
+        return still_active, dropped
+
+    def _streamVotes(self, pairs_to_use, rejected=None):
+        """
+        Compare and predict pairs in batches of stream_batch_size pairs per id, dropping ids with _pruneCandidates
+        after every batch. The unseen pairs of dropped ids are counted as votes for different, which does not change
+        the decision made by _determineCorrectAuthor, but their percent_same is the lower bound.
+        :param pairs_to_use: dict of target key to list of pairs
+        :param rejected: pairs rejected by the cascade, these count as votes for different
+        :return: dict of target id to dict of id to votes, same as to_use in __call__
+        """
+        printLogToConsole(self.console_log_level, "Comparing and predicting with early stopping", logging.INFO)
+        self.logger.info("Comparing and predicting with early stopping")
+        remaining = defaultdict(lambda: defaultdict(list))
+        votes = defaultdict(lambda: defaultdict(list))
+        for k, pairs in pairs_to_use.items():
+            _, k_id = k
+            for pair in pairs:
+                _, _, _, b_id = pair[0]
+                remaining[k_id][b_id].append([k, pair])
+        if rejected:
+            for k, pairs in rejected.items():
+                _, k_id = k
+                for pair in pairs:
+                    _, _, _, b_id = pair[0]
+                    votes[k_id][b_id].append(0)
+        totals = {}
+        active = {}
+        for k_id in set(remaining.keys()) | set(votes.keys()):
+            b_ids = set(remaining[k_id].keys()) | set(votes[k_id].keys())
+            totals[k_id] = {b_id: len(remaining[k_id][b_id]) + len(votes[k_id][b_id]) for b_id in b_ids}
+            active[k_id] = [b_id for b_id in b_ids if remaining[k_id][b_id]]
+
+        pairs_total = sum(len(x) for x in pairs_to_use.values())
+        pairs_compared = 0
+        batches = 0
+        # Creating the comparator builds its tf-idf models and starting a pool forks the workers, both cost more than
+        # comparing a small batch, so every batch uses the same ones
+        comparator = self._createComparator()
+        pool = mp.Pool(self.cores) if self.cores != 1 else None
+        try:
+            while any(active.values()):
+                batches += 1
+                to_compare = defaultdict(list)
+                for k_id, b_ids in active.items():
+                    for b_id in b_ids:
+                        for k, pair in remaining[k_id][b_id][:self.stream_batch_size]:
+                            to_compare[k].append(pair)
+                            pairs_compared += 1
+                        remaining[k_id][b_id] = remaining[k_id][b_id][self.stream_batch_size:]
+                self.logger.debug("Batch {} has {} pairs".format(batches, sum(len(x) for x in to_compare.values())))
+                compare_results = self._compareAmbiguousPairs(to_compare, comparator, pool)
+                compare_results = self._consolidateResults(compare_results)
+                predictions, probabilities = self._makePredictions(compare_results)
+                for k_id, b_predictions in predictions.items():
+                    for b_id, b_votes in b_predictions.items():
+                        if self.use_probabilities:
+                            b_votes = [y[1] for y in probabilities[k_id][b_id]]
+                        votes[k_id][b_id].extend(b_votes)
+
+                for k_id in active.keys():
+                    if not active[k_id]:
+                        continue
+                    still_active, dropped = self._pruneCandidates(votes[k_id], totals[k_id], active[k_id])
+                    for b_id in dropped:
+                        self.logger.debug("Stopped comparing {} to {} after {} of {} pairs".format(
+                            k_id, b_id, len(votes[k_id][b_id]), totals[k_id][b_id]))
+                    active[k_id] = [b_id for b_id in still_active if remaining[k_id][b_id]]
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+        out = {}
+        for k_id, b_totals in totals.items():
+            out[k_id] = {}
+            for b_id, total in b_totals.items():
+                b_votes = votes[k_id][b_id]
+                out[k_id][b_id] = b_votes + [0] * (total - len(b_votes))
+        self.pairs_compared = pairs_compared
+        self.logger.info("Early stopping compared {} of {} pairs in {} batches".format(pairs_compared, pairs_total,
+                                                                                      batches))
+        return out
@@ -0,0 +1,207 @@
+from collections import Counter
+from src.create_training_data import getAuthorInfo
+from src.pair_keys import authorKey
+from src.utility_functions import convertPaperToSortable
+
+
+class AuthorProfile:
+    """
+    Aggregate of every paper an author id has. Instead of keeping one author info per paper, it keeps the counts of
+    the values that CompareAuthors uses (co-authors, orgs, emails, venues, years, title/citation/section vocab) so that
+    a target can be compared to an author once instead of once per paper.
+
+    Profiles are updated incrementally with addInfo/addPaper, and asAuthorInfo() turns the profile back into the same
+    format as getAuthorInfo so it can be passed to CompareAuthors.
+    """
+
+    def __init__(self, author_id):
+        self.author_id = author_id
+        self.papers = []
+        self.years = {}
+        self.names = Counter()
+        self.co_authors = Counter()
+        self.co_author_info = {}
+        self.orgs = Counter()
+        self.aff_types = Counter()
+        self.email_users = Counter()
+        self.email_domains = Counter()
+        self.departments = Counter()
+        self.addresses = Counter()
+        self.venues = Counter()
+        self.title_vocab = Counter()
+        self.citation_vocab = Counter()
+        self.citation_authors = Counter()
+        self.section_vocab = Counter()
+
+    def __len__(self):
+        return len(self.papers)
+
+    def __contains__(self, pid):
+        return pid in self.years
+
+    @property
+    def year_range(self):
+        if not self.years:
+            return None, None
+        return min(self.years.values()), max(self.years.values())
+
+    def addPaper(self, paper):
+        """
+        Add a Paper to the profile
+        :param paper: Paper object that has author_id as an author
+        """
+        _, info = getAuthorInfo([paper, self.author_id])
+        self.addInfo(info)
+
+    def addInfo(self, info):
+        """
+        Add an author info created by getAuthorInfo to the profile. Adding a paper that is already in the profile
+        does nothing.
+        :param info: dict from getAuthorInfo
+        """
+        pid = info["pid"]
+        if pid in self.years:
+            return
+        self.papers.append(pid)
+        self.years[pid] = convertPaperToSortable(pid, True)
+        self.venues[pid[0]] += 1
+        self.names[info["name"]] += 1
+
+        for i, name in enumerate(info["co_authors_name"]):
+            self.co_authors[name] += 1
+            self.co_author_info[name] = [
+                info["co_authors_id"][i],
+                info["co_authors_email"][i],
+                info["co_authors_aff_type"][i],
+                info["co_authors_aff"][i]
+            ]
+
+        if info["aff_name"]:
+            self.orgs[info["aff_name"]] += 1
+        if info["aff_type"]:
+            self.aff_types[info["aff_type"]] += 1
+        if info["email_user"]:
+            self.email_users[info["email_user"]] += 1
+        if info["email_domain"]:
+            self.email_domains[info["email_domain"]] += 1
+        for d in info["department"]:
+            self.departments[d] += 1
+        if info["address"]:
+            address = tuple(info["address"].get(k) for k in ["postCode", "settlement", "country"])
+            if any(address):
+                self.addresses[address] += 1
+
+        self.title_vocab.update(info["title_tokenized"])
+        self.citation_vocab.update(info["citations_tokenized"])
+        self.section_vocab.update(info["sections_tokenized"])
+        for c in info["citations"]:
+            self.citation_authors.update(c["authors"])
+
+    def _representativePaper(self, target_pid=None):
+        if target_pid is None:
+            return max(self.papers, key=lambda p: self.years[p])
+        target_year = convertPaperToSortable(target_pid, True)
+        return min(self.papers,
+                   key=lambda p: (abs(self.years[p] - target_year), p[0] != target_pid[0], -self.years[p]))
+
+    @staticmethod
+    def _mostCommon(counter):
+        if not counter:
+            return None
+        return counter.most_common(1)[0][0]
+
+    def asAuthorInfo(self, target_pid=None, max_co_authors=None):
+        """
+        Create an author info in the getAuthorInfo format from the profile
+        :param target_pid: pid of the paper the profile will be compared to. The profile's pid is set to its paper
+        closest in year (and then venue) to it, otherwise the most recent paper is used
+        :param max_co_authors: Only use the most frequent co-authors
+        :return: pair key, author info dict
+        """
+        if not self.papers:
+            raise ValueError("{} has no papers in its profile".format(self.author_id))
+        pid = self._representativePaper(target_pid)
+        co_authors = [x[0] for x in self.co_authors.most_common(max_co_authors)]
+        email_user = self._mostCommon(self.email_users)
+        address = self._mostCommon(self.addresses)
+        out = {
+            "pid": pid,
+            "name": self._mostCommon(self.names),
+            "co_authors_id": [self.co_author_info[x][0] for x in co_authors],
+            "co_authors_name": co_authors,
+            "co_authors_email": [self.co_author_info[x][1] for x in co_authors],
+            "co_authors_aff_type": [self.co_author_info[x][2] for x in co_authors],
+            "co_authors_aff": [self.co_author_info[x][3] for x in co_authors],
+            "email_user": email_user,
+            "email_domain": self._mostCommon(self.email_domains),
+            "aff_type": self._mostCommon(self.aff_types),
+            "aff_name": self._mostCommon(self.orgs),
+            "department": [x[0] for x in self.departments.most_common()],
+            "address": dict(zip(["postCode", "settlement", "country"], address)) if address else {},
+            "title": None,
+            "title_tokenized": list(self.title_vocab.keys()),
+            "citations": [{"authors": list(self.citation_authors.keys())}] if self.citation_authors else [],
+            "citations_tokenized": list(self.citation_vocab.keys()),
+            "sections": {},
+            "sections_tokenized": list(self.section_vocab.keys())
+        }
+        return authorKey(pid, self.author_id), out
+
+
+class AuthorProfiles:
+    """
+    Collection of AuthorProfile keyed by author id.
+    """
+
+    def __init__(self, papers, author_papers):
+        """
+        :param papers: dict of pid to Paper
+        :param author_papers: dict of author id to the list of pids they have
+        """
+        self.papers = papers
+        self.author_papers = author_papers
+        self.profiles = {}
+        self.missing_papers = 0
+
+    def __contains__(self, author_id):
+        return author_id in self.profiles
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def __getitem__(self, author_id):
+        if author_id not in self.profiles:
+            self.build([author_id])
+        return self.profiles[author_id]
+
+    def build(self, authors):
+        """
+        Create the profiles for authors that do not already have one
+        :param authors: list of author ids
+        """
+        for a in authors:
+            if a in self.profiles:
+                continue
+            if a not in self.author_papers:
+                raise KeyError("{} is not in author_papers".format(a))
+            profile = AuthorProfile(a)
+            for p in self.author_papers[a]:
+                if p not in self.papers or a not in self.papers[p].affiliations:
+                    self.missing_papers += 1
+                    continue
+                profile.addPaper(self.papers[p])
+            self.profiles[a] = profile
+
+    def addPaper(self, paper):
+        """
+        Add a new paper to the profiles of each of its authors that already have a profile
+        :param paper: Paper object
+        """
+        self.papers[paper.pid] = paper
+        for a in paper.authors.keys():
+            if a not in self.author_papers:
+                self.author_papers[a] = []
+            if paper.pid not in self.author_papers[a]:
+                self.author_papers[a].append(paper.pid)
+            if a in self.profiles and a in paper.affiliations:
+                self.profiles[a].addPaper(paper)
@@ -0,0 +1,227 @@
+from collections.abc import Mapping, MutableMapping
+from copy import deepcopy
+import os
+import numpy as np
+import ujson
+
+
+def _csr(rows, cols, row_count):
+    """
+    Group cols by rows, keeping the original order of cols within each row
+    :return: indptr, cols sorted by row
+    """
+    order = np.argsort(rows, kind="stable")
+    indptr = np.zeros(row_count + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(np.bincount(rows, minlength=row_count))
+    return indptr, cols[order].astype(np.int32)
+
+
+class AuthorshipIndex(Mapping):
+    """
+    Read only index of who wrote what. Authors and pids are stored once in interning tables and the authorships are
+    two CSR arrays, author id to paper ids and paper id to author ids, so looking up either side is a slice.
+
+    It can be used anywhere author_papers (dict of author to list of pids) is read. Use overlay to get a mutable view
+    for adding temporary targets without copying the index.
+    """
+
+    def __init__(self, authors, pids, author_indptr, author_paper_ids):
+        """
+        :param authors: list of author ids, the index of an author is their integer id
+        :param pids: list of pids, the index of a pid is its integer id
+        :param author_indptr: author_paper_ids[author_indptr[i]:author_indptr[i+1]] are the papers of author i
+        :param author_paper_ids: paper ids of every authorship
+        """
+        self.authors = list(authors)
+        self.pids = list(pids)
+        self.author_ids = {a: i for i, a in enumerate(self.authors)}
+        self.pid_ids = {p: i for i, p in enumerate(self.pids)}
+        self.author_indptr = np.asarray(author_indptr, dtype=np.int64)
+        self.author_paper_ids = np.asarray(author_paper_ids, dtype=np.int32)
+
+        rows = np.repeat(np.arange(len(self.authors), dtype=np.int32), np.diff(self.author_indptr))
+        self.paper_indptr, self.paper_author_ids = _csr(self.author_paper_ids, rows, len(self.pids))
+        # Each author's paper ids in sorted order for membership checks
+        self._sorted_paper_ids = self.author_paper_ids[np.lexsort((self.author_paper_ids, rows))]
+
+    @classmethod
+    def fromAuthorPapers(cls, author_papers):
+        """
+        :param author_papers: dict of author id to list of pids
+        :return: AuthorshipIndex
+        """
+        pid_ids = {}
+        author_indptr = np.zeros(len(author_papers) + 1, dtype=np.int64)
+        author_paper_ids = []
+        for i, papers in enumerate(author_papers.values()):
+            for p in papers:
+                author_paper_ids.append(pid_ids.setdefault(p, len(pid_ids)))
+            author_indptr[i + 1] = len(author_paper_ids)
+        return cls(list(author_papers.keys()), list(pid_ids.keys()), author_indptr, author_paper_ids)
+
+    @classmethod
+    def fromPapers(cls, papers):
+        """
+        Index every author with an affiliation entry in each paper, the same authors PDFParser puts in author_papers
+        :param papers: dict of pid to Paper
+        :return: AuthorshipIndex
+        """
+        author_ids = {}
+        rows = []
+        cols = []
+        pids = list(papers.keys())
+        for j, paper in enumerate(papers.values()):
+            for a in paper.affiliations.keys():
+                rows.append(author_ids.setdefault(a, len(author_ids)))
+                cols.append(j)
+        author_indptr, author_paper_ids = _csr(np.array(rows, dtype=np.int32), np.array(cols, dtype=np.int32),
+                                               len(author_ids))
+        return cls(list(author_ids.keys()), pids, author_indptr, author_paper_ids)
+
+    def save(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(path, authors=np.array(ujson.dumps(self.authors)), pids=np.array(ujson.dumps(self.pids)),
+                 author_indptr=self.author_indptr, author_paper_ids=self.author_paper_ids)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(ujson.loads(str(data["authors"])), ujson.loads(str(data["pids"])), data["author_indptr"],
+                       data["author_paper_ids"])
+
+    def paperIdsOf(self, author_id):
+        return self.author_paper_ids[self.author_indptr[author_id]:self.author_indptr[author_id + 1]]
+
+    def authorIdsOf(self, paper_id):
+        return self.paper_author_ids[self.paper_indptr[paper_id]:self.paper_indptr[paper_id + 1]]
+
+    def papersOf(self, author):
+        """
+        :return: list of the author's pids, in the order they were indexed
+        """
+        return [self.pids[i] for i in self.paperIdsOf(self.author_ids[author]).tolist()]
+
+    def authorsOf(self, pid):
+        """
+        :return: list of the author ids on a paper
+        """
+        return [self.authors[i] for i in self.authorIdsOf(self.pid_ids[pid]).tolist()]
+
+    def hasPaper(self, author, pid):
+        if author not in self.author_ids or pid not in self.pid_ids:
+            return False
+        author_id = self.author_ids[author]
+        start, end = self.author_indptr[author_id], self.author_indptr[author_id + 1]
+        paper_id = self.pid_ids[pid]
+        i = start + np.searchsorted(self._sorted_paper_ids[start:end], paper_id)
+        return i < end and self._sorted_paper_ids[i] == paper_id
+
+    def coAuthorIds(self, author_id):
+        paper_ids = self.paperIdsOf(author_id)
+        if len(paper_ids) == 0:
+            return np.array([], dtype=np.int32)
+        co_authors = np.unique(np.concatenate([self.authorIdsOf(p) for p in paper_ids.tolist()]))
+        return co_authors[co_authors != author_id]
+
+    def coAuthors(self, author):
+        """
+        :return: set of every author that wrote a paper with author
+        """
+        return {self.authors[i] for i in self.coAuthorIds(self.author_ids[author]).tolist()}
+
+    def sharedPapers(self, author_a, author_b):
+        """
+        :return: set of pids both authors wrote
+        """
+        shared = np.intersect1d(self.paperIdsOf(self.author_ids[author_a]), self.paperIdsOf(self.author_ids[author_b]))
+        return {self.pids[i] for i in shared.tolist()}
+
+    def sharedCoAuthors(self, author_a, author_b):
+        """
+        :return: set of the authors that have written with both authors
+        """
+        shared = np.intersect1d(self.coAuthorIds(self.author_ids[author_a]),
+                                self.coAuthorIds(self.author_ids[author_b]))
+        return {self.authors[i] for i in shared.tolist()}
+
+    def overlay(self):
+        """
+        :return: AuthorshipOverlay over this index
+        """
+        return AuthorshipOverlay(self)
+
+    def __getitem__(self, author):
+        return self.papersOf(author)
+
+    def __contains__(self, author):
+        return author in self.author_ids
+
+    def __iter__(self):
+        return iter(self.authors)
+
+    def __len__(self):
+        return len(self.authors)
+
+
+class AuthorshipOverlay(MutableMapping):
+    """
+    Mutable author_papers view of an AuthorshipIndex. Changes are kept in the overlay and never change the index, an
+    author's list of pids is only copied out of the index when it is accessed, so it can be changed in place.
+    Copying an overlay only copies the changes.
+    """
+
+    def __init__(self, base, changed=None, removed=None):
+        self.base = base
+        self._changed = changed if changed is not None else {}
+        self._removed = removed if removed is not None else set()
+
+    def __getitem__(self, author):
+        if author in self._changed:
+            return self._changed[author]
+        if author in self._removed or author not in self.base:
+            raise KeyError(author)
+        papers = self._changed[author] = self.base.papersOf(author)
+        return papers
+
+    def __setitem__(self, author, papers):
+        self._removed.discard(author)
+        self._changed[author] = papers
+
+    def __delitem__(self, author):
+        if author not in self:
+            raise KeyError(author)
+        self._changed.pop(author, None)
+        if author in self.base:
+            self._removed.add(author)
+
+    def __contains__(self, author):
+        if author in self._changed:
+            return True
+        return author not in self._removed and author in self.base
+
+    def __iter__(self):
+        for a in self.base:
+            if a not in self._removed:
+                yield a
+        for a in list(self._changed.keys()):
+            if a not in self.base:
+                yield a
+
+    def __len__(self):
+        return len(self.base) - len(self._removed) + len([a for a in self._changed if a not in self.base])
+
+    def overlay(self):
+        return AuthorshipOverlay(self.base, {k: list(v) for k, v in self._changed.items()}, set(self._removed))
+
+    def __deepcopy__(self, memo):
+        return AuthorshipOverlay(self.base, deepcopy(self._changed, memo), set(self._removed))
+
+
+def copyAuthorPapers(author_papers):
+    """
+    Copy author_papers so it can be changed, indexes are not copied and get an overlay instead
+    """
+    if isinstance(author_papers, (AuthorshipIndex, AuthorshipOverlay)):
+        return author_papers.overlay()
+    return deepcopy(author_papers)
@@ -0,0 +1,125 @@
+import numpy as np
+from src.compare_authors import CompareAuthors, getAlgo, nameScores, initialsScore
+from src.utility_functions import convertPaperToSortable
+
+
+class CascadeScorer:
+    """
+    First stage of the cascade used by AuthorDisambiguation. It scores a pair of author infos using only the cheap
+    terms of CompareAuthors (name, initials, org type, email domain, co-authors and year) so that clear non-matches
+    can be rejected before the full comparison and the model are run on them.
+
+    The cheap terms are calculated the exact same way CompareAuthors calculates them, so the scorer can also be
+    calibrated on already compared pairs (e.g. tagged_pairs.pickle) with scoreCompareResults()
+    """
+    cheap_terms = [
+        "first_name_score",
+        "initials_score",
+        "org_type_score",
+        "email_domain_score",
+        "co_auth_score",
+        "year_dif"
+    ]
+    default_weights = {
+        "first_name_score": 1.0,
+        "initials_score": 1.0,
+        "org_type_score": .5,
+        "email_domain_score": 1.0,
+        "co_auth_score": 1.0,
+        "year_dif": 1.0
+    }
+
+    def __init__(self, threshold=.5, weights=None, year_window=10, str_algorithm=None):
+        """
+        :param threshold: Pairs with a score below this are rejected
+        :param weights: dict of weights for each of the cheap terms, missing terms use the default weight
+        :param year_window: Number of years apart after which the year term is 0
+        :param str_algorithm: string similarity function, defaults to jaro similarity
+        """
+        self.threshold = threshold
+        self.weights = dict(self.default_weights)
+        if weights:
+            for k, w in weights.items():
+                if k not in self.weights:
+                    raise KeyError("{} is not a cheap term".format(k))
+                self.weights[k] = w
+        self.weight_array = np.asarray([self.weights[k] for k in self.cheap_terms], dtype=float)
+        self.year_window = year_window
+        self.algorithm = str_algorithm if str_algorithm is not None else getAlgo("jaro", "similarity")
+
+    def features(self, a, b):
+        """
+        Get the raw cheap terms for two author infos
+        :param a: author info for author a
+        :param b: author info for author b
+        :return: list of the values in the order of cheap_terms
+        """
+        name_a = a["name"].split(" ")
+        name_b = b["name"].split(" ")
+        first_name_score, _, _ = nameScores(name_a, name_b, self.algorithm)
+        initials_score = initialsScore(name_a, name_b)
+        org_type_score = 1 if a["aff_type"] == b["aff_type"] else 0
+        email_domain_score = 0
+        if a["email_domain"] and b["email_domain"]:
+            email_domain_score = self.algorithm(a["email_domain"], b["email_domain"])
+        co_auth_score = CompareAuthors._sharedInLists(a["co_authors_name"], b["co_authors_name"])
+        year_dif = abs(convertPaperToSortable(a["pid"], True) - convertPaperToSortable(b["pid"], True))
+        return [first_name_score, initials_score, org_type_score, email_domain_score, co_auth_score, year_dif]
+
+    def scoreFeatures(self, features):
+        """
+        Turn raw cheap terms into scores
+        :param features: array of shape [n, len(cheap_terms)] or a single list of the terms
+        :return: np.array of n scores between 0 and 1
+        """
+        features = np.array(features, dtype=float, ndmin=2)
+        normalized = np.clip(features, 0, 1)
+        normalized[:, 5] = np.clip(1 - features[:, 5] / self.year_window, 0, 1)
+        return normalized.dot(self.weight_array) / self.weight_array.sum()
+
+    def scoreCompareResults(self, compare_results):
+        """
+        Score vectors that were already created by CompareAuthors
+        :param compare_results: array of shape [n, len(CompareAuthors.compare_terms)]
+        :return: np.array of n scores
+        """
+        compare_results = np.array(compare_results, dtype=float, ndmin=2)
+        columns = [CompareAuthors.compare_terms.index(x) for x in self.cheap_terms]
+        return self.scoreFeatures(compare_results[:, columns])
+
+    def __call__(self, a, b):
+        return float(self.scoreFeatures(self.features(a, b))[0])
+
+    def keep(self, score):
+        return score >= self.threshold
+
+    @staticmethod
+    def recallLoss(scores, tags, threshold):
+        """
+        Fraction of the same pairs that would be rejected at threshold
+        :param scores: cascade scores
+        :param tags: 1 if the pair is the same, 0 otherwise. These can be the tags from the full model
+        :param threshold: threshold to check
+        :return: recall loss between 0 and 1
+        """
+        scores = np.asarray(scores, dtype=float)
+        same = scores[np.asarray(tags) == 1]
+        if same.shape[0] == 0:
+            return 0.0
+        return float(np.sum(same < threshold) / same.shape[0])
+
+    @staticmethod
+    def calibrate(scores, tags, target_recall=.99):
+        """
+        Find the highest threshold that keeps at least target_recall of the same pairs
+        :param scores: cascade scores
+        :param tags: 1 if the pair is the same, 0 otherwise
+        :param target_recall: recall of the same pairs to keep
+        :return: the threshold, or 0 if there are no same pairs
+        """
+        scores = np.asarray(scores, dtype=float)
+        same = np.sort(scores[np.asarray(tags) == 1])
+        if same.shape[0] == 0:
+            return 0.0
+        allowed_loss = int(np.floor(round(same.shape[0] * (1 - target_recall), 6)))
+        return float(same[allowed_loss])
@@ -1,17 +1,10 @@
 import numpy as np
 import shutil
 from tqdm import tqdm
-from scipy.special import comb
-from scipy import spatial
-from sklearn.metrics.pairwise import cosine_similarity
-from src.utility_functions import cleanName, convertPaperToSortable
+from src.utility_functions import cleanName, convertPaperToSortable, getStemmer
 from collections import Counter
 from py_stringmatching.similarity_measure import soft_tfidf
 from textdistance import JaroWinkler
-from copy import deepcopy
-from nltk.stem import PorterStemmer
-
-stemmer = PorterStemmer()
 
 
 def getAlgo(algorithm="jaro", measure="similarity"):
@@ -28,6 +21,63 @@ def getAlgo(algorithm="jaro", measure="similarity"):
         raise ValueError("Recieved invalid argument for algorithm")
 
 
+def nameScores(name_a, name_b, algorithm):
+    """
+    Get the first, middle, and last name similarity scores of two split names
+    :param name_a: list of the words in name a
+    :param name_b: list of the words in name b
+    :param algorithm: string similarity algorithm to use
+    :return: first_name_score, middle_name_score, last_name_score
+    """
+    len_name_a = len(name_a)
+    len_name_b = len(name_b)
+    full_name_count = 2
+    if len_name_a >= full_name_count and len_name_b >= full_name_count:
+        first_name_score = algorithm(name_a[0], name_b[0])
+        last_name_score = algorithm(name_a[-1], name_b[-1])
+        if len_name_a > full_name_count and len_name_b > full_name_count:
+            middle_name_score = algorithm(" ".join(name_a[1:-1]), " ".join(name_b[1:-1]))
+        elif len_name_a == full_name_count and len_name_b == full_name_count:
+            middle_name_score = 1
+        else:
+            middle_name_score = 0
+    else:
+        # They both only have 1 name
+        if len_name_a == len_name_b:
+            first_name_score = 1
+            middle_name_score = 1
+            last_name_score = algorithm(name_a[0], name_b[0])
+        else:
+            first_name_score = 0
+            middle_name_score = 0
+            last_name_score = algorithm(name_a[-1], name_b[-1])
+    return first_name_score, middle_name_score, last_name_score
+
+
+def initialsScore(name_a, name_b):
+    """
+    Score how many initials two split names share, scaled by the difference in their lengths
+    :param name_a: list of the words in name a
+    :param name_b: list of the words in name b
+    :return: the initials score
+    """
+    try:
+        initials_a = [x[0] for x in name_a]
+    except:
+        initials_a = []
+    try:
+        initials_b = [x[0] for x in name_b]
+    except:
+        initials_b = []
+    shared_initials = 0
+    len_ia = len(initials_a)
+    len_ib = len(initials_b)
+    for i in range(min(len_ia, len_ib)):
+        if initials_a[i] == initials_b[i]:
+            shared_initials += 1
+    return shared_initials * min(len_ia, len_ib) / float(max(len_ia, len_ib))
+
+
 class CompareAuthors:
     """
     If you would like to implement your own author comparison, overwrite this class. Things you need for it to work:
@@ -95,7 +145,7 @@ class CompareAuthors:
         """
         Compare two authors, args MUST conatin:
         :param key: The key of the pair
-        :type key: str
+        :type key: tuple
         :param tag: The tag associated with this pair (same or different
         :type tag: int
         :param a: author info for author a
@@ -107,43 +157,8 @@ class CompareAuthors:
         key, tag, a, b = args
         name_a = a["name"].split(" ")
         name_b = b["name"].split(" ")
-        try:
-            initials_a = [x[0] for x in name_a]
-        except:
-            initials_a = []
-        try:
-            initials_b = [x[0] for x in name_b]
-        except:
-            initials_b = []
-        len_name_a = len(name_a)
-        len_name_b = len(name_b)
-        full_name_count = 2
-        if len_name_a >= full_name_count and len_name_b >= full_name_count:
-            first_name_score = self.algorithm(name_a[0], name_b[0])
-            last_name_score = self.algorithm(name_a[-1], name_b[-1])
-            if len_name_a > full_name_count and len_name_b > full_name_count:
-                middle_name_score = self.algorithm(" ".join(name_a[1:-1]), " ".join(name_b[1:-1]))
-            elif len_name_a == full_name_count and len_name_b == full_name_count:
-                middle_name_score = 1
-            else:
-                middle_name_score = 0
-        else:
-            # They both only have 1 name
-            if len_name_a == len_name_b:
-                first_name_score = 1
-                middle_name_score = 1
-                last_name_score = self.algorithm(name_a[0], name_b[0])
-            else:
-                first_name_score = 0
-                middle_name_score = 0
-                last_name_score = self.algorithm(name_a[-1], name_b[-1])
-        shared_initials = 0
-        len_ia = len(initials_a)
-        len_ib = len(initials_b)
-        for i in range(min(len_ia, len_ib)):
-            if initials_a[i] == initials_b[i]:
-                shared_initials += 1
-        initials_score = shared_initials * min(len_ia, len_ib) / float(max(len_ia, len_ib))
+        first_name_score, middle_name_score, last_name_score = nameScores(name_a, name_b, self.algorithm)
+        initials_score = initialsScore(name_a, name_b)
         address_a = a["address"]
         address_b = b["address"]
         address_keys = ["postCode", "settlement", "country"]
@@ -186,10 +201,12 @@ class CompareAuthors:
             b_co_auth_count = 1
 
         co_auth_score = self._sharedInLists(a["co_authors_name"], b["co_authors_name"])
-        a_co_auth_domains = [x[1] for x in a["co_authors_email"]]
-        b_co_auth_domains = [x[1] for x in b["co_authors_email"]]
-        a_co_auth_aff_split = [[stemmer.stem(w) for w in x.split()] if x else [] for x in a["co_authors_aff"]]
-        b_co_auth_aff_split = [[stemmer.stem(w) for w in x.split()] if x else [] for x in b["co_authors_aff"]]
+        prepared_a = self.preprocess(a)
+        prepared_b = self.preprocess(b)
+        a_co_auth_domains = prepared_a["co_authors_domain"]
+        b_co_auth_domains = prepared_b["co_authors_domain"]
+        a_co_auth_aff_split = prepared_a["co_authors_aff_stemmed"]
+        b_co_auth_aff_split = prepared_b["co_authors_aff_stemmed"]
         co_auth_name_scores, co_auth_email_scores, co_auth_aff_scores = self._getCoAuthScores(
             [a["co_authors_name"], b["co_authors_name"]],
             [a_co_auth_domains, b_co_auth_domains],
@@ -240,7 +257,8 @@ class CompareAuthors:
                                                 len(a["co_authors_name"]), len(b["co_authors_name"]))
 
         # department score
-        department_score = self._getDepartmentScore(a["department"], b["department"])
+        department_score = self._getDepartmentScore(a["department"], b["department"],
+                                                    prepared_a["department_stemmed"], prepared_b["department_stemmed"])
 
         # title score
         same_title_words = self._sharedInLists(a["title_tokenized"], b["title_tokenized"])
@@ -250,12 +268,8 @@ class CompareAuthors:
 
         same_venue = 1 if a["pid"][0] == b["pid"][0] else 0
 
-        a_citation_authors = []
-        b_citation_authors = []
-        for c in a["citations"]:
-            a_citation_authors.extend(c["authors"])
-        for c in b["citations"]:
-            b_citation_authors.extend(c["authors"])
+        a_citation_authors = prepared_a["citation_authors"]
+        b_citation_authors = prepared_b["citation_authors"]
         num_citations_diff = abs(len(a_citation_authors)-len(b_citation_authors))
         citation_auth_score = self._sharedInLists(a_citation_authors,b_citation_authors)
         citation_titles_score = self._sharedInLists(a["citations_tokenized"],b["citations_tokenized"],size_mult=False)
@@ -286,6 +300,29 @@ class CompareAuthors:
         out.extend(address_scores)
         return key, tag, np.asarray(out)
 
+    @staticmethod
+    def preprocess(info):
+        """
+        Calculate the values of an author info that do not depend on the author it is compared to. They are stored in
+        the info under "prepared", so an info that is compared many times (like a candidate's paper that is compared to
+        every target in a name block) only calculates them once
+        :param info: author info from getAuthorInfo
+        :return: dict of the prepared values
+        """
+        if "prepared" not in info:
+            stemmer = getStemmer()
+            citation_authors = []
+            for c in info["citations"]:
+                citation_authors.extend(c["authors"])
+            info["prepared"] = {
+                "co_authors_domain": [x[1] for x in info["co_authors_email"]],
+                "co_authors_aff_stemmed": [[stemmer.stem(w) for w in x.split()] if x else [] for x in
+                                           info["co_authors_aff"]],
+                "department_stemmed": [[stemmer.stem(w) for w in x.split()] for x in info["department"]],
+                "citation_authors": citation_authors
+            }
+        return info["prepared"]
+
     @staticmethod
     def compareCoAuthValues(a_value, b_value, compare_algorithm):
         if not a_value or not b_value:
@@ -322,14 +359,19 @@ class CompareAuthors:
         b_shared_aff = sum([1 for x in b_co_auth if x == b_value])
         return abs(a_shared_aff / a_len - b_shared_aff / b_len)
 
-    def _getDepartmentScore(self, a, b):
+    def _getDepartmentScore(self, a, b, a_stemmed=None, b_stemmed=None):
         scores = []
         if not a or not b:
             return 0
+        stemmer = getStemmer()
+        if a_stemmed is None:
+            a_stemmed = [[stemmer.stem(w) for w in x.split()] for x in a]
+        if b_stemmed is None:
+            b_stemmed = [[stemmer.stem(w) for w in x.split()] for x in b]
         for i in range(len(a)):
             for j in range(len(b)):
-                dep_a = [stemmer.stem(w) for w in a[i].split()]
-                dep_b = [stemmer.stem(w) for w in b[j].split()]
+                dep_a = a_stemmed[i]
+                dep_b = b_stemmed[j]
                 try:
                     scores.append(self.dep_name_algo(dep_a, dep_b))
                 except ZeroDivisionError as e:
@@ -340,7 +382,7 @@ class CompareAuthors:
     def _sharedInLists(a, b,size_mult=True):
         if not a or not b:
             return 0
-        b_remaining = deepcopy(b)
+        b_remaining = list(b)
         score = 0
         for i in a:
             if i in b_remaining:
@@ -54,6 +54,7 @@ class ConfigHandler:
         "print_compare_stats",
         "compare_args",
         "compare_batch_size",
+        "pair_chunk_size",
         "remove_single_author",
         "require_exact_match",
     ]
@@ -64,15 +65,25 @@ class ConfigHandler:
         "model",
         "model_name",
         "model_path",
+        "compiled_model",
         "skip_same_papers",
         "create_new_author",
         "compare_cutoff",
+        "sample_method",
+        "sample_seed",
         "tie_breaker",
         "DEBUG_MODE",
         "sim_overrides",
         "allow_authors_not_in_override",
         "same_paper_diff_people",
-        "use_probabilities"
+        "use_probabilities",
+        "use_cascade",
+        "cascade_threshold",
+        "cascade_target_recall",
+        "compare_mode",
+        "early_stopping",
+        "stream_batch_size",
+        "inference_cores"
     ]
     vote_classifier_keys = [
         "classifier_weights",
@@ -86,6 +97,15 @@ class ConfigHandler:
         "diff_same_ratio",
         "train_all_estimators",
         "voting",
+        "student",
+        "student_params",
+        "out_of_core",
+        "subsample_size",
+        "test_size",
+        "epochs",
+        "search_grids",
+        "search_folds",
+        "weight_grid",
     ]
     target_creator_keys = [
         "treat_id_different_people",
@@ -271,7 +291,8 @@ class ConfigHandler:
         files = ["id_to_name.json", "parsed_papers.json", "aliases.json", "same_names.txt", "acl_papers.json",
                  "incomplete_papers.txt", "department_corpus.txt", "org_corpus.txt", "conflicts.json",
                  "organizations.json", "effective_org_info.json", "author_papers.json", "similar_names.json",
-                 "known_affiliations.json","test_special_keys.txt","conflict_author_parsed.txt","tagged_pairs.pickle"]
+                 "known_affiliations.json","test_special_keys.txt","conflict_author_parsed.txt","tagged_pairs.pickle",
+                 "tagged_pairs_chunks.pickle", "data_snapshot.bin", "authorship_index.npz"]
 
         for f in files:
             file_name, extension = f.split(".")
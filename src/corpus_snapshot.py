@@ -0,0 +1,438 @@
+import mmap
+import os
+from collections.abc import Mapping, ItemsView, ValuesView
+from copy import deepcopy
+import numpy as np
+import ujson
+
+SNAPSHOT_MAGIC = b"ACLSNAP\x00"
+SNAPSHOT_VERSION = 1
+
+# Files in a snapshot, these are the keys used by loadData
+snapshot_files = ["parsed_papers", "author_papers", "id_to_name", "organizations"]
+
+paper_dtype = np.dtype([
+    ("pid", "<i4"), ("title", "<i4"), ("abstract", "<i4"), ("unknown", "<i4"), ("citations", "<i4"),
+    ("sections", "<i4"), ("authorship_start", "<i8"), ("authorship_count", "<i4"),
+    ("title_start", "<i8"), ("title_count", "<i4"), ("citations_start", "<i8"), ("citations_count", "<i4"),
+    ("sections_start", "<i8"), ("sections_count", "<i4")
+])
+authorship_dtype = np.dtype([("author", "<i4"), ("name", "<i4"), ("affiliation", "<i4")])
+affiliation_dtype = np.dtype([("email", "<i4"), ("info", "<i4")])
+
+
+def _encode(s):
+    return s.encode("utf-8", "surrogatepass")
+
+
+class _StringTable:
+    """
+    Deduplicated strings, each string is stored once and referred to by its index. None is -1
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def add(self, s):
+        if s is None:
+            return -1
+        i = self.ids.get(s)
+        if i is None:
+            i = self.ids[s] = len(self.strings)
+            self.strings.append(s)
+        return i
+
+    def addJson(self, obj):
+        return self.add(ujson.dumps(obj))
+
+    def arrays(self):
+        encoded = [_encode(s) for s in self.strings]
+        offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+        offsets[1:] = np.cumsum([len(s) for s in encoded], dtype="<u8")
+        return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def _sortedOrder(keys):
+    """
+    Order of keys sorted by their utf-8 bytes, used to binary search the keys without decoding all of them
+    """
+    encoded = [_encode(k) for k in keys]
+    return np.array(sorted(range(len(keys)), key=encoded.__getitem__), dtype="<i4")
+
+
+def writeSnapshot(path, papers, author_papers=None, id_to_name=None, organizations=None):
+    """
+    Write a binary snapshot of the corpus that can be loaded with CorpusSnapshot.
+
+    Layout: magic, header length, json header with the offset, dtype and shape of every section, then the sections
+    aligned to 8 bytes. Strings are kept in one string table (offsets + utf-8 blob) and every other section refers to
+    them by index. Papers, authorships and affiliations are fixed width records, the tokenized fields are ranges in a
+    single token array and author_papers is stored as an index pointer + pid array. Nested values that are rarely
+    read (citations, sections, unknown, affiliation info, id_to_name and organizations values) are stored as json
+    strings and only decoded when accessed.
+
+    :param path: path to write to
+    :param papers: dict of pid to Paper or paper dict
+    :param author_papers: dict of author id to list of pids
+    :param id_to_name: dict of author id to name dict
+    :param organizations: dict of org key to org info
+    :return: None
+    """
+    strings = _StringTable()
+    paper_records = np.zeros(len(papers), dtype=paper_dtype)
+    authorships = []
+    affiliations = []
+    tokens = []
+
+    def addTokens(record, field, words):
+        record[field + "_start"] = len(tokens)
+        record[field + "_count"] = len(words) if words else 0
+        if words:
+            tokens.extend(strings.add(w) for w in words)
+
+    for i, paper in enumerate(papers.values()):
+        if not isinstance(paper, dict):
+            paper = paper.asDict()
+        record = paper_records[i]
+        record["pid"] = strings.add(paper["pid"])
+        record["title"] = strings.add(paper["title"])
+        record["abstract"] = strings.add(paper["abstract"])
+        record["unknown"] = strings.addJson(paper.get("unknown") or [])
+        record["citations"] = strings.addJson(paper.get("citations") or [])
+        record["sections"] = strings.addJson(paper.get("sections") or {})
+        addTokens(record, "title", paper.get("title_tokenized"))
+        addTokens(record, "citations", paper.get("citations_tokenized"))
+        addTokens(record, "sections", paper.get("sections_tokenized"))
+
+        paper_affiliations = paper.get("affiliations") or {}
+        authors = list(paper["authors"].keys())
+        authors.extend(a for a in paper_affiliations.keys() if a not in paper["authors"])
+        record["authorship_start"] = len(authorships)
+        record["authorship_count"] = len(authors)
+        for a in authors:
+            aff_index = -1
+            if a in paper_affiliations:
+                entry = paper_affiliations[a]
+                aff_index = len(affiliations)
+                affiliations.append((strings.add(entry.get("email")),
+                                     strings.addJson({k: v for k, v in entry.items() if k != "email"})))
+            authorships.append((strings.add(a), strings.add(paper["authors"].get(a)), aff_index))
+
+    sections = {
+        "papers": paper_records,
+        "papers_keys": np.array([strings.add(k) for k in papers.keys()], dtype="<i4"),
+        "papers_order": _sortedOrder(list(papers.keys())),
+        "authorships": np.array(authorships, dtype=authorship_dtype),
+        "affiliations": np.array(affiliations, dtype=affiliation_dtype),
+        "tokens": np.array(tokens, dtype="<i4")
+    }
+    if author_papers is not None:
+        indptr = np.zeros(len(author_papers) + 1, dtype="<i8")
+        indptr[1:] = np.cumsum([len(v) for v in author_papers.values()])
+        sections["author_papers_keys"] = np.array([strings.add(k) for k in author_papers.keys()], dtype="<i4")
+        sections["author_papers_order"] = _sortedOrder(list(author_papers.keys()))
+        sections["author_papers_indptr"] = indptr
+        sections["author_papers_pids"] = np.array([strings.add(p) for v in author_papers.values() for p in v],
+                                                  dtype="<i4")
+    for name, values in [("id_to_name", id_to_name), ("organizations", organizations)]:
+        if values is None:
+            continue
+        sections[name + "_keys"] = np.array([strings.add(k) for k in values.keys()], dtype="<i4")
+        sections[name + "_order"] = _sortedOrder(list(values.keys()))
+        sections[name + "_values"] = np.array([strings.addJson(v) for v in values.values()], dtype="<i4")
+    sections["string_offsets"], sections["string_blob"] = strings.arrays()
+
+    header = {"version": SNAPSHOT_VERSION, "sections": {}}
+    offset = 0
+    for name, array in sections.items():
+        dtype = array.dtype.descr if array.dtype.names else array.dtype.str
+        header["sections"][name] = [offset, dtype, list(array.shape)]
+        offset += array.nbytes + (-array.nbytes % 8)
+    header = ujson.dumps(header).encode("utf-8")
+    header += b" " * (-(len(header) + 16) % 8)
+
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(np.array([len(header)], dtype="<u8").tobytes())
+        f.write(header)
+        for array in sections.values():
+            f.write(np.ascontiguousarray(array).tobytes())
+            f.write(b"\x00" * (-array.nbytes % 8))
+    os.replace(tmp_path, path)
+
+
+def isSnapshotFresh(path, sources):
+    """
+    Check if the snapshot at path exists and is newer than every source file that exists
+    :param path: snapshot path
+    :param sources: list of paths the snapshot was made from
+    :return: bool
+    """
+    if not os.path.isfile(path):
+        return False
+    snapshot_time = os.path.getmtime(path)
+    return all(not os.path.isfile(s) or os.path.getmtime(s) <= snapshot_time for s in sources)
+
+
+class CorpusSnapshot:
+    """
+    A snapshot written by writeSnapshot, opened with mmap. Opening only reads the header, records are decoded when
+    they are accessed through the mappings.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError("{} is not a corpus snapshot".format(path))
+        header_len = int(np.frombuffer(self._mmap, dtype="<u8", count=1, offset=len(SNAPSHOT_MAGIC))[0])
+        start = len(SNAPSHOT_MAGIC) + 8
+        header = ujson.loads(self._mmap[start:start + header_len].decode("utf-8"))
+        if header["version"] != SNAPSHOT_VERSION:
+            raise ValueError("{} is version {}, expected {}".format(path, header["version"], SNAPSHOT_VERSION))
+        start += header_len
+        self.sections = {}
+        for name, (offset, descr, shape) in header["sections"].items():
+            dtype = np.dtype([tuple(x) for x in descr]) if isinstance(descr, list) else np.dtype(descr)
+            count = int(np.prod(shape))
+            self.sections[name] = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=start + offset)
+        self._offsets = self.sections["string_offsets"]
+        self._blob_start = start + header["sections"]["string_blob"][0]
+        self._mappings = {}
+        self._string_cache = {}
+
+    def __contains__(self, file):
+        if file == "parsed_papers":
+            return "papers" in self.sections
+        return file + "_keys" in self.sections
+
+    def __getitem__(self, file):
+        """
+        Get the mapping for one of snapshot_files
+        """
+        if file not in snapshot_files or file not in self:
+            raise KeyError("{} is not in {}".format(file, self.path))
+        if file not in self._mappings:
+            if file == "parsed_papers":
+                self._mappings[file] = PaperRecords(self)
+            elif file == "author_papers":
+                self._mappings[file] = AuthorPapers(self)
+            else:
+                self._mappings[file] = JsonRecords(self, file)
+        return self._mappings[file]
+
+    def stringBytes(self, i):
+        start = self._blob_start + int(self._offsets[i])
+        return self._mmap[start:self._blob_start + int(self._offsets[i + 1])]
+
+    def string(self, i):
+        if i < 0:
+            return None
+        try:
+            return self._string_cache[i]
+        except KeyError:
+            pass
+        # Strings are immutable so decoded strings can be shared, this also dedupes tokens and ids in memory
+        s = self._string_cache[i] = self.stringBytes(i).decode("utf-8", "surrogatepass")
+        return s
+
+    def strings(self, ids):
+        return [self.string(i) for i in ids.tolist()]
+
+
+def _loadMapping(path, file, as_papers=False):
+    mapping = CorpusSnapshot(path)[file]
+    return mapping.asPapers() if as_papers else mapping
+
+
+class _RecordItems(ItemsView):
+    def __iter__(self):
+        return self._mapping._iterItems()
+
+
+class _RecordValues(ValuesView):
+    def __iter__(self):
+        for _, v in self._mapping._iterItems():
+            yield v
+
+
+class _SnapshotMapping(Mapping):
+    """
+    Read only mapping over keyed records of a snapshot. Keys are found by binary searching the sorted order, values
+    are decoded on the first access and cached so that the same object is returned every time, like a dict.
+    Copying (copy.copy, copy.deepcopy or .copy()) returns a plain dict.
+    """
+
+    def __init__(self, snapshot, file, keys, order):
+        self._snapshot = snapshot
+        self._file = file
+        self._keys = keys
+        self._order = order
+        self._cache = {}
+
+    def _decode(self, i):
+        raise NotImplementedError()
+
+    def _find(self, key):
+        if not isinstance(key, str):
+            return -1
+        target = _encode(key)
+        lo, hi = 0, len(self._order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._snapshot.stringBytes(self._keys[self._order[mid]]) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self._order) and self._snapshot.stringBytes(self._keys[self._order[lo]]) == target:
+            return int(self._order[lo])
+        return -1
+
+    def __getitem__(self, key):
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        i = self._find(key)
+        if i < 0:
+            raise KeyError(key)
+        value = self._cache[key] = self._decode(i)
+        return value
+
+    def __contains__(self, key):
+        return key in self._cache or self._find(key) >= 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        for i in self._keys.tolist():
+            yield self._snapshot.string(i)
+
+    def _iterItems(self):
+        for i, key in enumerate(self):
+            if key not in self._cache:
+                self._cache[key] = self._decode(i)
+            yield key, self._cache[key]
+
+    def items(self):
+        return _RecordItems(self)
+
+    def values(self):
+        return _RecordValues(self)
+
+    def copy(self):
+        return dict(self.items())
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        return deepcopy(self.copy(), memo)
+
+    def __reduce__(self):
+        return _loadMapping, (self._snapshot.path, self._file)
+
+
+class PaperRecords(_SnapshotMapping):
+    """
+    parsed_papers from a snapshot, values are the same dicts as parsed_papers.json. Use asPapers to get Paper objects.
+    """
+
+    def __init__(self, snapshot, as_papers=False):
+        papers = snapshot.sections["papers"]
+        super().__init__(snapshot, "parsed_papers", snapshot.sections["papers_keys"], snapshot.sections["papers_order"])
+        self._papers = papers
+        self._as_papers = as_papers
+
+    def asPapers(self):
+        """
+        The same records as lazily created Paper objects
+        :return: PaperRecords
+        """
+        return PaperRecords(self._snapshot, True)
+
+    def _tokens(self, record, field):
+        start = int(record[field + "_start"])
+        return self._snapshot.strings(self._snapshot.sections["tokens"][start:start + int(record[field + "_count"])])
+
+    def _decode(self, i):
+        snapshot = self._snapshot
+        record = self._papers[i]
+        authors = {}
+        affiliations = {}
+        start = int(record["authorship_start"])
+        authorships = snapshot.sections["authorships"][start:start + int(record["authorship_count"])]
+        for author, name, aff_index in authorships.tolist():
+            author = snapshot.string(author)
+            if name >= 0:
+                authors[author] = snapshot.string(name)
+            if aff_index >= 0:
+                email, info = snapshot.sections["affiliations"][aff_index].tolist()
+                affiliations[author] = {"email": snapshot.string(email)}
+                affiliations[author].update(ujson.loads(snapshot.string(info)))
+        paper = {
+            "pid": snapshot.string(int(record["pid"])),
+            "title": snapshot.string(int(record["title"])),
+            "abstract": snapshot.string(int(record["abstract"])),
+            "authors": authors,
+            "unknown": ujson.loads(snapshot.string(int(record["unknown"]))),
+            "affiliations": affiliations,
+            "title_tokenized": self._tokens(record, "title"),
+            "citations": ujson.loads(snapshot.string(int(record["citations"]))),
+            "citations_tokenized": self._tokens(record, "citations"),
+            "sections": ujson.loads(snapshot.string(int(record["sections"]))),
+            "sections_tokenized": self._tokens(record, "sections")
+        }
+        if self._as_papers:
+            from src.paper import Paper
+            return Paper(**paper)
+        return paper
+
+    def __reduce__(self):
+        return _loadMapping, (self._snapshot.path, self._file, self._as_papers)
+
+
+class AuthorPapers(_SnapshotMapping):
+    """
+    author_papers from a snapshot, values are lists of pids
+    """
+
+    def __init__(self, snapshot):
+        super().__init__(snapshot, "author_papers", snapshot.sections["author_papers_keys"],
+                         snapshot.sections["author_papers_order"])
+        self._indptr = snapshot.sections["author_papers_indptr"]
+        self._pids = snapshot.sections["author_papers_pids"]
+
+    def _decode(self, i):
+        return self._snapshot.strings(self._pids[int(self._indptr[i]):int(self._indptr[i + 1])])
+
+
+class JsonRecords(_SnapshotMapping):
+    """
+    id_to_name or organizations from a snapshot, values are stored as json
+    """
+
+    def __init__(self, snapshot, file):
+        super().__init__(snapshot, file, snapshot.sections[file + "_keys"], snapshot.sections[file + "_order"])
+        self._values = snapshot.sections[file + "_values"]
+
+    def _decode(self, i):
+        return ujson.loads(self._snapshot.string(int(self._values[i])))
+
+
+def loadPapers(parsed_papers):
+    """
+    Convert parsed papers to Paper objects. Papers from a snapshot are converted lazily when they are accessed.
+    :param parsed_papers: dict of pid to paper dict or PaperRecords
+    :return: dict or PaperRecords of pid to Paper
+    """
+    if isinstance(parsed_papers, PaperRecords):
+        return parsed_papers.asPapers()
+    from src.paper import Paper
+    return {x: Paper(**info) for x, info in parsed_papers.items()}
@@ -1,6 +1,9 @@
 from src.utility_functions import chunks, cleanName, convertPaperToSortable, createLogger, ncr, printLogToConsole, \
     printStats
 from src.compare_authors import CompareAuthors, getAlgo
+from src.pair_keys import authorKey, pairKey, asKey
+from src.pair_chunks import writePairChunks
+from src.pair_stats import PairStats
 import time
 import multiprocessing as mp
 import sys
@@ -24,19 +27,17 @@ def checkPair(args):
         return None
     if a in special_cases and b in special_cases:
         return None
-    a_pid, a_id = a.split(" ")
-    b_pid, b_id = b.split(" ")
+    a_pid, a_id = a
+    b_pid, b_id = b
     if a_pid == b_pid:
         return None
     if algorithm(a_id, b_id) * 100 < name_similarity_cutoff * 100:
         return None
 
     if convertPaperToSortable(a_pid) < convertPaperToSortable(b_pid):
-        tmp_key = a + " " + b
-        pair_out = [tmp_key, a, b]
+        pair_out = [pairKey(a, b), a, b]
     else:
-        tmp_key = b + " " + a
-        pair_out = [tmp_key, b, a]
+        pair_out = [pairKey(b, a), b, a]
     if a_id == b_id:
         return 1, pair_out
     else:
@@ -45,7 +46,7 @@ def checkPair(args):
 
 def getAuthorInfo(args):
     paper, author = args
-    pair_key = paper.pid + " " + author
+    pair_key = authorKey(paper.pid, author)
     out = {
         "pid": paper.pid,
         "name": cleanName(paper.authors[author]),
@@ -140,10 +141,12 @@ class CreateTrainingData:
         min_batch_len=[100000, "Minimum number of combinations to use batches"],
         allow_exact_special=[True, "Do not Allow ids that are exactly equal to special cases"],
         drop_null_authors=[True, "Disable Dropping authors with either no email or no affiliation"],
-        print_compare_stats=[False, " print the indepth stats of comparisons."],
+        print_compare_stats=[False, "Write the stats of every compared feature to same_different.txt"],
         compare_batch_size=[2000, "size of batches for comparing authors, only has an effect when cores > 1"],
         remove_single_author=[False, "Remove papers with only 1 author"],
-        require_exact_match=[False, "If special cases must be exact match"]
+        require_exact_match=[False, "If special cases must be exact match"],
+        pair_chunk_size=[0, "Also save the pairs to tagged_pairs_chunks.pickle in chunks of this many pairs, which is "
+                            "needed to train out of core. 0 disables it"]
     )
 
     def __init__(self, papers, incomplete_papers, special_keys=None, save_data=False, ext_directory=False,
@@ -152,7 +155,7 @@ class CreateTrainingData:
                  exclude=None, rand_seed=None, cores=4, batch_size=25000, allow_exact_special=True,
                  min_batch_len=100000, file_log_level=logging.DEBUG, console_log_level=logging.WARNING, log_format=None,
                  log_path=None, DEBUG_MODE=False, drop_null_authors=True, print_compare_stats=False, compare_args=None,
-                 compare_batch_size=1000, remove_single_author=False, require_exact_match=False):
+                 compare_batch_size=1000, remove_single_author=False, require_exact_match=False, pair_chunk_size=0):
         """
         Initialize the class
         :param papers: The parsed papers you want to use (dict of Paper objects)
@@ -183,12 +186,14 @@ class CreateTrainingData:
         :param log_path: path to log files(str, default is '/logs/preprocess_data.log'
         :param DEBUG_MODE: debugging mode (bool, default is false)
         :param drop_null_authors: drop authors with either no email or no affiliation (bool, default is True)
-        :param print_compare_stats: print the indepth stats of comparisons. This WILL slow
-        down the program by a lot(bool, default is False)
+        :param print_compare_stats: write same_different.txt and special_same_special_different.txt with the stats of
+        every compared feature to the txt directory, they are calculated while the pairs are compared (bool, default is
+        False)
         :param compare_args: dict of arguments to pass to compareAuthors
         :param compare_batch_size: size of batches for comparing authors, only has an effect when cores > 1
         :param remove_single_author: Remove papers with only 1 author
         :param require_exact_match: If special cases must be exact match
+        :param pair_chunk_size: Also save the pairs in chunks of this many pairs, 0 disables it
         """
         if compare_args is None:
             compare_args = {}
@@ -231,6 +236,7 @@ class CreateTrainingData:
         self.compare_args = compare_args
         self.compare_args["str_algorithm"] = algorithm.split("-")
         self.compare_batch_size = compare_batch_size
+        self.pair_chunk_size = pair_chunk_size
         if self.ext_directory:
             self.json_path = self.json_path + "/json"
             self.csv_path = self.csv_path + "/csv"
@@ -331,10 +337,12 @@ class CreateTrainingData:
             diff = []
             special_same = []
             special_diff = []
+            # Passed pairs can have string keys if they were saved before keys were tuples
+            pairs_to_use = [[t, [asKey(x) for x in pair_data]] for t, pair_data in pairs_to_use]
             for t, pair_data in pairs_to_use:
                 is_special = False
                 for special_case in self.special_keys:
-                    if special_case in pair_data[1] or special_case in pair_data[2]:
+                    if special_case in pair_data[1][1] or special_case in pair_data[2][1]:
                         is_special = True
                 if t == 1:
                     if is_special:
@@ -384,12 +392,20 @@ class CreateTrainingData:
         comparator = CompareAuthors(**self.compare_args)
         printLogToConsole(self.console_log_level, "Comparing authors", logging.INFO)
         self.logger.log(logging.INFO, "Comparing authors")
+        # The stats are updated with every batch of compared pairs, so they do not need another pass over the results
+        pair_stats = None
+        if self.print_compare_stats:
+            pair_stats = PairStats(CompareAuthors.compare_terms, self.special_keys)
         if self.cores == 1 or len(to_use) < 20000:
             pbar = tqdm(total=len(to_use), file=sys.stdout)
             for i in to_use:
                 results.append(comparator(i))
+                if pair_stats and len(results) % self.compare_batch_size == 0:
+                    pair_stats.add(results[-self.compare_batch_size:])
                 pbar.update()
             pbar.close()
+            if pair_stats and len(results) % self.compare_batch_size:
+                pair_stats.add(results[-(len(results) % self.compare_batch_size):])
         else:
             printLogToConsole(self.console_log_level, "Comparing {} pairs in parallel".format(len(to_use)),
                               logging.INFO)
@@ -402,12 +418,11 @@ class CreateTrainingData:
             self.logger.debug("{} batches".format(batch_count))
 
             with mp.Pool(self.cores) as Pool:
-                imap_results = list(
-                    tqdm(Pool.imap_unordered(comparator.processBatch, batches), total=batch_count, file=sys.stdout))
-
-            self.logger.debug("Combining results from pool")
-            for res in imap_results:
-                results.extend(res)
+                for res in tqdm(Pool.imap_unordered(comparator.processBatch, batches), total=batch_count,
+                                file=sys.stdout):
+                    results.extend(res)
+                    if pair_stats:
+                        pair_stats.add(res)
         total_run_end = time.time()
         hours, rem = divmod(total_run_end - total_run_start, 3600)
         minutes, seconds = divmod(rem, 60)
@@ -420,6 +435,10 @@ class CreateTrainingData:
 
         ]
         printStats("Results", stats, line_adaptive=True)
+        if pair_stats:
+            printLogToConsole(self.console_log_level, "Writing compare stats to {}".format(self.txt_path), logging.INFO,
+                              logger=self.logger)
+            pair_stats.writeReports(self.txt_path, logger=self.logger, logger_level=logging.INFO)
         printLogToConsole(self.console_log_level,
                           "Total Run time: {:0>2}:{:0>2}:{:05.2f}".format(int(hours), int(minutes), seconds),
                           logging.INFO)
@@ -432,6 +451,10 @@ class CreateTrainingData:
 
             with open(self.pickle_path+"/tagged_pairs.pickle", "wb") as f:
                 pickle.dump(results, f)
+            if self.pair_chunk_size:
+                printLogToConsole(self.console_log_level, "Writing pairs in chunks of {}".format(self.pair_chunk_size),
+                                  logging.INFO, logger=self.logger)
+                writePairChunks(self.pickle_path + "/tagged_pairs_chunks.pickle", results, self.pair_chunk_size)
 
     def _populateConstants(self):
         task_count = 0
@@ -493,7 +516,7 @@ class CreateTrainingData:
     def _createPairDict(pair_keys, char_count=1, word_count=1):
         out = defaultdict(list)
         for k in pair_keys:
-            p, a = k.split()
+            p, a = k
             a_split = a.split("-")
             first_word = a_split[:word_count]
             out[" ".join(first_word)[:char_count]].append(k)
@@ -510,10 +533,10 @@ class CreateTrainingData:
             if special_split not in special_cases:
                 special_cases[special_split] = []
             for a in separated[special_split]:
-                if k in a:
-                    if (not self.allow_exact_special and k != a) or self.allow_exact_special:
+                if k in a[1]:
+                    if (not self.allow_exact_special and k != a[1]) or self.allow_exact_special:
                         if self.require_exact_match:
-                            if k == a:
+                            if k == a[1]:
                                 special_cases[special_split].append(a)
                         else:
                             special_cases[special_split].append(a)
@@ -537,8 +560,8 @@ class CreateTrainingData:
         special_cases_combos = []
         for i, a in enumerate(keys):
             for j, b in enumerate(keys[1 + i:]):
-                a_paper, a_id = a.split(" ")
-                b_paper, b_id = b.split(" ")
+                a_paper, a_id = a
+                b_paper, b_id = b
                 if a_id in special_cases and b_id in special_cases:
                     special_cases_combos.append([a, b, self.algorithm, special_cases, name_cutoff])
                     continue
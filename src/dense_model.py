@@ -0,0 +1,69 @@
+import json
+import numpy as np
+from src.lazy_import import lazyImport
+
+# Model saved by DenseNN.save, with the predict, predict_proba and voting AuthorDisambiguation uses, so the dense
+# network can be used as the disambiguation model instead of the VotingClassifier. Tensorflow is only imported when a
+# model is loaded.
+
+
+def normalizeRows(X):
+    """
+    Same as tf.keras.utils.normalize(X, axis=1), which DenseNN uses on its data, without importing tensorflow
+    :param X: 2d array
+    :return: X with every row scaled to a norm of 1
+    """
+    norms = np.atleast_1d(np.linalg.norm(X, 2, 1))
+    norms[norms == 0] = 1
+    return X / np.expand_dims(norms, 1)
+
+
+class DenseModel:
+    """
+    Drop in replacement for the VotingClassifier with the predict, predict_proba and voting AuthorDisambiguation uses
+    """
+    voting = "soft"
+
+    def __init__(self, model, normalize=True, batch_size=10000):
+        """
+        :param model: trained keras model with one sigmoid output
+        :param normalize: if the model was trained on normalized vectors
+        :param batch_size: max rows per call to the model
+        """
+        self.model = model
+        self.normalize = normalize
+        self.batch_size = batch_size
+
+    @property
+    def n_features_in_(self):
+        return self.model.input_shape[-1]
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if len(X) == 0:
+            return np.zeros((0, 2))
+        if self.normalize:
+            X = normalizeRows(X)
+        # model.predict builds a tf.data pipeline on every call, which costs more than predicting the few pairs of an
+        # author, so batches that fit in one call go straight to the model
+        if len(X) <= self.batch_size:
+            same = np.asarray(self.model(X, training=False))[:, 0]
+        else:
+            same = self.model.predict(X, batch_size=self.batch_size, verbose=0)[:, 0]
+        same = same.astype(float)
+        return np.vstack([1 - same, same]).T
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] > .5).astype(int)
+
+
+def loadDenseModel(path):
+    """
+    :param path: directory DenseNN.save wrote the model to
+    :return: DenseModel
+    """
+    tf = lazyImport("tensorflow")
+    with open(path + "/dense.json") as f:
+        parameters = json.load(f)
+    model = tf.keras.models.load_model(path + "/model.keras")
+    return DenseModel(model, parameters["normalize"], parameters["batch_size"])
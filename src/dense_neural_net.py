@@ -1,6 +1,3 @@
-import tensorflow as tf
-from tensorflow.keras.layers import Dense, Dropout, Activation
-from tensorflow.keras.metrics import BinaryAccuracy
 import numpy as np
 from tqdm import tqdm
 import sys
@@ -8,11 +5,16 @@ import os
 import random
 import gc
 from src.utility_functions import createLogger
-from keras.wrappers.scikit_learn import KerasClassifier, KerasRegressor
-import eli5
-from eli5.sklearn import PermutationImportance
 from src.compare_authors import CompareAuthors
+from src.pair_keys import asKey
+from src.pair_chunks import chunkOffsets, readPairChunk, iterPairChunks, isTestPair
+from src.dense_model import normalizeRows
+from src.lazy_import import lazyImport
 import pickle
+import json
+
+# Tensorflow is imported the first time a model is made or loaded
+tf = lazyImport("tensorflow")
 
 # Credit goes to user pwais for this fix for abseil colliding with python.logging. REMOVE ME WHEN ABSEIL IS UPDATED
 try:
@@ -40,10 +42,11 @@ except Exception as e:
 
 
 class DenseNN:
-    def __init__(self, epochs=3, layers=4, dropout=.1, activation=tf.keras.activations.relu, test_fraction=8,
+    def __init__(self, epochs=3, layers=4, dropout=.1, activation=None, test_fraction=8,
                  funnel=2, optimizer='rmsprop', loss='binary_crossentropy', metrics=None,save_path=None, model_save_path='/models/',
                  model_name=None,load_model=None, special_cases=None, rand_seed=None, start_neurons=16, batch_size=10000, cutoff=None,
-                 normalize=True, save_pairs=False, special_only=False,console_log_level=logging.ERROR, file_log_level=logging.DEBUG, log_format=None, log_path=None,diff_same_ratio=1):
+                 normalize=True, save_pairs=False, special_only=False,console_log_level=logging.ERROR, file_log_level=logging.DEBUG, log_format=None, log_path=None,diff_same_ratio=1,
+                 shuffle_buffer=100000):
         if not log_format:
             log_format = '%(asctime)s|%(levelname)8s|%(module)20s|%(funcName)20s: %(message)s'
         if not log_path:
@@ -58,7 +61,9 @@ class DenseNN:
         if special_cases is None:
             special_cases = []
         if metrics is None:
-            metrics = [BinaryAccuracy]
+            metrics = [tf.keras.metrics.BinaryAccuracy]
+        if activation is None:
+            activation = tf.keras.activations.relu
 
         self.special_cases = special_cases
         self.epochs = epochs
@@ -72,6 +77,13 @@ class DenseNN:
         self.test_fraction = test_fraction
         if rand_seed:
             random.seed(rand_seed)
+        self.rand_seed = rand_seed
+        self.model_save_path = model_save_path
+        self.model_name = model_name
+        if not model_name:
+            self.model_name = "DNN1"
+        self.shuffle_buffer = shuffle_buffer
+        self.n_features = None
         self.start_neurons = start_neurons
         self.batch_size = batch_size
         self.cutoff = cutoff
@@ -85,6 +97,19 @@ class DenseNN:
         self.special_train =None
         self.special_test = None
 
+    def _isSpecialCase(self, a, b):
+        special_a = False
+        special_b = False
+        for case in self.special_cases:
+            if case in b:
+                special_a = True
+
+            if case in a:
+                special_b = True
+            if special_a and special_b:
+                return True
+        return False
+
     def _parseData(self, data):
         same = []
         different = []
@@ -92,20 +117,10 @@ class DenseNN:
         special_different = []
         pbar = tqdm(total=len(data), file=sys.stdout)
         for k, t, d in data:
-            p1, a, p2, b = k.split()
-
-            special_a = False
-            special_b = False
-            is_special_case = False
-            for case in self.special_cases:
-                if case in b:
-                    special_a = True
+            k = asKey(k)
+            p1, a, p2, b = k
 
-                if case in a:
-                    special_b = True
-                if special_a and special_b:
-                    is_special_case= True
-                    break
+            is_special_case = self._isSpecialCase(a, b)
 
             if t == 1:
                 if is_special_case:
@@ -232,19 +247,20 @@ class DenseNN:
             out_special_test["X"] = tf.keras.utils.normalize(out_special_test["X"], axis=1)
         return out_train, out_test, out_special_train, out_special_test
 
-    def createModel(self) -> tf.keras.models.Sequential:
-        input_shape = self.train["X"].shape[1:]
+    def createModel(self, input_shape=None) -> "tf.keras.models.Sequential":
+        if input_shape is None:
+            input_shape = self.train["X"].shape[1:]
         model = tf.keras.models.Sequential()
         current_neurons = self.start_neurons
         current_dropout = self.dropout
         for i in range(self.layers - 1):
-            model.add(Dense(current_neurons, input_shape=input_shape, activation=self.activation))
-            model.add(Dropout(current_dropout))
+            model.add(tf.keras.layers.Dense(current_neurons, input_shape=input_shape, activation=self.activation))
+            model.add(tf.keras.layers.Dropout(current_dropout))
 
             if self.funnel:
                 current_neurons = current_neurons // self.funnel
                 current_dropout = current_dropout // self.funnel
-        model.add(Dense(1, activation='sigmoid'))
+        model.add(tf.keras.layers.Dense(1, activation='sigmoid'))
         model.compile(optimizer=self.optimizer, loss=self.loss, metrics=self.metrics)
         return model
 
@@ -256,7 +272,7 @@ class DenseNN:
         print("Creating data")
         self.train, self.test, self.special_train, self.special_test = self.createTrainTest(data)
         print("Creating Model")
-        self.createModel()
+        self.model = self.createModel()
 
     def train(self):
         print("INFO: Training model...")
@@ -273,3 +289,113 @@ class DenseNN:
         print("INFO: Evaluating on special test")
         special = self.model.evaluate(self.special_test["X"], self.special_test["Y"])
         return normal,special
+
+    def _decodeChunk(self, path, offset, split):
+        """
+        Read a chunk and keep the pairs of split, called by the tf.data workers
+        :param path: path to the chunks
+        :param offset: offset of the chunk
+        :param split: 'train', 'test' or 'special_test'
+        :return: X and Y of the pairs as float32
+        """
+        X, Y = [], []
+        for k, t, d in readPairChunk(path, int(offset)):
+            k = asKey(k)
+            is_test = isTestPair(k, self.rand_seed, self.test_fraction)
+            if is_test != (split in ["test", "special_test"]):
+                continue
+            if (split == "special_test" or self.special_only) and not self._isSpecialCase(k[1], k[3]):
+                continue
+            X.append(d)
+            Y.append(t)
+        X = np.asarray(X, dtype=np.float32).reshape(len(Y), self.n_features)
+        if self.normalize:
+            X = normalizeRows(X).astype(np.float32)
+        return X, np.asarray(Y, dtype=np.float32)
+
+    def streamDataset(self, path, split="train", shuffle=True):
+        """
+        tf.data pipeline of the pairs in a file written by writePairChunks, for when the pairs do not fit in memory.
+        Chunks are read and decoded by parallel workers and prefetched while the model trains, so only a few chunks
+        are in memory at once. The split uses the hash of the key like the out of core VoteClassifier
+        :param path: path to the chunks
+        :param split: 'train', 'test' or 'special_test'
+        :param shuffle: shuffle the chunks and the pairs within shuffle_buffer, in a different order every epoch
+        :return: tf.data.Dataset of batches of X and Y
+        """
+        offsets = chunkOffsets(path)
+        if self.n_features is None:
+            self.n_features = len(readPairChunk(path, offsets[0])[0][2])
+        n_features = self.n_features
+
+        def decode(offset):
+            X, Y = tf.numpy_function(lambda o: self._decodeChunk(path, o, split), [offset], (tf.float32, tf.float32))
+            return tf.ensure_shape(X, [None, n_features]), tf.ensure_shape(Y, [None])
+
+        dataset = tf.data.Dataset.from_tensor_slices(np.asarray(offsets, dtype=np.int64))
+        if shuffle:
+            dataset = dataset.shuffle(len(offsets), seed=self.rand_seed, reshuffle_each_iteration=True)
+        dataset = dataset.map(decode, num_parallel_calls=tf.data.AUTOTUNE, deterministic=not shuffle)
+        dataset = dataset.unbatch()
+        if shuffle:
+            dataset = dataset.shuffle(self.shuffle_buffer, seed=self.rand_seed, reshuffle_each_iteration=True)
+        return dataset.batch(self.batch_size).prefetch(tf.data.AUTOTUNE)
+
+    def _classWeights(self, path):
+        """
+        Weight the larger class so it has the same total weight as the pairs _selectPairsToUse would keep
+        """
+        counts = {0: 0, 1: 0}
+        for chunk in iterPairChunks(path):
+            for k, t, _ in chunk:
+                k = asKey(k)
+                if isTestPair(k, self.rand_seed, self.test_fraction):
+                    continue
+                if self.special_only and not self._isSpecialCase(k[1], k[3]):
+                    continue
+                counts[t] += 1
+        smaller = min(counts.values())
+        return {t: min(1.0, smaller * self.dif_same_ratio / c) if c else 0. for t, c in counts.items()}
+
+    def trainFromChunks(self, path):
+        """
+        Train on the pairs in a file written by writePairChunks without loading them all
+        :param path: path to the chunks
+        :return: keras History
+        """
+        print("INFO: Counting pairs")
+        class_weight = self._classWeights(path)
+        dataset = self.streamDataset(path, "train")
+        if not self.model.layers:
+            self.model = self.createModel((self.n_features,))
+        print("INFO: Training model...")
+        return self.model.fit(dataset, epochs=self.epochs, class_weight=class_weight)
+
+    def evaluateFromChunks(self, path):
+        print("INFO: Evaluating on test")
+        normal = self.model.evaluate(self.streamDataset(path, "test", shuffle=False))
+
+        print("INFO: Evaluating on special test")
+        special = self.model.evaluate(self.streamDataset(path, "special_test", shuffle=False))
+        return normal, special
+
+    def save(self):
+        """
+        Save the model to model_save_path, where AuthorDisambiguation loads it with model_name
+        """
+        path = os.getcwd() + self.model_save_path + self.model_name
+        if not os.path.exists(path):
+            os.makedirs(path)
+        self.model.save(path + "/model.keras")
+        parameters_dict = {
+            "normalize": self.normalize,
+            "batch_size": self.batch_size,
+            "n_features": self.model.input_shape[-1],
+            "special_only": self.special_only,
+            "test_fraction": self.test_fraction,
+            "rand_seed": self.rand_seed,
+            "diff_same_ratio": self.dif_same_ratio
+        }
+        with open(path + "/dense.json", "w") as f:
+            json.dump(parameters_dict, f, indent=4)
+        print("INFO: Saved model {} to {}".format(self.model_name, path))
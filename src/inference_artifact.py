@@ -0,0 +1,573 @@
+import json
+import pickle
+import numpy as np
+from src.lazy_import import lazyImport
+
+scipy = lazyImport("scipy")
+
+# Inference artifact for the VotingClassifier trained by VoteClassifier. Unpickling the model imports scikit-learn and
+# every estimator, and the KNN estimator searches its training set when predicting. exportModel writes the fitted
+# parameters of each estimator to a single .npz file and CompiledVotingClassifier predicts with them using only NumPy
+# and scipy, following the same operations scikit-learn uses so predict and predict_proba return the same values.
+#
+# Trees are stored as flat node arrays, with every tree of a forest or AdaBoost in the same arrays, so the samples are
+# passed down every tree at once. When scikit-learn uses a KD or ball tree for KNN, a KD-tree is built when exporting
+# and stored pickled, it is only used if the installed scipy is the version that built it, otherwise it is rebuilt
+# from the training data. Neighbors at the same distance as the k-th neighbor can then be picked differently than
+# scikit-learn picks them, and distance weights can differ in the last bits.
+
+ARTIFACT_VERSION = 1
+
+
+def _sklearnSoftmax(X):
+    X = X - X.max(axis=1)[:, np.newaxis]
+    np.exp(X, out=X)
+    X /= X.sum(axis=1)[:, np.newaxis]
+    return X
+
+
+def _logSumExp(X):
+    # scikit-learn's _logsumexp, which GaussianNB uses, rounds differently than scipy.special.logsumexp
+    X_max = X.max(axis=1, keepdims=True)
+    index_max = X == X_max
+    X = X.copy()
+    X[index_max] = -np.inf
+    m = index_max.astype(X.dtype).sum(axis=1, keepdims=True)
+    shift = np.where(np.isfinite(X_max), X_max, 0)
+    s = np.exp(X - shift).sum(axis=1, keepdims=True)
+    s = np.where(s == 0, s, s / m)
+    return (np.log1p(s) + np.log(m) + X_max)[:, 0]
+
+
+def _exportTrees(trees, arrays, prefix):
+    """
+    Concatenate the nodes of the trees
+    :param trees: list of fitted DecisionTreeClassifier
+    :param arrays: dict to add the arrays to
+    :param prefix: prefix of the array names
+    """
+    left = []
+    right = []
+    feature = []
+    threshold = []
+    missing_left = []
+    value = []
+    roots = []
+    offset = 0
+    for tree in trees:
+        t = tree.tree_
+        if t.n_outputs != 1:
+            raise ValueError("Only trees with one output are supported")
+        nodes = t.__getstate__()["nodes"]
+        is_leaf = t.children_left == -1
+        roots.append(offset)
+        left.append(np.where(is_leaf, -1, t.children_left + offset))
+        right.append(np.where(is_leaf, -1, t.children_right + offset))
+        # Leaves have feature -2, which would index a column when every node is looked up at once
+        feature.append(np.where(is_leaf, 0, t.feature))
+        threshold.append(t.threshold)
+        # Trees from before scikit-learn 1.3 do not have missing_go_to_left, they can not have seen missing values
+        if "missing_go_to_left" in nodes.dtype.names:
+            missing_left.append(nodes["missing_go_to_left"].astype(bool))
+        else:
+            missing_left.append(np.zeros(t.node_count, dtype=bool))
+        # Before scikit-learn 1.4 value has the weighted class counts of every node and predict_proba divides them by
+        # their sum, since then it has the fractions. Rows that already sum to 1 are kept as they are so the
+        # probabilities are the same as scikit-learn's to the last bit.
+        node_value = t.value[:, 0, :tree.n_classes_]
+        sums = node_value.sum(axis=1, keepdims=True)
+        counts = ~np.isclose(sums, 1) & (sums != 0)
+        value.append(np.where(counts, node_value / np.where(counts, sums, 1), node_value))
+        offset += t.node_count
+    arrays[prefix + "roots"] = np.array(roots, dtype=np.intp)
+    arrays[prefix + "left"] = np.concatenate(left).astype(np.intp)
+    arrays[prefix + "right"] = np.concatenate(right).astype(np.intp)
+    arrays[prefix + "feature"] = np.concatenate(feature).astype(np.intp)
+    arrays[prefix + "threshold"] = np.concatenate(threshold)
+    arrays[prefix + "missing_left"] = np.concatenate(missing_left)
+    arrays[prefix + "value"] = np.concatenate(value)
+
+
+def _exportEstimator(estimator, arrays, prefix):
+    """
+    :param estimator: fitted estimator
+    :param arrays: dict to add the arrays of the estimator to
+    :param prefix: prefix of the array names
+    :return: dict of the non array parameters
+    """
+    kind = type(estimator).__name__
+    arrays[prefix + "classes"] = estimator.classes_
+    if kind == "DecisionTreeClassifier":
+        _exportTrees([estimator], arrays, prefix)
+    elif kind == "RandomForestClassifier":
+        _exportTrees(estimator.estimators_, arrays, prefix)
+    elif kind == "AdaBoostClassifier":
+        _exportTrees(estimator.estimators_, arrays, prefix)
+        arrays[prefix + "tree_classes"] = estimator.estimators_[0].classes_
+        arrays[prefix + "estimator_weights"] = estimator.estimator_weights_
+    elif kind == "GaussianNB":
+        arrays[prefix + "class_prior"] = estimator.class_prior_
+        arrays[prefix + "theta"] = estimator.theta_
+        arrays[prefix + "var"] = estimator.var_
+    elif kind == "QuadraticDiscriminantAnalysis":
+        arrays[prefix + "means"] = estimator.means_
+        arrays[prefix + "priors"] = estimator.priors_
+        for i, (r, s) in enumerate(zip(estimator.rotations_, estimator.scalings_)):
+            arrays[prefix + "rotations_{}".format(i)] = r
+            arrays[prefix + "scalings_{}".format(i)] = s
+    elif kind == "MLPClassifier":
+        for i, (c, b) in enumerate(zip(estimator.coefs_, estimator.intercepts_)):
+            arrays[prefix + "coefs_{}".format(i)] = c
+            arrays[prefix + "intercepts_{}".format(i)] = b
+        return dict(type=kind, layers=len(estimator.coefs_), activation=estimator.activation,
+                    out_activation=estimator.out_activation_)
+    elif kind == "KNeighborsClassifier":
+        if estimator.effective_metric_ not in ["euclidean", "minkowski", "manhattan"] or estimator.outputs_2d_ or \
+                not isinstance(estimator.weights, str):
+            raise ValueError("Only single output KNN with a minkowski metric and uniform or distance weights is "
+                             "supported")
+        p = estimator.effective_metric_params_.get("p", estimator.p)
+        if estimator.effective_metric_ == "euclidean":
+            p = 2
+        elif estimator.effective_metric_ == "manhattan":
+            p = 1
+        # scikit-learn searches the training data directly when it has many features, then the neighbors are found
+        # the same way so ties are broken the same way, otherwise the KD-tree is built now instead of when loading
+        brute = estimator._fit_method == "brute" and p == 2
+        arrays[prefix + "fit_X"] = estimator._fit_X
+        arrays[prefix + "y"] = estimator._y
+        if not brute:
+            tree = scipy.spatial.cKDTree(estimator._fit_X)
+            arrays[prefix + "kd_tree"] = np.frombuffer(pickle.dumps(tree, protocol=pickle.HIGHEST_PROTOCOL),
+                                                       dtype=np.uint8)
+        return dict(type=kind, n_neighbors=estimator.n_neighbors, weights=estimator.weights, p=p, brute=brute,
+                    scipy_version=scipy.__version__)
+    else:
+        raise ValueError("{} is not supported by the inference artifact".format(kind))
+    return dict(type=kind)
+
+
+def exportModel(model, path):
+    """
+    Write the inference artifact of a fitted VotingClassifier
+    :param model: fitted VotingClassifier
+    :param path: path of the .npz file
+    """
+    arrays = {"classes": model.classes_}
+    estimators = []
+    for i, (name, estimator) in enumerate(zip(model.named_estimators_.keys(), model.estimators_)):
+        params = _exportEstimator(estimator, arrays, "{}/".format(i))
+        params["name"] = name
+        estimators.append(params)
+    # The model is fitted, so scikit-learn is already imported
+    import sklearn
+    weights = model._weights_not_none
+    spec = dict(version=ARTIFACT_VERSION, sklearn_version=sklearn.__version__, voting=model.voting,
+                weights=None if weights is None else [float(w) for w in weights], estimators=estimators,
+                n_features_in_=int(model.n_features_in_))
+    arrays["spec"] = np.array(json.dumps(spec))
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+
+
+class _Trees:
+    def __init__(self, arrays, prefix):
+        self.classes = arrays[prefix + "classes"]
+        self.roots = arrays[prefix + "roots"]
+        self.left = arrays[prefix + "left"]
+        self.right = arrays[prefix + "right"]
+        self.feature = arrays[prefix + "feature"]
+        self.threshold = arrays[prefix + "threshold"]
+        self.missing_left = arrays[prefix + "missing_left"]
+        self.value = arrays[prefix + "value"]
+
+    def leaves(self, X):
+        """
+        :param X: samples
+        :return: array of shape (samples, trees) of the leaf of each sample in each tree
+        """
+        # The trees split on float32 features
+        X = np.asarray(X, dtype=np.float32)
+        nodes = np.tile(self.roots, (X.shape[0], 1))
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        while True:
+            is_split = self.left[nodes] != -1
+            if not is_split.any():
+                return nodes
+            x = X[rows, self.feature[nodes]]
+            go_left = (x <= self.threshold[nodes]) | (np.isnan(x) & self.missing_left[nodes])
+            nodes = np.where(is_split, np.where(go_left, self.left[nodes], self.right[nodes]), nodes)
+
+    def predict_proba(self, X):
+        leaves = self.leaves(X)
+        proba = np.zeros((X.shape[0], self.value.shape[1]), dtype=np.float64)
+        for i in range(leaves.shape[1]):
+            proba += self.value[leaves[:, i]]
+        proba /= leaves.shape[1]
+        return proba
+
+    def predict(self, X):
+        return self.classes.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+class _AdaBoost(_Trees):
+    def __init__(self, arrays, prefix):
+        super().__init__(arrays, prefix)
+        self.tree_classes = arrays[prefix + "tree_classes"]
+        self.estimator_weights = arrays[prefix + "estimator_weights"]
+
+    def decision_function(self, X):
+        leaves = self.leaves(X)
+        n_classes = len(self.classes)
+        classes = self.classes[:, np.newaxis]
+        decision = 0
+        for i, w in zip(range(leaves.shape[1]), self.estimator_weights):
+            tree_predictions = self.tree_classes.take(np.argmax(self.value[leaves[:, i]], axis=1), axis=0)
+            decision = decision + np.where((tree_predictions == classes).T, w, -1 / (n_classes - 1) * w)
+        decision /= self.estimator_weights.sum()
+        if n_classes == 2:
+            decision[:, 0] *= -1
+            return decision.sum(axis=1)
+        return decision
+
+    def predict_proba(self, X):
+        decision = self.decision_function(X)
+        if len(self.classes) == 2:
+            decision = np.vstack([-decision, decision]).T / 2
+        else:
+            decision /= len(self.classes) - 1
+        return _sklearnSoftmax(decision)
+
+    def predict(self, X):
+        decision = self.decision_function(X)
+        if len(self.classes) == 2:
+            return self.classes.take(decision > 0, axis=0)
+        return self.classes.take(np.argmax(decision, axis=1), axis=0)
+
+
+class _GaussianNB:
+    def __init__(self, arrays, prefix):
+        self.classes = arrays[prefix + "classes"]
+        self.class_prior = arrays[prefix + "class_prior"]
+        self.theta = arrays[prefix + "theta"]
+        self.var = arrays[prefix + "var"]
+
+    def _jointLogLikelihood(self, X):
+        jll = []
+        for i in range(len(self.classes)):
+            n_ij = -0.5 * np.sum(np.log(2.0 * np.pi * self.var[i, :]))
+            n_ij -= 0.5 * np.sum(((X - self.theta[i, :]) ** 2) / (self.var[i, :]), 1)
+            jll.append(np.log(self.class_prior[i]) + n_ij)
+        return np.array(jll).T
+
+    def predict_proba(self, X):
+        jll = self._jointLogLikelihood(X)
+        return np.exp(jll - np.atleast_2d(_logSumExp(jll)).T)
+
+    def predict(self, X):
+        return self.classes[np.argmax(self._jointLogLikelihood(X), axis=1)]
+
+
+class _QDA:
+    def __init__(self, arrays, prefix):
+        self.classes = arrays[prefix + "classes"]
+        self.means = arrays[prefix + "means"]
+        self.priors = arrays[prefix + "priors"]
+        self.rotations = [arrays[prefix + "rotations_{}".format(i)] for i in range(len(self.classes))]
+        self.scalings = [arrays[prefix + "scalings_{}".format(i)] for i in range(len(self.classes))]
+
+    def _decisionFunction(self, X):
+        norm2 = []
+        for i in range(len(self.classes)):
+            X2 = np.dot(X - self.means[i], self.rotations[i] * (self.scalings[i] ** (-0.5)))
+            norm2.append(np.sum(X2 ** 2, axis=1))
+        norm2 = np.array(norm2).T
+        u = np.asarray([np.sum(np.log(s)) for s in self.scalings])
+        return -0.5 * (norm2 + u) + np.log(self.priors)
+
+    def predict_proba(self, X):
+        scores = self._decisionFunction(X)
+        log_likelihood = scores - scores.max(axis=1)[:, np.newaxis]
+        return np.exp(log_likelihood - np.log(np.exp(log_likelihood).sum(axis=1)[:, np.newaxis]))
+
+    def predict(self, X):
+        return self.classes.take(self._decisionFunction(X).argmax(axis=1))
+
+
+class _MLP:
+    def __init__(self, arrays, prefix, params):
+        self.classes = arrays[prefix + "classes"]
+        self.coefs = [arrays[prefix + "coefs_{}".format(i)] for i in range(params["layers"])]
+        self.intercepts = [arrays[prefix + "intercepts_{}".format(i)] for i in range(params["layers"])]
+        self.activation = params["activation"]
+        self.out_activation = params["out_activation"]
+
+    @staticmethod
+    def _activate(X, activation):
+        if activation == "relu":
+            np.maximum(X, 0, out=X)
+        elif activation == "tanh":
+            np.tanh(X, out=X)
+        elif activation == "logistic":
+            scipy.special.expit(X, out=X)
+        elif activation == "softmax":
+            X[:] = _sklearnSoftmax(X)
+        elif activation != "identity":
+            raise ValueError("Unknown activation {}".format(activation))
+
+    def _forwardPass(self, X):
+        activation = X
+        for i, (c, b) in enumerate(zip(self.coefs, self.intercepts)):
+            activation = activation @ c
+            activation += b
+            if i != len(self.coefs) - 1:
+                self._activate(activation, self.activation)
+        self._activate(activation, self.out_activation)
+        if activation.shape[1] == 1:
+            return activation.ravel()
+        return activation
+
+    def predict_proba(self, X):
+        y_pred = self._forwardPass(X)
+        if y_pred.ndim == 1:
+            return np.vstack([1 - y_pred, y_pred]).T
+        return y_pred
+
+    def predict(self, X):
+        y_pred = self._forwardPass(X)
+        if y_pred.ndim == 1:
+            return self.classes[(y_pred > .5).astype(int)]
+        return self.classes.take(np.argmax(y_pred, axis=1))
+
+
+def _squaredNorms(X):
+    # Each norm is a BLAS dot product, like scikit-learn's, summing in a different order changes the last bits
+    return np.fromiter((np.dot(x, x) for x in X), dtype=np.float64, count=X.shape[0])
+
+
+def _smallest(dist, k, sample_size=1024):
+    """
+    Indices of the k smallest distances of each row, in no particular order
+    :param dist: array of shape (samples, training samples)
+    :param k: number of distances
+    :param sample_size: the k-th smallest distance in this many columns bounds the k-th smallest of the row
+    :return: array of shape (samples, k), boolean array of the rows with more than one distance equal to the k-th
+    """
+    if dist.shape[1] > 2 * sample_size:
+        # Partitioning every column is slow, only the columns within the bound of each row are partitioned
+        bound = np.partition(dist[:, :sample_size], k - 1, axis=1)[:, k - 1]
+        rows, cols = np.nonzero(dist <= bound[:, np.newaxis])
+        counts = np.bincount(rows, minlength=dist.shape[0])
+        position = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+        candidates = np.full((dist.shape[0], counts.max()), np.inf)
+        candidate_cols = np.zeros(candidates.shape, dtype=np.intp)
+        candidates[rows, position] = dist[rows, cols]
+        candidate_cols[rows, position] = cols
+    else:
+        candidates = dist
+        candidate_cols = None
+    ind = np.argpartition(candidates, k - 1, axis=1)[:, :k]
+    kth = np.take_along_axis(candidates, ind, axis=1).max(axis=1)
+    tied = (candidates <= kth[:, np.newaxis]).sum(axis=1) > k
+    if candidate_cols is not None:
+        ind = np.take_along_axis(candidate_cols, ind, axis=1)
+    return ind, tied
+
+
+def _heapNeighbors(dist, k, block_size=256):
+    """
+    Push the distances in order to a max heap of size k the same way scikit-learn's heap_push does
+    :param dist: distances of a sample to every training sample
+    :param k: number of neighbors
+    :param block_size: number of distances to compare to the largest distance in the heap at once
+    :return: indices of the neighbors
+    """
+    values = np.full(k, np.inf)
+    indices = np.full(k, -1, dtype=np.intp)
+    for start in range(0, len(dist), block_size):
+        block = dist[start:start + block_size]
+        for j in np.flatnonzero(block < values[0]):
+            val = block[j]
+            if val >= values[0]:
+                continue
+            current = 0
+            while True:
+                left = 2 * current + 1
+                right = left + 1
+                if left >= k:
+                    break
+                elif right >= k:
+                    if values[left] > val:
+                        swap = left
+                    else:
+                        break
+                elif values[left] >= values[right]:
+                    if val < values[left]:
+                        swap = left
+                    else:
+                        break
+                else:
+                    if val < values[right]:
+                        swap = right
+                    else:
+                        break
+                values[current] = values[swap]
+                indices[current] = indices[swap]
+                current = swap
+            values[current] = val
+            indices[current] = start + j
+    return indices
+
+
+class _KNN:
+    def __init__(self, arrays, prefix, params):
+        self.classes = arrays[prefix + "classes"]
+        self.y = arrays[prefix + "y"]
+        self.n_neighbors = params["n_neighbors"]
+        self.weights = params["weights"]
+        self.p = params["p"]
+        self.fit_X = arrays[prefix + "fit_X"]
+        self.tree = None
+        if params["brute"]:
+            self.fit_X_norms = _squaredNorms(self.fit_X)
+        elif params["scipy_version"] == scipy.__version__:
+            self.tree = pickle.loads(arrays[prefix + "kd_tree"].tobytes())
+        else:
+            self.tree = scipy.spatial.cKDTree(self.fit_X)
+
+    def _bruteNeighbors(self, X, chunk_size=256):
+        """
+        The k nearest neighbors the way scikit-learn finds them without a tree, ranking the training data by the
+        squared distances |x|^2 - 2x.y + |y|^2
+        :param X: samples
+        :param chunk_size: number of samples to compare to the training data at once
+        :return: distances, indices, both of shape (samples, n_neighbors) and sorted by distance
+        """
+        k = self.n_neighbors
+        X_norms = _squaredNorms(X)
+        dist_out = np.empty((X.shape[0], k))
+        ind_out = np.empty((X.shape[0], k), dtype=np.intp)
+        for start in range(0, X.shape[0], chunk_size):
+            end = min(start + chunk_size, X.shape[0])
+            dist = X[start:end] @ self.fit_X.T
+            dist *= -2
+            dist += X_norms[start:end, np.newaxis]
+            dist += self.fit_X_norms
+            np.maximum(dist, 0, out=dist)
+            ind, tied = _smallest(dist, k)
+            # Which of the training samples at the same distance as the k-th neighbor are neighbors depends on the
+            # order they were pushed to scikit-learn's heap
+            for i in np.flatnonzero(tied):
+                ind[i] = _heapNeighbors(dist[i], k)
+            d = np.take_along_axis(dist, ind, axis=1)
+            order = np.argsort(d, axis=1)
+            dist_out[start:end] = np.sqrt(np.take_along_axis(d, order, axis=1))
+            ind_out[start:end] = np.take_along_axis(ind, order, axis=1)
+        return dist_out, ind_out
+
+    def _votes(self, X):
+        if self.tree is None:
+            dist, ind = self._bruteNeighbors(X)
+        else:
+            dist, ind = self.tree.query(X, k=self.n_neighbors, p=self.p)
+        if dist.ndim == 1:
+            dist = dist[:, np.newaxis]
+            ind = ind[:, np.newaxis]
+        if self.weights == "distance":
+            with np.errstate(divide="ignore"):
+                weights = 1.0 / dist
+            inf_mask = np.isinf(weights)
+            inf_row = np.any(inf_mask, axis=1)
+            weights[inf_row] = inf_mask[inf_row]
+        else:
+            weights = np.ones_like(ind)
+        rows = np.arange(X.shape[0])
+        votes = np.zeros((X.shape[0], len(self.classes)))
+        for i, idx in enumerate(self.y[ind].T):
+            votes[rows, idx] += weights[:, i]
+        return votes
+
+    def predict_proba(self, X):
+        votes = self._votes(X)
+        votes /= votes.sum(axis=1)[:, np.newaxis]
+        return votes
+
+    def predict(self, X):
+        return self.classes.take(np.argmax(self._votes(X), axis=1))
+
+
+class CompiledVotingClassifier:
+    """
+    VotingClassifier loaded from the artifact written by exportModel, it has the same predict, predict_proba and
+    voting as the VotingClassifier
+    """
+
+    def __init__(self, path):
+        """
+        :param path: path of the .npz file
+        """
+        with np.load(path, allow_pickle=False) as f:
+            arrays = dict(f)
+        spec = json.loads(str(arrays["spec"]))
+        if spec["version"] != ARTIFACT_VERSION:
+            raise ValueError("{} is version {} of the artifact, expected {}".format(path, spec["version"],
+                                                                                   ARTIFACT_VERSION))
+        self.voting = spec["voting"]
+        self.weights = spec["weights"]
+        self.classes_ = arrays["classes"]
+        self.n_features_in_ = spec.get("n_features_in_")
+        # Version of scikit-learn that exported the artifact, None for artifacts exported before it was stored
+        self.sklearn_version = spec.get("sklearn_version")
+        self.names = []
+        self.estimators_ = []
+        for i, params in enumerate(spec["estimators"]):
+            prefix = "{}/".format(i)
+            kind = params["type"]
+            if kind in ["DecisionTreeClassifier", "RandomForestClassifier"]:
+                estimator = _Trees(arrays, prefix)
+            elif kind == "AdaBoostClassifier":
+                estimator = _AdaBoost(arrays, prefix)
+            elif kind == "GaussianNB":
+                estimator = _GaussianNB(arrays, prefix)
+            elif kind == "QuadraticDiscriminantAnalysis":
+                estimator = _QDA(arrays, prefix)
+            elif kind == "MLPClassifier":
+                estimator = _MLP(arrays, prefix, params)
+            elif kind == "KNeighborsClassifier":
+                estimator = _KNN(arrays, prefix, params)
+            else:
+                raise ValueError("{} is not supported by the inference artifact".format(kind))
+            self.names.append(params["name"])
+            self.estimators_.append(estimator)
+
+    @staticmethod
+    def _checkX(X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2:
+            raise ValueError("Expected a 2D array, got {} dimensions".format(X.ndim))
+        return X
+
+    def predict_proba(self, X):
+        if self.voting != "soft":
+            raise AttributeError("predict_proba is not available when voting='hard'")
+        X = self._checkX(X)
+        return np.average(np.asarray([e.predict_proba(X) for e in self.estimators_]), axis=0, weights=self.weights)
+
+    def predict(self, X):
+        X = self._checkX(X)
+        if self.voting == "soft":
+            return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+        # Weighted votes are added in the same order np.bincount adds them
+        votes = np.zeros((X.shape[0], len(self.classes_)), dtype=np.float64 if self.weights else np.intp)
+        for i, estimator in enumerate(self.estimators_):
+            predictions = estimator.predict(X)
+            votes[np.arange(X.shape[0]), predictions] += self.weights[i] if self.weights else 1
+        return self.classes_[np.argmax(votes, axis=1)]
+
+
+def loadModel(path):
+    """
+    :param path: path of the artifact written by exportModel
+    :return: CompiledVotingClassifier
+    """
+    return CompiledVotingClassifier(path)
@@ -0,0 +1,26 @@
+import importlib.util
+import sys
+
+# nltk, scikit-learn, scipy and tensorflow take longer to import than most of the CLI takes to start, and each of
+# them is only used by some of the stages. lazyImport returns the package without running it, and the package is
+# imported the first time one of its attributes is used. Only top level packages can be imported lazily, finding
+# the spec of a submodule imports its parent.
+
+
+def lazyImport(name):
+    """
+    Import a package the first time one of its attributes is used
+    :param name: name of the top level package
+    :return: the package if it is already imported, otherwise a module that imports it when it is first used
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError("No module named '{}'".format(name), name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
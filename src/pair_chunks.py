@@ -0,0 +1,121 @@
+import json
+import os
+import pickle
+import zlib
+from src.pair_keys import keyToString
+
+# tagged_pairs.pickle is one pickled list of every pair, so it has to be loaded whole. tagged_pairs_chunks.pickle has
+# the same [key, tag, vector] pairs pickled as consecutive lists of at most chunk_size pairs, so training can read one
+# chunk at a time and only keep bounded samples of the pairs in memory. The byte offset of every chunk is written to
+# tagged_pairs_chunks.pickle.index, so chunks can also be read out of order and in parallel.
+
+
+def writePairChunks(path, pairs, chunk_size=10000):
+    """
+    :param path: path of the file to write
+    :param pairs: iterable of pairs
+    :param chunk_size: max number of pairs in a chunk
+    :return: number of pairs written
+    """
+    count = 0
+    chunk = []
+    offsets = []
+    with open(path, "wb") as f:
+        for pair in pairs:
+            chunk.append(pair)
+            if len(chunk) == chunk_size:
+                offsets.append(f.tell())
+                pickle.dump(chunk, f, protocol=pickle.HIGHEST_PROTOCOL)
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            offsets.append(f.tell())
+            pickle.dump(chunk, f, protocol=pickle.HIGHEST_PROTOCOL)
+            count += len(chunk)
+    with open(path + ".index", "w") as f:
+        json.dump(offsets, f)
+    return count
+
+
+def iterPairChunks(path):
+    """
+    :param path: path of a file written by writePairChunks
+    :return: generator of the lists of pairs
+    """
+    with open(path, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+def chunkOffsets(path):
+    """
+    :param path: path of a file written by writePairChunks
+    :return: list of the byte offset of every chunk
+    """
+    if os.path.exists(path + ".index") and os.path.getmtime(path + ".index") >= os.path.getmtime(path):
+        with open(path + ".index") as f:
+            return json.load(f)
+    # Files written before the index have to be read once to find the chunks
+    offsets = []
+    with open(path, "rb") as f:
+        while True:
+            offset = f.tell()
+            try:
+                pickle.load(f)
+            except EOFError:
+                return offsets
+            offsets.append(offset)
+
+
+def readPairChunk(path, offset):
+    """
+    :param path: path of a file written by writePairChunks
+    :param offset: offset of the chunk from chunkOffsets
+    :return: list of the pairs in the chunk
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return pickle.load(f)
+
+
+def isTestPair(key, seed, test_fraction):
+    """
+    Split the pairs into train and test without having all of them at once. The split only depends on the pair, so it
+    is the same in every pass over the chunks
+    :param key: tuple key of the pair
+    :param seed: random seed of the model
+    :param test_fraction: 1 of every test_fraction pairs is a test pair
+    :return: True if the pair is a test pair
+    """
+    return zlib.crc32("{} {}".format(seed, keyToString(key)).encode()) % test_fraction == 0
+
+
+class Reservoir:
+    """
+    Uniform random sample of at most size items of a stream of unknown length
+    """
+
+    def __init__(self, size, rng):
+        """
+        :param size: max number of items to keep
+        :param rng: random.Random to sample with
+        """
+        self.size = size
+        self.rng = rng
+        self.items = []
+        self.seen = 0
+
+    def add(self, item):
+        self.seen += 1
+        if len(self.items) < self.size:
+            self.items.append(item)
+            return
+        i = self.rng.randrange(self.seen)
+        if i < self.size:
+            self.items[i] = item
+
+    def __len__(self):
+        return len(self.items)
@@ -0,0 +1,58 @@
+import sys
+
+# Keys for author instances and pairs of them. The key of an author on a paper is the tuple (pid, author id) and the
+# key of a pair is the two author keys concatenated, (pid a, author id a, pid b, author id b). The strings in the keys
+# are interned, so building, hashing and comparing keys does not allocate new strings. The space separated strings
+# "pid author" and "pid_a a pid_b b" are only used when keys are written to or read from files, so they only work for
+# ids without spaces. Pids never have them and createID replaces them with dashes. The separator is kept a space
+# because it is the format of the existing pickles and isTestPair hashes the strings to split train and test.
+
+
+def authorKey(pid, author_id):
+    """
+    :param pid: paper id
+    :param author_id: author id
+    :return: (pid, author id)
+    """
+    return sys.intern(pid), sys.intern(author_id)
+
+
+def pairKey(a, b):
+    """
+    :param a: author key of the first author
+    :param b: author key of the second author
+    :return: (pid a, author id a, pid b, author id b)
+    """
+    return a + b
+
+
+def splitPairKey(pair_key):
+    """
+    :param pair_key: key from pairKey
+    :return: author key of a, author key of b
+    """
+    return pair_key[:2], pair_key[2:]
+
+
+def keyToString(key):
+    """
+    Space separated string of an author or pair key, for writing results
+    """
+    return " ".join(key)
+
+
+def keyFromString(key):
+    """
+    Inverse of keyToString
+    """
+    return tuple(sys.intern(x) for x in key.split(" "))
+
+
+def asKey(key):
+    """
+    Use a key that can be either a tuple key or a string from keyToString, such as the keys in pickles created before
+    keys were tuples
+    """
+    if isinstance(key, str):
+        return keyFromString(key)
+    return key
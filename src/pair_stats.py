@@ -0,0 +1,291 @@
+import numpy as np
+from src.pair_keys import asKey
+from src.utility_functions import printStats
+
+# Per feature statistics of compared pairs, computed column wise on the matrix of compare vectors. Pairs are added in
+# chunks as they are compared, so the stats are ready when comparing is done and the pairs never have to be collected
+# into per feature lists. Every group of pairs keeps the count, the sum and the sum of squared differences from the mean
+# (combined across chunks with Chan's formula) of every feature, and a histogram of the values of every feature. The
+# histogram has a bin for every distinct value until it has more than max_bins, then neighbouring bins are merged into
+# max_bins bins of about equal count. Compare vectors have few distinct values, so quantiles are usually exact, and
+# the memory used does not grow with the number of pairs either way.
+
+pair_groups = ["same", "different", "special same", "special different"]
+
+
+def _mergeHistogram(values, counts, new_values, new_counts, max_bins):
+    """
+    :param values: sorted bin values of the histogram
+    :param counts: count of every bin
+    :param new_values: bin values to add
+    :param new_counts: count of every bin to add
+    :param max_bins: max number of bins to keep
+    :return: sorted bin values, counts, if the histogram was compressed
+    """
+    values, inverse = np.unique(np.concatenate([values, new_values]), return_inverse=True)
+    counts = np.bincount(inverse, weights=np.concatenate([counts, new_counts]), minlength=len(values))
+    if len(values) <= max_bins:
+        return values, counts, False
+    # Bins are contiguous ranges of the sorted values with about the same count, their value is the mean of the range
+    bins = np.minimum((np.cumsum(counts) - counts) * max_bins // counts.sum(), max_bins - 1).astype(int)
+    bin_counts = np.bincount(bins, weights=counts)
+    bin_values = np.bincount(bins, weights=values * counts) / np.maximum(bin_counts, 1)
+    keep = bin_counts > 0
+    return bin_values[keep], bin_counts[keep], True
+
+
+class _GroupStats:
+    """
+    Streaming stats of every feature of one group of pairs
+    """
+
+    def __init__(self, n_features, max_bins):
+        self.max_bins = max_bins
+        self.count = 0
+        self.sum = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+        self.values = [np.zeros(0) for _ in range(n_features)]
+        self.counts = [np.zeros(0) for _ in range(n_features)]
+        self.exact = True
+
+    def add(self, X):
+        """
+        :param X: 2d array, a row for every pair
+        """
+        if len(X) == 0:
+            return
+        n = len(X)
+        chunk_sum = X.sum(axis=0)
+        chunk_mean = chunk_sum / n
+        chunk_m2 = ((X - chunk_mean) ** 2).sum(axis=0)
+        if self.count:
+            delta = chunk_mean - self.sum / self.count
+            self.m2 = self.m2 + chunk_m2 + delta ** 2 * self.count * n / (self.count + n)
+        else:
+            self.m2 = chunk_m2
+        self.sum = self.sum + chunk_sum
+        self.count += n
+        for i in range(X.shape[1]):
+            new_values, new_counts = np.unique(X[:, i], return_counts=True)
+            self.values[i], self.counts[i], compressed = _mergeHistogram(self.values[i], self.counts[i], new_values,
+                                                                          new_counts, self.max_bins)
+            self.exact = self.exact and not compressed
+
+    def merge(self, other):
+        """
+        Add the stats of another _GroupStats
+        """
+        if not other.count:
+            return
+        if self.count:
+            delta = other.sum / other.count - self.sum / self.count
+            self.m2 = self.m2 + other.m2 + delta ** 2 * self.count * other.count / (self.count + other.count)
+        else:
+            self.m2 = other.m2.copy()
+        self.sum = self.sum + other.sum
+        self.count += other.count
+        for i in range(len(self.values)):
+            self.values[i], self.counts[i], compressed = _mergeHistogram(self.values[i], self.counts[i],
+                                                                          other.values[i], other.counts[i],
+                                                                          self.max_bins)
+            self.exact = self.exact and other.exact and not compressed
+
+    def mean(self):
+        if not self.count:
+            return np.full(len(self.sum), np.nan)
+        return self.sum / self.count
+
+    def var(self):
+        if not self.count:
+            return np.full(len(self.sum), np.nan)
+        return self.m2 / self.count
+
+    def quantile(self, q):
+        """
+        Quantile of every feature, interpolated linearly between the two closest values like np.quantile
+        :param q: quantile between 0 and 1
+        :return: array of the quantiles
+        """
+        if not self.count:
+            return np.full(len(self.sum), np.nan)
+        position = q * (self.count - 1)
+        lower, upper = int(np.floor(position)), int(np.ceil(position))
+        out = np.empty(len(self.values))
+        for i, (values, counts) in enumerate(zip(self.values, self.counts)):
+            cumulative = np.cumsum(counts)
+            low, high = values[np.searchsorted(cumulative, [lower, upper], side="right")]
+            # The median of an even number of values is their mean, same as np.median
+            out[i] = (low + high) / 2 if position - lower == .5 else low + (high - low) * (position - lower)
+        return out
+
+    def samples(self, i):
+        """
+        :param i: index of the feature
+        :return: the values of feature i, repeated by their count
+        """
+        return np.repeat(self.values[i], self.counts[i].astype(int))
+
+
+class PairStats:
+    """
+    Streaming per feature stats of compared pairs split into same, different, special same and special different
+    """
+
+    # Metrics computed from the streamed stats, any other metric function gets the values from the histograms
+    streamed_metrics = {
+        np.mean: lambda g: g.mean(),
+        np.median: lambda g: g.quantile(.5),
+        np.var: lambda g: g.var(),
+        np.std: lambda g: np.sqrt(g.var()),
+        np.min: lambda g: g.quantile(0),
+        np.max: lambda g: g.quantile(1),
+    }
+
+    def __init__(self, data_keys, special_cases=None, include_special_rest=True, max_bins=4096):
+        """
+        :param data_keys: The keys that are from CompareAuthors.compare_terms
+        :param special_cases: Any special cases you want to get the stats of
+        :param include_special_rest: Include the special cases in the other pairs stats
+        :param max_bins: max number of bins in the histogram of a feature, quantiles are exact until a feature has
+        more distinct values than this
+        """
+        self.data_keys = data_keys
+        self.special_cases = special_cases if special_cases else []
+        self.include_special_rest = include_special_rest
+        self.groups = {g: _GroupStats(len(data_keys), max_bins) for g in pair_groups}
+        self._author_cases = {}
+
+    def _authorCases(self, author_id):
+        """
+        :param author_id: author id
+        :return: set of the special cases the author id starts with
+        """
+        if author_id not in self._author_cases:
+            parts = author_id.split("-")
+            self._author_cases[author_id] = frozenset(
+                case for case in self.special_cases if "-".join(parts[:len(case.split("-"))]) == case)
+        return self._author_cases[author_id]
+
+    def isSpecial(self, key):
+        """
+        :param key: pair key
+        :return: if both authors of the pair start with the same special case
+        """
+        _, a, _, b = asKey(key)
+        return bool(self._authorCases(a) & self._authorCases(b))
+
+    def add(self, pairs):
+        """
+        :param pairs: list of [key, tag, vector] from CompareAuthors
+        """
+        if not pairs:
+            return
+        tags = np.fromiter((tag for _, tag, _ in pairs), dtype=int, count=len(pairs))
+        special = np.fromiter((self.isSpecial(key) for key, _, _ in pairs), dtype=bool, count=len(pairs))
+        X = np.asarray([vector for _, _, vector in pairs], dtype=np.float64).reshape(len(pairs), -1)
+        self.addArrays(X, tags, special)
+
+    def addArrays(self, X, tags, special):
+        """
+        :param X: 2d array of compare vectors
+        :param tags: array of tags, 1 if same
+        :param special: bool array, if the pair is a special case
+        """
+        same = tags == 1
+        rest = ~special | self.include_special_rest
+        self.groups["same"].add(X[same & rest])
+        self.groups["different"].add(X[~same & rest])
+        self.groups["special same"].add(X[same & special])
+        self.groups["special different"].add(X[~same & special])
+
+    def merge(self, other):
+        """
+        Add the stats of another PairStats, such as one computed in another process
+        """
+        for g in pair_groups:
+            self.groups[g].merge(other.groups[g])
+
+    def count(self, group):
+        return self.groups[group].count
+
+    def mean(self, group):
+        return self.groups[group].mean()
+
+    def var(self, group):
+        return self.groups[group].var()
+
+    def quantile(self, group, q):
+        return self.groups[group].quantile(q)
+
+    def histogram(self, group, key, bins=10):
+        """
+        :param group: group of pairs
+        :param key: feature from data_keys
+        :param bins: bins argument of np.histogram
+        :return: counts and bin edges, same as np.histogram
+        """
+        g = self.groups[group]
+        i = self.data_keys.index(key)
+        return np.histogram(g.values[i], bins=bins, weights=g.counts[i])
+
+    def metric(self, group, function):
+        """
+        :param group: group of pairs
+        :param function: metric function that runs on a list of floats
+        :return: array of the metric of every feature
+        """
+        g = self.groups[group]
+        if function in self.streamed_metrics:
+            return self.streamed_metrics[function](g)
+        return np.array([function(g.samples(i)) for i in range(len(self.data_keys))])
+
+    def differenceStats(self, a, b, metrics):
+        """
+        :param a: first group
+        :param b: second group
+        :param metrics: list of ("name of metric", metric function)
+        :return: rows of ["key name", absolute difference of the metric of a and b]
+        """
+        a_values = [self.metric(a, f) for _, f in metrics]
+        b_values = [self.metric(b, f) for _, f in metrics]
+        out = []
+        for i, k in enumerate(self.data_keys):
+            for j, (name, _) in enumerate(metrics):
+                s_value = a_values[j][i]
+                if not s_value:
+                    s_value = 0
+                d_value = b_values[j][i]
+                if not d_value:
+                    d_value = 0
+                out.append(["{} {}".format(k, name), abs(s_value - d_value)])
+        return out
+
+    def writeReports(self, output_dir=None, metrics=None, logger=None, logger_level=None):
+        """
+        Write same_different.txt and special_same_special_different.txt to output_dir, or print them if it is None
+        :param output_dir: output directory to write stats too
+        :param metrics: metrics you want to return, tuples in the form ("name of metric", metric function)
+        :param logger: the logger to log too
+        :param logger_level: the level you want to log too
+        """
+        if metrics is None:
+            metrics = [
+                ("avg", np.mean),
+                ("median", np.median)
+            ]
+        if logger:
+            for g in pair_groups:
+                logger.log(logger_level, "{} {} pairs".format(self.count(g), g))
+            if not all(self.groups[g].exact for g in pair_groups):
+                logger.log(logger_level, "Quantiles are approximate, a feature has more than max_bins values")
+        same_different = self.differenceStats("same", "different", metrics)
+        special_same_and_different = self.differenceStats("special same", "special different", metrics)
+        if output_dir:
+            with open(output_dir + "/same_different.txt", "w") as f:
+                printStats("Same vs Different", same_different, print_func=f.write, printing_file=True)
+            with open(output_dir + "/special_same_special_different.txt", "w") as f:
+                printStats("Special Same vs Special Different", special_same_and_different, print_func=f.write,
+                           printing_file=True)
+        else:
+            printStats("Same vs Different", same_different)
+            printStats("Special Same vs Special Different", special_same_and_different)
@@ -1,42 +1,66 @@
 from src.utility_functions import *
 from copy import deepcopy
-from nltk import word_tokenize, corpus, pos_tag
+from sys import intern
+from functools import lru_cache
 import re
 from src.utility_functions import removeDupes
+from src.lazy_import import lazyImport
 
+nltk = lazyImport("nltk")
 remove_punct = re.compile("[^\w\s-]")
-stop_words = corpus.stopwords.words("english")
+
+
+@lru_cache(maxsize=None)
+def stopWords():
+    return frozenset(nltk.corpus.stopwords.words("english"))
+
+
+def internTokens(tokens):
+    if not tokens:
+        return ()
+    return tuple(intern(str(w)) for w in tokens)
 
 
 class Paper:
+    """
+    A paper's information. Ids and tokens are interned and the tokenized lists and citations are stored as tuples,
+    so they can be shared between copies instead of being copied. Code that changes a paper should replace these
+    attributes (i.e. paper.citations = new_citations) instead of changing them in place.
+    """
+    __slots__ = ["pid", "title", "abstract", "authors", "unknown", "affiliations", "pid_sortable", "coauthors",
+                 "title_tokenized", "citations", "citations_tokenized", "sections", "sections_tokenized", "title_pos"]
+
     def __init__(self, pid, title, abstract, authors, unknown=None, affiliations=None, title_tokenized=None,
                  sections=None, sections_tokenized=None, citations=None, citations_tokenized=None, title_pos=None):
 
-        self.pid = pid
+        self.pid = intern(str(pid))
         self.title = title
         self.abstract = abstract
-        self.authors = authors
+        self.authors = {intern(str(k)): v for k, v in authors.items()}
         self.unknown = unknown if unknown else []
-        self.affiliations = affiliations if affiliations else {}
+        self.affiliations = {intern(str(k)): v for k, v in affiliations.items()} if affiliations else {}
+        for info in self.affiliations.values():
+            try:
+                if isinstance(info["affiliation"]["id"], str):
+                    info["affiliation"]["id"] = intern(str(info["affiliation"]["id"]))
+            except (KeyError, TypeError):
+                pass
         self.pid_sortable = convertPaperToSortable(pid)
         self.coauthors = {}
-        if not title_tokenized:
-            self.title_tokenized = []
-        else:
-            self.title_tokenized = title_tokenized
+        self.title_tokenized = internTokens(title_tokenized)
         if not citations:
-            self.citations = []
-            self.citations_tokenized = []
+            self.citations = ()
+            self.citations_tokenized = ()
         else:
-            self.citations = citations
-            self.citations_tokenized = citations_tokenized
+            self.citations = tuple(citations)
+            self.citations_tokenized = internTokens(citations_tokenized)
 
         if sections is None:
             self.sections = {}
-            self.sections_tokenized = []
+            self.sections_tokenized = ()
         else:
             self.sections = sections
-            self.sections_tokenized = sections_tokenized if sections_tokenized else []
+            self.sections_tokenized = internTokens(sections_tokenized)
         self.title_pos = title_pos
 
     def addAffiliations(self, affiliations):
@@ -77,14 +101,28 @@ class Paper:
         }
 
     def copy(self):
-        return Paper(**deepcopy(self.asDict()))
+        """
+        Copy the paper. authors, affiliations and each author's affiliation entry are new dicts so they can be changed
+        without affecting the original, everything else (tuples, strings, sections and the affiliation info) is shared
+        :return: Paper
+        """
+        out = Paper.__new__(Paper)
+        for k in Paper.__slots__:
+            setattr(out, k, getattr(self, k))
+        out.authors = dict(self.authors)
+        out.affiliations = {k: dict(v) for k, v in self.affiliations.items()}
+        out.unknown = list(self.unknown)
+        out.coauthors = dict(self.coauthors)
+        return out
 
     def loadTokenized(self, title, citations, sections):
-        self.title_tokenized = title
-        self.citations_tokenized = citations
-        self.sections_tokenized = sections
+        self.title_tokenized = internTokens(title)
+        self.citations_tokenized = internTokens(citations)
+        self.sections_tokenized = internTokens(sections)
 
     def tokenize(self, remove_stops=True):
+        stop_words = stopWords()
+        word_tokenize = nltk.word_tokenize
         title_tokenized = word_tokenize(remove_punct.sub(" ", cleanName(self.title, replace_punct=False)))
         title_out = []
         for i, w in enumerate(title_tokenized):
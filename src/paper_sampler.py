@@ -0,0 +1,91 @@
+import random
+from src.utility_functions import convertPaperToSortable
+
+
+class PaperSampler:
+    """
+    Select a bounded subset of an author's papers to compare a target to.
+
+    Methods:
+        diverse: Greedily pick the paper that covers the most years, orgs and co-authors that have not been covered by
+        the papers already picked. Ties are broken by a seeded shuffle so the same author always gets the same papers.
+        recent: The most recent papers
+        random: Seeded random sample
+    """
+    methods = ["diverse", "recent", "random"]
+
+    def __init__(self, papers, max_papers=0, method="diverse", seed=1):
+        """
+        :param papers: dict of pid to Paper
+        :param max_papers: Maximum papers to select per author, 0 selects every paper
+        :param method: one of methods
+        :param seed: seed for the random number generator, the generator is reseeded for every author
+        """
+        if method not in self.methods:
+            raise ValueError("{} is not a valid sampling method".format(method))
+        if max_papers < 0:
+            raise ValueError("max_papers must be >= 0")
+        self.papers = papers
+        self.max_papers = max_papers
+        self.method = method
+        self.seed = seed
+
+    def paperFeatures(self, pid, author):
+        """
+        Get the year, org and co-authors of an author on a paper
+        :return: set of (feature type, value)
+        """
+        out = {("year", convertPaperToSortable(pid, True))}
+        if pid not in self.papers:
+            return out
+        paper = self.papers[pid]
+        try:
+            aff_info = paper.affiliations[author]["affiliation"]
+            aff_type = aff_info["type"][0]
+            out.add(("org", aff_info["info"][aff_type][0]))
+        except (KeyError, IndexError, TypeError):
+            pass
+        for a in paper.authors.keys():
+            if a != author:
+                out.add(("co_author", a))
+        return out
+
+    def __call__(self, author, pids):
+        """
+        Select the papers of author to use
+        :param author: author id
+        :param pids: list of the author's pids
+        :return: list of the selected pids, in the same order as pids
+        """
+        if self.max_papers == 0 or len(pids) <= self.max_papers:
+            return list(pids)
+        rng = random.Random("{}-{}".format(self.seed, author))
+        if self.method == "random":
+            selected = set(rng.sample(list(pids), self.max_papers))
+        elif self.method == "recent":
+            selected = set(sorted(pids, key=convertPaperToSortable, reverse=True)[:self.max_papers])
+        else:
+            selected = self._selectDiverse(author, pids, rng)
+        return [p for p in pids if p in selected]
+
+    def _selectDiverse(self, author, pids, rng):
+        candidates = list(pids)
+        rng.shuffle(candidates)
+        # Prefer recent papers when coverage ties, the shuffle breaks ties between papers from the same year
+        candidates.sort(key=lambda p: convertPaperToSortable(p, True), reverse=True)
+        features = {p: self.paperFeatures(p, author) for p in candidates}
+        covered = set()
+        selected = set()
+        while len(selected) < self.max_papers:
+            best = None
+            best_score = -1
+            for p in candidates:
+                if p in selected:
+                    continue
+                score = len(features[p] - covered)
+                if score > best_score:
+                    best = p
+                    best_score = score
+            selected.add(best)
+            covered |= features[best]
+        return selected
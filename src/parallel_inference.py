@@ -0,0 +1,116 @@
+import multiprocessing as mp
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+
+# Pool of worker processes that predict blocks of compare results with the disambiguation model. Every worker gets the
+# model once when it starts, forked workers inherit it without copying. A block of rows is copied once into shared
+# memory, the workers are sent row ranges of it and write the predictions and probabilities of same into a shared
+# output array, so neither the rows nor the results are pickled between processes.
+
+_worker_model = None
+
+
+def _initWorker(model):
+    global _worker_model
+    _worker_model = model
+
+
+def _predictRows(args):
+    """
+    Predict rows start to end of a shared block, run by the workers
+    :param args: name of the rows, name of the output, shape of the rows, start, end, if the model has predict_proba
+    """
+    rows_name, out_name, shape, start, end, has_probabilities = args
+    rows_memory = shared_memory.SharedMemory(name=rows_name)
+    out_memory = shared_memory.SharedMemory(name=out_name)
+    try:
+        rows = np.ndarray(shape, dtype=np.float64, buffer=rows_memory.buf)
+        out = np.ndarray((shape[0], 3), dtype=np.float64, buffer=out_memory.buf)
+        out[start:end, 0] = _worker_model.predict(rows[start:end])
+        if has_probabilities:
+            out[start:end, 1:] = _worker_model.predict_proba(rows[start:end])
+        # The arrays use the buffers, so they have to be gone before the memory is closed
+        del rows, out
+    finally:
+        rows_memory.close()
+        out_memory.close()
+
+
+class _Block:
+    """
+    Rows submitted to the InferencePool, result waits for the workers and returns their output
+    """
+
+    def __init__(self, rows_memory, out_memory, length, tasks, has_probabilities):
+        self.rows_memory = rows_memory
+        self.out_memory = out_memory
+        self.length = length
+        self.tasks = tasks
+        self.has_probabilities = has_probabilities
+
+    def result(self):
+        """
+        :return: array of the predictions, array of the probabilities or None if the model does not have them
+        """
+        try:
+            for task in self.tasks:
+                task.get()
+            out = np.ndarray((self.length, 3), dtype=np.float64, buffer=self.out_memory.buf).copy()
+        finally:
+            self.close()
+        return out[:, 0].astype(int), out[:, 1:] if self.has_probabilities else None
+
+    def close(self):
+        for memory in [self.rows_memory, self.out_memory]:
+            memory.close()
+            memory.unlink()
+
+
+class InferencePool:
+    """
+    Predict with a model in worker processes while the main process keeps working, use as a context manager
+    """
+
+    def __init__(self, model, cores, task_rows=2000):
+        """
+        :param model: model with predict, and predict_proba if it has probabilities
+        :param cores: number of worker processes
+        :param task_rows: max number of rows a worker predicts at once, blocks are split into at least one range per
+        worker
+        """
+        self.model = model
+        self.cores = cores
+        self.task_rows = task_rows
+        # Hard voting does not have probabilities
+        self.has_probabilities = getattr(model, "voting", None) != "hard" and hasattr(model, "predict_proba")
+        self.pool = None
+
+    def __enter__(self):
+        # Workers started before the resource tracker start their own, which unlinks the memory they attached to when
+        # they exit and warns that it leaked
+        resource_tracker.ensure_running()
+        self.pool = mp.Pool(self.cores, initializer=_initWorker, initargs=(self.model,))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.pool.terminate()
+        self.pool.join()
+
+    def submit(self, rows):
+        """
+        Start predicting rows and return right away
+        :param rows: 2d array of rows
+        :return: _Block, its result method returns the predictions and probabilities
+        """
+        rows = np.ascontiguousarray(rows, dtype=np.float64)
+        # Shared memory can not be empty
+        rows_memory = shared_memory.SharedMemory(create=True, size=max(rows.nbytes, 1))
+        out_memory = shared_memory.SharedMemory(create=True, size=max(len(rows) * 3 * 8, 1))
+        np.ndarray(rows.shape, dtype=np.float64, buffer=rows_memory.buf)[:] = rows
+        step = max(1, min(self.task_rows, -(-len(rows) // self.cores)))
+        tasks = []
+        for start in range(0, len(rows), step):
+            args = [rows_memory.name, out_memory.name, rows.shape, start, min(start + step, len(rows)),
+                    self.has_probabilities]
+            tasks.append(self.pool.apply_async(_predictRows, (args,)))
+        return _Block(rows_memory, out_memory, len(rows), tasks, self.has_probabilities)
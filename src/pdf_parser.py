@@ -12,15 +12,14 @@ from html import unescape
 from tqdm import tqdm
 import logging
 from copy import deepcopy
+from functools import lru_cache
 from textdistance import JaroWinkler
-from py_stringmatching.similarity_measure import soft_tfidf, jaro_winkler
 from py_stringmatching.tokenizer import whitespace_tokenizer
 from src.utility_functions import cleanName, nameFromDict, createID, printLogToConsole, printStats, chunks, \
     getChildText, createLogger
 from src.paper import Paper
 import multiprocessing as mp
 import sys
-from nltk import word_tokenize
 import time
 
 remove_html = re.compile("<[^>]*>")
@@ -28,35 +27,48 @@ remove_punct = re.compile("[^\w\s]")
 remove_punct_ids = re.compile("[^\w\s-]")
 parse_section_num = re.compile("(\d+)")
 split_address = re.compile("(?<!\w)(\.)|\s?[^\w\s\.]")
-# Saves time to define them once, and they are never at risk of being overwritten
-try:
-    xpath_config = json.load(open("config.json"))["PDFParserXpaths"]
-except FileNotFoundError:
-    xpath_config = json.load(open("/".join(os.getcwd().split("/")[:-1]) + "/config.json"))
-    xpath_config = xpath_config["PDFParserXpaths"]
-namespaces = xpath_config["namespaces"]
-get_authors = etree.XPath(xpath_config["get_authors"], namespaces=namespaces)
-get_name = etree.XPath(xpath_config["get_name"], namespaces=namespaces)
-get_author_affiliation = etree.XPath(xpath_config["get_author_affiliation"], namespaces=namespaces)
-get_author_email = etree.XPath(xpath_config["get_author_email"], namespaces=namespaces)
-check_department = etree.XPath(xpath_config["check_department"], namespaces=namespaces)
-get_abstract = etree.XPath(xpath_config["get_abstract"], namespaces=namespaces)
-get_affiliations = etree.XPath(xpath_config["get_affiliations"], namespaces=namespaces)
-get_orgs = etree.XPath(xpath_config["get_orgs"], namespaces=namespaces)
-get_address = etree.XPath(xpath_config["get_address"], namespaces=namespaces)
-get_citations = etree.XPath(xpath_config["get_citations"], namespaces=namespaces)
-get_citation_analytic = etree.XPath(xpath_config["get_citation_analytic"], namespaces=namespaces)
-get_citation_title = etree.XPath(xpath_config["get_citation_title"], namespaces=namespaces)
-get_citation_authors = etree.XPath(xpath_config["get_citation_authors"], namespaces=namespaces)
-get_citation_publication = etree.XPath(xpath_config["get_citation_publication"], namespaces=namespaces)
-get_citation_pub_title = etree.XPath(xpath_config["get_citation_pub_title"], namespaces=namespaces)
-get_citation_pub_data = etree.XPath(xpath_config["get_citation_pub_data"], namespaces=namespaces)
-get_biblScope = etree.XPath(xpath_config["get_biblScope"], namespaces=namespaces)
-get_citation_pub_date = etree.XPath(xpath_config["get_citation_pub_date"], namespaces=namespaces)
-get_sections = etree.XPath(xpath_config["get_sections"], namespaces=namespaces)
+# config.json is found relative to this file instead of the working directory. The XPaths in it are compiled the
+# first time they are used, so importing the parser does not read the config
+config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json")
+
+
+@lru_cache(maxsize=None)
+def xpathConfig():
+    with open(config_path) as f:
+        return json.load(f)["PDFParserXpaths"]
+
+
+@lru_cache(maxsize=None)
+def getXPath(name):
+    """
+    :param name: key of the XPath in PDFParserXpaths
+    :return: the compiled XPath
+    """
+    config = xpathConfig()
+    return etree.XPath(config[name], namespaces=config["namespaces"])
+
+
 txt_distance_jaro_winkler = JaroWinkler()
 
 
+def organizationsFromDict(organizations):
+    """
+    Convert organizations loaded from organizations.json back to Counters
+    :param organizations: dict of org id to dict of info to counts
+    :return: dict of org id to dict of info to Counter, count is an int
+    """
+    out = {}
+    for k, info in organizations.items():
+        tmp_info = {}
+        for s, v in info.items():
+            if s != "count":
+                tmp_info[s] = Counter(v)
+            else:
+                tmp_info[s] = int(v)
+        out[k] = tmp_info
+    return out
+
+
 class PDFParser:
     def __init__(self, aliases, id_to_name, same_names, sim_cutoff, raise_error=False):
         """
@@ -74,12 +86,13 @@ class PDFParser:
         self.raise_error = raise_error
 
     def getOrganizations(self, r):
-        affiliations = get_affiliations(r)
+        namespaces = xpathConfig()["namespaces"]
+        affiliations = getXPath("get_affiliations")(r)
         out = {}
         for a in affiliations:
 
             # Getting organization info
-            org_names = get_orgs(a)
+            org_names = getXPath("get_orgs")(a)
             org_information = defaultdict(list)
             for o in org_names:
                 org_text = o.text
@@ -131,7 +144,7 @@ class PDFParser:
             # handle it like this, then have a lot of appends and checking dicts and lists for something existing in
             # them
             address = {}
-            address_results = get_address(a)
+            address_results = getXPath("get_address")(a)
             for k in namespaces.keys():
                 if any([x.tag for x in address_results if namespaces[k] in x.tag]):
                     # Had to put in the second replace because the {} were remaining
@@ -177,7 +190,7 @@ class PDFParser:
 
     def _parseAuthors(self, actual, r, pid, manual_fixes):
         out = {}
-        authors_found = get_authors(r)
+        authors_found = getXPath("get_authors")(r)
         unknown = []
         errors = []
         correct_with_manual = 0
@@ -188,7 +201,7 @@ class PDFParser:
         keys_with_same = []
         for person in authors_found:
             try:
-                name = getChildText(get_name(person)[0], delimiter=" ").replace("  ", " ")
+                name = getChildText(getXPath("get_name")(person)[0], delimiter=" ").replace("  ", " ")
             except Exception as e:
                 if self.raise_error:
                     raise e
@@ -224,11 +237,11 @@ class PDFParser:
                     else:
                         corresponding_actual = _id
             try:
-                aff_key = get_author_affiliation(person)[0]
+                aff_key = getXPath("get_author_affiliation")(person)[0]
             except:
                 aff_key = None
             try:
-                author_email = get_author_email(person)[0]
+                author_email = getXPath("get_author_email")(person)[0]
             except:
                 author_email = None
 
@@ -293,7 +306,7 @@ class PDFParser:
 
         if not out.abstract:
             try:
-                out.abstract = str(get_abstract(root)[0])
+                out.abstract = str(getXPath("get_abstract")(root)[0])
             except:
                 return None, -1, ["No abstract found for {}".format(out.pid)]
 
@@ -331,7 +344,7 @@ class PDFParser:
                     }
 
         citations, errors = self._parseCitations(out.pid, root)
-        out.citations = citations
+        out.citations = tuple(citations)
         errors.extend(errors)
 
         sections, status = self._parseSections(root)
@@ -348,7 +361,7 @@ class PDFParser:
     @staticmethod
     def _parseSections(root):
         out = {}
-        sections = get_sections(root)
+        sections = getXPath("get_sections")(root)
         if not sections:
             return out, -1
         for section in sections:
@@ -370,7 +383,7 @@ class PDFParser:
 
     @staticmethod
     def _parseCitations(pid, root):
-        citations = get_citations(root)
+        citations = getXPath("get_citations")(root)
         out = []
         errors = []
         had_error_analytic = False
@@ -379,7 +392,7 @@ class PDFParser:
             return out, ["No citations found for paper {}".format(pid)]
         for item in citations:
             try:
-                analytic = get_citation_analytic(item)[0]
+                analytic = getXPath("get_citation_analytic")(item)[0]
             except IndexError as e:
                 if not had_error_analytic:
                     had_error_analytic = True
@@ -387,7 +400,7 @@ class PDFParser:
                 continue
 
             try:
-                publication = get_citation_publication(item)[0]
+                publication = getXPath("get_citation_publication")(item)[0]
             except IndexError as e:
                 if not had_error_publication:
                     errors.append("A citation in {} failed to get publication".format(pid))
@@ -395,7 +408,7 @@ class PDFParser:
 
             citation_info = {}
             try:
-                citation_title = get_citation_title(analytic)[0]
+                citation_title = getXPath("get_citation_title")(analytic)[0]
                 citation_info["title"] = cleanName(citation_title.text)
                 if "level" in citation_title.attrib:
                     citation_info["type"] = citation_title.attrib["level"]
@@ -405,13 +418,13 @@ class PDFParser:
                 citation_info["title"] = None
                 citation_info["type"] = None
 
-            authors = get_citation_authors(analytic)
+            authors = getXPath("get_citation_authors")(analytic)
             if not authors:
                 citation_info["authors"] = []
             else:
                 citation_info["authors"] = [cleanName(getChildText(x, " ").replace("  ", " ")) for x in authors]
 
-            pub_title = get_citation_pub_title(publication)
+            pub_title = getXPath("get_citation_pub_title")(publication)
             if not pub_title:
                 citation_info["pub_type"] = None
                 citation_info["pub_title"] = None
@@ -423,14 +436,14 @@ class PDFParser:
                     citation_info["pub_type"] = None
                 citation_info["pub_title"] = cleanName(pub_title.text)
 
-            pub_data = get_citation_pub_data(publication)
+            pub_data = getXPath("get_citation_pub_data")(publication)
             citation_info["volume"] = None
             citation_info["issue"] = None
             citation_info["date"] = None
             citation_info["date_type"] = None
             if pub_data:
                 pub_data = pub_data[0]
-                biblScopes = get_biblScope(pub_data)
+                biblScopes = getXPath("get_biblScope")(pub_data)
                 for i in biblScopes:
                     if "unit" not in i.attrib:
                         continue
@@ -445,7 +458,7 @@ class PDFParser:
                             citation_info["issue"] = int(i.text)
                         except ValueError:
                             citation_info["issue"] = i.text
-                pub_date = get_citation_pub_date(pub_data)
+                pub_date = getXPath("get_citation_pub_date")(pub_data)
                 if pub_date:
                     pub_date = pub_date[0]
                     if "type" in pub_date.attrib:
@@ -597,15 +610,8 @@ class PDFParserWrapper:
                 parsed = ujson.load(open(tmp_parsed_path + "/parsed_papers.json"))
                 self.parsed = {x: Paper(**parsed[x]) for x in parsed.keys()}
                 try:
-                    tmp_organizations = json.load(open(tmp_parsed_path + "organizations.json"))
-                    for k, info in tmp_organizations.items():
-                        tmp_info = {}
-                        for s, v in info.items():
-                            if s != "count":
-                                tmp_info[s] = Counter(v)
-                            else:
-                                tmp_info[s] = int(v)
-                        self.organizations[k] = tmp_info
+                    self.organizations = organizationsFromDict(
+                        json.load(open(tmp_parsed_path + "organizations.json")))
                     self.effective_org_info = json.load(open(tmp_parsed_path + "effective_org_info.json"))
                 except FileNotFoundError:
                     self.organizations = {}
@@ -644,12 +650,110 @@ class PDFParserWrapper:
         if self.attempt_fix_parse:
             self.logger.warning("attempt_fix_parser_errors is not yet implemented, it will have no effect")
 
-    def __call__(self, xml_path, debug_cutoff=None, debug_part=None):
+    def loadExisting(self, parsed, author_papers, organizations=None, effective_org_info=None, org_names=None,
+                     department_names=None, incomplete_papers=None):
+        """
+        Use already parsed data so that update can add to it, the arguments are the contents of the files written by
+        _saveData
+        :param parsed: dict of pid to Paper or paper dict
+        :param author_papers: dict of author id to list of pids
+        :param organizations: dict of org id to org info
+        :param effective_org_info: dict of org id to effective org info
+        :param org_names: list of organization names
+        :param department_names: list of department names
+        :param incomplete_papers: list of pids that need manual fixes
+        """
+        self.parsed = {k: v if isinstance(v, Paper) else Paper(**v) for k, v in parsed.items()}
+        self.author_papers = defaultdict(list, {k: list(v) for k, v in author_papers.items()})
+        self.organizations = organizationsFromDict(organizations) if organizations else {}
+        self.effective_org_info = deepcopy(effective_org_info) if effective_org_info else {}
+        self.org_names = list(org_names) if org_names else []
+        self.department_names = list(department_names) if department_names else []
+        self.incomplete_papers = list(incomplete_papers) if incomplete_papers else []
+
+    def update(self, xml_path, pids):
+        """
+        Parse only the pdf xmls of pids and merge them into the parsed data. Papers that were already parsed are
+        replaced, and only the authors and organizations on the updated papers are changed. Names are only added to
+        the org and department corpora.
+        :param xml_path: Path to the parsed pdfs
+        :param pids: pids of the papers added or changed
+        :return: dict with the pids added, updated and failed, the authors added and the orgs added and updated
+        """
+        pids = set(pids)
+        old_papers = {p: self.parsed.pop(p) for p in pids if p in self.parsed}
+        authors_before = set(self.author_papers.keys())
+        orgs_before = set(self.organizations.keys())
+        org_names_before = len(self.org_names)
+        department_names_before = len(self.department_names)
+        removed_orgs = self._removeOrgsAndDep(old_papers)
+        self.incomplete_papers = [p for p in self.incomplete_papers if p not in pids]
+
+        self(xml_path, only_pids=pids, changed_orgs=removed_orgs)
+
+        changed_orgs = set()
+        for paper in [*old_papers.values(), *[self.parsed[p] for p in pids if p in self.parsed]]:
+            for aff_email in paper.affiliations.values():
+                if aff_email["affiliation"]["type"] and aff_email["affiliation"]["id"]:
+                    changed_orgs.add(aff_email["affiliation"]["id"])
+        return {
+            "added": [p for p in pids if p in self.parsed and p not in old_papers],
+            "updated": [p for p in pids if p in self.parsed and p in old_papers],
+            "failed": [p for p in pids if p not in self.parsed],
+            "new_authors": [a for a in self.author_papers.keys() if a not in authors_before],
+            "new_orgs": [o for o in changed_orgs if o not in orgs_before],
+            "updated_orgs": [o for o in changed_orgs if o in orgs_before],
+            "new_org_names": len(self.org_names) - org_names_before,
+            "new_department_names": len(self.department_names) - department_names_before
+        }
+
+    def _removeOrgsAndDep(self, papers):
+        """
+        Remove what _getOrgsAndDep added for papers from author_papers and the organization counts. With
+        use_org_most_common the affiliations were already replaced, so the most common values are removed instead.
+        :param papers: dict of pid to Paper
+        :return: set of the ids of the organizations that had counts removed and still have papers
+        """
+        changed_orgs = set()
+        for p, paper in papers.items():
+            for a, aff_email in paper.affiliations.items():
+                if a in self.author_papers:
+                    self.author_papers[a] = [x for x in self.author_papers[a] if x != p]
+                    if not self.author_papers[a]:
+                        del self.author_papers[a]
+                aff = aff_email["affiliation"]
+                org_id = aff["id"]
+                if not aff["type"] or not org_id or org_id not in self.organizations:
+                    continue
+                org = self.organizations[org_id]
+                org["count"] -= 1
+                to_remove = [("name", cleanName(aff["info"][aff["type"][0]][0])), ("type", aff["type"][0])]
+                to_remove.extend((k, v) for k, v in aff["address"].items() if k in org and k != "count")
+                for k, v in to_remove:
+                    # The most common values of an org can be ones this paper never had
+                    if v not in org.get(k, {}):
+                        continue
+                    org[k][v] -= 1
+                    if org[k][v] <= 0:
+                        del org[k][v]
+                if org["count"] <= 0:
+                    del self.organizations[org_id]
+                    self.effective_org_info.pop(org_id, None)
+                    changed_orgs.discard(org_id)
+                else:
+                    changed_orgs.add(org_id)
+        return changed_orgs
+
+    def __call__(self, xml_path, debug_cutoff=None, debug_part=None, only_pids=None, changed_orgs=None):
         """
         Run the parser
         :param xml_path: Path to the parsed pdfs
         :param debug_cutoff: Only for debugging purposes
         :param debug_part: Part to debug
+        :param only_pids: Only parse the papers with these pids, the organizations and departments are only updated
+        for them. Used by update
+        :param changed_orgs: ids of other organizations whose counts were changed, their info is recomputed with the
+        organizations of only_pids. Used by update
         :return: dict of parsed_papers
         """
 
@@ -659,6 +763,8 @@ class PDFParserWrapper:
         if xml_path[-1] != '/':
             xml_path = xml_path + '/'
         parsed_pdfs = [f for f in os.listdir(xml_path) if os.path.isfile(os.path.join(xml_path, f)) and ".xml" in f]
+        if only_pids is not None:
+            parsed_pdfs = [f for f in parsed_pdfs if f.split(".")[0] in only_pids]
         if debug_cutoff:
             parsed_pdfs = parsed_pdfs[:debug_cutoff]
 
@@ -809,7 +915,12 @@ class PDFParserWrapper:
         if debug_part is not None and debug_part == "parse":
             return self.parsed
 
-        self._getOrgsAndDep()
+        if only_pids is not None:
+            to_update = {p: self.parsed[p] for p in only_pids if p in self.parsed}
+            self._getOrgsAndDep(to_update, changed_orgs)
+        else:
+            to_update = self.parsed
+            self._getOrgsAndDep()
 
         # Display results
         results = [
@@ -832,15 +943,15 @@ class PDFParserWrapper:
         printLogToConsole(self.console_log_level, "Generating Tokenized for titles", logging.INFO)
         self.logger.log(logging.INFO, "Generating Tokenized for titles")
         if self.cores == 1:
-            with tqdm(file=sys.stdout, total=len(self.parsed)) as pbar:
-                for k in self.parsed.keys():
-                    self.parsed[k].createPOS()
+            with tqdm(file=sys.stdout, total=len(to_update)) as pbar:
+                for k in to_update.keys():
+                    self.parsed[k].loadTokenized(*self.parsed[k].tokenize())
                     pbar.update()
                 pbar.close()
         else:
             with mp.Pool(self.cores) as Pool:
-                pool_results = list(tqdm(Pool.imap_unordered(self._getTokenized, [x for k, x in self.parsed.items()]),
-                                         total=len(self.parsed), file=sys.stdout))
+                pool_results = list(tqdm(Pool.imap_unordered(self._getTokenized, [x for k, x in to_update.items()]),
+                                         total=len(to_update), file=sys.stdout))
             for k, t, c, s in pool_results:
                 self.parsed[k].loadTokenized(t, c, s)
         for k in manual_fixes_needed.keys():
@@ -925,7 +1036,16 @@ class PDFParserWrapper:
             printLogToConsole(self.console_log_level, "Wrote files to {}".format(self.save_dir), logging.INFO)
             self.logger.log(logging.INFO, "Wrote files to {}".format(self.save_dir))
 
-    def _getOrgsAndDep(self):
+    def _getOrgsAndDep(self, papers=None, orgs=None):
+        """
+        Add the authors, organizations and departments of papers to author_papers, organizations and the corpora
+        :param papers: dict of pid to Paper to add, defaults to every parsed paper. When given, the info of the other
+        organizations is kept
+        :param orgs: ids of organizations to recompute the info of even if they are not on papers, only used with papers
+        """
+        update = papers is not None
+        if papers is None:
+            papers = self.parsed
         printLogToConsole(self.console_log_level, "Getting organizations and departments", logging.INFO)
         self.logger.info("Getting organizations and departments")
         org_corpus = []
@@ -934,8 +1054,12 @@ class PDFParserWrapper:
         tmp_organizations_info = {}
         org_first_letter = defaultdict(Counter)
         address_keys = ["postCode", "region", "settlement", "country"]
-        org_pbar = tqdm(total=len(self.parsed), file=sys.stdout)
-        for p, paper in self.parsed.items():
+        if update and orgs:
+            for org_id in orgs:
+                if org_id in self.organizations:
+                    tmp_organizations_info[org_id] = self.organizations[org_id]
+        org_pbar = tqdm(total=len(papers), file=sys.stdout)
+        for p, paper in papers.items():
             for a, aff_email in paper.affiliations.items():
                 self.author_papers[a].append(p)
                 aff = aff_email["affiliation"]
@@ -992,7 +1116,7 @@ class PDFParserWrapper:
             if self.cores == 1:
                 org_pbar = tqdm(total=len(tmp_organizations_info), file=sys.stdout)
                 for k in tmp_organizations_info.keys():
-                    self.organizations[k] = self._combineOrgInfo([k, tmp_organizations_info[k]])
+                    _, self.organizations[k] = self._combineOrgInfo([k, tmp_organizations_info[k]])
                     org_pbar.update()
                 org_pbar.close()
             else:
@@ -1002,6 +1126,8 @@ class PDFParserWrapper:
                         tqdm(Pool.imap_unordered(self._combineOrgInfo, org_args), total=len(org_args), file=sys.stdout))
                 for k, r in res:
                     self.organizations[k] = r
+        elif update:
+            self.organizations.update(deepcopy(tmp_organizations_info))
         else:
             self.organizations=deepcopy(tmp_organizations_info)
         # TODO: Implement way to combine orgs
@@ -1012,6 +1138,15 @@ class PDFParserWrapper:
         if self.org_most_common:
             printLogToConsole(self.console_log_level, "Using most common values for organizations", logging.INFO)
             self.logger.info("Using most common values for organizations")
+            if update:
+                # The most common values can change, so the other papers of the orgs also need to be updated
+                for p, paper in self.parsed.items():
+                    if p in papers:
+                        continue
+                    for a, aff_email in paper.affiliations.items():
+                        aff = aff_email["affiliation"]
+                        if aff["type"] and aff["id"] in tmp_organizations_info:
+                            people_orgs[aff["id"]].append((p, a))
             fix_pbar = tqdm(total=len(tmp_organizations_info), file=sys.stdout)
             authors_affected = []
             for org, info in tmp_organizations_info.items():
@@ -1053,6 +1188,8 @@ class PDFParserWrapper:
             self.logger.debug("{} Authors affected".format(len(authors_affected)))
             self.logger.debug("{} First 10 affected".format(authors_affected[:10]))
 
+        elif update:
+            self.effective_org_info.update(tmp_organizations_info)
         else:
             self.effective_org_info = tmp_organizations_info
 
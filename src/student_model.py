@@ -0,0 +1,32 @@
+import numpy as np
+
+# Model distilled from the VotingClassifier by VoteClassifier.distill. The student is a single regressor trained on the
+# ensemble's probability that a pair is the same author, the weighted share of votes for hard voting, so every pair
+# is predicted by one small model instead of every estimator of the ensemble.
+
+
+class StudentModel:
+    """
+    Drop in replacement for the VotingClassifier with the predict, predict_proba and voting AuthorDisambiguation uses
+    """
+    voting = "soft"
+
+    def __init__(self, regressor, teacher_voting="soft"):
+        """
+        :param regressor: fitted regressor of the teacher's probability of same
+        :param teacher_voting: voting of the teacher, only kept for reference since the student always has probabilities
+        """
+        self.regressor = regressor
+        self.teacher_voting = teacher_voting
+
+    @property
+    def n_features_in_(self):
+        return self.regressor.n_features_in_
+
+    def predict_proba(self, X):
+        same = np.clip(self.regressor.predict(X), 0, 1)
+        return np.vstack([1 - same, same]).T
+
+    def predict(self, X):
+        # The teacher predicts different when the probabilities or votes are tied
+        return (self.predict_proba(X)[:, 1] > .5).astype(int)
@@ -6,6 +6,7 @@ from tqdm import tqdm
 from src.utility_functions import printLogToConsole, createLogger
 import os
 from src.paper import Paper
+from src.authorship_index import copyAuthorPapers
 
 
 class TargetCreator:
@@ -37,7 +38,7 @@ class TargetCreator:
                 break
             self.papers[k] = Paper(**p)
         self.id_to_name = deepcopy(id_to_name)
-        self.author_papers = deepcopy(author_papers)
+        self.author_papers = copyAuthorPapers(author_papers)
         self.author_id_suffix = Counter()
         self.raise_error = raise_error
         self.error_papers = set()
@@ -206,6 +207,10 @@ class TargetCreator:
         # self.logger.debug("Skipped {} authors due to being in old_ids".format(skipped_old_ids))
         printLogToConsole(self.console_log_level, "Adding papers", logging.INFO, logger=self.logger)
         paper_pbar = tqdm(total=len(self.papers), file=sys.stdout)
+        # Sets of each author's papers so checking if a paper was already added does not scan the list
+        added_papers = defaultdict(set)
+        for a, papers in self.new_author_papers.items():
+            added_papers[a].update(papers)
         for pid, paper in self.papers.items():
             if pid in self.error_papers:
                 self.logger.debug("{} is in error_papers, but not in self.new_papers".format(pid))
@@ -217,7 +222,8 @@ class TargetCreator:
                 for a in paper.affiliations.keys():
                     if a not in self.new_id_to_name:
                         self.new_id_to_name[a] = self.id_to_name[a]
-                    if pid not in self.new_author_papers[a]:
+                    if pid not in added_papers[a]:
+                        added_papers[a].add(pid)
                         self.new_author_papers[a].append(pid)
             paper_pbar.update()
         paper_pbar.close()
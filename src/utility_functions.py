@@ -4,16 +4,23 @@ from html import unescape
 import re
 from lxml import etree
 import operator as op
-from functools import reduce
+from functools import reduce, lru_cache
 import logging
 import numpy as np
 from tqdm import tqdm
 import sys
 import ujson
-from nltk import PorterStemmer
 from copy import deepcopy
-
-stemmer = PorterStemmer()
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import time
+from src.corpus_snapshot import CorpusSnapshot, isSnapshotFresh, snapshot_files
+from src.artifact_cache import loadStemmedCorpus
+from src.authorship_index import AuthorshipIndex
+from src.lazy_import import lazyImport
+
+nltk = lazyImport("nltk")
 remove_punct_ids = re.compile("[^\w\s-]")
 remove_html = re.compile("<[^>]*>")
 remove_punct = re.compile("[^\w\s]")
@@ -162,6 +169,14 @@ def cleanName(n, replace_punct=True):
         return unidecode.unidecode(unescape(n))
 
 
+@lru_cache(maxsize=None)
+def getStemmer():
+    """
+    PorterStemmer shared by every module, made the first time something is stemmed
+    """
+    return nltk.PorterStemmer()
+
+
 def chunks(l, n):
     """
     Create chunked data
@@ -262,9 +277,9 @@ def printLogToConsole(console_level, msg, level, print_func=print, logger=None,
 
 
 def calculatePairStats(pairs, data_keys, metrics=None, logger=None, logger_level=None, special_cases=None,
-                       include_special_rest=True, output_dir=None):
+                       include_special_rest=True, output_dir=None, chunk_size=10000):
     """
-    Calculate stats for compared pairs
+    Calculate stats for compared pairs, see src.pair_stats.PairStats to calculate them while the pairs are compared
     :param pairs: the compared pairs
     :param data_keys: The keys that are from CompareAuthors.compare_terms
     :param metrics: metrics you want to return, it is a tuple in the form ("name of metric",metric function). Please
@@ -275,138 +290,16 @@ def calculatePairStats(pairs, data_keys, metrics=None, logger=None, logger_level
     :param special_cases: Any special cases you want to get the stats of
     :param include_special_rest: Include the special cases in the other pairs stats
     :param output_dir: output directory to write stats too
+    :param chunk_size: number of pairs added to the stats at once
     :return: None
     """
-    if metrics is None:
-        metrics = [
-            ("avg", np.mean),
-            ("median", np.median)
-        ]
-    if special_cases is None:
-        special_cases = []
-
-    def getStats(d):
-        key_stats = {x: [] for x in data_keys}
-        pbar = tqdm(total=len(d), file=sys.stdout)
-        for i in d:
-            for j, v in enumerate(i):
-                try:
-                    key_stats[data_keys[j]].append(v)
-
-                except Exception as e:
-                    pbar.close()
-                    print(j)
-                    raise e
-            pbar.update()
-        pbar.close()
-        out = {}
-        for k in key_stats.keys():
-            calculated_dict = {}
-            for name, algorithm in metrics:
-                calculated_dict[name] = algorithm(key_stats[k])
-            out[k] = calculated_dict
-        return out
-
-    same = []
-    different = []
-    special_same = []
-    special_different = []
-    print("INFO: Parsing pairs")
-    parse_pbar = tqdm(total=len(pairs), file=sys.stdout)
-    for key, tag, data in pairs:
-        p1, a, p2, b = key.split()
-        is_special_case = False
-        for case in special_cases:
-            tmp_a = "-".join(a.split("-")[:len(case.split("-"))])
-            tmp_b = "-".join(b.split("-")[:len(case.split("-"))])
-            if tmp_a == case and tmp_b == case:
-                is_special_case = True
-                break
-        if tag == 1:
-            if is_special_case:
-                special_same.append(data)
-                if include_special_rest:
-                    same.append(data)
-            else:
-                same.append(data)
-        else:
-            if is_special_case:
-                special_different.append(data)
-                if include_special_rest:
-                    different.append(data)
-            else:
-                different.append(data)
-        parse_pbar.update()
-    parse_pbar.close()
-
-    if logger:
-        logger.log(logger_level, "{} same pairs".format(len(same)))
-        logger.log(logger_level, "{} different pairs".format(len(different)))
-        logger.log(logger_level, "{} special same pairs".format(len(special_same)))
-        logger.log(logger_level, "{} special different pairs".format(len(special_different)))
-
+    # pair_stats uses printStats
+    from src.pair_stats import PairStats
+    stats = PairStats(data_keys, special_cases, include_special_rest)
     print("INFO: Getting Stats")
-    stats = {}
-    keys_and_pairs = [("same", same), ("different", different), ("special same", special_same), ("special different",
-                                                                                                 special_different)]
-    for k, pair_stats in keys_and_pairs:
-        stats[k] = getStats(pair_stats)
-
-    def singleMetrics(a):
-        args_print_stats = []
-        pbar = tqdm(total=len(data_keys) * len(metrics), file=sys.stdout)
-        for i in data_keys:
-            s = stats[a]
-            for name, _ in metrics:
-                s_value = s[i][name]
-                if not s_value:
-                    s_value = 0
-                stat_str = "{} {}".format(i, name)
-                args_print_stats.append([stat_str, abs(s_value)])
-                pbar.update()
-        pbar.close()
-        return args_print_stats
-
-    def differenceStats(a, b):
-        args_print_stats = []
-        pbar = tqdm(total=len(data_keys) * len(metrics), file=sys.stdout)
-        for i in data_keys:
-            s = stats[a]
-            d = stats[b]
-            for name, _ in metrics:
-                s_value = s[i][name]
-                if not s_value:
-                    s_value = 0
-                d_value = d[i][name]
-                if not d_value:
-                    d_value = 0
-                stat_str = "{} {}".format(i, name)
-                args_print_stats.append([stat_str, abs(s_value - d_value)])
-                pbar.update()
-        pbar.close()
-        return args_print_stats
-
-    # print("INFO: Getting stats for same")
-    # same_stats = singleMetrics("same")
-    # print("INFO: Getting stats for different")
-    # different_stats = singleMetrics("different")
-    print("INFO: Getting stats for same vs different")
-    same_different = differenceStats("same", "different")
-    print("INFO: Getting stats for special same vs special different")
-    special_same_and_different = differenceStats("special same", "special different")
-    if output_dir:
-        with open(output_dir + "/same_different.txt", "w") as f:
-
-            printStats("Same vs Different", same_different, print_func=f.write, printing_file=True)
-        with open(output_dir + "/special_same_special_different.txt", "w") as f:
-
-            printStats("Special Same vs Special Different", special_same_and_different, print_func=f.write,
-                       printing_file=True)
-    else:
-        # printStats("Same", same_stats)
-        # printStats("Different", different_stats)
-        printStats("Same vs Different", same_different)
-        printStats("Special Same vs Special Different", special_same_and_different)
+    for i in tqdm(range(0, len(pairs), chunk_size), file=sys.stdout):
+        stats.add(pairs[i:i + chunk_size])
+    stats.writeReports(output_dir, metrics, logger, logger_level)
 
 
 def makeParameterName(parameters):
@@ -473,13 +366,179 @@ def parseCLIArgs(args, config_handler, debug_mode=False):
     return config_handler
 
 
-def loadData(to_load, logger, config_handler, other_files=None, override_keys=None):
+def _openSnapshot(to_load, logger, config_handler):
+    """
+    Open the data snapshot if it exists and is newer than the json files in to_load
+    :return: CorpusSnapshot or None
+    """
+    try:
+        path = config_handler["data_snapshot"]
+    except KeyError:
+        return None
+    sources = []
+    for file in to_load:
+        try:
+            sources.append(config_handler[file])
+        except KeyError:
+            continue
+    if not isSnapshotFresh(path, [x for x in sources if isinstance(x, str)]):
+        logger.debug("{} does not exist or is older than the json files".format(path))
+        return None
+    try:
+        return CorpusSnapshot(path)
+    except (ValueError, OSError) as e:
+        printLogToConsole(config_handler.console_log_level, "Could not open snapshot {}: {}".format(path, e),
+                          logging.WARNING, logger=logger)
+        return None
+
+
+def _loadFile(file, path, logger, console_log_level):
+    """
+    Load a single file based on its name and extension
+    """
+    logger.debug("path={}".format(path))
+    extension = path.split(".")[-1]
+    if "corpus" in file:
+        logger.debug("File is a corpus")
+        return loadStemmedCorpus(path, getStemmer(), logger)
+    elif extension == "json":
+        logger.debug("File has json extension")
+        with open(path) as f:
+            return ujson.load(f)
+    elif extension == "txt":
+        logger.debug("File has txt extension")
+        with open(path) as f:
+            return [line.strip() for line in f.readlines()]
+    elif extension == "csv":
+        logger.debug("File has csv extension")
+        with open(path) as f:
+            return [line.strip().split(",") for line in f.readlines()]
+    elif extension == "npz" and file == "authorship_index":
+        logger.debug("File is an authorship index")
+        return AuthorshipIndex.load(path)
+    printLogToConsole(console_log_level,
+                      "{} is an unknown extension, out[{}] is the io reader result from open".format(extension, file),
+                      logging.INFO, logger=logger)
+    return open(path)
+
+
+class LazyData(MutableMapping):
+    """
+    Files returned by loadData. Every file has a loader that is only called the first time the file is accessed, so
+    files that are never used are never read. load_times has the seconds it took to load each file.
+    """
+
+    def __init__(self, loaders, logger, console_log_level):
+        self._loaders = loaders
+        self._values = {}
+        self._order = list(loaders.keys())
+        self.load_times = {}
+        self.logger = logger
+        self.console_log_level = console_log_level
+
+    def _load(self, file):
+        printLogToConsole(self.console_log_level, "Loading {}".format(file), logging.INFO, logger=self.logger)
+        t0 = time.time()
+        value = self._loaders[file]()
+        self.load_times[file] = time.time() - t0
+        printLogToConsole(self.console_log_level, "Loaded {} in {:.2f}s".format(file, self.load_times[file]),
+                          logging.INFO, logger=self.logger)
+        return value
+
+    def __getitem__(self, file):
+        if file not in self._values:
+            if file not in self._loaders:
+                raise KeyError(file)
+            self._values[file] = self._load(file)
+            del self._loaders[file]
+        return self._values[file]
+
+    def __setitem__(self, file, value):
+        if file not in self._order:
+            self._order.append(file)
+        self._loaders.pop(file, None)
+        self._values[file] = value
+
+    def __delitem__(self, file):
+        if file not in self._order:
+            raise KeyError(file)
+        self._order.remove(file)
+        self._loaders.pop(file, None)
+        self._values.pop(file, None)
+
+    def __iter__(self):
+        return iter(list(self._order))
+
+    def __len__(self):
+        return len(self._order)
+
+    def isLoaded(self, file):
+        return file in self._values
+
+    def rename(self, file, new_name):
+        """
+        Rename a file without loading it
+        """
+        if file in self._loaders:
+            self._loaders[new_name] = self._loaders.pop(file)
+        else:
+            self._values[new_name] = self._values.pop(file)
+        self._order[self._order.index(file)] = new_name
+
+    def loadAll(self, workers=None):
+        """
+        Load every file that has not been loaded yet on a thread pool
+        :param workers: number of threads, defaults to one per file
+        :return: self
+        """
+        to_load = [x for x in self._order if x in self._loaders]
+        if not to_load:
+            return self
+        with ThreadPoolExecutor(max_workers=workers if workers else len(to_load)) as pool:
+            results = list(pool.map(self._load, to_load))
+        for file, value in zip(to_load, results):
+            self._values[file] = value
+            del self._loaders[file]
+        return self
+
+    def printLoadTimes(self, name="Load Times", total=None):
+        """
+        Print how long every loaded file took to load, in the order of the files
+        :param name: Name of the stats
+        :param total: seconds it took to load every file, files loaded in parallel take less than the sum
+        """
+        rows = [[file, self.load_times[file]] for file in self._order if file in self.load_times]
+        if total is not None:
+            rows.append(["Total", total])
+        printStats(name, rows, line_adaptive=True)
+
+
+def loadData(to_load, logger, config_handler, other_files=None, override_keys=None, lazy=False, workers=None):
+    """
+    Load files using the paths in config_handler
+    :param to_load: names of the files in config_handler to load
+    :param logger: logger
+    :param config_handler: ConfigHandler
+    :param other_files: list of other paths to load
+    :param override_keys: dict of file name to the key it should have in the result
+    :param lazy: Only load each file when it is first accessed, otherwise all files are loaded in parallel and the
+    load times are printed. Call printLoadTimes on the result to print them when lazy
+    :param workers: number of threads to load with, defaults to one per file
+    :return: LazyData of file name to loaded file
+    """
     if not other_files:
         other_files = []
     if not override_keys:
         override_keys = {}
-    out = {}
+    loaders = {}
+    snapshot = None
+    if any(x in snapshot_files for x in to_load):
+        snapshot = _openSnapshot([x for x in to_load if x in snapshot_files], logger, config_handler)
     for file in to_load:
+        if snapshot is not None and file in snapshot_files and file in snapshot:
+            logger.debug("Using snapshot for {}".format(file))
+            loaders[file] = partial(snapshot.__getitem__, file)
+            continue
         try:
             path = config_handler[file]
         except KeyError:
@@ -492,58 +551,58 @@ def loadData(to_load, logger, config_handler, other_files=None, override_keys=No
                               "config_handler[{}] is not a string, skipping".format(file), logging.WARNING,
                               logger=logger)
             continue
-        logger.debug("path={}".format(path))
-        extension = path.split(".")[-1]
-        printLogToConsole(config_handler.console_log_level, "Loading {}".format(file), logging.INFO, logger=logger)
-        if "corpus" in file:
-            logger.debug("File is a corpus")
-            out[file] = [[stemmer.stem(w) for w in x.strip().split()] for x in open(path).readlines()]
-        elif extension == "json":
-            logger.debug("File has json extension")
-
-            out[file] = ujson.load(open(path))
-        elif extension == "txt":
-            logger.debug("File has txt extension")
-            out[file] = [line.strip() for line in open(path).readlines()]
-        elif extension == "csv":
-            logger.debug("File has csv extension")
-            out[file] = [line.strip().split(",") for line in open(path).readlines()]
-        else:
-            printLogToConsole(config_handler.console_log_level,
-                              "{} is an unknown extension, out[{}] is the io reader result from open".format(extension,
-                                                                                                             file),
-                              logging.INFO,
-                              logger=logger)
-            out[file] = open(path)
+        loaders[file] = partial(_loadFile, file, path, logger, config_handler.console_log_level)
 
-    logger.debug("Opening other files passed")
+    logger.debug("Adding other files passed")
     for path in other_files:
-        file, extension = path.split("/")[-1].split(".")
-        printLogToConsole(config_handler.console_log_level, "Loading {}".format(file), logging.INFO, logger=logger)
-        if extension == "json":
-            logger.debug("File has json extension")
-            out[file] = ujson.load(path)
-        elif extension == "txt":
-            logger.debug("File has txt extension")
-            out[file] = [line.strip() for line in open(path).readlines()]
-        elif extension == "csv":
-            logger.debug("File has csv extension")
-            out[file] = [line.strip().split(",") for line in open(path).readlines()]
-        else:
-            printLogToConsole(config_handler.console_log_level,
-                              "{} is an unknown extension, out[{}] is the io reader result from open".format(extension,
-                                                                                                             file),
-                              logging.WARNING,
-                              logger=logger)
-            out[file] = open(path)
+        file = path.split("/")[-1].split(".")[0]
+        loaders[file] = partial(_loadFile, file, path, logger, config_handler.console_log_level)
+
+    out = LazyData(loaders, logger, config_handler.console_log_level)
     logger.debug("Overriding keys")
     for k, n in override_keys.items():
         logger.debug("Changing {} to {}".format(k, n))
-        out[n] = deepcopy(out[k])
-        del out[k]
+        out.rename(k, n)
+    if not lazy:
+        t0 = time.time()
+        out.loadAll(workers)
+        total = time.time() - t0
+        logger.info("Loaded {} files in {:.2f}s".format(len(out), total))
+        out.printLoadTimes(total=total)
     return out
 
 
+def loadAuthorshipIndex(logger, config_handler):
+    """
+    Load the authorship index create_data.py and update_data.py save, it is only rebuilt from author_papers when it is
+    missing or older than author_papers.json
+    :param logger: logger
+    :param config_handler: ConfigHandler
+    :return: AuthorshipIndex
+    """
+    try:
+        path = config_handler["authorship_index"]
+    except KeyError:
+        path = None
+    try:
+        sources = [config_handler["author_papers"]]
+    except KeyError:
+        sources = []
+    if isinstance(path, str) and isSnapshotFresh(path, [x for x in sources if isinstance(x, str)]):
+        printLogToConsole(config_handler.console_log_level, "Loading authorship_index", logging.INFO, logger=logger)
+        try:
+            return AuthorshipIndex.load(path)
+        except (ValueError, OSError, KeyError) as e:
+            printLogToConsole(config_handler.console_log_level, "Could not load {}: {}".format(path, e),
+                              logging.WARNING, logger=logger)
+    else:
+        logger.debug("{} does not exist or is older than author_papers".format(path))
+    data = loadData(["author_papers"], logger, config_handler)
+    printLogToConsole(config_handler.console_log_level, "Building authorship_index from author_papers", logging.INFO,
+                      logger=logger)
+    return AuthorshipIndex.fromAuthorPapers(data["author_papers"])
+
+
 def createCLIShared(arguments):
     shared_group = arguments.add_argument_group("Universal",
                                                 "Universal Arguments shared across all modules. Once you have decided on "
@@ -2,25 +2,137 @@ import numpy as np
 import pickle
 import os
 import sys
-from sklearn.neural_network import MLPClassifier
+from sklearn.neural_network import MLPClassifier, MLPRegressor
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.svm import SVC
 from sklearn.gaussian_process import GaussianProcessClassifier
 from sklearn.gaussian_process.kernels import RBF
 from sklearn.tree import DecisionTreeClassifier
-from sklearn.ensemble import RandomForestClassifier, AdaBoostClassifier, VotingClassifier
+from sklearn.ensemble import RandomForestClassifier, AdaBoostClassifier, VotingClassifier, \
+    HistGradientBoostingRegressor
 from sklearn.naive_bayes import GaussianNB
 from sklearn.discriminant_analysis import QuadraticDiscriminantAnalysis
+from sklearn.linear_model import SGDClassifier
 import random
+import re
 import time
 from sklearn.metrics import classification_report, precision_recall_fscore_support, f1_score, confusion_matrix
-from sklearn.model_selection import GridSearchCV
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
 from sklearn.utils import resample
 from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
+from sklearn.utils import Bunch
+import multiprocessing as mp
 import logging
-from src.utility_functions import createLogger, printLogToConsole
+from src.utility_functions import createLogger, printLogToConsole, printStats
+from src.pair_keys import asKey
+from src.pair_chunks import iterPairChunks, isTestPair, Reservoir
+from src.inference_artifact import exportModel
+from src.student_model import StudentModel
 from tqdm import tqdm
 import json
+import hashlib
+import itertools
+
+
+estimator_classes = {
+    "GaussianNB": GaussianNB,
+    "KNeighborsClassifier": KNeighborsClassifier,
+    "MLPClassifier": MLPClassifier,
+    "SVC": SVC,
+    "RBF": RBF,
+    "RandomForestClassifier": RandomForestClassifier,
+    "AdaBoostClassifier": AdaBoostClassifier,
+    "QuadraticDiscriminantAnalysis": QuadraticDiscriminantAnalysis,
+    "DecisionTreeClassifier": DecisionTreeClassifier,
+    "SGDClassifier": SGDClassifier,
+    "GaussianProcessClassifier": GaussianProcessClassifier
+}
+
+
+def createEstimator(m, params):
+    """
+    :param m: name of the estimator's class, a key of estimator_classes
+    :param params: parameters of the estimator
+    :return: the estimator
+    """
+    return estimator_classes[m](**params)
+
+
+def fitEstimator(args):
+    """
+    Fit an estimator, used by the pool in VoteClassifier.trainModel
+    :param args: name, estimator, X, Y
+    :return: name, fitted estimator, seconds to fit
+    """
+    name, estimator, X, Y = args
+    t0 = time.time()
+    estimator.fit(X, Y)
+    return name, estimator, time.time() - t0
+
+
+def predictEstimator(args):
+    """
+    Predict every set of data with a fitted estimator, used by the pool in VoteClassifier.evaluate
+    :param args: name, estimator, list of X to predict
+    :return: name, list of predictions, seconds to predict all of them
+    """
+    name, estimator, to_predict = args
+    t0 = time.time()
+    predictions = [estimator.predict(X) for X in to_predict]
+    return name, predictions, time.time() - t0
+
+
+def foldIndices(Y, folds, seed, fold):
+    """
+    :return: train indices, validation indices of the fold
+    """
+    splitter = StratifiedKFold(folds, shuffle=True, random_state=seed)
+    return list(splitter.split(np.zeros(len(Y)), Y))[fold]
+
+
+def searchFold(args):
+    """
+    Fit and validate an estimator on one fold, used by the pool in VoteClassifier.searchParameters. The train matrix is
+    memory mapped instead of being copied to every worker
+    :param args: task id, estimator class name, parameters, fold, number of folds, seed, path to X, path to Y
+    :return: task id, F1 on the fold, seconds to fit, array of the predictions and probabilities of same on the fold
+    """
+    task_id, m, params, fold, folds, seed, X_path, Y_path = args
+    X = np.load(X_path, mmap_mode="r")
+    Y = np.load(Y_path, mmap_mode="r")
+    train_index, validation_index = foldIndices(Y, folds, seed, fold)
+    estimator = createEstimator(m, params)
+    t0 = time.time()
+    estimator.fit(X[train_index], Y[train_index])
+    fit_time = time.time() - t0
+    predictions = estimator.predict(X[validation_index])
+    if hasattr(estimator, "predict_proba"):
+        probabilities = estimator.predict_proba(X[validation_index])[:, 1]
+    else:
+        probabilities = predictions.astype(float)
+    return task_id, f1_score(Y[validation_index], predictions), fit_time, np.vstack([predictions, probabilities])
+
+
+def searchWeights(args):
+    """
+    Score weights of the estimators on their out of fold predictions, used by the pool in
+    VoteClassifier.searchParameters
+    :param args: path to the out of fold predictions of every estimator, path to Y, voting, list of (index, weights)
+    :return: list of (index, weights, F1)
+    """
+    predictions_path, Y_path, voting, combinations = args
+    predictions = np.load(predictions_path, mmap_mode="r")
+    Y = np.load(Y_path).astype(bool)
+    # Same as the VotingClassifier, ties are predicted as different
+    votes = np.asarray(predictions[:, 0 if voting == "hard" else 1, :], dtype=float)
+    weights = np.asarray([w for _, w in combinations], dtype=float)
+    same = (weights @ votes) > weights.sum(axis=1)[:, np.newaxis] / 2
+    tp = (same & Y).sum(axis=1)
+    fp = (same & ~Y).sum(axis=1)
+    fn = (~same & Y).sum(axis=1)
+    f1 = 2 * tp / np.maximum(2 * tp + fp + fn, 1)
+    return [(i, w, float(f)) for (i, w), f in zip(combinations, f1)]
 
 
 class VoteClassifier:
@@ -34,15 +146,37 @@ class VoteClassifier:
         cutoff=[1000,"Amount of data cases to use"],
         special_only=[False,"Train and test only on special cases"],
         diff_same_ratio=[1.0,"Ratio of diff:same, and vice versa"],
-        train_all_estimators=[False,"Train every estimator provided, otherwise -"],
+        train_all_estimators=[False,"Evaluate every estimator on its own as well as the ensemble"],
         voting=["hard","Voting types, either soft or hard"],
+        student=["", "Distill the model into a single student model, either 'gradient_boosting' or 'mlp'. The student "
+                     "is saved as <model_name>_student and can be used by the disambiguation like any other model"],
+        student_params=[{}, "Parameters of the student's regressor"],
+        out_of_core=[False, "Stream the pairs from tagged_pairs_chunks.pickle instead of loading every pair. "
+                            "Estimators with partial_fit are trained on every pair, the others on a sample of the pairs"],
+        subsample_size=[50000, "Max pairs of each class, and of each class of the special cases, that the "
+                               "estimators without partial_fit are trained on when out_of_core"],
+        test_size=[50000, "Max pairs of each class, and of each class of the special cases, to test on when "
+                          "out_of_core"],
+        epochs=[1, "Number of passes over the pairs for estimators with partial_fit when out_of_core"],
+        search_grids=[{}, "Dict of estimator name to a dict of parameter name to the list of values to try. If it is "
+                          "not empty, the parameters and weights of the estimators are searched before training"],
+        search_folds=[3, "Number of cross validation folds in the search"],
+        weight_grid=[[1, 2, 3], "Weights to try for each estimator in the search"],
     )
 
+    # Default parameters of the student regressors, student_params overrides them
+    student_regressors = {
+        "gradient_boosting": (HistGradientBoostingRegressor, dict(max_depth=3, max_iter=200)),
+        "mlp": (MLPRegressor, dict(hidden_layer_sizes=(16,), max_iter=500))
+    }
+
     def __init__(self, data, classifiers, classifier_weights=None, test_fraction=8, save_data=False,
                  ext_directory=False, save_path=None, model_save_path='/models/', model_name=None, special_cases=None,
                  rand_seed=None, cutoff=None, special_only=False, console_log_level=logging.ERROR,
                  file_log_level=logging.DEBUG, log_format=None, log_path=None, diff_same_ratio=1,
-                 train_all_estimators=False, voting="hard"):
+                 train_all_estimators=False, voting="hard", cores=4, student="", student_params=None,
+                 out_of_core=False, subsample_size=50000, test_size=50000, epochs=1, search_grids=None,
+                 search_folds=3, weight_grid=None):
 
         if not log_format:
             log_format = '%(asctime)s|%(levelname)8s|%(module)20s|%(funcName)20s: %(message)s'
@@ -63,6 +197,8 @@ class VoteClassifier:
         if special_cases is None:
             special_cases = []
         self.special_cases = special_cases
+        self._special_pattern = re.compile("|".join(re.escape(c) for c in special_cases)) if special_cases else None
+        self._special_ids = {}
         self.rand_seed = rand_seed
         if not self.rand_seed:
             self.rand_seed = random.randint(0, 9999)
@@ -92,131 +228,128 @@ class VoteClassifier:
         self.train_all_estimators = train_all_estimators
         self.classifier_params = {}
         self.voting = voting
-        self.train, self.test, self.special_test, self.special_train = self._createTrainTest(data)
+        self.cores = cores if cores else mp.cpu_count()
+        self.fit_times = {}
+        if student and student not in self.student_regressors:
+            raise ValueError("{} is not a supported student".format(student))
+        self.student = student
+        self.student_params = student_params if student_params else {}
+        self.student_model = None
+        self.student_stats = []
+        self.out_of_core = out_of_core
+        self.subsample_size = subsample_size
+        self.test_size = test_size
+        self.epochs = epochs
+        self.search_grids = search_grids if search_grids else {}
+        self.search_folds = search_folds
+        self.weight_grid = weight_grid if weight_grid else [1, 2, 3]
+        self.search_results = {}
+        self.evaluation = {}
+        if out_of_core:
+            # data is the path to the chunks, the pairs are sampled when training
+            self.data_path = data
+            self.train, self.test, self.special_test, self.special_train = None, None, None, None
+            self.class_counts = None
+        else:
+            self.train, self.test, self.special_test, self.special_train = self._createTrainTest(data)
+
+    def _isSpecialId(self, author_id):
+        # Author ids are in many pairs, so each is only searched for the special cases once
+        if author_id not in self._special_ids:
+            self._special_ids[author_id] = bool(self._special_pattern and self._special_pattern.search(author_id))
+        return self._special_ids[author_id]
+
+    def _isSpecialCase(self, a, b):
+        return self._isSpecialId(a) and self._isSpecialId(b)
 
     def _parseData(self, data):
-        same = []
-        different = []
-        special_same = []
-        special_different = []
-        pbar = tqdm(total=len(data), file=sys.stdout)
-        for k, t, d in data:
-            p1, a, p2, b = k.split()
-
-            special_a = False
-            special_b = False
-            is_special_case = False
-            for case in self.special_cases:
-                if case in b:
-                    special_a = True
-
-                if case in a:
-                    special_b = True
-                if special_a and special_b:
-                    is_special_case = True
-                    break
-
-            if t == 1:
-                if is_special_case:
-                    special_same.append((k, 1, d))
-                else:
-                    same.append((k, 1, d))
-            else:
-                if is_special_case:
-                    special_different.append((k, 0, d))
-                else:
-                    different.append((k, 0, d))
-            pbar.update()
-        pbar.close()
+        """
+        :param data: list of [key, tag, vector]
+        :return: keys, feature matrix, array of tags, array of whether each pair is a special case
+        """
+        keys = [asKey(k) for k, _, _ in tqdm(data, file=sys.stdout)]
+        X = np.array([d for _, _, d in data])
+        tags = np.fromiter((t for _, t, _ in data), dtype=int, count=len(data))
+        special = np.fromiter((self._isSpecialCase(k[1], k[3]) for k in keys), dtype=bool, count=len(keys))
+        return keys, X, tags, special
+
+    def _groupPairs(self, tags, special):
+        """
+        :return: indices of the same, different, special same and special different pairs
+        """
+        same = np.flatnonzero((tags == 1) & ~special)
+        different = np.flatnonzero((tags != 1) & ~special)
         if self.cutoff:
-            same = random.sample(same, self.cutoff)
-            different = random.sample(different, self.cutoff)
-        return same, different, special_same, special_different
+            same = same[random.sample(range(len(same)), self.cutoff)]
+            different = different[random.sample(range(len(different)), self.cutoff)]
+        return same, different, np.flatnonzero((tags == 1) & special), np.flatnonzero((tags != 1) & special)
 
     def _selectPairsToUse(self, same, diff):
-        len_same = len(same)
-        len_diff = len(diff)
-        same = np.array([x[0] for x in same])
-        diff = np.array([x[0] for x in diff])
-        same_larger = False
-        if len_same > len_diff:
-            same_larger = True
-            pair_count = int(len_diff * self.dif_same_ratio)
-        else:
-            pair_count = int(len_same * self.dif_same_ratio)
-        if same_larger:
-            out_diff = diff
-            out_same = resample(same, n_samples=pair_count, random_state=self.rand_seed)
-        else:
-            out_same = same
-            out_diff = resample(diff, n_samples=pair_count, random_state=self.rand_seed)
-        return out_same, out_diff
-
-    @staticmethod
-    def convertToUsable(data):
-        return [(x[2], x[1]) for x in data]
-
-    def _splitTrainTest(self, same, diff, special_same=None, special_diff=None):
-
+        """
+        Resample the smaller class so there are diff_same_ratio times as many pairs of the larger class
+        :param same: indices of the same pairs
+        :param diff: indices of the different pairs
+        :return: indices of the same and different pairs to use
+        """
+        if len(same) > len(diff):
+            return resample(same, n_samples=int(len(diff) * self.dif_same_ratio), random_state=self.rand_seed), diff
+        return same, resample(diff, n_samples=int(len(same) * self.dif_same_ratio), random_state=self.rand_seed)
+
+    def _splitTrainTest(self, X, same, diff, special_same=None, special_diff=None):
+        """
+        :param X: feature matrix of every pair
+        :param same: indices of the same pairs
+        :param diff: indices of the different pairs
+        :param special_same: indices of the special same pairs to add
+        :param special_diff: indices of the special different pairs to add
+        :return: dicts of the train and test X and Y
+        """
         self.logger.debug("Creating train and test")
-        Y = []
-        X = np.concatenate((same, diff))
-        self.logger.debug("# of same = {}".format(same.shape[0]))
-        for i in range(same.shape[0]):
-            Y.append(1)
-        self.logger.debug("# of different = {}".format(diff.shape[0]))
-        for i in range(diff.shape[0]):
-            Y.append(0)
+        groups = [(same, 1), (diff, 0)]
         if special_same is not None:
-            X = np.concatenate((X, special_same))
-            self.logger.debug("# of special same = {}".format(special_same.shape[0]))
-            for i in range(special_same.shape[0]):
-                Y.append(1)
+            groups.append((special_same, 1))
         if special_diff is not None:
-            X = np.concatenate((X, special_diff))
-            self.logger.debug("# of special diff= {}".format(special_diff.shape[0]))
-            for i in range(special_diff.shape[0]):
-                Y.append(0)
-        Y = np.array(Y)
-        X_train, X_test, Y_train, Y_test = train_test_split(X, Y, test_size=1 / self.test_fraction,
-                                                            random_state=self.rand_seed)
+            groups.append((special_diff, 0))
+        for (index, _), name in zip(groups, ["same", "different", "special same", "special diff"]):
+            self.logger.debug("# of {} = {}".format(name, len(index)))
+        index = np.concatenate([i for i, _ in groups])
+        Y = np.concatenate([np.full(len(i), t) for i, t in groups])
+        index_train, index_test, Y_train, Y_test = train_test_split(index, Y, test_size=1 / self.test_fraction,
+                                                                    random_state=self.rand_seed)
         return {
-                   "X": X_train,
+                   "X": X[index_train],
                    "Y": Y_train
                }, {
-                   "X": X_test,
+                   "X": X[index_test],
                    "Y": Y_test
                }
 
     def _createTrainTest(self, data):
         printLogToConsole(self.console_log_level, "Creating train and test", logging.INFO)
         self.logger.info("Creating train and test")
-        same, different, special_same, special_different = self._parseData(data)
+        keys, X, tags, special = self._parseData(data)
+        same, different, special_same, special_different = self._groupPairs(tags, special)
 
-        def saveData(d, file_path):
+        def saveData(index, t, file_path):
             with open(file_path, "wb") as f:
-                to_save = [x for x in d]
+                to_save = [(keys[i], t, data[i][2]) for i in index]
                 pickle.dump(to_save, f)
 
         if self.save_data:
-            saveData(same, self.save_path + "/same.pickle")
-            saveData(different, self.save_path + "/different.pickle")
-            saveData(special_same, self.save_path + "/special_same.pickle")
-            saveData(special_different, self.save_path + "/special_different.pickle")
+            saveData(same, 1, self.save_path + "/same.pickle")
+            saveData(different, 0, self.save_path + "/different.pickle")
+            saveData(special_same, 1, self.save_path + "/special_same.pickle")
+            saveData(special_different, 0, self.save_path + "/special_different.pickle")
             all_pairs = []
-            for k, t, _ in [*same, *different, *special_same, *special_different]:
-                all_pairs.append([k, t])
+            for index, t in [(same, 1), (different, 0), (special_same, 1), (special_different, 0)]:
+                all_pairs.extend([keys[i], t] for i in index)
             with open(self.save_path + "/save_pairs.pickle", "wb") as f:
                 pickle.dump(all_pairs, f)
 
-        same = self.convertToUsable(same)
-        different = self.convertToUsable(different)
-        special_same = self.convertToUsable(special_same)
-        special_different = self.convertToUsable(special_different)
         same, different = self._selectPairsToUse(same, different)
         special_same, special_different = self._selectPairsToUse(special_same, special_different)
-        train, test = self._splitTrainTest(same, different, special_same, special_different)
-        special_train, special_test = self._splitTrainTest(special_same, special_different)
+        train, test = self._splitTrainTest(X, same, different, special_same, special_different)
+        special_train, special_test = self._splitTrainTest(X, special_same, special_different)
 
         printLogToConsole(self.console_log_level, "Splitting non-special pairs", logging.INFO)
         self.logger.info("Splitting non-special pairs")
@@ -239,35 +372,18 @@ class VoteClassifier:
             if n not in classifier_parameters:
                 self.logger.error("{} is not in classifier_parameters".format(n))
                 raise KeyError("{} is not in classifier_parameters".format(n))
-            if m == "GaussianNB":
-                self.estimators.append((n, GaussianNB(**classifier_parameters[n])))
-            elif m == "KNeighborsClassifier":
-                self.estimators.append((n, KNeighborsClassifier(**classifier_parameters[n])))
-            elif m == "MLPClassifier":
-                self.estimators.append((n, MLPClassifier(**classifier_parameters[n])))
-            elif m == "SVC":
-                self.estimators.append((n, SVC(**classifier_parameters[n])))
-            elif m == "RBF":
-                self.estimators.append((n, RBF(**classifier_parameters[n])))
-            elif m == "RandomForestClassifier":
-                self.estimators.append((n, RandomForestClassifier(**classifier_parameters[n])))
-            elif m == "AdaBoostClassifier":
-                self.estimators.append((n, AdaBoostClassifier(**classifier_parameters[n])))
-            elif m == "QuadraticDiscriminantAnalysis":
-                self.estimators.append((n, QuadraticDiscriminantAnalysis(**classifier_parameters[n])))
-            elif m == "DecisionTreeClassifier":
-                self.estimators.append((n, DecisionTreeClassifier(**classifier_parameters[n])))
-            elif m == "GaussianProcessClassifier":
-                self.estimators.append((n, GaussianProcessClassifier(**classifier_parameters[n])))
-            else:
+            if m not in estimator_classes:
                 self.logger.error("Unknown classifier")
                 raise ValueError("{} is not a supported classifier".format(m))
+            self.estimators.append((n, createEstimator(m, classifier_parameters[n])))
 
         self.model = VotingClassifier(self.estimators, voting=self.voting, weights=weights)
 
     def trainModel(self, voting="hard"):
         printLogToConsole(self.console_log_level, "Training model", logging.INFO)
         self.logger.info("Training model")
+        if self.out_of_core:
+            return self._trainOutOfCore()
 
         if self.special_only:
             self.logger.debug("Training on special data")
@@ -279,20 +395,306 @@ class VoteClassifier:
             train = self.train
 
         X = train["X"]
-        Y = train["Y"]
-        if self.train_all_estimators:
-            for n, m in self.estimators:
-                t0 = time.time()
-                m.fit(X, Y)
-                t1 = time.time()
-                progress_str = "Finished fitting classifier {} in {:.2f}s".format(n, t1 - t0)
-                printLogToConsole(self.console_log_level, progress_str, logging.INFO)
-                self.logger.info(progress_str)
-        printLogToConsole(self.console_log_level, "Fitting the VotingClassifier Model", logging.INFO)
-        self.logger.info("Fitting the VotingClassifier Model")
-        self.model.fit(X, Y)
-        printLogToConsole(self.console_log_level, "Finished fitting model", logging.INFO)
-        self.logger.info("Finished fitting model")
+        label_encoder = LabelEncoder().fit(train["Y"])
+        Y = label_encoder.transform(train["Y"])
+
+        # The estimators are independent, so they are fit at the same time and then put in the VotingClassifier the
+        # same way VotingClassifier.fit would, instead of fitting every estimator again
+        args = [[n, m, X, Y] for n, m in self.estimators]
+        fitted = {}
+        t0 = time.time()
+        for n, m, fit_time in self._runEstimators(fitEstimator, args, "Fitting"):
+            fitted[n] = m
+            self.fit_times[n] = fit_time
+            progress_str = "Finished fitting classifier {} in {:.2f}s".format(n, fit_time)
+            printLogToConsole(self.console_log_level, progress_str, logging.INFO)
+            self.logger.info(progress_str)
+        self._setFitted(label_encoder, fitted)
+        printLogToConsole(self.console_log_level, "Finished fitting model in {:.2f}s".format(time.time() - t0),
+                          logging.INFO)
+        self.logger.info("Finished fitting model in {:.2f}s".format(time.time() - t0))
+
+    def _setFitted(self, label_encoder, fitted):
+        self.estimators = [(n, fitted[n]) for n, _ in self.estimators]
+        self.model.le_ = label_encoder
+        self.model.classes_ = label_encoder.classes_
+        self.model.estimators_ = [m for _, m in self.estimators]
+        # Same order as the estimators, fitted is in the order the fits finished
+        self.model.named_estimators_ = Bunch(**dict(self.estimators))
+
+    def _isTest(self, key):
+        return isTestPair(key, self.rand_seed, self.test_fraction)
+
+    def _samplePairs(self):
+        """
+        First pass over the chunks. Every pair is put in the reservoir of its split, whether it is a special case and
+        its tag, so the samples are stratified and each has at most subsample_size or test_size pairs
+        :return: dict of (split, is special case, tag) to Reservoir of vectors
+        """
+        rng = random.Random(self.rand_seed)
+        reservoirs = {}
+        for split, size in [["train", self.subsample_size], ["test", self.test_size]]:
+            for special in [False, True]:
+                for tag in [0, 1]:
+                    reservoirs[split, special, tag] = Reservoir(size, rng)
+        for chunk in tqdm(iterPairChunks(self.data_path), file=sys.stdout):
+            for k, t, d in chunk:
+                k = asKey(k)
+                split = "test" if self._isTest(k) else "train"
+                reservoirs[split, self._isSpecialCase(k[1], k[3]), t].add(d)
+        return reservoirs
+
+    def _stackSample(self, reservoirs, split, special_cases):
+        """
+        :param reservoirs: reservoirs from _samplePairs
+        :param split: 'train' or 'test'
+        :param special_cases: list of the special case values to use, [False, True] uses every pair
+        :return: dict of X and Y, with same and different balanced like _selectPairsToUse
+        """
+        same = [d for special in special_cases for d in reservoirs[split, special, 1].items]
+        diff = [d for special in special_cases for d in reservoirs[split, special, 0].items]
+        if not same or not diff:
+            return {"X": np.zeros((0, 0)), "Y": np.zeros(0, dtype=int)}
+        same_index, diff_index = self._selectPairsToUse(np.arange(len(same)),
+                                                        np.arange(len(same), len(same) + len(diff)))
+        X = np.array(same + diff)[np.concatenate((same_index, diff_index))]
+        Y = np.concatenate((np.ones(len(same_index), dtype=int), np.zeros(len(diff_index), dtype=int)))
+        order = np.random.RandomState(self.rand_seed).permutation(len(Y))
+        return {"X": X[order], "Y": Y[order]}
+
+    def _partialFit(self, estimators, class_counts):
+        """
+        Pass over the chunks epochs times and train the estimators on every training pair
+        :param estimators: list of (name, estimator with partial_fit)
+        :param class_counts: number of training pairs of each tag
+        """
+        # Pairs of the larger class are kept with the probability that gives the same ratio as _selectPairsToUse
+        smaller = min(class_counts.values())
+        keep = {t: min(1.0, smaller * self.dif_same_ratio / c) if c else 0 for t, c in class_counts.items()}
+        self.logger.debug("Probability of keeping pairs: {}".format(keep))
+        classes = np.array([0, 1])
+        rng = np.random.RandomState(self.rand_seed)
+        for epoch in range(self.epochs):
+            printLogToConsole(self.console_log_level, "Epoch {}/{}".format(epoch + 1, self.epochs), logging.INFO)
+            self.logger.info("Epoch {}/{}".format(epoch + 1, self.epochs))
+            for chunk in tqdm(iterPairChunks(self.data_path), file=sys.stdout):
+                X = []
+                Y = []
+                for k, t, d in chunk:
+                    k = asKey(k)
+                    if self._isTest(k) or (self.special_only and not self._isSpecialCase(k[1], k[3])):
+                        continue
+                    X.append(d)
+                    Y.append(t)
+                if not Y:
+                    continue
+                X = np.asarray(X)
+                Y = np.asarray(Y)
+                use = rng.random_sample(len(Y)) < np.where(Y == 1, keep[1], keep[0])
+                order = rng.permutation(np.flatnonzero(use))
+                if len(order) == 0:
+                    continue
+                for n, m in estimators:
+                    t0 = time.time()
+                    m.partial_fit(X[order], Y[order], classes=classes)
+                    self.fit_times[n] = self.fit_times.get(n, 0) + time.time() - t0
+
+    def _sampleOutOfCore(self):
+        printLogToConsole(self.console_log_level, "Sampling pairs from {}".format(self.data_path), logging.INFO)
+        self.logger.info("Sampling pairs from {}".format(self.data_path))
+        reservoirs = self._samplePairs()
+        special_cases = [True] if self.special_only else [False, True]
+        class_counts = {t: sum(reservoirs["train", special, t].seen for special in special_cases) for t in [0, 1]}
+        self.class_counts = class_counts
+        self.train = self._stackSample(reservoirs, "train", [False, True])
+        self.special_train = self._stackSample(reservoirs, "train", [True])
+        self.test = self._stackSample(reservoirs, "test", [False, True])
+        self.special_test = self._stackSample(reservoirs, "test", [True])
+        for (split, special, tag), r in reservoirs.items():
+            self.logger.debug("{} special={} tag={}: kept {} of {}".format(split, special, tag, len(r), r.seen))
+        stats = [
+            ["Training pairs", sum(class_counts.values())],
+            ["Training same", class_counts[1]],
+            ["Training different", class_counts[0]],
+            ["Subsample size", len(self.special_train["Y"] if self.special_only else self.train["Y"])],
+            ["Test size", len(self.test["Y"])],
+            ["Special test size", len(self.special_test["Y"])]
+        ]
+        printStats("Out of core sample", stats, line_adaptive=True)
+        for row in stats:
+            self.logger.info("{}: {}".format(*row))
+
+    def _trainOutOfCore(self):
+        t0 = time.time()
+        # The pairs were already sampled if the parameters were searched
+        if self.train is None:
+            self._sampleOutOfCore()
+        label_encoder = LabelEncoder().fit([0, 1])
+        incremental = [(n, m) for n, m in self.estimators if hasattr(m, "partial_fit")]
+        self.logger.debug("Estimators trained on every pair: {}".format([n for n, _ in incremental]))
+        if incremental:
+            self._partialFit(incremental, self.class_counts)
+        fitted = dict(incremental)
+
+        # The other estimators keep their training data or need all of it at once, so they are fit on the sample
+        sample = self.special_train if self.special_only else self.train
+        args = [[n, m, sample["X"], sample["Y"]] for n, m in self.estimators if n not in fitted]
+        for n, m, fit_time in self._runEstimators(fitEstimator, args, "Fitting"):
+            fitted[n] = m
+            self.fit_times[n] = fit_time
+        for n, _ in self.estimators:
+            progress_str = "Finished fitting classifier {} in {:.2f}s".format(n, self.fit_times[n])
+            printLogToConsole(self.console_log_level, progress_str, logging.INFO)
+            self.logger.info(progress_str)
+        self._setFitted(label_encoder, fitted)
+        printLogToConsole(self.console_log_level, "Finished fitting model in {:.2f}s".format(time.time() - t0),
+                          logging.INFO)
+        self.logger.info("Finished fitting model in {:.2f}s".format(time.time() - t0))
+
+    def _runEstimators(self, func, args, action):
+        """
+        Run func on the args of every estimator, in parallel if there is more than one core
+        :param func: fitEstimator or predictEstimator
+        :param args: list of the args for each estimator
+        :param action: what is being done, for logging
+        :return: list of the results of func
+        """
+        cores = min(self.cores, len(args))
+        self.logger.debug("{} {} estimators with {} cores".format(action, len(args), cores))
+        if cores <= 1:
+            return [func(x) for x in tqdm(args, file=sys.stdout)]
+        with mp.Pool(cores) as Pool:
+            return list(tqdm(Pool.imap_unordered(func, args), total=len(args), file=sys.stdout))
+
+    def _runSearch(self, func, args, action):
+        """
+        Like _runEstimators, but yields the results as they finish so they can be cached right away
+        """
+        cores = min(self.cores, len(args))
+        self.logger.debug("{} {} tasks with {} cores".format(action, len(args), cores))
+        if cores <= 1:
+            yield from tqdm(map(func, args), total=len(args), file=sys.stdout)
+            return
+        with mp.Pool(cores) as Pool:
+            yield from tqdm(Pool.imap_unordered(func, args), total=len(args), file=sys.stdout)
+
+    def searchParameters(self, classifier_parameters):
+        """
+        Cross validate every combination of the parameters in search_grids for each estimator, then search the weights
+        of the estimators with the out of fold predictions of their best parameters. Every fold is cached when it
+        finishes in search_cache under save_path, so an interrupted search only runs the folds that are left.
+        :param classifier_parameters: dict of estimator name to parameters, used for the estimators and parameters
+        that are not in search_grids
+        :return: classifier_parameters with the best parameters. classifier_weights is set to the best weights
+        """
+        printLogToConsole(self.console_log_level, "Searching parameters", logging.INFO)
+        self.logger.info("Searching parameters")
+        if self.out_of_core and self.train is None:
+            self._sampleOutOfCore()
+        train = self.special_train if self.special_only else self.train
+        X = np.ascontiguousarray(train["X"], dtype=float)
+        Y = np.ascontiguousarray(train["Y"], dtype=int)
+        folds = self.search_folds
+        t0 = time.time()
+
+        # The cache only holds folds of the same data and splits
+        fingerprint = hashlib.sha1(X.tobytes() + Y.tobytes())
+        fingerprint.update("{} {}".format(folds, self.rand_seed).encode())
+        cache_path = self.save_path + "/search_cache/" + fingerprint.hexdigest()[:16]
+        os.makedirs(cache_path + "/folds", exist_ok=True)
+        X_path, Y_path = cache_path + "/X.npy", cache_path + "/Y.npy"
+        if not os.path.exists(X_path):
+            np.save(X_path, X)
+            np.save(Y_path, Y)
+        results = {}
+        if os.path.exists(cache_path + "/results.jsonl"):
+            with open(cache_path + "/results.jsonl") as f:
+                for line in f:
+                    # The last line is incomplete if the search was killed while writing it
+                    try:
+                        result = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    results[result["id"]] = result
+
+        candidates = {}
+        tasks = []
+        for n, m in self.classifiers:
+            base = classifier_parameters.get(n, {})
+            grid = ParameterGrid(self.search_grids[n]) if n in self.search_grids else [{}]
+            candidates[n] = []
+            for grid_params in grid:
+                params = {**base, **grid_params}
+                task_ids = []
+                for fold in range(folds):
+                    task_id = hashlib.sha1(json.dumps([m, params, fold], sort_keys=True).encode()).hexdigest()
+                    task_ids.append(task_id)
+                    if task_id not in results:
+                        tasks.append([task_id, m, params, fold, folds, self.rand_seed, X_path, Y_path])
+                candidates[n].append((params, task_ids))
+        cached = sum(len(ids) for c in candidates.values() for _, ids in c) - len(tasks)
+        self.logger.info("{} folds to run, {} cached in {}".format(len(tasks), cached, cache_path))
+
+        task_info = {t[0]: t for t in tasks}
+        with open(cache_path + "/results.jsonl", "a") as f:
+            for task_id, f1, fit_time, predictions in self._runSearch(searchFold, tasks, "Cross validating"):
+                np.save(cache_path + "/folds/{}.npy".format(task_id), predictions)
+                _, m, params, fold = task_info[task_id][:4]
+                results[task_id] = dict(id=task_id, classifier=m, params=params, fold=fold, f1=f1,
+                                        fit_time=fit_time)
+                f.write(json.dumps(results[task_id]) + "\n")
+                f.flush()
+
+        # Ties go to the first parameters in the grid
+        best = {}
+        summary = {}
+        for n, _ in self.classifiers:
+            scores = [np.mean([results[i]["f1"] for i in task_ids]) for _, task_ids in candidates[n]]
+            best_index = int(np.argmax(scores))
+            best[n] = candidates[n][best_index]
+            summary[n] = dict(params=best[n][0], f1=float(scores[best_index]), candidates=len(scores))
+
+        # Out of fold predictions of the best parameters of every estimator, shape (estimators, 2, pairs)
+        oof = np.zeros((len(self.classifiers), 2, len(Y)))
+        for i, (n, _) in enumerate(self.classifiers):
+            for fold, task_id in enumerate(best[n][1]):
+                _, validation_index = foldIndices(Y, folds, self.rand_seed, fold)
+                oof[i][:, validation_index] = np.load(cache_path + "/folds/{}.npy".format(task_id))
+        oof_path = cache_path + "/oof.npy"
+        np.save(oof_path, oof)
+
+        combinations = [(i, list(w)) for i, w in
+                        enumerate(itertools.product(self.weight_grid, repeat=len(self.classifiers))) if any(w)]
+        current = [self.classifier_weights[n] for n, _ in self.classifiers]
+        combinations.append((len(combinations), current))
+        batch_size = max(1, int(np.ceil(len(combinations) / (self.cores * 4))))
+        args = [[oof_path, Y_path, self.voting, combinations[i:i + batch_size]]
+                for i in range(0, len(combinations), batch_size)]
+        scores = [x for batch in self._runSearch(searchWeights, args, "Searching weights") for x in batch]
+        scores.sort(key=lambda x: (-x[2], x[0]))
+        _, best_weights, best_f1 = scores[0]
+        current_f1 = [f1 for i, _, f1 in scores if i == len(combinations) - 1][0]
+
+        self.classifier_weights = {n: best_weights[i] for i, (n, _) in enumerate(self.classifiers)}
+        best_params = dict(classifier_parameters)
+        best_params.update({n: best[n][0] for n, _ in self.classifiers})
+        self.search_results = dict(folds=folds, estimators=summary, weights=self.classifier_weights,
+                                   f1=best_f1, f1_current_weights=current_f1,
+                                   weight_combinations=len(combinations), cache=cache_path)
+
+        stats = [[n, summary[n]["f1"], summary[n]["candidates"], str(summary[n]["params"])]
+                 for n, _ in self.classifiers]
+        stats.append(["Ensemble, weights {}".format(best_weights), best_f1, len(combinations), ""])
+        stats.append(["Ensemble, weights {}".format(current), current_f1, 1, ""])
+        printStats("Parameter search", [["Estimator", "F1", "Tried", "Best parameters"], *stats], line_adaptive=True)
+        for row in stats:
+            self.logger.info("{}: F1={:.4f} of {} tried {}".format(*row))
+        printLogToConsole(self.console_log_level, "Finished search in {:.2f}s".format(time.time() - t0), logging.INFO)
+        self.logger.info("Finished search in {:.2f}s".format(time.time() - t0))
+
+        self.classifier_params = best_params
+        self._saveParameters(os.getcwd() + self.model_save_path + self.model_name)
+        return best_params
 
     def evaluate(self):
         printLogToConsole(self.console_log_level, "Evaluating model", logging.INFO)
@@ -300,10 +702,14 @@ class VoteClassifier:
         if self.train_all_estimators:
             predictions = {}
             special_predictions = {}
-            for n, m in self.estimators:
-                self.logger.debug("Making predictions for {}".format(n))
-                predictions[n] = m.predict(self.test["X"])
-                special_predictions[n] = m.predict(self.special_test["X"])
+            predict_times = {}
+            args = [[n, m, [self.test["X"], self.special_test["X"]]] for n, m in self.estimators]
+            for n, (pred, special_pred), predict_time in self._runEstimators(predictEstimator, args, "Predicting"):
+                self.logger.debug("{} took {:.2f}s to predict".format(n, predict_time))
+                predictions[n] = pred
+                special_predictions[n] = special_pred
+                predict_times[n] = predict_time
+            predictions = {n: predictions[n] for n, _ in self.estimators}
 
             printLogToConsole(self.console_log_level, "Results for all estimators", logging.INFO)
             self.logger.info("Results for all estimators")
@@ -311,13 +717,15 @@ class VoteClassifier:
                 printLogToConsole(self.console_log_level,
                                   "First stat line is on normal test, second is for special cases",
                                   logging.INFO)
-            column_str = "{} {:>11} {:>11} {:>11}".format(" " * 25, "precision", "recall", "f1-score")
+            column_str = "{} {:>11} {:>11} {:>11} {:>11} {:>11}".format(" " * 25, "precision", "recall", "f1-score",
+                                                                        "fit (s)", "predict (s)")
             printLogToConsole(self.console_log_level, column_str, logging.INFO)
             self.logger.info(column_str)
             for k, pred in predictions.items():
                 precision, recall, _, _ = precision_recall_fscore_support(self.test["Y"], pred, average="binary")
                 f1 = f1_score(self.test["Y"], pred, average="binary")
-                stat_str = "{:<25} {:>11.2f} {:>11.2f} {:>11.2f}".format(k + ":", precision, recall, f1)
+                stat_str = "{:<25} {:>11.2f} {:>11.2f} {:>11.2f} {:>11.2f} {:>11.2f}".format(
+                    k + ":", precision, recall, f1, self.fit_times.get(k, 0), predict_times[k])
                 printLogToConsole(self.console_log_level, stat_str, logging.INFO)
                 self.logger.info(stat_str)
                 if self.special_only:
@@ -331,6 +739,7 @@ class VoteClassifier:
                 self.logger.info(stat_str)
 
         model_predictions = self.model.predict(self.test["X"])
+        self.evaluation = {"f1": float(f1_score(self.test["Y"], model_predictions))}
         printLogToConsole(self.console_log_level, "Model stats on test data:", logging.INFO)
         self.logger.info("Model stats on test data")
         stats = classification_report(self.test["Y"], model_predictions, target_names=["Different", "Same"])
@@ -338,21 +747,94 @@ class VoteClassifier:
         self.logger.info(stats)
         if not self.special_only:
             model_predictions = self.model.predict(self.special_test["X"])
+            self.evaluation["f1_special"] = float(f1_score(self.special_test["Y"], model_predictions))
             printLogToConsole(self.console_log_level, "Model stats on special cases data:", logging.INFO)
             self.logger.info("Model stats on special cases data")
             stats = classification_report(self.special_test["Y"], model_predictions, target_names=["Different", "Same"])
             print(stats)
             self.logger.info(stats)
 
+    def _teacherProbabilities(self, X):
+        """
+        Probability of same from the model, for hard voting it is the weighted share of the estimators voting same
+        """
+        if self.voting == "soft":
+            return self.model.predict_proba(X)[:, 1]
+        votes = np.asarray([m.predict(X) for m in self.model.estimators_])
+        return np.average(votes, axis=0, weights=self.model._weights_not_none)
+
+    @staticmethod
+    def _rowsPerSecond(model, X, batch_size):
+        t0 = time.time()
+        for i in range(0, len(X), batch_size):
+            model.predict(X[i:i + batch_size])
+        return len(X) / max(time.time() - t0, 1e-9)
+
+    def distill(self):
+        """
+        Train the student on the model's probabilities of the training pairs and compare it to the model
+        :return: list of rows for printStats
+        """
+        printLogToConsole(self.console_log_level, "Distilling model into {} student".format(self.student),
+                          logging.INFO)
+        self.logger.info("Distilling model into {} student".format(self.student))
+        train = self.special_train if self.special_only else self.train
+        regressor, params = self.student_regressors[self.student]
+        params = {**params, "random_state": self.rand_seed, **self.student_params}
+        self.logger.debug("student params={}".format(params))
+        t0 = time.time()
+        targets = self._teacherProbabilities(train["X"])
+        label_time = time.time() - t0
+        t0 = time.time()
+        self.student_model = StudentModel(regressor(**params).fit(train["X"], targets), self.voting)
+        fit_time = time.time() - t0
+        self.logger.info("Labeled {} pairs in {:.2f}s and fit the student in {:.2f}s".format(len(targets), label_time,
+                                                                                          fit_time))
+
+        self.student_stats = [["Student fit (s)", fit_time]]
+        to_evaluate = [["test", self.test]]
+        if not self.special_only and len(self.special_test["Y"]) > 0:
+            to_evaluate.append(["special cases", self.special_test])
+        for name, data in to_evaluate:
+            teacher_predictions = self.model.predict(data["X"])
+            student_predictions = self.student_model.predict(data["X"])
+            self.student_stats.extend([
+                ["Agreement with teacher on {}".format(name), np.mean(teacher_predictions == student_predictions)],
+                ["Teacher F1 on {}".format(name), f1_score(data["Y"], teacher_predictions, average="binary")],
+                ["Student F1 on {}".format(name), f1_score(data["Y"], student_predictions, average="binary")]
+            ])
+        # Batches of 10 are about the number of pairs the disambiguation predicts at once for an id
+        for batch_size in [10, len(self.test["X"])]:
+            for name, model in [["Teacher", self.model], ["Student", self.student_model]]:
+                self.student_stats.append(["{} rows/s, batches of {}".format(name, batch_size),
+                                           self._rowsPerSecond(model, self.test["X"], batch_size)])
+        printStats("Distillation", self.student_stats, line_adaptive=True)
+        for row in self.student_stats:
+            self.logger.info("{}: {}".format(*row))
+        return self.student_stats
+
     def save(self):
         path = os.getcwd() + self.model_save_path + self.model_name
         if not os.path.exists(path):
             os.mkdir(path)
+        if self.student_model is not None:
+            self._saveStudent(path + "_student")
 
         # I got permission denied when using os.path.join
         with open(path + "/model.pickle", "wb") as f:
             pickle.dump(self.model, f)
+        try:
+            exportModel(self.model, path + "/model.npz")
+        except ValueError as e:
+            self.logger.warning("Could not write the inference artifact: {}".format(e))
+        self._saveParameters(path)
 
+        printLogToConsole(self.console_log_level, "Saved model {} to {}".format(self.model_name, path), logging.INFO)
+        self.logger.info("Saved model {} to {}".format(self.model_name, path))
+
+    def _saveParameters(self, path):
+        if not os.path.exists(path):
+            os.makedirs(path)
         parameters_dict = {
             "classifiers": self.classifiers,
             "classifier_weights": self.classifier_weights,
@@ -363,8 +845,26 @@ class VoteClassifier:
             "diff_same_ratio": self.dif_same_ratio,
             "cutoff": self.cutoff
         }
+        if self.search_results:
+            parameters_dict["search"] = self.search_results
+        if self.evaluation:
+            parameters_dict["evaluation"] = self.evaluation
         with open(path + "/parameters.json", "w") as f:
             json.dump(parameters_dict, f, indent=4)
 
-        printLogToConsole(self.console_log_level, "Saved model {} to {}".format(self.model_name, path), logging.INFO)
-        self.logger.info("Saved model {} to {}".format(self.model_name, path))
+    def _saveStudent(self, path):
+        if not os.path.exists(path):
+            os.mkdir(path)
+        with open(path + "/model.pickle", "wb") as f:
+            pickle.dump(self.student_model, f)
+        parameters_dict = {
+            "teacher": self.model_name,
+            "student": self.student,
+            "student_params": self.student_params,
+            "rand_seed": self.rand_seed,
+            "stats": {k: float(v) for k, v in self.student_stats}
+        }
+        with open(path + "/parameters.json", "w") as f:
+            json.dump(parameters_dict, f, indent=4)
+        printLogToConsole(self.console_log_level, "Saved student to {}".format(path), logging.INFO)
+        self.logger.info("Saved student to {}".format(path))
@@ -70,4 +70,112 @@ class TestACLParser(unittest.TestCase):
         self.assertDictEqual(parser.papers[test_paper_1].authors,test_paper_1_data)
         self.assertDictEqual(parser.papers[test_paper_2].authors, test_paper_2_data)
 
+    def test_compileNameVariants(self):
+        import tempfile
+        from src.artifact_cache import loadCachedArtifact, cachePath
+        variants = "- canonical: {first: Yang, last: Liu}\n" \
+                   "  id: yang-liu-ict\n" \
+                   "  comment: Several People\n" \
+                   "- canonical: {first: José I., last: Abreu}\n" \
+                   "  variants:\n" \
+                   "  - {first: Jose I., last: Abreu}\n" \
+                   "  - {first: null, last: Abreu}\n" \
+                   "- canonical: {first: James, last: Allan}\n" \
+                   "  similar: [james-allen]\n" \
+                   "  comment: UMass\n"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "name_variants.yaml")
+            with open(path, "w") as f:
+                f.write(variants)
+            compiled = loadCachedArtifact(path, str(NAME_VARIANTS_VERSION),
+                                          lambda x: compileNameVariants(readNameVariants(x)))
+            self.assertTrue(os.path.exists(cachePath(path)))
+            cached = loadCachedArtifact(path, str(NAME_VARIANTS_VERSION), lambda x: self.fail("cache was not used"))
+        self.assertEqual(compiled, cached)
+        self.assertEqual(["Yang Liu"], compiled["same_name"])
+        self.assertEqual("jose-i-abreu", compiled["aliases"]["jose i. abreu"])
+        self.assertEqual("jose-i-abreu", compiled["aliases"]["jose i abreu"])
+        self.assertEqual("jose-i-abreu", compiled["aliases"]["abreu"])
+        self.assertEqual({"first": "James", "last": "Allan"}, compiled["id_to_name"]["james-allan"])
+        self.assertEqual(["james-allen"], compiled["similar_names"]["james-allan"])
+        self.assertEqual("UMass", compiled["affiliations"]["james-allan"])
 
+    def test_update(self):
+        import tempfile
+        config = json.load(open("config.json"))
+        xml = "<?xml version='1.0' encoding='UTF-8'?>\n<collection id=\"{0}\"><volume id=\"1\">{1}</volume></collection>"
+        paper = "<paper><title>{}</title>{}<url>{}</url></paper>"
+        author = "<author><first>{}</first><last>{}</last></author>"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with open(os.path.join(tmp_dir, "X01.xml"), "w") as f:
+                f.write(xml.format("X01", paper.format("A", author.format("Ana", "Lopez"), "X01-1001") +
+                                   paper.format("B", author.format("Carl", "Díaz"), "X01-1002")))
+            parser = ACLParser(config["ACLParserXpaths"], cores=1)
+            parser.parseACLXml(tmp_dir + "/")
+            self.assertEqual({"ana-lopez": "Ana Lopez"}, parser.papers["X01-1001"].authors)
+
+            with open(os.path.join(tmp_dir, "X01.xml"), "w") as f:
+                f.write(xml.format("X01", paper.format("A", author.format("Ana", "Lopez") +
+                                                       author.format("Bo", "Chen"), "X01-1001") +
+                                   paper.format("B", author.format("Carl", "Díaz"), "X01-1002")))
+            with open(os.path.join(tmp_dir, "X02.xml"), "w") as f:
+                f.write(xml.format("X02", paper.format("C", author.format("Ana", "Lopez") +
+                                                       author.format("Carl", "Diaz"), "X02-1001")))
+            updated = ACLParser(config["ACLParserXpaths"], cores=1)
+            updated.loadExisting({k: v.asDict() for k, v in parser.papers.items()}, parser.id_to_name,
+                                 parser.conflicts)
+            changes = updated.update([os.path.join(tmp_dir, "X02.xml"), os.path.join(tmp_dir, "X01.xml")])
+
+        self.assertEqual(["X02-1001"], changes["added"])
+        self.assertEqual(["X01-1001", "X01-1002"], changes["updated"])
+        self.assertEqual(["carl-diaz1", "bo-chen"], changes["new_ids"])
+        self.assertEqual({"ana-lopez": "Ana Lopez", "bo-chen": "Bo Chen"}, updated.papers["X01-1001"].authors)
+        self.assertEqual({"ana-lopez": "Ana Lopez", "carl-diaz1": "Carl Diaz"}, updated.papers["X02-1001"].authors)
+        self.assertEqual({"carl-diaz": "Carl Díaz"}, updated.papers["X01-1002"].authors)
+        self.assertEqual({"first": "Carl", "last": "Diaz"}, updated.id_to_name["carl-diaz1"])
+        self.assertEqual([("carl-diaz1", "Carl Diaz")], updated.conflicts["carl-diaz"])
+
+    def test_parseACLXmlParallel(self):
+        import tempfile
+        # Other tests change the working directory
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        with open(os.path.join(root, "config.json")) as f:
+            config = json.load(f)
+        xml = "<?xml version='1.0' encoding='UTF-8'?>\n<collection id=\"{0}\"><volume id=\"1\">{1}</volume></collection>"
+        paper = "<paper><title>{}</title>{}<url>{}</url></paper>"
+        author = "<author><first>{}</first><last>{}</last></author>"
+        id_author = "<author id=\"{}\"><first>{}</first><last>{}</last></author>"
+        files = {
+            # The same new id with different names in every file, the name of the first file should be kept
+            "X01": paper.format("A", id_author.format("ana-lopez", "Ana", "Lopez") + author.format("Carl", "Díaz"),
+                                "X01-1001") +
+                   paper.format("B", author.format("Bo", "Chen") + author.format("Dee", "Ray"), "X01-1002"),
+            "X02": paper.format("C", id_author.format("ana-lopez", "Ana M.", "Lopez") + author.format("Carl", "Diaz"),
+                                "X02-1001") +
+                   paper.format("D", author.format("Bo", "Chen"), "X02-1002"),
+            "X03": paper.format("E", id_author.format("ana-lopez", "A.", "Lopez") +
+                                id_author.format("eve-kim", "Eve", "Kim") + author.format("Dee", "Ray"), "X03-1001"),
+        }
+        results = []
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name, papers in files.items():
+                with open(os.path.join(tmp_dir, name + ".xml"), "w") as f:
+                    f.write(xml.format(name, papers))
+            # Files are parsed in the order os.listdir returns them
+            first_file = [f for f in os.listdir(tmp_dir) if ".xml" in f][0]
+            for cores in [1, 2]:
+                parser = ACLParser(config["ACLParserXpaths"], cores=cores, log_path=tmp_dir + "/acl_parser.log")
+                parser.id_to_name = {"eve-kim": {"first": "Eve", "last": "Kim"}}
+                parser.parseACLXml(tmp_dir + "/")
+                results.append(parser)
+
+        serial, parallel = results
+        self.assertEqual(list(serial.papers.keys()), list(parallel.papers.keys()))
+        self.assertEqual({k: v.asDict() for k, v in serial.papers.items()},
+                         {k: v.asDict() for k, v in parallel.papers.items()})
+        self.assertEqual(list(serial.id_to_name.items()), list(parallel.id_to_name.items()))
+        self.assertEqual(dict(serial.conflicts), dict(parallel.conflicts))
+        self.assertEqual(["carl-diaz"], list(serial.conflicts.keys()))
+        self.assertEqual({"first": "Eve", "last": "Kim"}, parallel.id_to_name["eve-kim"])
+        first_names = {"X01.xml": "Ana Lopez", "X02.xml": "Ana M. Lopez", "X03.xml": "A. Lopez"}
+        self.assertEqual(first_names[first_file], parallel.id_to_name["ana-lopez"])
@@ -0,0 +1,46 @@
+from unittest import TestCase
+from src.artifact_cache import loadStemmedCorpus, cachePath
+from nltk import PorterStemmer
+import os
+import tempfile
+
+
+class CountingStemmer(PorterStemmer):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def stem(self, word, to_lowercase=True):
+        self.calls += 1
+        return super().stem(word, to_lowercase)
+
+
+class TestArtifactCache(TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "org_corpus.txt")
+        with open(self.path, "w") as f:
+            f.write("University of Computing\nComputing Laboratories\nUniversity of Languages\n")
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_cache(self):
+        stemmer = CountingStemmer()
+        corpus = loadStemmedCorpus(self.path, stemmer)
+        expected = [[PorterStemmer().stem(w) for w in x.split()] for x in open(self.path).readlines()]
+        self.assertEqual(expected, corpus)
+        self.assertTrue(os.path.exists(cachePath(self.path)))
+        stemmed = stemmer.calls
+
+        cached = loadStemmedCorpus(self.path, stemmer)
+        self.assertEqual(stemmed, stemmer.calls)
+        self.assertEqual(corpus, cached)
+
+        with open(self.path, "a") as f:
+            f.write("Another University\n")
+        changed = loadStemmedCorpus(self.path, stemmer)
+        self.assertEqual(4, len(changed))
+        self.assertEqual(["anoth", "univers"], changed[-1])
+
+        self.assertEqual(4, len(loadStemmedCorpus(self.path, PorterStemmer(PorterStemmer.ORIGINAL_ALGORITHM))))
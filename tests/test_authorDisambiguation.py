@@ -158,9 +158,9 @@ class TestAuthorDisambiguation(TestCase):
         self.assertEqual(1, error_auth)
         self.assertEqual(1, error_paper)
         for i, v in res.items():
-            if i == "D17-1207 yang-liu-ict":
+            if i == ("D17-1207", "yang-liu-ict"):
                 self.compareInfoDict(v, getAuthorInfo([self.test_papers["D17-1207"], "yang-liu-ict"])[1])
-            elif i == "C18-1172 luyang-liu":
+            elif i == ("C18-1172", "luyang-liu"):
                 self.compareInfoDict(v, getAuthorInfo([self.test_papers["C18-1172"], "luyang-liu"])[1])
 
     @ignore_warnings
@@ -212,26 +212,26 @@ class TestAuthorDisambiguation(TestCase):
         with open(log_path, 'w'):
             pass
         test_auths = [
-            ["A1-1000 yang-liu", 1],
-            ["A1-1001 yang-liu", 1],
-            ["A1-1002 yang-liu", 1],
-            ["A1-1003 yang-liu", 1],
-            ["A1-1004 yang-liu", 1],
-            ["A1-1005 yang-liu", 1],
+            [("A1-1000", "yang-liu"), 1],
+            [("A1-1001", "yang-liu"), 1],
+            [("A1-1002", "yang-liu"), 1],
+            [("A1-1003", "yang-liu"), 1],
+            [("A1-1004", "yang-liu"), 1],
+            [("A1-1005", "yang-liu"), 1],
         ]
-        test_auth = ["A1-1002 yang-liu", 1]
+        test_auth = [("A1-1002", "yang-liu"), 1]
         expected_out = [
-            ["A1-1002 yang-liu A1-1000 yang-liu", 1, 1],
-            ["A1-1002 yang-liu A1-1001 yang-liu", 1, 1],
-            ["A1-1002 yang-liu A1-1003 yang-liu", 1, 1],
-            ["A1-1002 yang-liu A1-1004 yang-liu", 1, 1],
-            ["A1-1002 yang-liu A1-1005 yang-liu", 1, 1],
+            [("A1-1002", "yang-liu", "A1-1000", "yang-liu"), 1, 1],
+            [("A1-1002", "yang-liu", "A1-1001", "yang-liu"), 1, 1],
+            [("A1-1002", "yang-liu", "A1-1003", "yang-liu"), 1, 1],
+            [("A1-1002", "yang-liu", "A1-1004", "yang-liu"), 1, 1],
+            [("A1-1002", "yang-liu", "A1-1005", "yang-liu"), 1, 1],
         ]
         author_processor = AuthorDisambiguation(papers=self.test_papers, id_to_name=self.id_to_name,
                                                 compare_args=self.compare_authors_args, log_path=log_path,
                                                 name_similarity_cutoff=.95)
         res, excluded = author_processor._makePairs(test_auth, test_auths)
-        self.assertEqual([["A1-1002 yang-liu", 1]], excluded)
+        self.assertEqual([[("A1-1002", "yang-liu"), 1]], excluded)
         self.compareList(expected_out, res)
 
     @ignore_warnings
@@ -349,12 +349,12 @@ class TestAuthorDisambiguation(TestCase):
             ["P09-2066", "yang-liu-icsi"]
         ]
         info_dict = {
-            test_target[0] + " " + test_target[1]: getAuthorInfo([self.test_papers[test_target[0]], test_target[1]])[1]
+            tuple(test_target): getAuthorInfo([self.test_papers[test_target[0]], test_target[1]])[1]
         }
         pairs = []
         for p, n in test:
-            info_dict[p + " " + n] = getAuthorInfo([self.test_papers[p], n])[1]
-            pairs.append([" ".join([*test_target, p, n]), info_dict[" ".join(test_target)], info_dict[p + " " + n]])
+            info_dict[(p, n)] = getAuthorInfo([self.test_papers[p], n])[1]
+            pairs.append([(*test_target, p, n), info_dict[tuple(test_target)], info_dict[(p, n)]])
 
         print("INFO: Running compareAuthors tests")
         log_path = self.log_path + 'compare_authors.log'
@@ -364,16 +364,16 @@ class TestAuthorDisambiguation(TestCase):
                                                 compare_args=self.compare_authors_args, log_path=log_path,
                                                 name_similarity_cutoff=.95, allow_authors_not_in_override=False)
         comparator = CompareAuthors(**self.compare_authors_args)
-        key, res = author_processor._compareAuthors([comparator, " ".join(test_target), pairs])
-        self.assertEqual(" ".join(test_target), key)
+        key, res = author_processor._compareAuthors([comparator, tuple(test_target), pairs])
+        self.assertEqual(tuple(test_target), key)
         self.assertNotEqual(0, len(res))
         for k, info in info_dict.items():
-            if k == " ".join(test_target):
+            if k == tuple(test_target):
                 continue
-            k_id = k.split()[1]
+            k_id = k[1]
             self.assertTrue(k_id in res)
             self.assertEqual(1, len(res[k_id]))
-            expected = comparator([" ".join([*test_target, k]), 0, info_dict[" ".join(test_target)], info])[-1]
+            expected = comparator([(*test_target, *k), 0, info_dict[tuple(test_target)], info])[-1]
             np.testing.assert_array_equal(expected, res[k_id][0])
 
     @ignore_warnings
@@ -475,27 +475,27 @@ class TestAuthorDisambiguation(TestCase):
 
         results, excluded = author_processor._makeAmbiguousPairs(ambiguous_papers, check_authors, authors_to_get)
         expected_excluded = {
-            'W19-2708 yang-liu-georgetown': ['W19-2708 amir-zeldes']
+            ("W19-2708", "yang-liu-georgetown"): [("W19-2708", "amir-zeldes")]
         }
         for k in expected_excluded.keys():
             self.assertEqual(expected_excluded[k], excluded[k])
         expected_results = {
-            "W19-2708 yang-liu-georgetown": [
-                "Q18-1005 yang-liu-edinburgh",
-                "N19-1173 yang-liu-edinburgh",
-                "P15-2047 yang-liu-edinburgh"
+            ("W19-2708", "yang-liu-georgetown"): [
+                ("Q18-1005", "yang-liu-edinburgh"),
+                ("N19-1173", "yang-liu-edinburgh"),
+                ("P15-2047", "yang-liu-edinburgh")
             ],
-            "W19-2710 yang-liu-georgetown": [
-                "W19-2708 amir-zeldes",
-                "Q18-1005 yang-liu-edinburgh",
-                "N19-1173 yang-liu-edinburgh",
-                "P15-2047 yang-liu-edinburgh",
+            ("W19-2710", "yang-liu-georgetown"): [
+                ("W19-2708", "amir-zeldes"),
+                ("Q18-1005", "yang-liu-edinburgh"),
+                ("N19-1173", "yang-liu-edinburgh"),
+                ("P15-2047", "yang-liu-edinburgh"),
             ],
-            "W19-2717 yang-liu-georgetown": [
-                "W19-2708 amir-zeldes",
-                "Q18-1005 yang-liu-edinburgh",
-                "N19-1173 yang-liu-edinburgh",
-                "P15-2047 yang-liu-edinburgh"
+            ("W19-2717", "yang-liu-georgetown"): [
+                ("W19-2708", "amir-zeldes"),
+                ("Q18-1005", "yang-liu-edinburgh"),
+                ("N19-1173", "yang-liu-edinburgh"),
+                ("P15-2047", "yang-liu-edinburgh")
             ]
         }
         for k, info in results.items():
@@ -503,7 +503,7 @@ class TestAuthorDisambiguation(TestCase):
                 print(k)
                 self.fail()
             results_pair_keys = [x[0] for x in info]
-            expected_pair_keys = [" ".join([k, x]) for x in expected_results[k]]
+            expected_pair_keys = [k + x for x in expected_results[k]]
             self.compareList(results_pair_keys, expected_pair_keys)
 
     def test_removeKnownDifferent(self):
@@ -516,55 +516,55 @@ class TestAuthorDisambiguation(TestCase):
                                                 name_similarity_cutoff=.95, sim_overrides=True)
 
         tmp_pairs = {
-            "W19-2708 yang-liu-georgetown": [
-                "Q18-1005 yang-liu-edinburgh",
-                "N19-1173 yang-liu-edinburgh",
-                "P15-2047 yang-liu-edinburgh"
+            ("W19-2708", "yang-liu-georgetown"): [
+                ("Q18-1005", "yang-liu-edinburgh"),
+                ("N19-1173", "yang-liu-edinburgh"),
+                ("P15-2047", "yang-liu-edinburgh")
             ],
-            "W19-2710 yang-liu-georgetown": [
-                "W19-2708 amir-zeldes",
-                "Q18-1005 yang-liu-edinburgh",
-                "N19-1173 yang-liu-edinburgh",
-                "P15-2047 yang-liu-edinburgh",
+            ("W19-2710", "yang-liu-georgetown"): [
+                ("W19-2708", "amir-zeldes"),
+                ("Q18-1005", "yang-liu-edinburgh"),
+                ("N19-1173", "yang-liu-edinburgh"),
+                ("P15-2047", "yang-liu-edinburgh"),
             ],
-            "W19-2717 yang-liu-georgetown": [
-                "W19-2708 amir-zeldes",
-                "Q18-1005 yang-liu-edinburgh",
-                "N19-1173 yang-liu-edinburgh",
-                "P15-2047 yang-liu-edinburgh"
+            ("W19-2717", "yang-liu-georgetown"): [
+                ("W19-2708", "amir-zeldes"),
+                ("Q18-1005", "yang-liu-edinburgh"),
+                ("N19-1173", "yang-liu-edinburgh"),
+                ("P15-2047", "yang-liu-edinburgh")
             ],
-            "Q18-1005 yang-liu-edinburgh": [
-                "W19-2708 amir-zeldes",
+            ("Q18-1005", "yang-liu-edinburgh"): [
+                ("W19-2708", "amir-zeldes"),
             ]
         }
         test_pairs = {}
         for k, info in tmp_pairs.items():
-            test_pairs[k] = [[" ".join([k, x]), 1] for x in info]
+            test_pairs[k] = [[k + x, 1] for x in info]
         test_excluded = {
-            'W19-2708 yang-liu-georgetown': ['W19-2708 amir-zeldes'],
-            "W19-2710 yang-liu-georgetown": []
+            ("W19-2708", "yang-liu-georgetown"): [("W19-2708", "amir-zeldes")],
+            ("W19-2710", "yang-liu-georgetown"): []
         }
         expected_different = {
             "yang-liu-georgetown": ["amir-zeldes"]
         }
         expected_pairs = {
-            "W19-2708 yang-liu-georgetown": [
-                "Q18-1005 yang-liu-edinburgh",
-                "N19-1173 yang-liu-edinburgh",
-                "P15-2047 yang-liu-edinburgh"
+            ("W19-2708", "yang-liu-georgetown"): [
+                ("Q18-1005", "yang-liu-edinburgh"),
+                ("N19-1173", "yang-liu-edinburgh"),
+                ("P15-2047", "yang-liu-edinburgh")
             ],
-            "W19-2710 yang-liu-georgetown": [
-                "Q18-1005 yang-liu-edinburgh",
-                "N19-1173 yang-liu-edinburgh",
-                "P15-2047 yang-liu-edinburgh",
+            ("W19-2710", "yang-liu-georgetown"): [
+                ("Q18-1005", "yang-liu-edinburgh"),
+                ("N19-1173", "yang-liu-edinburgh"),
+                ("P15-2047", "yang-liu-edinburgh"),
             ],
-            "W19-2717 yang-liu-georgetown": [
-                "Q18-1005 yang-liu-edinburgh",
-                "N19-1173 yang-liu-edinburgh",
-                "P15-2047 yang-liu-edinburgh"
+            ("W19-2717", "yang-liu-georgetown"): [
+                ("Q18-1005", "yang-liu-edinburgh"),
+                ("N19-1173", "yang-liu-edinburgh"),
+                ("P15-2047", "yang-liu-edinburgh")
             ],
-            "Q18-1005 yang-liu-edinburgh": [
-                "W19-2708 amir-zeldes",
+            ("Q18-1005", "yang-liu-edinburgh"): [
+                ("W19-2708", "amir-zeldes"),
             ]
         }
         fixed, diff = author_processor._removeKnownDifferent(test_pairs, test_excluded)
@@ -574,7 +574,7 @@ class TestAuthorDisambiguation(TestCase):
                 print(k)
                 self.fail()
             results_pair_keys = [x[0] for x in info]
-            expected_pair_keys = [" ".join([k, x]) for x in expected_pairs[k]]
+            expected_pair_keys = [k + x for x in expected_pairs[k]]
             self.compareList(results_pair_keys, expected_pair_keys)
 
     @ignore_warnings
@@ -589,16 +589,16 @@ class TestAuthorDisambiguation(TestCase):
         expected_compare_array = np.array([1 for x in range(24)])
 
         test_results = {
-            "W19-2708 yang-liu-georgetown": {
+            ("W19-2708", "yang-liu-georgetown"): {
                 "yang-liu-edinburgh": [[1 for x in range(24)] for x in range(3)]
             },
-            "W19-2710 yang-liu-georgetown": {
+            ("W19-2710", "yang-liu-georgetown"): {
                 "yang-liu-edinburgh": [[1 for x in range(24)] for x in range(2)]
             },
-            "W19-2717 yang-liu-georgetown": {
+            ("W19-2717", "yang-liu-georgetown"): {
                 "yang-liu-edinburgh": [[1 for x in range(24)] for x in range(1)]
             },
-            "Q18-1005 yang-liu-edinburgh": {
+            ("Q18-1005", "yang-liu-edinburgh"): {
                 "amir-zeldes": [[1 for x in range(24)] for x in range(1)]
             }
         }
@@ -635,14 +635,14 @@ class TestAuthorDisambiguation(TestCase):
             ["P16-1159", "yang-liu-ict"]
         ]
         info_dict = {
-            test_target[0] + " " + test_target[1]: getAuthorInfo([self.test_papers[test_target[0]], test_target[1]])[1]
+            tuple(test_target): getAuthorInfo([self.test_papers[test_target[0]], test_target[1]])[1]
         }
         pairs = []
         for p, n in test:
-            info_dict[p + " " + n] = getAuthorInfo([self.test_papers[p], n])[1]
-            pairs.append([" ".join([*test_target, p, n]), info_dict[" ".join(test_target)], info_dict[p + " " + n]])
+            info_dict[(p, n)] = getAuthorInfo([self.test_papers[p], n])[1]
+            pairs.append([(*test_target, p, n), info_dict[tuple(test_target)], info_dict[(p, n)]])
         comparator = CompareAuthors(**self.compare_authors_args)
-        key, res = author_processor._compareAuthors([comparator, " ".join(test_target), pairs])
+        key, res = author_processor._compareAuthors([comparator, tuple(test_target), pairs])
         test_compare_results = {
             key: res
         }
@@ -658,3 +658,64 @@ class TestAuthorDisambiguation(TestCase):
                 else:
                     self.assertEqual(1, len(predict))
                     # self.assertEqual(1,len(probabilities[k][a]))
+
+    def test_pruneCandidates(self):
+        print("INFO: Running pruneCandidates tests")
+        log_path = self.log_path + 'prune_candidates.log'
+        with open(log_path, 'w'):
+            pass
+        random.seed(1)
+        for tie_breaker in ["max", "max_percent"]:
+            author_processor = AuthorDisambiguation(papers=self.test_papers, id_to_name=self.id_to_name,
+                                                    compare_args=self.compare_authors_args, log_path=log_path,
+                                                    name_similarity_cutoff=.95, threshold=.5,
+                                                    tie_breaker=tie_breaker)
+            for _ in range(200):
+                full_votes = {}
+                for b_id in "abcde":
+                    p = random.random()
+                    full_votes[b_id] = [1 if random.random() < p else 0 for _ in range(random.randint(1, 40))]
+                totals = {b_id: len(v) for b_id, v in full_votes.items()}
+                votes = {b_id: [] for b_id in full_votes.keys()}
+                active = list(full_votes.keys())
+                while active:
+                    for b_id in active:
+                        votes[b_id].extend(full_votes[b_id][len(votes[b_id]):len(votes[b_id]) + 5])
+                    active, _ = author_processor._pruneCandidates(votes, totals, active)
+                    active = [b_id for b_id in active if len(votes[b_id]) < totals[b_id]]
+                streamed = {b_id: v + [0] * (totals[b_id] - len(v)) for b_id, v in votes.items()}
+                expected, _ = author_processor._determineCorrectAuthor(full_votes)
+                actual, _ = author_processor._determineCorrectAuthor(streamed)
+                self.assertEqual(expected, actual)
+
+    def test_makeBlockBatches(self):
+        print("INFO: Running makeBlockBatches tests")
+        log_path = self.log_path + 'make_block_batches.log'
+        with open(log_path, 'w'):
+            pass
+        author_processor = AuthorDisambiguation(papers=self.test_papers, id_to_name=self.id_to_name,
+                                                compare_args=self.compare_authors_args, log_path=log_path,
+                                                name_similarity_cutoff=.95, cores=1)
+        names = {"yang-liu1": "yang liu", "yang-liu2": "yang liu", "yang-liu3": "yang (janet) liu", "chen-li1": "chen li"}
+        blocks = author_processor._makeNameBlocks(list(names.keys()), names)
+        self.assertEqual(blocks["yang-liu1"], blocks["yang-liu2"])
+        self.assertNotEqual(blocks["yang-liu1"], blocks["yang-liu3"])
+        self.assertNotEqual(blocks["yang-liu1"], blocks["chen-li1"])
+
+        author_processor.name_blocks = blocks
+        pairs = {
+            ("P1", "yang-liu1"): [1],
+            ("P2", "yang-liu2"): [2],
+            ("P3", "yang-liu3"): [3],
+            ("P4", "chen-li1"): [4],
+            ("P5", "yang-liu1"): [5]
+        }
+        batches = author_processor._makeBlockBatches(pairs)
+        self.assertEqual(3, len(batches))
+        self.assertEqual({("P1", "yang-liu1"): [1], ("P2", "yang-liu2"): [2], ("P5", "yang-liu1"): [5]}, batches[0])
+        self.assertEqual(sorted(pairs.keys()), sorted([k for b in batches for k in b.keys()]))
+
+        author_processor.cores = 6
+        batches = author_processor._makeBlockBatches(pairs)
+        self.assertEqual(4, len(batches))
+        self.assertEqual(sorted(pairs.keys()), sorted([k for b in batches for k in b.keys()]))
@@ -0,0 +1,98 @@
+from unittest import TestCase
+from src.author_profile import AuthorProfile, AuthorProfiles
+from src.create_training_data import getAuthorInfo
+from src.paper import Paper
+
+
+def makePaper(pid, authors, affiliations, title_tokenized=None, citations=None):
+    return Paper(pid=pid, title="", abstract="", authors=authors, affiliations=affiliations,
+                 title_tokenized=title_tokenized, citations=citations,
+                 citations_tokenized=[w for c in (citations if citations else []) for w in c["title"].split()])
+
+
+def makeAffiliation(email=None, org=None, org_type="institution"):
+    if not org:
+        return {"email": email, "affiliation": {}}
+    return {
+        "email": email,
+        "affiliation": {
+            "type": [org_type],
+            "info": {org_type: [org], "department": []},
+            "address": {"postCode": None, "settlement": None, "country": "USA"}
+        }
+    }
+
+
+class TestAuthorProfile(TestCase):
+    def setUp(self) -> None:
+        self.papers = {
+            "P10-1001": makePaper("P10-1001", {"john-doe": "John Doe", "jane-roe": "Jane Roe"},
+                                  {"john-doe": makeAffiliation("jd@uni.edu", "Uni"),
+                                   "jane-roe": makeAffiliation("jr@uni.edu", "Uni")},
+                                  ["pars", "tree"], [{"title": "tree bank", "authors": ["a b"]}]),
+            "W14-2001": makePaper("W14-2001", {"john-doe": "John Doe", "jane-roe": "Jane Roe", "bob-poe": "Bob Poe"},
+                                  {"john-doe": makeAffiliation("jd@corp.com", "Corp", "laboratory"),
+                                   "jane-roe": makeAffiliation(),
+                                   "bob-poe": makeAffiliation("bp@corp.com", "Corp", "laboratory")},
+                                  ["tree", "neural"]),
+            "P16-1002": makePaper("P16-1002", {"john-doe": "John Doe", "bob-poe": "Bob Poe"},
+                                  {"john-doe": makeAffiliation("jd@uni.edu", "Uni"),
+                                   "bob-poe": makeAffiliation(None, "Corp", "laboratory")},
+                                  ["neural"], [{"title": "neural nets", "authors": ["a b", "c d"]}])
+        }
+        self.author_papers = {
+            "john-doe": ["P10-1001", "W14-2001", "P16-1002"],
+            "jane-roe": ["P10-1001", "W14-2001"],
+            "bob-poe": ["W14-2001", "P16-1002"]
+        }
+
+    def test_addPaper(self):
+        profile = AuthorProfile("john-doe")
+        for p in self.author_papers["john-doe"]:
+            profile.addPaper(self.papers[p])
+        profile.addPaper(self.papers["P10-1001"])
+        self.assertEqual(len(profile), 3)
+        self.assertTrue("W14-2001" in profile)
+        self.assertEqual(profile.co_authors, {"Jane Roe": 2, "Bob Poe": 2})
+        self.assertEqual(profile.orgs, {"Uni": 2, "Corp": 1})
+        self.assertEqual(profile.email_domains, {"uni.edu": 2, "corp.com": 1})
+        self.assertEqual(profile.venues, {"P": 2, "W": 1})
+        self.assertEqual(profile.year_range, (2010, 2016))
+        self.assertEqual(profile.title_vocab, {"pars": 1, "tree": 2, "neural": 2})
+        self.assertEqual(profile.citation_authors, {"a b": 2, "c d": 1})
+
+    def test_asAuthorInfo(self):
+        profile = AuthorProfile("john-doe")
+        for p in self.author_papers["john-doe"]:
+            profile.addPaper(self.papers[p])
+        key, info = profile.asAuthorInfo()
+        _, expected = getAuthorInfo([self.papers["P16-1002"], "john-doe"])
+        self.assertEqual(key, ("P16-1002", "john-doe"))
+        self.assertEqual(set(info.keys()), set(expected.keys()))
+        self.assertEqual(info["aff_name"], "Uni")
+        self.assertEqual(info["email_domain"], "uni.edu")
+        self.assertEqual(sorted(info["co_authors_name"]), ["Bob Poe", "Jane Roe"])
+        self.assertEqual(len(info["co_authors_email"]), len(info["co_authors_name"]))
+        self.assertEqual(len(info["co_authors_aff"]), len(info["co_authors_name"]))
+
+        key, _ = profile.asAuthorInfo("W13-5000")
+        self.assertEqual(key, ("W14-2001", "john-doe"))
+        key, _ = profile.asAuthorInfo("P11-5000")
+        self.assertEqual(key, ("P10-1001", "john-doe"))
+        self.assertRaises(ValueError, AuthorProfile("empty").asAuthorInfo)
+
+    def test_profiles(self):
+        profiles = AuthorProfiles(dict(self.papers), {k: list(v) for k, v in self.author_papers.items()})
+        profiles.build(["jane-roe"])
+        self.assertTrue("jane-roe" in profiles)
+        self.assertFalse("bob-poe" in profiles)
+        self.assertEqual(len(profiles["bob-poe"]), 2)
+        self.assertRaises(KeyError, profiles.build, ["not-an-author"])
+
+        new_paper = makePaper("P18-1003", {"jane-roe": "Jane Roe", "new-person": "New Person"},
+                              {"jane-roe": makeAffiliation("jr@uni.edu", "Uni")})
+        profiles.addPaper(new_paper)
+        self.assertEqual(len(profiles["jane-roe"]), 3)
+        self.assertEqual(profiles["jane-roe"].year_range, (2010, 2018))
+        self.assertEqual(len(profiles["new-person"]), 0)
+        self.assertEqual(profiles.missing_papers, 1)
@@ -0,0 +1,95 @@
+from unittest import TestCase
+from src.authorship_index import AuthorshipIndex, AuthorshipOverlay, copyAuthorPapers
+from src.paper import Paper
+from copy import deepcopy
+from unittest import mock
+import json
+import logging
+import os
+import tempfile
+import time
+import src.authorship_index
+from src.utility_functions import loadAuthorshipIndex
+
+
+class TestAuthorshipIndex(TestCase):
+    def setUp(self) -> None:
+        self.author_papers = {
+            "john-doe": ["P10-1001", "W14-2001", "P16-1002"],
+            "jane-roe": ["W14-2001", "P10-1001"],
+            "bob-poe": ["W14-2001", "P16-1002"],
+            "amy-loe": ["P18-1003"]
+        }
+        self.index = AuthorshipIndex.fromAuthorPapers(self.author_papers)
+
+    def test_lookups(self):
+        self.assertEqual(self.author_papers, dict(self.index.items()))
+        self.assertEqual(["john-doe", "jane-roe", "bob-poe"], self.index.authorsOf("W14-2001"))
+        self.assertTrue(self.index.hasPaper("jane-roe", "P10-1001"))
+        self.assertFalse(self.index.hasPaper("jane-roe", "P16-1002"))
+        self.assertFalse(self.index.hasPaper("not-an-author", "P16-1002"))
+        self.assertEqual({"jane-roe", "bob-poe"}, self.index.coAuthors("john-doe"))
+        self.assertEqual(set(), self.index.coAuthors("amy-loe"))
+        self.assertEqual({"P10-1001", "W14-2001"}, self.index.sharedPapers("john-doe", "jane-roe"))
+        self.assertEqual({"john-doe"}, self.index.sharedCoAuthors("jane-roe", "bob-poe"))
+        self.assertRaises(KeyError, self.index.__getitem__, "not-an-author")
+
+    def test_fromPapers(self):
+        papers = {}
+        for a, pids in self.author_papers.items():
+            for p in pids:
+                if p not in papers:
+                    papers[p] = Paper(pid=p, title="", abstract="", authors={}, affiliations={})
+                papers[p].affiliations[a] = {"email": None, "affiliation": {}}
+        index = AuthorshipIndex.fromPapers(papers)
+        self.assertEqual({k: sorted(v) for k, v in self.author_papers.items()},
+                         {k: sorted(v) for k, v in index.items()})
+
+    def test_overlay(self):
+        overlay = copyAuthorPapers(self.index)
+        self.assertIsInstance(overlay, AuthorshipOverlay)
+        overlay["john-doe"].remove("P10-1001")
+        overlay["yang-liu1"] = ["P10-1001"]
+        del overlay["amy-loe"]
+        self.assertEqual(["W14-2001", "P16-1002"], overlay["john-doe"])
+        self.assertTrue("yang-liu1" in overlay)
+        self.assertFalse("amy-loe" in overlay)
+        self.assertEqual(4, len(overlay))
+        self.assertEqual(["john-doe", "jane-roe", "bob-poe", "yang-liu1"], list(overlay.keys()))
+        self.assertEqual(["P10-1001"], overlay.pop("yang-liu1"))
+        self.assertEqual(self.author_papers, dict(self.index.items()))
+
+        copied = deepcopy(overlay)
+        copied["jane-roe"].append("P18-1003")
+        self.assertEqual(["W14-2001", "P10-1001"], overlay["jane-roe"])
+        self.assertFalse("amy-loe" in copied)
+
+    def test_save(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "npz", "authorship_index.npz")
+            self.index.save(path)
+            loaded = AuthorshipIndex.load(path)
+        self.assertEqual(dict(self.index.items()), dict(loaded.items()))
+        self.assertEqual(self.index.authorsOf("P16-1002"), loaded.authorsOf("P16-1002"))
+
+    def test_loadAuthorshipIndex(self):
+        class Config(dict):
+            console_log_level = logging.ERROR
+
+        logger = logging.getLogger("test_authorship_index")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            config = Config(author_papers=tmp_dir + "/author_papers.json",
+                            authorship_index=tmp_dir + "/authorship_index.npz")
+            with open(config["author_papers"], "w") as f:
+                json.dump(self.author_papers, f)
+            # No index yet
+            self.assertEqual(self.author_papers, dict(loadAuthorshipIndex(logger, config).items()))
+            self.index.save(config["authorship_index"])
+            with mock.patch.object(src.authorship_index.AuthorshipIndex, "fromAuthorPapers",
+                                   side_effect=AssertionError):
+                self.assertEqual(self.author_papers, dict(loadAuthorshipIndex(logger, config).items()))
+            # author_papers.json changed after the index was saved
+            later = time.time() + 10
+            os.utime(config["author_papers"], (later, later))
+            with mock.patch.object(src.authorship_index.AuthorshipIndex, "load", side_effect=AssertionError):
+                self.assertEqual(self.author_papers, dict(loadAuthorshipIndex(logger, config).items()))
@@ -0,0 +1,64 @@
+from unittest import TestCase
+import numpy as np
+from src.cascade_scorer import CascadeScorer
+from src.compare_authors import CompareAuthors
+
+
+class TestCascadeScorer(TestCase):
+    def setUp(self) -> None:
+        self.a = {
+            "pid": "P19-1642",
+            "name": "john a doe",
+            "aff_type": "edu",
+            "email_domain": "uni.edu",
+            "co_authors_name": ["jane smith", "bob jones"]
+        }
+        self.b = {
+            "pid": "P17-1001",
+            "name": "john doe",
+            "aff_type": "edu",
+            "email_domain": "uni.edu",
+            "co_authors_name": ["jane smith"]
+        }
+        self.c = {
+            "pid": "W02-1001",
+            "name": "wei zhang",
+            "aff_type": "com",
+            "email_domain": "corp.com",
+            "co_authors_name": ["li wang"]
+        }
+
+    def test_scoreFeatures(self):
+        scorer = CascadeScorer(year_window=10)
+        self.assertAlmostEqual(scorer.scoreFeatures([1, 1, 1, 1, 1, 0])[0], 1.0)
+        self.assertAlmostEqual(scorer.scoreFeatures([0, 0, 0, 0, 0, 10])[0], 0.0)
+        self.assertAlmostEqual(scorer.scoreFeatures([0, 0, 0, 0, 0, 20])[0], 0.0)
+        self.assertEqual(scorer.scoreFeatures([[1, 1, 1, 1, 1, 0], [0, 0, 0, 0, 0, 10]]).shape, (2,))
+
+    def test_call(self):
+        scorer = CascadeScorer(threshold=.5)
+        same = scorer(self.a, self.b)
+        different = scorer(self.a, self.c)
+        self.assertGreater(same, different)
+        self.assertTrue(scorer.keep(same))
+        self.assertFalse(scorer.keep(different))
+
+    def test_scoreCompareResults(self):
+        scorer = CascadeScorer()
+        features = scorer.features(self.a, self.b)
+        compare_result = np.zeros(len(CompareAuthors.compare_terms))
+        for term, value in zip(scorer.cheap_terms, features):
+            compare_result[CompareAuthors.compare_terms.index(term)] = value
+        self.assertAlmostEqual(scorer.scoreCompareResults(compare_result)[0], scorer(self.a, self.b))
+
+    def test_badWeights(self):
+        self.assertRaises(KeyError, CascadeScorer, weights={"not_a_term": 1})
+
+    def test_calibrate(self):
+        scores = [.1, .2, .3, .4, .5, .6, .7, .8, .9, 1.0, .05]
+        tags = [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0]
+        self.assertEqual(CascadeScorer.calibrate(scores, tags, 1.0), .1)
+        self.assertEqual(CascadeScorer.calibrate(scores, tags, .8), .3)
+        self.assertEqual(CascadeScorer.calibrate(scores, [0] * len(scores)), 0.0)
+        self.assertAlmostEqual(CascadeScorer.recallLoss(scores, tags, .3), .2)
+        self.assertEqual(CascadeScorer.recallLoss(scores, tags, 0.0), 0.0)
@@ -0,0 +1,91 @@
+from unittest import TestCase
+from src.corpus_snapshot import writeSnapshot, CorpusSnapshot, isSnapshotFresh, loadPapers
+from src.paper import Paper
+from copy import deepcopy
+import json
+import os
+import pickle
+import tempfile
+import time
+
+
+class TestCorpusSnapshot(TestCase):
+    def setUp(self) -> None:
+        self.papers = {
+            "P19-1642": {
+                "pid": "P19-1642",
+                "title": "A Paper é",
+                "abstract": None,
+                "authors": {"john-doe": "John Doe", "jane-roe": "Jane Roe"},
+                "unknown": ["Someone"],
+                "affiliations": {
+                    "john-doe": {"email": "jd@uni.edu", "affiliation": {"id": "org-1", "type": ["institution"],
+                                                                       "info": {"institution": ["Uni"]}}},
+                    "bob-poe": {"email": None, "affiliation": {}}
+                },
+                "title_tokenized": ["paper"],
+                "citations": [{"title": "other paper", "authors": ["a b"]}],
+                "citations_tokenized": ["other", "paper"],
+                "sections": {"1": {"title": "introduction"}},
+                "sections_tokenized": ["introduction"]
+            },
+            "A00-1000": {
+                "pid": "A00-1000",
+                "title": "Another Paper",
+                "abstract": "",
+                "authors": {"jane-roe": "Jane Roe"},
+                "unknown": [],
+                "affiliations": {},
+                "title_tokenized": [],
+                "citations": [],
+                "citations_tokenized": [],
+                "sections": {},
+                "sections_tokenized": []
+            }
+        }
+        self.author_papers = {"john-doe": ["P19-1642"], "jane-roe": ["P19-1642", "A00-1000"], "bob-poe": []}
+        self.id_to_name = {"john-doe": {"first": "John", "last": "Doe"}, "jane-roe": {"first": "Jane", "last": "Roe"}}
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "data_snapshot.bin")
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_roundTrip(self):
+        writeSnapshot(self.path, self.papers, self.author_papers, self.id_to_name)
+        snapshot = CorpusSnapshot(self.path)
+        parsed = snapshot["parsed_papers"]
+        self.assertEqual(list(self.papers.keys()), list(parsed.keys()))
+        self.assertEqual(self.papers, dict(parsed.items()))
+        self.assertIs(parsed["A00-1000"], parsed["A00-1000"])
+        self.assertTrue("P19-1642" in parsed)
+        self.assertFalse("P19-1643" in parsed)
+        self.assertRaises(KeyError, parsed.__getitem__, "P19-1643")
+
+        self.assertEqual(self.author_papers, deepcopy(snapshot["author_papers"]))
+        self.assertIsInstance(deepcopy(snapshot["author_papers"]), dict)
+        self.assertEqual(self.id_to_name, snapshot["id_to_name"].copy())
+        self.assertTrue("organizations" not in snapshot)
+        self.assertRaises(KeyError, snapshot.__getitem__, "organizations")
+
+    def test_papers(self):
+        writeSnapshot(self.path, {k: Paper(**v) for k, v in self.papers.items()}, self.author_papers)
+        papers = loadPapers(CorpusSnapshot(self.path)["parsed_papers"])
+        for k, v in self.papers.items():
+            self.assertIsInstance(papers[k], Paper)
+            self.assertEqual(Paper(**v).asDict(), papers[k].asDict())
+        unpickled = pickle.loads(pickle.dumps(papers))
+        self.assertEqual(papers["P19-1642"].asDict(), unpickled["P19-1642"].asDict())
+        self.assertEqual(json.loads(json.dumps(papers["P19-1642"].asDict())),
+                         json.loads(json.dumps(loadPapers(self.papers)["P19-1642"].asDict())))
+
+    def test_fresh(self):
+        source = os.path.join(self.dir.name, "parsed_papers.json")
+        self.assertFalse(isSnapshotFresh(self.path, [source]))
+        with open(source, "w") as f:
+            json.dump(self.papers, f)
+        writeSnapshot(self.path, self.papers)
+        self.assertTrue(isSnapshotFresh(self.path, [source, os.path.join(self.dir.name, "missing.json")]))
+        later = time.time() + 10
+        os.utime(source, (later, later))
+        self.assertFalse(isSnapshotFresh(self.path, [source]))
@@ -9,6 +9,7 @@ from py_stringmatching.similarity_measure import soft_tfidf
 import warnings
 import sys
 from src.create_training_data import CreateTrainingData, getAuthorInfo
+from src.pair_keys import keyToString
 from src.paper import Paper
 import time
 import numpy as np
@@ -154,12 +155,11 @@ class TestCreateTrainingData(TestCase):
 
     def checkNotInCombinations(self, combos, _id):
         for k, _, _ in combos:
-            self.assertTrue(_id not in k)
+            self.assertNotEqual(_id, k)
 
     def checkNoSameCombinations(self, combos):
         for k, _, _ in combos:
-            p1, id1, p2, id2 = k.split()
-            self.assertNotEqual(p1 + " " + id1, p2 + " " + id2)
+            self.assertNotEqual(k[:2], k[2:])
 
     def compareInfoDict(self, actual, expected):
         self.assertTrue("name" in actual)
@@ -252,8 +252,8 @@ class TestCreateTrainingData(TestCase):
         self.assertEqual(len(tasks), expected_total)
         for i in tasks:
             pair_key, res = getAuthorInfo(i)
-            if pair_key in self.test_auth_info:
-                self.compareInfoDict(res, self.test_auth_info[pair_key])
+            if keyToString(pair_key) in self.test_auth_info:
+                self.compareInfoDict(res, self.test_auth_info[keyToString(pair_key)])
             results.append((pair_key, res))
         self.assertEqual(len(results), expected_total)
 
@@ -262,18 +262,18 @@ class TestCreateTrainingData(TestCase):
         with open(log_path, 'w'):
             pass
         test_pairs = [
-            'N12-1057 john-wilkins',
-            'N12-1057 mona-diab',
-            'N12-1057 john-smith',
-            'N19-1050 shima-asaadi',
-            'N19-1050 saif-mohammad',
-            'N19-1050 svetlana-kiritchenko',
-            'C16-1050 john-doe',
-            'C16-1050 josh-way',
-            'C16-1050 jeff-wilkins',
-            'S19-2016 sasha-mohammad',
-            'S19-2016 john-wilson',
-            'P19-1642 miguel-rios',
+            ("N12-1057", "john-wilkins"),
+            ("N12-1057", "mona-diab"),
+            ("N12-1057", "john-smith"),
+            ("N19-1050", "shima-asaadi"),
+            ("N19-1050", "saif-mohammad"),
+            ("N19-1050", "svetlana-kiritchenko"),
+            ("C16-1050", "john-doe"),
+            ("C16-1050", "josh-way"),
+            ("C16-1050", "jeff-wilkins"),
+            ("S19-2016", "sasha-mohammad"),
+            ("S19-2016", "john-wilson"),
+            ("P19-1642", "miguel-rios"),
         ]
         test_1 = {
             "j": 6,
@@ -290,46 +290,46 @@ class TestCreateTrainingData(TestCase):
         self.assertTrue("j" in res)
         self.assertTrue("m" in res)
         self.assertTrue("s" in res)
-        self.assertTrue("N12-1057 john-wilkins" in res['j'])
+        self.assertTrue(("N12-1057", "john-wilkins") in res['j'])
         for k in test_1.keys():
             self.assertEqual(len(res[k]), test_1[k])
         res = pair_creator._createPairDict(test_pairs, 2)
         for k in test_2.keys():
             self.assertTrue(k in res)
             self.assertEqual(len(res[k]), test_2[k])
-        self.assertTrue("N12-1057 john-wilkins" in res['jo'])
+        self.assertTrue(("N12-1057", "john-wilkins") in res['jo'])
         res = pair_creator._createPairDict(test_pairs, char_count=6, word_count=2)
         self.assertTrue("john w" in res)
-        self.assertTrue('N12-1057 john-wilkins' in res["john w"])
+        self.assertTrue(("N12-1057", "john-wilkins") in res["john w"])
 
     def test_makeCombinations(self):
         log_path = self.log_path + 'make_combinations.log'
         with open(log_path, 'w'):
             pass
         t1 = [
-            ('N12-1057 person-a', 1),
-            ('N12-1057 person-b', 2),
-            ('N12-1058 person-a', 3),
-            ('N12-1058 person-c', 4),
-            ('N12-1058 person-d', 5),
-            ('N12-1059 person-a', 6),
-            ('N12-1059 person-c', 7),
-            ('N12-1060 human-a', 8),
-            ('N12-1061 human-b', 9),
+            (("N12-1057", "person-a"), 1),
+            (("N12-1057", "person-b"), 2),
+            (("N12-1058", "person-a"), 3),
+            (("N12-1058", "person-c"), 4),
+            (("N12-1058", "person-d"), 5),
+            (("N12-1059", "person-a"), 6),
+            (("N12-1059", "person-c"), 7),
+            (("N12-1060", "human-a"), 8),
+            (("N12-1061", "human-b"), 9),
         ]
-        pair_a = ['N12-1057 person-a N12-1058 person-a', 'N12-1057 person-a', 'N12-1058 person-a']
-        pair_b = ['N12-1057 person-a N12-1057 person-b', 'N12-1057 person-a', 'N12-1057 person-b']
-        pair_c = ['N12-1057 person-a N12-1058 person-c', 'N12-1057 person-a', 'N12-1058 person-c']
-        pair_d = ['N12-1057 person-a N12-1058 person-d', 'N12-1057 person-a', 'N12-1058 person-d']
-        pair_e = ['N12-1057 person-a N12-1060 human-a', 'N12-1057 person-a', 'N12-1060 human-a']
-        pair_f = ['N12-1060 human-a N12-1061 human-b', 'N12-1060 human-a', 'N12-1061 human-b']
-        pair_g = ['N12-1058 person-c N12-1057 person-a', 'N12-1060 human-a', 'N12-1061 human-b']
+        pair_a = [("N12-1057", "person-a", "N12-1058", "person-a"), ("N12-1057", "person-a"), ("N12-1058", "person-a")]
+        pair_b = [("N12-1057", "person-a", "N12-1057", "person-b"), ("N12-1057", "person-a"), ("N12-1057", "person-b")]
+        pair_c = [("N12-1057", "person-a", "N12-1058", "person-c"), ("N12-1057", "person-a"), ("N12-1058", "person-c")]
+        pair_d = [("N12-1057", "person-a", "N12-1058", "person-d"), ("N12-1057", "person-a"), ("N12-1058", "person-d")]
+        pair_e = [("N12-1057", "person-a", "N12-1060", "human-a"), ("N12-1057", "person-a"), ("N12-1060", "human-a")]
+        pair_f = [("N12-1060", "human-a", "N12-1061", "human-b"), ("N12-1060", "human-a"), ("N12-1061", "human-b")]
+        pair_g = [("N12-1058", "person-c", "N12-1057", "person-a"), ("N12-1060", "human-a"), ("N12-1061", "human-b")]
         pair_creator = CreateTrainingData(self.papers, self.incomplete, name_similarity_cutoff=.8,
                                           cores=1, **self.default_args,log_path=log_path)
         algorithm = pair_creator.algorithm
         s, d = pair_creator._makeCombinations(t1)
-        self.checkNotInCombinations(s, 'N12-1057 person-a N12-1060 human-a')
-        self.checkNotInCombinations(d, 'N12-1057 person-a N12-1060 human-a')
+        self.checkNotInCombinations(s, ("N12-1057", "person-a", "N12-1060", "human-a"))
+        self.checkNotInCombinations(d, ("N12-1057", "person-a", "N12-1060", "human-a"))
         self.checkNoSameCombinations(s)
         self.checkNoSameCombinations(d)
         self.assertTrue(pair_a in s)
@@ -347,7 +347,7 @@ class TestCreateTrainingData(TestCase):
         s, d = pair_creator._makeCombinations(t1, use_cutoff=False)
         self.assertTrue(pair_e not in s)
         self.assertTrue(pair_e in d)
-        s, d = pair_creator._makeCombinations(t1, special_cases=["N12-1060 human-a", "N12-1061 human-b"],
+        s, d = pair_creator._makeCombinations(t1, special_cases=[("N12-1060", "human-a"), ("N12-1061", "human-b")],
                                               use_cutoff=False)
         self.assertTrue(pair_f not in s)
         self.assertTrue(pair_f not in d)
@@ -358,23 +358,23 @@ class TestCreateTrainingData(TestCase):
             pass
         t1 = {
             "p": [
-                'N12-1057 person-a',
-                'N12-1057 person-b',
-                'N12-1058 person-a',
-                'N12-1058 person-c',
-                'N12-1058 person-d',
-                'N12-1059 person-a',
-                'N12-1059 person-c',
+                ("N12-1057", "person-a"),
+                ("N12-1057", "person-b"),
+                ("N12-1058", "person-a"),
+                ("N12-1058", "person-c"),
+                ("N12-1058", "person-d"),
+                ("N12-1059", "person-a"),
+                ("N12-1059", "person-c"),
             ]
         }
         t2 = {
             "person a": [
-                'N12-1057 person-abc',
-                'N12-1058 person-abc',
-                'N12-1058 person-ade',
-                'N12-1058 person-acd',
-                'N12-1059 person-abe',
-                'N12-1059 person-acd'
+                ("N12-1057", "person-abc"),
+                ("N12-1058", "person-abc"),
+                ("N12-1058", "person-ade"),
+                ("N12-1058", "person-acd"),
+                ("N12-1059", "person-abe"),
+                ("N12-1059", "person-acd")
             ]
         }
         pair_creator = CreateTrainingData(self.papers, self.incomplete, special_keys=["person-a"],
@@ -383,9 +383,9 @@ class TestCreateTrainingData(TestCase):
         self.assertEqual(len(special_cases), 1)
         self.assertTrue("p" in special_cases)
         self.assertEqual(special_cases["p"], [
-            'N12-1057 person-a',
-            'N12-1058 person-a',
-            'N12-1059 person-a',
+            ("N12-1057", "person-a"),
+            ("N12-1058", "person-a"),
+            ("N12-1059", "person-a"),
         ])
         pair_creator = CreateTrainingData(self.papers, self.incomplete, special_keys=["person-ab"], separate_chars=8,
                                           separate_words=2, cores=1, **self.default_args,log_path=log_path)
@@ -393,9 +393,9 @@ class TestCreateTrainingData(TestCase):
         self.assertEqual(len(special_cases), 1)
         self.assertTrue("person a" in special_cases)
         self.assertEqual(special_cases["person a"], [
-            'N12-1057 person-abc',
-            'N12-1058 person-abc',
-            'N12-1059 person-abe',
+            ("N12-1057", "person-abc"),
+            ("N12-1058", "person-abc"),
+            ("N12-1059", "person-abe"),
         ])
 
     def test_prepareData(self):
@@ -403,16 +403,16 @@ class TestCreateTrainingData(TestCase):
         with open(log_path, 'w'):
             pass
         t1 = {
-            'N12-1057 student-a1': 1,
-            'N12-1057 professor-a': 2,
-            'N12-1058 student-a2': 3,
-            'N12-1058 professor-a': 5,
-            'N12-1059 student-b': 6,
-            'N12-1059 professor-b': 7,
-            'N12-1060 professor-b': 8,
-            'N12-1060 professor-a': 9,
-            'N12-1060 student-b': 10,
-            'N12-1060 student-a1': 4,
+            ("N12-1057", "student-a1"): 1,
+            ("N12-1057", "professor-a"): 2,
+            ("N12-1058", "student-a2"): 3,
+            ("N12-1058", "professor-a"): 5,
+            ("N12-1059", "student-b"): 6,
+            ("N12-1059", "professor-b"): 7,
+            ("N12-1060", "professor-b"): 8,
+            ("N12-1060", "professor-a"): 9,
+            ("N12-1060", "student-b"): 10,
+            ("N12-1060", "student-a1"): 4,
         }
         pair_creator = CreateTrainingData(self.papers, self.incomplete, name_similarity_cutoff=.8, special_keys=[
             "student-a"], cores=1, **self.default_args,log_path=log_path)
@@ -0,0 +1,10 @@
+from unittest import TestCase
+import numpy as np
+from src.dense_model import normalizeRows
+
+
+class TestDenseModel(TestCase):
+
+    def test_normalizeRows(self):
+        X = np.array([[3., 4.], [0., 0.], [1., 0.]])
+        np.testing.assert_allclose([[.6, .8], [0, 0], [1, 0]], normalizeRows(X))
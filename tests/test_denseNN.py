@@ -1,5 +1,10 @@
 from unittest import TestCase
 from src.dense_neural_net import DenseNN
+from src.dense_model import loadDenseModel
+from src.pair_chunks import writePairChunks
+import logging
+import os
+import tempfile
 import numpy as np
 
 
@@ -59,4 +64,42 @@ class TestDenseNN(TestCase):
                 diff_count += 1
         self.assertEqual(same_count, 4)
         self.assertEqual(diff_count, 6)
-        self.assertEqual(same_count+diff_count,10)
\ No newline at end of file
+        self.assertEqual(same_count+diff_count,10)
+
+    def test_streaming(self):
+        rs = np.random.RandomState(1)
+        data = []
+        for i in range(2000):
+            t = i % 2
+            data.append(("P{} yang-liu-{} P{} bang-liu".format(i, i % 3, i + 1), t, list(rs.rand(6) + t)))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tagged_pairs_chunks.pickle")
+            writePairChunks(path, data, chunk_size=300)
+            dnn = DenseNN(epochs=2, batch_size=64, rand_seed=1, special_cases=["yang-liu"], shuffle_buffer=500,
+                          model_save_path="/", model_name=os.path.basename(directory),
+                          log_path=os.path.join(directory, "dnn.log"), console_log_level=logging.ERROR)
+            train = [Y for _, Y in dnn.streamDataset(path, "train", shuffle=False)]
+            test = [Y for _, Y in dnn.streamDataset(path, "test", shuffle=False)]
+            self.assertEqual(2000, sum(len(Y) for Y in train) + sum(len(Y) for Y in test))
+            self.assertLessEqual(max(len(Y) for Y in train), 64)
+
+            dnn.trainFromChunks(path)
+            normal, special = dnn.evaluateFromChunks(path)
+            self.assertGreater(normal[1], .9)
+
+            cwd = os.getcwd()
+            os.chdir(os.path.dirname(directory))
+            try:
+                dnn.save()
+            finally:
+                os.chdir(cwd)
+            model = loadDenseModel(directory)
+            self.assertEqual("soft", model.voting)
+            X = np.array([d for _, _, d in data[:20]])
+            probabilities = model.predict_proba(X)
+            self.assertEqual((20, 2), probabilities.shape)
+            np.testing.assert_allclose(1, probabilities.sum(axis=1), rtol=1e-6)
+            np.testing.assert_array_equal(probabilities[:, 1] > .5, model.predict(X))
+            # Large batches go through model.predict
+            model.batch_size = 8
+            np.testing.assert_allclose(probabilities, model.predict_proba(X), rtol=1e-5)
@@ -0,0 +1,56 @@
+from unittest import TestCase
+import json
+import logging
+import os
+import tempfile
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from src.author_disambiguation import AuthorDisambiguation
+from src.compare_authors import CompareAuthors
+from tests.test_streamVotes import createPapers
+import evaluate_disambiguation
+
+
+class TestEvaluateDisambiguation(TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        # AuthorDisambiguation and the reports write to the working directory
+        self.cwd = os.getcwd()
+        os.chdir(self.dir.name)
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        with open(root + "/config.json") as f:
+            self.config_raw = json.load(f)
+        with open("config.json", "w") as f:
+            json.dump(self.config_raw, f, indent=2)
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.dir.cleanup()
+
+    def test_cascadeReport(self):
+        papers, author_papers = createPapers()
+        id_to_name = {a: {"first": "Yang", "last": "Liu"} for a in author_papers}
+        rs = np.random.RandomState(1)
+        X = rs.rand(200, len(CompareAuthors.compare_terms))
+        model = RandomForestClassifier(n_estimators=5, random_state=1).fit(X, (X[:, 5] > .3).astype(int))
+        compare_args = {"company_corpus": [["alpha", "univ"], ["beta", "corp"]],
+                        "department_corpus": [["dept", "of", "cs"]], "threshold": .4,
+                        "str_algorithm": ["jaro", "similarity"]}
+        ad = AuthorDisambiguation(papers=papers, author_papers=author_papers, compare_args=compare_args,
+                                  id_to_name=id_to_name, model=model, log_path=self.dir.name + "/ad.log",
+                                  console_log_level=logging.ERROR, use_cascade=True, cascade_threshold=.5)
+        ad(["yang-liu"], evaluation_mode=True)
+        self.assertEqual(12, ad.cascade_report["pairs"])
+
+        evaluate_disambiguation.reportCascade("Cascade vs Full Scoring", ad.cascade_report, .99)
+        with open("test_results.txt") as f:
+            lines = f.read().splitlines()
+        self.assertIn("Cascade vs Full Scoring:", lines)
+        self.assertIn("Pairs:12", "".join(lines).replace(" ", ""))
+
+        evaluate_disambiguation.saveCascadeThreshold(ad.cascade_report["calibrated_threshold"])
+        with open("config.json") as f:
+            config_json = json.load(f)
+        self.assertEqual(ad.cascade_report["calibrated_threshold"], config_json.pop("cascade_threshold"))
+        self.assertEqual(self.config_raw, config_json)
@@ -0,0 +1,134 @@
+from unittest import TestCase
+import os
+import subprocess
+import sys
+import tempfile
+import numpy as np
+import sklearn
+from sklearn.neural_network import MLPClassifier
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.ensemble import RandomForestClassifier, AdaBoostClassifier, VotingClassifier
+from sklearn.naive_bayes import GaussianNB
+from sklearn.discriminant_analysis import QuadraticDiscriminantAnalysis
+from src.inference_artifact import exportModel, loadModel
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def createData(n, rs):
+    # Like the pair vectors, most features only take a few values so neighbors are often at the same distance
+    X = rs.randint(0, 3, (n, 24)).astype(float)
+    X[:, :8] /= 4
+    X[:, 8:12] = rs.rand(n, 4)
+    return X
+
+
+def createModel(voting, knn_args=None):
+    if knn_args is None:
+        knn_args = {}
+    return VotingClassifier([
+        ("Nearest Neighbors", KNeighborsClassifier(n_neighbors=7, **knn_args)),
+        ("Decision Tree", DecisionTreeClassifier(max_depth=5, random_state=1)),
+        ("Random Forest", RandomForestClassifier(max_depth=5, max_features=5, n_estimators=10, random_state=1)),
+        ("AdaBoost", AdaBoostClassifier(random_state=1)),
+        ("Naive Bayes", GaussianNB()),
+        ("QDA", QuadraticDiscriminantAnalysis(reg_param=.1)),
+        ("Neural Net", MLPClassifier(alpha=1, max_iter=1000, random_state=1))
+    ], voting=voting, weights=[1, 3, 2, 2, 1, 1, 2])
+
+
+class TestInferenceArtifact(TestCase):
+
+    def setUp(self) -> None:
+        rs = np.random.RandomState(1)
+        self.X = createData(3000, rs)
+        self.Y = (self.X[:, 0] + self.X[:, 12] * self.X[:, 8] + rs.rand(3000) > 1.2).astype(int)
+        self.test_X = createData(2000, rs)
+        self.test_X[:10] = self.X[:10]
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "model.npz")
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_soft(self):
+        for weights in ["uniform", "distance"]:
+            model = createModel("soft", {"weights": weights}).fit(self.X, self.Y)
+            exportModel(model, self.path)
+            compiled = loadModel(self.path)
+            self.assertEqual("soft", compiled.voting)
+            self.assertEqual(24, compiled.n_features_in_)
+            for (name, estimator), compiled_estimator in zip(model.named_estimators_.items(), compiled.estimators_):
+                np.testing.assert_array_equal(estimator.predict(self.test_X), compiled_estimator.predict(self.test_X),
+                                              err_msg=name)
+                np.testing.assert_array_equal(estimator.predict_proba(self.test_X),
+                                              compiled_estimator.predict_proba(self.test_X), err_msg=name)
+            np.testing.assert_array_equal(model.predict_proba(self.test_X), compiled.predict_proba(self.test_X))
+            np.testing.assert_array_equal(model.predict(self.test_X), compiled.predict(self.test_X))
+            for batch_size in [1, 7]:
+                np.testing.assert_array_equal(model.predict_proba(self.test_X[:batch_size]),
+                                              compiled.predict_proba(self.test_X[:batch_size]))
+
+    def test_hard(self):
+        model = createModel("hard").fit(self.X, self.Y)
+        exportModel(model, self.path)
+        compiled = loadModel(self.path)
+        np.testing.assert_array_equal(model.predict(self.test_X), compiled.predict(self.test_X))
+        self.assertRaises(AttributeError, compiled.predict_proba, self.test_X)
+
+    def test_kdTree(self):
+        # Without ties the neighbors from the KD-tree are the same
+        rs = np.random.RandomState(2)
+        X = rs.rand(2000, 4)
+        Y = (X[:, 0] + X[:, 1] > 1).astype(int)
+        test_X = rs.rand(500, 4)
+        model = createModel("soft", {"algorithm": "kd_tree"}).fit(X, Y)
+        exportModel(model, self.path)
+        compiled = loadModel(self.path)
+        self.assertIsNotNone(compiled.estimators_[0].tree)
+        np.testing.assert_array_equal(model.predict(test_X), compiled.predict(test_X))
+        np.testing.assert_allclose(model.predict_proba(test_X), compiled.predict_proba(test_X))
+
+    def test_noSklearn(self):
+        model = createModel("soft").fit(self.X, self.Y)
+        exportModel(model, self.path)
+        code = "import sys\n" \
+               "from src.inference_artifact import loadModel\n" \
+               "loadModel({!r}).predict_proba([[0.0] * 24])\n" \
+               "print(any(m.split('.')[0] == 'sklearn' for m in sys.modules))".format(self.path)
+        res = subprocess.run([sys.executable, "-c", code], cwd=root, stdout=subprocess.PIPE, universal_newlines=True,
+                             check=True)
+        self.assertEqual("False", res.stdout.strip())
+
+    def test_unsupported(self):
+        from sklearn.svm import SVC
+        model = VotingClassifier([("SVC", SVC())]).fit(self.X, self.Y)
+        self.assertRaises(ValueError, exportModel, model, self.path)
+
+    def test_oldTrees(self):
+        # Trees pickled before scikit-learn 1.3 have no missing_go_to_left and before 1.4 value has class counts
+        class OldTree:
+            def __init__(self, tree):
+                self.n_outputs = tree.n_outputs
+                self.node_count = tree.node_count
+                self.children_left = tree.children_left
+                self.children_right = tree.children_right
+                self.feature = tree.feature
+                self.threshold = tree.threshold
+                self.value = tree.value * tree.weighted_n_node_samples[:, np.newaxis, np.newaxis]
+                self.nodes = np.zeros(tree.node_count, dtype=[("left_child", np.intp)])
+
+            def __getstate__(self):
+                return {"nodes": self.nodes}
+
+        model = VotingClassifier([("Random Forest", RandomForestClassifier(max_depth=5, n_estimators=10,
+                                                                           random_state=1))],
+                                 voting="soft").fit(self.X, self.Y)
+        expected = model.predict_proba(self.test_X)
+        for estimator in model.estimators_[0].estimators_:
+            estimator.tree_ = OldTree(estimator.tree_)
+        exportModel(model, self.path)
+        compiled = loadModel(self.path)
+        np.testing.assert_allclose(expected, compiled.predict_proba(self.test_X))
+        self.assertEqual(sklearn.__version__, compiled.sklearn_version)
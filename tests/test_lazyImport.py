@@ -0,0 +1,33 @@
+from unittest import TestCase
+import os
+import subprocess
+import sys
+from src.lazy_import import lazyImport
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestLazyImport(TestCase):
+
+    def test_lazyImport(self):
+        self.assertIs(sys.modules["os"], lazyImport("os"))
+        self.assertRaises(ModuleNotFoundError, lazyImport, "not_a_real_package")
+        code = "import sys\n" \
+               "from src.lazy_import import lazyImport\n" \
+               "textdistance = lazyImport('textdistance')\n" \
+               "print('textdistance.algorithms' in sys.modules)\n" \
+               "print(textdistance.JaroWinkler()('abc', 'abd') > 0)\n" \
+               "print('textdistance.algorithms' in sys.modules)"
+        res = subprocess.run([sys.executable, "-c", code], cwd=root, stdout=subprocess.PIPE, universal_newlines=True,
+                             check=True)
+        self.assertEqual(["False", "True", "True"], res.stdout.split())
+
+    def test_stagesDoNotImportHeavyPackages(self):
+        # The lazily imported top level packages are in sys.modules, but none of their submodules are imported
+        code = "import sys\n" \
+               "import disambiguate, src.pdf_parser, src.create_training_data\n" \
+               "print(sorted(m for m in sys.modules if m.split('.')[0] in ['nltk', 'sklearn', 'scipy', 'tensorflow'] " \
+               "and m not in ['nltk', 'scipy']))"
+        res = subprocess.run([sys.executable, "-c", code], cwd=root, stdout=subprocess.PIPE, universal_newlines=True,
+                             check=True)
+        self.assertEqual("[]", res.stdout.strip())
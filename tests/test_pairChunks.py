@@ -0,0 +1,94 @@
+from unittest import TestCase
+import logging
+import os
+import random
+import tempfile
+import numpy as np
+from src.pair_chunks import writePairChunks, iterPairChunks, chunkOffsets, readPairChunk, isTestPair, Reservoir
+from src.vote_classifier import VoteClassifier
+
+
+def createData(n):
+    rs = np.random.RandomState(1)
+    data = []
+    for i in range(n):
+        t = i % 2
+        a = "a-special" if i % 5 == 0 else "a{}".format(i % 7)
+        b = "b-special" if i % 5 == 0 else "b{}".format(i % 5)
+        data.append([("P{}".format(i), a, "Q{}".format(i), b), t, rs.rand(6) + t * .5])
+    return data
+
+
+class TestPairChunks(TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "tagged_pairs_chunks.pickle")
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_chunks(self):
+        data = createData(25)
+        self.assertEqual(25, writePairChunks(self.path, iter(data), chunk_size=10))
+        chunks = list(iterPairChunks(self.path))
+        self.assertEqual([10, 10, 5], [len(c) for c in chunks])
+        read = [p for c in chunks for p in c]
+        self.assertEqual([p[0] for p in data], [p[0] for p in read])
+        np.testing.assert_array_equal(data[-1][2], read[-1][2])
+        writePairChunks(self.path, [])
+        self.assertEqual([], list(iterPairChunks(self.path)))
+
+    def test_chunkOffsets(self):
+        data = createData(25)
+        writePairChunks(self.path, data, chunk_size=10)
+        offsets = chunkOffsets(self.path)
+        self.assertEqual(3, len(offsets))
+        self.assertEqual([p[0] for p in data[20:]], [p[0] for p in readPairChunk(self.path, offsets[2])])
+        # Files without the index are read to find the chunks
+        os.remove(self.path + ".index")
+        self.assertEqual(offsets, chunkOffsets(self.path))
+
+    def test_isTestPair(self):
+        keys = [p[0] for p in createData(4000)]
+        is_test = [isTestPair(k, 1, 8) for k in keys]
+        self.assertEqual(is_test, [isTestPair(k, 1, 8) for k in keys])
+        self.assertAlmostEqual(1 / 8, np.mean(is_test), delta=.02)
+        self.assertNotEqual(is_test, [isTestPair(k, 2, 8) for k in keys])
+
+    def test_reservoir(self):
+        reservoir = Reservoir(3, random.Random(1))
+        for i in range(2):
+            reservoir.add(i)
+        self.assertEqual([0, 1], reservoir.items)
+        counts = np.zeros(10)
+        for seed in range(2000):
+            reservoir = Reservoir(3, random.Random(seed))
+            for i in range(10):
+                reservoir.add(i)
+            self.assertEqual(3, len(reservoir))
+            self.assertEqual(10, reservoir.seen)
+            counts[reservoir.items] += 1
+        # Every item is kept with probability 3/10
+        np.testing.assert_allclose(counts / 2000, .3, atol=.05)
+
+    def test_outOfCore(self):
+        writePairChunks(self.path, createData(3000), chunk_size=500)
+        classifiers = [("Decision Tree", "DecisionTreeClassifier"), ("Naive Bayes", "GaussianNB"),
+                       ("SGD", "SGDClassifier")]
+        params = {"Decision Tree": {"max_depth": 3, "random_state": 1}, "Naive Bayes": {},
+                  "SGD": {"random_state": 1}}
+        weights = {"Decision Tree": 2, "Naive Bayes": 1, "SGD": 1}
+        vc = VoteClassifier(self.path, classifiers=classifiers, classifier_weights=weights, rand_seed=1,
+                            special_cases=["special"], cores=1, out_of_core=True, subsample_size=200, test_size=20,
+                            log_path=os.path.join(self.dir.name, "vc.log"), console_log_level=logging.ERROR)
+        vc.createModel(params)
+        vc.trainModel()
+        # 200 of each class for the normal and the special pairs
+        self.assertEqual(800, len(vc.train["Y"]))
+        self.assertEqual(80, len(vc.test["Y"]))
+        self.assertEqual(40, len(vc.special_test["Y"]))
+        self.assertEqual(400, vc.train["Y"].sum())
+        # Naive Bayes saw every training pair
+        self.assertGreater(vc.model.named_estimators_["Naive Bayes"].class_count_.sum(), 2000)
+        self.assertGreater(np.mean(vc.model.predict(vc.test["X"]) == vc.test["Y"]), .9)
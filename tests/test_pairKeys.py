@@ -0,0 +1,31 @@
+from unittest import TestCase
+import pickle
+from src.pair_keys import authorKey, pairKey, splitPairKey, keyToString, keyFromString, asKey
+
+
+class TestPairKeys(TestCase):
+
+    def test_pairKey(self):
+        a = authorKey("P19-1642", "iacer-calixto")
+        b = authorKey("C16-1050", "elaheh-shafieibavani")
+        self.assertEqual(("P19-1642", "iacer-calixto"), a)
+        key = pairKey(a, b)
+        self.assertEqual(("P19-1642", "iacer-calixto", "C16-1050", "elaheh-shafieibavani"), key)
+        p1, a_id, p2, b_id = key
+        self.assertEqual("iacer-calixto", a_id)
+        self.assertEqual("elaheh-shafieibavani", b_id)
+        self.assertEqual((a, b), splitPairKey(key))
+
+    def test_strings(self):
+        key = pairKey(authorKey("P19-1642", "iacer-calixto"), authorKey("C16-1050", "elaheh-shafieibavani"))
+        self.assertEqual("P19-1642 iacer-calixto C16-1050 elaheh-shafieibavani", keyToString(key))
+        self.assertEqual(key, keyFromString(keyToString(key)))
+        self.assertEqual(key, asKey(keyToString(key)))
+        self.assertIs(key, asKey(key))
+        self.assertEqual(("P19-1642", "iacer-calixto"), asKey("P19-1642 iacer-calixto"))
+
+    def test_pickle(self):
+        key = pairKey(authorKey("P19-1642", "iacer-calixto"), authorKey("C16-1050", "elaheh-shafieibavani"))
+        pairs = {key: 1}
+        loaded = pickle.loads(pickle.dumps(pairs))
+        self.assertEqual(1, loaded[key])
@@ -0,0 +1,87 @@
+from unittest import TestCase
+import os
+import tempfile
+import numpy as np
+from src.pair_stats import PairStats
+from src.utility_functions import calculatePairStats
+
+
+def createPairs(n=1000, seed=1):
+    rs = np.random.RandomState(seed)
+    pairs = []
+    for i in range(n):
+        a = ["yang-liu-ict", "bang-liu", "yang-x"][i % 3]
+        b = ["yang-liu-icsi", "bang-liu", "yang-liu"][(i // 3) % 3]
+        t = rs.randint(2)
+        pairs.append([("P{}".format(i), a, "P{}".format(i + 1), b), t,
+                      np.array([rs.randint(4), round(rs.rand(), 2), rs.rand() + t])])
+    return pairs
+
+
+class TestPairStats(TestCase):
+
+    def setUp(self) -> None:
+        self.keys = ["discrete", "rounded", "continuous"]
+        self.pairs = createPairs()
+        self.X = np.array([v for _, _, v in self.pairs])
+        self.same = np.array([t == 1 for _, t, _ in self.pairs])
+
+    def addChunks(self, stats, size=97):
+        for i in range(0, len(self.pairs), size):
+            stats.add(self.pairs[i:i + size])
+        return stats
+
+    def test_streamedStats(self):
+        stats = self.addChunks(PairStats(self.keys))
+        X = self.X[self.same]
+        self.assertEqual(len(X), stats.count("same"))
+        np.testing.assert_allclose(X.mean(axis=0), stats.mean("same"))
+        np.testing.assert_allclose(X.var(axis=0), stats.var("same"))
+        for q in [0, .25, .5, .9, 1]:
+            np.testing.assert_allclose(np.quantile(X, q, axis=0), stats.quantile("same", q))
+        counts, edges = stats.histogram("same", "rounded", bins=5)
+        expected_counts, expected_edges = np.histogram(X[:, 1], bins=5)
+        np.testing.assert_array_equal(expected_counts, counts)
+        np.testing.assert_allclose(expected_edges, edges)
+        # Custom metrics get the values of the feature
+        np.testing.assert_allclose(np.ptp(X, axis=0), stats.metric("same", np.ptp))
+
+    def test_compressedHistogram(self):
+        stats = self.addChunks(PairStats(self.keys, max_bins=64))
+        X = self.X[~self.same]
+        self.assertFalse(stats.groups["different"].exact)
+        self.assertLessEqual(len(stats.groups["different"].values[2]), 64)
+        # The discrete feature has less values than bins
+        np.testing.assert_array_equal(np.median(X[:, 0]), stats.quantile("different", .5)[0])
+        self.assertAlmostEqual(np.median(X[:, 2]), stats.quantile("different", .5)[2], delta=.05)
+        np.testing.assert_allclose(X.mean(axis=0), stats.mean("different"))
+
+    def test_merge(self):
+        first, second = PairStats(self.keys), PairStats(self.keys)
+        first.add(self.pairs[:300])
+        second.add(self.pairs[300:])
+        first.merge(second)
+        stats = self.addChunks(PairStats(self.keys))
+        for g in ["same", "different"]:
+            np.testing.assert_allclose(stats.mean(g), first.mean(g))
+            np.testing.assert_allclose(stats.var(g), first.var(g))
+            np.testing.assert_array_equal(stats.quantile(g, .5), first.quantile(g, .5))
+
+    def test_specialCases(self):
+        stats = PairStats(self.keys, special_cases=["yang-liu", "yang"], include_special_rest=False)
+        self.assertTrue(stats.isSpecial(("P1", "yang-liu-ict", "P2", "yang-liu-icsi")))
+        self.assertTrue(stats.isSpecial("P1 yang-x P2 yang-liu"))
+        self.assertFalse(stats.isSpecial(("P1", "bang-liu", "P2", "bang-liu")))
+        self.assertFalse(stats.isSpecial(("P1", "yang-liu", "P2", "bang-liu")))
+        self.addChunks(stats)
+        self.assertEqual(len(self.pairs), sum(stats.count(g) for g in stats.groups))
+
+    def test_calculatePairStats(self):
+        with tempfile.TemporaryDirectory() as d:
+            calculatePairStats(self.pairs, self.keys, special_cases=["yang-liu"], output_dir=d, chunk_size=100)
+            self.assertTrue(os.path.exists(d + "/special_same_special_different.txt"))
+            with open(d + "/same_different.txt") as f:
+                lines = f.read().splitlines()
+        medians = np.abs(np.median(self.X[self.same], axis=0) - np.median(self.X[~self.same], axis=0))
+        self.assertEqual("Same vs Different:", lines[1])
+        self.assertEqual("continuous median:{:.3f}".format(medians[2]), " ".join(lines[-2].split()[1:]))
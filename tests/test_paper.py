@@ -0,0 +1,46 @@
+from unittest import TestCase
+from src.paper import Paper
+import json
+
+
+class TestPaper(TestCase):
+    def setUp(self) -> None:
+        self.paper_dict = {
+            "pid": "P19-1642",
+            "title": "A Paper",
+            "abstract": "An abstract",
+            "authors": {"john-doe": "John Doe", "jane-roe": "Jane Roe"},
+            "unknown": [],
+            "affiliations": {
+                "john-doe": {"email": "jd@uni.edu", "affiliation": {"id": "org-1", "type": ["institution"],
+                                                                   "info": {"institution": ["Uni"]}}},
+                "jane-roe": {"email": None, "affiliation": {"id": None, "type": [], "info": None}}
+            },
+            "title_tokenized": ["paper"],
+            "citations": [{"title": "other paper", "authors": ["a b"]}],
+            "citations_tokenized": ["other", "paper"],
+            "sections": {"1": {"title": "introduction"}},
+            "sections_tokenized": ["introduction"]
+        }
+
+    def test_roundTrip(self):
+        paper = Paper(**self.paper_dict)
+        self.assertEqual(paper.asDict(), Paper(**paper.asDict()).asDict())
+        self.assertEqual(json.loads(json.dumps(self.paper_dict)), json.loads(json.dumps(paper.asDict())))
+        self.assertIsInstance(paper.citations, tuple)
+        self.assertIsInstance(paper.title_tokenized, tuple)
+        self.assertRaises(AttributeError, setattr, paper, "not_a_slot", 1)
+
+    def test_copy(self):
+        paper = Paper(**self.paper_dict)
+        copied = paper.copy()
+        self.assertEqual(paper, copied)
+        self.assertEqual(paper.asDict(), copied.asDict())
+        self.assertIs(paper.citations, copied.citations)
+
+        del copied.authors["jane-roe"]
+        copied.affiliations["john-doe"]["email"] = None
+        copied.unknown.append("someone")
+        self.assertTrue("jane-roe" in paper.authors)
+        self.assertEqual("jd@uni.edu", paper.affiliations["john-doe"]["email"])
+        self.assertEqual([], paper.unknown)
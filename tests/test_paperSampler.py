@@ -0,0 +1,49 @@
+from unittest import TestCase
+from src.paper_sampler import PaperSampler
+from src.paper import Paper
+
+
+class TestPaperSampler(TestCase):
+    def setUp(self) -> None:
+        self.papers = {}
+        self.pids = []
+        for i in range(10):
+            pid = "P1{}-10{:02d}".format(i // 2, i)
+            org = "Uni" if i < 8 else "Corp"
+            co_author = "co-author-{}".format(i % 3)
+            self.papers[pid] = Paper(pid=pid, title="", abstract="",
+                                     authors={"john-doe": "John Doe", co_author: "Co Author"},
+                                     affiliations={"john-doe": {"email": None, "affiliation": {
+                                         "type": ["institution"], "info": {"institution": [org]}}}})
+            self.pids.append(pid)
+
+    def test_noCutoff(self):
+        sampler = PaperSampler(self.papers, 0)
+        self.assertEqual(self.pids, sampler("john-doe", self.pids))
+        sampler = PaperSampler(self.papers, 20)
+        self.assertEqual(self.pids, sampler("john-doe", self.pids))
+
+    def test_recent(self):
+        sampler = PaperSampler(self.papers, 3, "recent")
+        self.assertEqual(["P13-1007", "P14-1008", "P14-1009"], sampler("john-doe", self.pids))
+
+    def test_diverse(self):
+        sampler = PaperSampler(self.papers, 5, "diverse")
+        selected = sampler("john-doe", self.pids)
+        self.assertEqual(5, len(selected))
+        self.assertEqual(selected, sampler("john-doe", self.pids))
+        features = set()
+        for p in selected:
+            features |= sampler.paperFeatures(p, "john-doe")
+        self.assertEqual({x for x in features if x[0] == "year"}, {("year", 2010 + i) for i in range(5)})
+        self.assertTrue(("org", "Corp") in features)
+        self.assertEqual(3, len([x for x in features if x[0] == "co_author"]))
+
+    def test_random(self):
+        selected = PaperSampler(self.papers, 4, "random", seed=3)("john-doe", self.pids)
+        self.assertEqual(4, len(selected))
+        self.assertEqual(selected, PaperSampler(self.papers, 4, "random", seed=3)("john-doe", self.pids))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, PaperSampler, self.papers, 3, "not-a-method")
+        self.assertRaises(ValueError, PaperSampler, self.papers, -1)
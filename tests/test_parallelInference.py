@@ -0,0 +1,37 @@
+from unittest import TestCase
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, VotingClassifier
+from sklearn.naive_bayes import GaussianNB
+from src.parallel_inference import InferencePool
+
+
+class TestParallelInference(TestCase):
+
+    def setUp(self) -> None:
+        rs = np.random.RandomState(1)
+        self.X = rs.rand(500, 6)
+        self.Y = (self.X[:, 0] + self.X[:, 1] > 1).astype(int)
+        self.blocks = [rs.rand(n, 6) for n in [1, 7, 300, 0, 45]]
+
+    def createModel(self, voting):
+        return VotingClassifier([("Random Forest", RandomForestClassifier(n_estimators=10, random_state=1)),
+                                 ("Naive Bayes", GaussianNB())], voting=voting).fit(self.X, self.Y)
+
+    def test_soft(self):
+        model = self.createModel("soft")
+        with InferencePool(model, 2, task_rows=50) as pool:
+            # Every block is submitted before waiting for any of them
+            blocks = [pool.submit(b) for b in self.blocks]
+            for rows, block in zip(self.blocks, blocks):
+                predictions, probabilities = block.result()
+                np.testing.assert_array_equal(model.predict(rows) if len(rows) else [], predictions)
+                np.testing.assert_allclose(model.predict_proba(rows) if len(rows) else np.zeros((0, 2)),
+                                           probabilities)
+
+    def test_hard(self):
+        model = self.createModel("hard")
+        with InferencePool(model, 2) as pool:
+            self.assertFalse(pool.has_probabilities)
+            predictions, probabilities = pool.submit(self.blocks[2]).result()
+        np.testing.assert_array_equal(model.predict(self.blocks[2]), predictions)
+        self.assertIsNone(probabilities)
@@ -0,0 +1,73 @@
+from unittest import TestCase
+import json
+import logging
+import os
+import tempfile
+from unittest import mock
+import numpy as np
+import src.vote_classifier
+from src.vote_classifier import VoteClassifier, searchWeights
+
+
+def createData(n=600):
+    rs = np.random.RandomState(1)
+    data = []
+    for i in range(n):
+        t = i % 2
+        a = "a-special" if i % 5 == 0 else "a{}".format(i % 7)
+        b = "b-special" if i % 5 == 0 else "b{}".format(i % 5)
+        data.append([("P{}".format(i), a, "Q{}".format(i), b), t, rs.rand(6) + t * .5])
+    return data
+
+
+class TestParameterSearch(TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.dir.name)
+        os.mkdir("models")
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.dir.cleanup()
+
+    def createVC(self):
+        classifiers = [("Decision Tree", "DecisionTreeClassifier"), ("Naive Bayes", "GaussianNB")]
+        weights = {"Decision Tree": 1, "Naive Bayes": 1}
+        return VoteClassifier(createData(), classifiers=classifiers, classifier_weights=weights, rand_seed=1, cores=1,
+                              special_cases=["special"], save_path=self.dir.name, weight_grid=[0, 1, 2],
+                              search_grids={"Decision Tree": {"max_depth": [1, 3]}},
+                              log_path=self.dir.name + "/vc.log", console_log_level=logging.ERROR)
+
+    def test_search(self):
+        vc = self.createVC()
+        params = vc.searchParameters({"Decision Tree": {"random_state": 1}, "Naive Bayes": {}})
+        self.assertEqual(1, params["Decision Tree"]["random_state"])
+        self.assertIn(params["Decision Tree"]["max_depth"], [1, 3])
+        self.assertNotEqual([0, 0], list(vc.classifier_weights.values()))
+        with open("models/VC1/parameters.json") as f:
+            saved = json.load(f)
+        self.assertEqual(params, saved["classifier_params"])
+        self.assertEqual(vc.classifier_weights, saved["classifier_weights"])
+        self.assertEqual(9, saved["search"]["weight_combinations"])
+        self.assertGreaterEqual(saved["search"]["f1"], saved["search"]["f1_current_weights"])
+
+        vc.createModel(params)
+        vc.trainModel()
+
+        # Every fold is cached, so searching again does not fit anything
+        vc = self.createVC()
+        with mock.patch.object(src.vote_classifier, "searchFold", side_effect=AssertionError):
+            self.assertEqual(params, vc.searchParameters({"Decision Tree": {"random_state": 1}, "Naive Bayes": {}}))
+
+    def test_searchWeights(self):
+        # Two estimators that agree on the first 2 pairs, only the first is right on the other 2
+        predictions = np.array([[[1, 0, 1, 0], [.9, .1, .8, .2]], [[1, 0, 0, 1], [.9, .1, .4, .6]]])
+        np.save(self.dir.name + "/oof.npy", predictions)
+        np.save(self.dir.name + "/Y.npy", np.array([1, 0, 1, 0]))
+        args = [self.dir.name + "/oof.npy", self.dir.name + "/Y.npy", "hard", [(0, [1, 1]), (1, [2, 1])]]
+        # [1, 1] ties on the last 2 pairs, which are predicted different
+        self.assertEqual([(0, [1, 1], 2 / 3), (1, [2, 1], 1.)], searchWeights(args))
+        args[2] = "soft"
+        self.assertEqual([(0, [1, 1], 1.), (1, [2, 1], 1.)], searchWeights(args))
@@ -0,0 +1,112 @@
+from unittest import TestCase
+import json
+import logging
+import os
+import tempfile
+from src.pdf_parser import PDFParserWrapper
+from src.paper import Paper
+
+tei_template = """<TEI xmlns="http://www.tei-c.org/ns/1.0"><teiHeader><fileDesc><sourceDesc><biblStruct><analytic>
+{}
+</analytic></biblStruct></sourceDesc></fileDesc><profileDesc><abstract><div><p>An abstract</p></div></abstract>
+</profileDesc></teiHeader><text><body><div><head n="1">Introduction</head></div></body><back>
+<div type="references"><listBibl/></div></back></text></TEI>"""
+author_template = """<author><persName><forename type="first">{}</forename><surname>{}</surname></persName>
+<email>{}</email><affiliation key="aff{}"><orgName type="department">{}</orgName>
+<orgName type="institution">{}</orgName><address><settlement>{}</settlement><country>{}</country></address>
+</affiliation></author>"""
+
+names = {"ann-lee": "Ann Lee", "bob-ray": "Bob Ray", "cal-dunn": "Cal Dunn", "dee-fox": "Dee Fox",
+         "eve-kim": "Eve Kim"}
+orgs = {"alpha": ("Dept of CS", "Alpha Univ", "Town", "USA"),
+        "alpha-village": ("Dept of CS", "Alpha Univ", "Village", "USA"),
+        "beta": ("Research", "Beta Corp", "City", "USA"),
+        "gamma": ("Dept of CS", "Gamma Lab", "Ville", "France"),
+        "delta": ("Dept of CS", "Delta Inst", "Burg", "Germany")}
+papers_authors = {
+    "P19-1001": [("ann-lee", "alpha"), ("bob-ray", "beta")],
+    "P19-1002": [("ann-lee", "alpha"), ("cal-dunn", "gamma")],
+    "P19-1003": [("bob-ray", "beta"), ("cal-dunn", "delta"), ("dee-fox", "alpha-village")]
+}
+# Delta Inst and Dee Fox are only on the old P19-1003, Eve Kim is only on the new one and Beta Corp loses a paper
+changed_paper = [("bob-ray", "alpha"), ("cal-dunn", "gamma"), ("eve-kim", "gamma")]
+
+
+def writeTEI(xml_path, pid, authors):
+    xml_authors = []
+    for i, (a, org) in enumerate(authors):
+        first, last = names[a].split()
+        xml_authors.append(author_template.format(first, last, a + "@mail.com", i, *orgs[org]))
+    with open(os.path.join(xml_path, pid + ".tei.xml"), "w") as f:
+        f.write(tei_template.format("\n".join(xml_authors)))
+
+
+def asJSON(x):
+    return json.loads(json.dumps(x, sort_keys=True))
+
+
+class TestPDFParserUpdate(TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.xml_path = self.dir.name + "/pdf_xml"
+        os.mkdir(self.xml_path)
+        for pid, authors in papers_authors.items():
+            writeTEI(self.xml_path, pid, authors)
+        self.papers = {}
+        for pid, authors in papers_authors.items():
+            authors = authors + changed_paper if pid == "P19-1003" else authors
+            self.papers[pid] = Paper(pid=pid, title="A title", abstract="", authors={a: names[a] for a, _ in authors})
+        self.id_to_name = {}
+        for a, name in names.items():
+            first, last = name.split()
+            self.id_to_name[a] = {"first": first, "last": last}
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def createParser(self, use_org_most_common):
+        return PDFParserWrapper(papers=self.papers, aliases={}, id_to_name=self.id_to_name, same_names=[],
+                                cores=1, use_org_most_common=use_org_most_common, console_log_level=logging.ERROR,
+                                log_path=self.dir.name + "/pdf_parser.log")
+
+    def updateAndParse(self, use_org_most_common):
+        """
+        :return: a parser updated with the changed P19-1003 and a parser that parsed the changed P19-1003 from scratch
+        """
+        parser = self.createParser(use_org_most_common)
+        parser(self.xml_path)
+        # update_data.py loads the data from the files written by _saveData
+        updated = self.createParser(use_org_most_common)
+        updated.loadExisting(asJSON({k: p.asDict() for k, p in parser.parsed.items()}),
+                             asJSON(parser.author_papers), asJSON(parser.organizations),
+                             asJSON(parser.effective_org_info), parser.org_names, parser.department_names,
+                             parser.incomplete_papers)
+        writeTEI(self.xml_path, "P19-1003", changed_paper)
+        changes = updated.update(self.xml_path, ["P19-1003"])
+        self.assertEqual(["P19-1003"], changes["updated"])
+        self.assertEqual(["eve-kim"], changes["new_authors"])
+
+        scratch = self.createParser(use_org_most_common)
+        scratch(self.xml_path)
+        self.assertEqual({k: sorted(v) for k, v in scratch.author_papers.items()},
+                         {k: sorted(v) for k, v in updated.author_papers.items()})
+        self.assertEqual(asJSON(scratch.effective_org_info), asJSON(updated.effective_org_info))
+        self.assertEqual(sorted(scratch.department_names), sorted(updated.department_names))
+        # The corpora only grow, so the name only on the old P19-1003 is kept
+        self.assertEqual(sorted(scratch.org_names + ["Delta Inst"]), sorted(updated.org_names))
+        for pid, paper in scratch.parsed.items():
+            self.assertEqual(paper.affiliations, updated.parsed[pid].affiliations)
+        return updated, scratch
+
+    def test_update(self):
+        updated, scratch = self.updateAndParse(use_org_most_common=False)
+        self.assertNotIn("delta-inst", updated.organizations)
+        self.assertEqual(asJSON(scratch.organizations), asJSON(updated.organizations))
+
+    def test_updateOrgMostCommon(self):
+        updated, scratch = self.updateAndParse(use_org_most_common=True)
+        self.assertNotIn("delta-inst", updated.organizations)
+        # The counts removed for the old P19-1003 are its most common values, Dee Fox's settlement was never counted
+        self.assertEqual({"Town": 3}, scratch.organizations["alpha-univ"]["settlement"])
+        self.assertEqual({"Town": 2, "Village": 1}, updated.organizations["alpha-univ"]["settlement"])
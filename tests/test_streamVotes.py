@@ -0,0 +1,80 @@
+from unittest import TestCase
+from unittest import mock
+import logging
+import os
+import tempfile
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+import src.author_disambiguation
+from src.author_disambiguation import AuthorDisambiguation
+from src.compare_authors import CompareAuthors
+from src.paper import Paper
+
+
+def createAffiliation(email, org):
+    return {"email": email, "affiliation": {"type": ["institution"], "info": {"institution": [org],
+                                                                              "department": ["Dept of CS"]},
+                                            "address": {"postCode": None, "settlement": "Town", "country": "USA"}}}
+
+
+def createPapers():
+    papers = {}
+    author_papers = {}
+    authors = {"yang-liu-a": ("a.edu", "Alpha Univ", {"bo-chen": "Bo Chen", "li-wang": "Li Wang"}),
+               "yang-liu-b": ("b.com", "Beta Corp", {"tom-hill": "Tom Hill", "sue-park": "Sue Park"})}
+    for i, (author_id, (domain, org, co_authors)) in enumerate(authors.items()):
+        for year in range(10, 16):
+            pid = "P{}-{}{:03d}".format(year, i, year)
+            paper_authors = {author_id: "Yang Liu", **co_authors}
+            affiliations = {a: createAffiliation(a + "@" + domain, org) for a in paper_authors}
+            papers[pid] = Paper(pid=pid, title="t", abstract="", authors=paper_authors, affiliations=affiliations,
+                                title_tokenized=["pars", org.split()[0].lower()], citations=[],
+                                citations_tokenized=[])
+            for a in paper_authors:
+                author_papers.setdefault(a, []).append(pid)
+    pid = "P18-9999"
+    papers[pid] = Paper(pid=pid, title="t", abstract="", authors={"yang-liu": "Yang Liu", "bo-chen": "Bo Chen"},
+                        affiliations={"yang-liu": createAffiliation("y@a.edu", "Alpha Univ"),
+                                      "bo-chen": createAffiliation("b@a.edu", "Alpha Univ")},
+                        title_tokenized=["pars"], citations=[], citations_tokenized=[])
+    author_papers["yang-liu"] = [pid]
+    author_papers["bo-chen"].append(pid)
+    return papers, author_papers
+
+
+class TestStreamVotes(TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        # AuthorDisambiguation writes results.json to the working directory
+        self.cwd = os.getcwd()
+        os.chdir(self.dir.name)
+        self.papers, self.author_papers = createPapers()
+        self.id_to_name = {a: {"first": "Yang", "last": "Liu"} for a in self.author_papers}
+        rs = np.random.RandomState(1)
+        X = rs.rand(200, len(CompareAuthors.compare_terms))
+        self.model = RandomForestClassifier(n_estimators=5, random_state=1).fit(X, (X[:, 5] > .3).astype(int))
+        self.compare_args = {"company_corpus": [["alpha", "univ"], ["beta", "corp"]],
+                             "department_corpus": [["dept", "of", "cs"]], "threshold": .4,
+                             "str_algorithm": ["jaro", "similarity"]}
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.dir.cleanup()
+
+    def disambiguate(self, **kwargs):
+        ad = AuthorDisambiguation(papers=self.papers, author_papers=self.author_papers,
+                                  compare_args=self.compare_args, id_to_name=self.id_to_name, model=self.model,
+                                  log_path=self.dir.name + "/ad.log", console_log_level=logging.ERROR, **kwargs)
+        with mock.patch.object(src.author_disambiguation, "CompareAuthors", side_effect=CompareAuthors) as created:
+            results = ad(["yang-liu"], evaluation_mode=True)
+        return results, created.call_count
+
+    def test_comparatorCreatedOnce(self):
+        expected, _ = self.disambiguate(cores=1)
+        for cores in [1, 2]:
+            # A batch of 2 pairs per id needs 3 batches for the 6 papers of every id
+            results, created = self.disambiguate(cores=cores, early_stopping=True, stream_batch_size=2)
+            self.assertEqual(1, created)
+            self.assertEqual(expected["yang-liu"]["same"], results["yang-liu"]["same"])
+            self.assertEqual(sorted(expected["yang-liu"]["percent_same"]), sorted(results["yang-liu"]["percent_same"]))
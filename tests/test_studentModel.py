@@ -0,0 +1,55 @@
+from unittest import TestCase
+import logging
+import tempfile
+import numpy as np
+from sklearn.linear_model import LinearRegression
+from src.student_model import StudentModel
+from src.vote_classifier import VoteClassifier
+
+
+def createData(n=600):
+    rs = np.random.RandomState(1)
+    data = []
+    for i in range(n):
+        t = i % 2
+        a = "a-special" if i % 5 == 0 else "a{}".format(i % 7)
+        b = "b-special" if i % 5 == 0 else "b{}".format(i % 5)
+        data.append([("P{}".format(i), a, "Q{}".format(i), b), t, rs.rand(6) + t * .5])
+    return data
+
+
+class TestStudentModel(TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_contract(self):
+        X = np.array([[0.], [.25], [1.], [2.]])
+        model = StudentModel(LinearRegression().fit(X[[0, 2]], [0, 1]))
+        self.assertEqual("soft", model.voting)
+        np.testing.assert_allclose([[1, 0], [.75, .25], [0, 1], [0, 1]], model.predict_proba(X), atol=1e-9)
+        np.testing.assert_array_equal([0, 0, 1, 1], model.predict(X))
+
+    def test_distill(self):
+        classifiers = [("Decision Tree", "DecisionTreeClassifier"), ("Naive Bayes", "GaussianNB")]
+        params = {"Decision Tree": {"max_depth": 3, "random_state": 1}, "Naive Bayes": {}}
+        weights = {"Decision Tree": 2, "Naive Bayes": 1}
+        for voting in ["hard", "soft"]:
+            vc = VoteClassifier(createData(), classifiers=classifiers, classifier_weights=weights, rand_seed=1,
+                                special_cases=["special"], voting=voting, cores=1, student="gradient_boosting",
+                                log_path=self.dir.name + "/vc.log", console_log_level=logging.ERROR)
+            vc.createModel(params)
+            vc.trainModel()
+            stats = dict(vc.distill())
+            self.assertGreater(stats["Agreement with teacher on test"], .9)
+            self.assertIn("Student F1 on special cases", stats)
+            self.assertIn("Student rows/s, batches of 10", stats)
+            self.assertEqual((5, 2), vc.student_model.predict_proba(vc.test["X"][:5]).shape)
+
+    def test_unknownStudent(self):
+        self.assertRaises(ValueError, VoteClassifier, createData(), classifiers=[("Naive Bayes", "GaussianNB")],
+                          classifier_weights={"Naive Bayes": 1}, student="svm",
+                          log_path=self.dir.name + "/vc.log")
@@ -0,0 +1,38 @@
+from unittest import TestCase
+import json
+import os
+import pickle
+import tempfile
+from src.config_handler import ConfigHandler
+from src.utility_functions import parseCLIArgs
+import train
+
+
+class TestTrain(TestCase):
+
+    def setUp(self) -> None:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.config_raw = json.load(open(root + "/config.json"))
+        self.dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.dir.name)
+        os.makedirs("logs")
+        os.makedirs("data/pickle")
+        self.pairs = [[("P1", "a", "P2", "b"), 1, [0.5, 1.0]]]
+        with open("data/pickle/tagged_pairs.pickle", "wb") as f:
+            pickle.dump(self.pairs, f)
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.dir.cleanup()
+
+    def loadPairs(self, cli_args):
+        config = ConfigHandler(dict(self.config_raw), "train", raise_error_unknown=True)
+        parseCLIArgs(train.arguments.parse_args(cli_args), config)
+        return train.loadPairs(config)
+
+    def test_loadPairs(self):
+        # The stock config.json does not have out_of_core
+        self.assertNotIn("out_of_core", self.config_raw)
+        self.assertEqual(self.pairs, self.loadPairs([]))
+        self.assertEqual(os.getcwd() + "/data/pickle/tagged_pairs_chunks.pickle", self.loadPairs(["--out_of_core"]))
@@ -0,0 +1,77 @@
+from unittest import TestCase
+from src.utility_functions import loadData, LazyData
+from contextlib import redirect_stdout
+from io import StringIO
+import json
+import logging
+import os
+import tempfile
+
+
+class FakeConfig:
+    console_log_level = logging.ERROR
+
+    def __init__(self, paths):
+        self.paths = paths
+
+    def __getitem__(self, item):
+        return self.paths[item]
+
+
+class TestLoadData(TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.paths = {}
+        for name, content in [("id_to_name.json", json.dumps({"john-doe": {"first": "John", "last": "Doe"}})),
+                              ("same_names.txt", "john-doe\njane-roe\n"),
+                              ("conflicts.csv", "a,b\nc,d\n")]:
+            path = os.path.join(self.dir.name, name)
+            with open(path, "w") as f:
+                f.write(content)
+            self.paths[name.split(".")[0]] = path
+        self.config = FakeConfig(self.paths)
+        self.logger = logging.getLogger("test_loadData")
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_eager(self):
+        data = loadData(["id_to_name", "same_names", "conflicts", "not_a_file"], self.logger, self.config)
+        self.assertIsInstance(data, LazyData)
+        self.assertEqual(["id_to_name", "same_names", "conflicts"], list(data.keys()))
+        self.assertTrue(all(data.isLoaded(x) for x in data))
+        self.assertEqual(["john-doe", "jane-roe"], data["same_names"])
+        self.assertEqual([["a", "b"], ["c", "d"]], data["conflicts"])
+        self.assertEqual(set(data.load_times.keys()), set(data.keys()))
+
+    def test_lazy(self):
+        data = loadData(["id_to_name", "same_names"], self.logger, self.config, lazy=True,
+                        override_keys={"id_to_name": "names"})
+        self.assertEqual(["names", "same_names"], list(data.keys()))
+        self.assertFalse(data.isLoaded("names"))
+        self.assertEqual({"first": "John", "last": "Doe"}, data["names"]["john-doe"])
+        self.assertTrue(data.isLoaded("names"))
+        self.assertFalse(data.isLoaded("same_names"))
+        self.assertEqual(["names"], list(data.load_times.keys()))
+
+        def passed(**kwargs):
+            return kwargs
+        self.assertEqual(["john-doe", "jane-roe"], passed(**data)["same_names"])
+        del data["names"]
+        self.assertRaises(KeyError, data.__getitem__, "names")
+
+    def test_printLoadTimes(self):
+        out = StringIO()
+        with redirect_stdout(out):
+            loadData(["id_to_name", "same_names"], self.logger, self.config)
+        lines = out.getvalue().splitlines()
+        self.assertIn("Load Times:", lines)
+        self.assertEqual(["id_to_name", "same_names", "Total"], [x.split()[1][:-1] for x in lines if x[:2] == "--"])
+
+        data = loadData(["id_to_name", "same_names"], self.logger, self.config, lazy=True)
+        data["same_names"]
+        out = StringIO()
+        with redirect_stdout(out):
+            data.printLoadTimes()
+        lines = out.getvalue().splitlines()
+        self.assertEqual(["same_names"], [x.split()[1][:-1] for x in lines if x[:2] == "--"])
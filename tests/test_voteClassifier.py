@@ -0,0 +1,106 @@
+from unittest import TestCase
+import logging
+import os
+import pickle
+import tempfile
+import numpy as np
+from sklearn.ensemble import VotingClassifier
+from sklearn.naive_bayes import GaussianNB
+from sklearn.tree import DecisionTreeClassifier
+from src.vote_classifier import VoteClassifier
+
+
+def createData(n=200):
+    data = []
+    for i in range(n):
+        a = "yang-liu-ict" if i % 5 == 0 else "bang-liu"
+        b = "yang-liu-icsi" if i % 5 == 0 else "bang-liu"
+        data.append(("P{} {} P{} {}".format(i, a, i + 1, b), i % 2, [i, i]))
+    return data
+
+
+def createRandomData(n=400):
+    rs = np.random.RandomState(1)
+    data = []
+    for i in range(n):
+        t = i % 2
+        a = "yang-liu-ict" if i % 5 == 0 else "bang-liu"
+        data.append([("P{}".format(i), a, "P{}".format(i + 1), a), t, rs.rand(4) + t * .3])
+    return data
+
+
+class TestVoteClassifier(TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.vc = VoteClassifier(createData(), classifiers=[("Naive Bayes", "GaussianNB")],
+                                 classifier_weights={"Naive Bayes": 1}, special_cases=["yang-liu"], rand_seed=1,
+                                 test_fraction=5, log_path=self.dir.name + "/vc.log", console_log_level=logging.ERROR)
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test__parseData(self):
+        test_data = [
+            ("P1 yang-liu-ict P2 yang-liu-icsi", 0, [1, 1]),
+            ("P1 yang-liu-ict P3 bang-liu", 0, [2, 2]),
+            ("P1 yang-liu-ict P4 yang-liu-ict", 1, [3, 3]),
+            ("P1 bang-liu P4 bang-liu", 1, [4, 4]),
+        ]
+        keys, X, tags, special = self.vc._parseData(test_data)
+        self.assertEqual(("P1", "yang-liu-ict", "P2", "yang-liu-icsi"), keys[0])
+        np.testing.assert_array_equal([[1, 1], [2, 2], [3, 3], [4, 4]], X)
+        np.testing.assert_array_equal([0, 0, 1, 1], tags)
+        np.testing.assert_array_equal([True, False, True, False], special)
+        same, different, special_same, special_different = self.vc._groupPairs(tags, special)
+        np.testing.assert_array_equal([3], same)
+        np.testing.assert_array_equal([1], different)
+        np.testing.assert_array_equal([2], special_same)
+        np.testing.assert_array_equal([0], special_different)
+
+    def test_selectPairsToUse(self):
+        same, diff = self.vc._selectPairsToUse(np.arange(10), np.arange(10, 40))
+        np.testing.assert_array_equal(np.arange(10), same)
+        self.assertEqual(10, len(diff))
+        self.assertTrue(np.isin(diff, np.arange(10, 40)).all())
+
+    def test_splitTrainTest(self):
+        X = np.arange(200).reshape(100, 2)
+        train, test = self.vc._splitTrainTest(X, np.arange(40), np.arange(40, 100))
+        self.assertEqual((80, 2), train["X"].shape)
+        self.assertEqual(20, len(test["Y"]))
+        # Rows keep their tag after the split
+        np.testing.assert_array_equal(train["X"][:, 0] < 80, train["Y"] == 1)
+        np.testing.assert_array_equal(test["X"][:, 0] < 80, test["Y"] == 1)
+
+    def test_createTrainTest(self):
+        # Special pairs are in both the train and the special train
+        self.assertEqual(200, len(self.vc.train["Y"]) + len(self.vc.test["Y"]))
+        self.assertEqual(40, len(self.vc.special_train["Y"]) + len(self.vc.special_test["Y"]))
+        for split in [self.vc.train, self.vc.test, self.vc.special_train, self.vc.special_test]:
+            np.testing.assert_array_equal(split["X"][:, 0] % 2, split["Y"])
+
+    def test_trainModel(self):
+        # The VotingClassifier trainModel puts together from the separately fit estimators works like a fit one
+        classifiers = [("Decision Tree", "DecisionTreeClassifier"), ("Naive Bayes", "GaussianNB")]
+        params = {"Decision Tree": {"max_depth": 3, "random_state": 1}, "Naive Bayes": {}}
+        weights = {"Decision Tree": 2, "Naive Bayes": 1}
+        for voting in ["hard", "soft"]:
+            for cores in [1, 2]:
+                vc = VoteClassifier(createRandomData(), classifiers=classifiers, classifier_weights=weights,
+                                    special_cases=["yang-liu"], rand_seed=1, voting=voting, cores=cores,
+                                    log_path=self.dir.name + "/vc.log", console_log_level=logging.ERROR)
+                vc.createModel(params)
+                vc.trainModel()
+                expected = VotingClassifier([("Decision Tree", DecisionTreeClassifier(max_depth=3, random_state=1)),
+                                             ("Naive Bayes", GaussianNB())], voting=voting, weights=[2, 1])
+                expected.fit(vc.train["X"], vc.train["Y"])
+                X = vc.test["X"]
+                unpickled = pickle.loads(pickle.dumps(vc.model))
+                for model in [vc.model, unpickled]:
+                    np.testing.assert_array_equal(expected.classes_, model.classes_)
+                    self.assertEqual(list(expected.named_estimators_.keys()), list(model.named_estimators_.keys()))
+                    np.testing.assert_array_equal(expected.predict(X), model.predict(X))
+                    np.testing.assert_array_equal(expected.transform(X), model.transform(X))
+                    if voting == "soft":
+                        np.testing.assert_allclose(expected.predict_proba(X), model.predict_proba(X))
@@ -17,6 +17,19 @@ createCLIGroup(arguments, "VoteClassifier",
                "values",
                VoteClassifier.parameters)
 
+
+def loadPairs(config):
+    """
+    :param config: ConfigHandler of train.py
+    :return: the path of tagged_pairs_chunks.pickle if out_of_core, otherwise the pairs in tagged_pairs.pickle
+    """
+    # out_of_core is only in the config if it is in config.json or passed on the command line
+    if config["VoteClassifier"].get("out_of_core", False):
+        return config["tagged_pairs_chunks"]
+    with open(config["tagged_pairs"], "rb") as f:
+        return pickle.load(f)
+
+
 if __name__ == '__main__':
     gc.collect()
     args = arguments.parse_args()
@@ -28,7 +41,7 @@ if __name__ == '__main__':
     config_raw = json.load(open("config.json"))
     config = ConfigHandler(config_raw, "train", raise_error_unknown=True)
     config = parseCLIArgs(args, config)
-    data = pickle.load(open(config["tagged_pairs"], "rb"))
+    data = loadPairs(config)
     scores = []
     weights = {
         "Nearest Neighbors": 1,
@@ -117,7 +130,11 @@ if __name__ == '__main__':
     special_keys = [x.strip() for x in open(config["test_special_keys"]).readlines() if x != "\n"]
     config.addArgument("special_cases", special_keys)
     vote_classifier = VoteClassifier(data, classifiers=classifiers, **config["VoteClassifier"])
+    if vote_classifier.search_grids:
+        params = vote_classifier.searchParameters(params)
     vote_classifier.createModel(params)
     vote_classifier.trainModel()
     vote_classifier.evaluate()
+    if vote_classifier.student:
+        vote_classifier.distill()
     vote_classifier.save()
@@ -0,0 +1,82 @@
+import json
+from src.acl_parser import ACLParser
+from src.pdf_parser import PDFParserWrapper
+from src.config_handler import ConfigHandler
+from src.utility_functions import createCLIGroup, parseCLIArgs, loadData, createCLIShared, printLogToConsole, \
+    printStats
+from src.corpus_snapshot import writeSnapshot, loadPapers
+from src.authorship_index import AuthorshipIndex
+import os
+import logging
+import gc
+import argparse
+
+arguments = argparse.ArgumentParser(
+    description="Add new or changed ACL xml files and their parsed PDF xml files to the data made by create_data.py "
+                "without parsing everything again. You can specify these in config.json instead of using command line "
+                "arguments",
+    formatter_class=argparse.MetavarTypeHelpFormatter)
+arguments.add_argument("xml_files", nargs="+", type=str, help="Paths to the new or changed ACL xml files")
+createCLIShared(arguments)
+createCLIGroup(arguments, "PDFParser",
+               "Arguments for the PDFParser, check the documentation of pdf_parser.py to see default values",
+               PDFParserWrapper.parameters)
+
+
+def readLines(path):
+    with open(path) as f:
+        return [x.strip() for x in f.readlines()]
+
+
+if __name__ == '__main__':
+    args = arguments.parse_args()
+    with open(os.getcwd() + "/logs/update_data.log", 'w'):
+        pass
+    print("INFO: Starting Update Data")
+    gc.collect()
+    config_raw = json.load(open("config.json"))
+    config = ConfigHandler(config_raw, "update_data", raise_error_unknown=True)
+    config = parseCLIArgs(args, config)
+
+    data = loadData(["acl_papers", "id_to_name", "conflicts", "parsed_papers", "author_papers", "organizations",
+                     "effective_org_info", "incomplete_papers"], config.logger, config)
+    acl_parser = ACLParser(**config["ACLParser"])
+    acl_parser.parseNameVariants(config["name_variants_path"])
+    acl_parser.loadExisting(data["acl_papers"], data["id_to_name"], data["conflicts"])
+    acl_changes = acl_parser.update(args.xml_files)
+    if acl_parser.save_data:
+        acl_parser.saveData()
+
+    parser = PDFParserWrapper(papers=acl_parser.papers, aliases=acl_parser.aliases, id_to_name=acl_parser.id_to_name,
+                              same_names=acl_parser.same_name, **config["PDFParser"])
+    parser.loadExisting(loadPapers(data["parsed_papers"]), data["author_papers"], data["organizations"],
+                        data["effective_org_info"], readLines(config["org_corpus"]),
+                        readLines(config["department_corpus"]), data["incomplete_papers"])
+    del data
+    pdf_changes = parser.update(config["parsed_pdf_path"], acl_changes["added"] + acl_changes["updated"])
+    if parser.save_data:
+        printLogToConsole(config.console_log_level, "Writing data snapshot", logging.INFO, logger=config.logger)
+        writeSnapshot(config["data_snapshot"], parser.parsed, parser.author_papers, parser.id_to_name,
+                      parser.organizations)
+        AuthorshipIndex.fromAuthorPapers(parser.author_papers).save(config["authorship_index"])
+
+    results = [
+        ["ACL papers added", len(acl_changes["added"])],
+        ["ACL papers updated", len(acl_changes["updated"])],
+        ["ACL papers failed", acl_changes["failed"]],
+        ["IDs created", len(acl_changes["new_ids"])],
+        ["Parsed papers added", len(pdf_changes["added"])],
+        ["Parsed papers updated", len(pdf_changes["updated"])],
+        ["Parsed papers failed", len(pdf_changes["failed"])],
+        ["Authors added", len(pdf_changes["new_authors"])],
+        ["Organizations added", len(pdf_changes["new_orgs"])],
+        ["Organizations updated", len(pdf_changes["updated_orgs"])],
+        ["Organization names added", pdf_changes["new_org_names"]],
+        ["Department names added", pdf_changes["new_department_names"]]
+    ]
+    for msg, value in results:
+        config.logger.info("{}: {}".format(msg, value))
+    config.logger.debug("New ids: {}".format(acl_changes["new_ids"]))
+    config.logger.debug("Papers that failed to parse: {}".format(pdf_changes["failed"]))
+    printStats("Update Results", results, line_adaptive=True)
+    gc.collect()